@@ -0,0 +1,374 @@
+# -------------------------------------------------------------------------
+# Name:        Micro benchmarks
+# Purpose:     time of the hot functions in isolation with warm up and repeats,
+#              stored as baseline (JSON) and compared against a baseline
+#
+# Created:     18/10/2026
+# -------------------------------------------------------------------------
+
+"""
+Micro benchmarks of single functions on representative inputs of the synthetic basin
+(see :mod:`benchmark.synthetic_basin`)::
+
+    python -m benchmark.micro run --size 200 --output baseline.json
+    python -m benchmark.micro compare baseline.json                    # runs the benchmarks again
+    python -m benchmark.micro compare baseline.json current.json --threshold 0.1
+
+compare returns exit code 1 if the median time of a benchmark is more than threshold (fraction) slower than
+in the baseline. Benchmarks which cannot be built (e.g. readmeteodata without netCDF4) are skipped.
+"""
+
+import os
+import sys
+import json
+import platform
+import argparse
+import datetime
+import shutil
+import tempfile
+from time import perf_counter
+import numpy as np
+import numba
+
+from cwatm.management_modules.globals import lib2, option, binding, dateVar, outTss, meteofiles, flagmeteo, inputcounter, \
+    validation, maskinfo
+from cwatm.management_modules.data_handling import downscale_volume, readmeteodata, initValidation
+from cwatm.management_modules.replace_pcr import npareatotal
+from cwatm.management_modules.output import outputTssMap
+from benchmark.synthetic_basin import synthetic_basin, synthetic_meteo
+from benchmark.run_benchmark import syntheticModel, syntheticHRU, syntheticData, set_mask
+
+
+def basin_model(size, hrus=4, substeps=1, kernels='numpy'):
+    """
+    :return: syntheticModel (see :class:`benchmark.run_benchmark.syntheticModel`) of a basin of size x size cells
+    """
+
+    maps = synthetic_basin(size, size, lakes=5)
+    # river network with the numba kernels if the C++ library cannot be loaded
+    return syntheticModel(maps, synthetic_meteo(maps, 2), hrus, substeps, routingNumba=lib2 is None, kernels=kernels)
+
+
+def case_kinematic(size):
+    """
+    lib2.kinematic: one routing substep on the river network
+    """
+
+    if lib2 is None:
+        raise ImportError("routing library (t5) could not be loaded")
+    model = basin_model(size)
+    rng = np.random.default_rng(1)
+    Qold = rng.random(model.cells) * 10.
+    q = rng.random(model.cells) * 1e-4
+    dtRouting = 86400. / 8
+
+    def run():
+        Qnew = np.zeros(model.cells)
+        lib2.kinematic(Qold, q, model.dirDown, model.dirupLen, model.dirupID, Qnew, model.channelAlpha, model.beta,
+                       dtRouting, model.chanLength, model.lendirDown)
+    return run
+
+
+def soil_case(size, soilNumba):
+    model = basin_model(size, kernels='numba' if soilNumba else 'numpy')
+    HRU = model.HRU
+    n = HRU.size
+    rng = np.random.default_rng(1)
+    HRU.natural_available_water_infiltration = (rng.random(n) * 0.01).astype(np.float32)
+    HRU.EWRef = np.full(n, 0.004, dtype=np.float32)
+    HRU.totalPotET = np.full(n, 0.004, dtype=np.float32)
+    HRU.cropKC = np.linspace(0.2, 1.2, n, dtype=np.float32)
+    capillar = np.zeros(n, dtype=np.float32)
+
+    def run():
+        model.soil_module.dynamic(capillar, np.zeros(n, dtype=np.float32), HRU.totalPotET * np.float32(0.8), HRU.totalPotET * np.float32(0.2), HRU.totalPotET)
+    return run
+
+
+def case_soil(size):
+    """
+    soil.dynamic: numpy version of the soil column for all HRUs
+    """
+    return soil_case(size, False)
+
+
+def case_soil_numba(size):
+    """
+    soil.dynamic with soilKernel = numba (soil_column_numba)
+    """
+    return soil_case(size, True)
+
+
+def case_downscale_volume(size, hrus=4, ratio=6):
+    """
+    downscale_volume: water demand of a coarse grid (ratio x ratio cells) to the HRUs of the land area
+    """
+
+    rng = np.random.default_rng(1)
+    mask = ~synthetic_basin(size, size)['basin']
+    HRUs_per_cell = np.where(mask, 0, hrus).ravel()
+    var_to_HRU_uncompressed = np.cumsum(HRUs_per_cell)
+    nHRU = var_to_HRU_uncompressed[-1]
+    HRU_land_size = rng.random(nHRU)
+    downscale_mask = rng.random(nHRU) < 0.3
+    cell = 1 / 12.
+    model_gt = (10., cell, 0., 50., 0., -cell)
+    # the coarse grid starts one fine cell outside the model grid
+    data_gt = (10. - cell, cell * ratio, 0., 50. + cell, 0., -cell * ratio)
+    data = rng.random((size // ratio + 2, size // ratio + 2)) * 1e6
+
+    def run():
+        downscale_volume(data_gt, model_gt, data, mask, var_to_HRU_uncompressed, downscale_mask, HRU_land_size)
+    return run
+
+
+def case_npareatotal(size, areas=1000):
+    """
+    npareatotal: total of each area (e.g. command areas, water bodies) on all cells
+    """
+
+    rng = np.random.default_rng(1)
+    cells = size * size
+    values = rng.random(cells)
+    areaclass = rng.integers(0, areas, cells)
+
+    def run():
+        npareatotal(values, areaclass)
+    return run
+
+
+def case_outputTss(size, outpoints=20, series=10):
+    """
+    outputTssMap.dynamic: time series (point and area sum) of outpoints for a daily report
+    """
+
+    model = basin_model(size)
+    grid = syntheticHRU(model.cells)
+    grid.discharge = model.grid.discharge
+    grid.cellArea = model.cellArea
+    grid.runoff = np.linspace(0., 0.01, model.cells)
+    rng = np.random.default_rng(1)
+    points = rng.choice(model.cells, outpoints, replace=False)
+    grid.sampleAdresses = {i + 1: point for i, point in enumerate(points)}
+    grid.noOutpoints = outpoints
+    grid.evalCatch = {key: rng.integers(0, outpoints + 1, model.cells) for key in grid.sampleAdresses}
+    grid.catcharea = {key: np.bincount(grid.evalCatch[key], weights=grid.cellArea)[key] for key in grid.sampleAdresses}
+    module = outputTssMap(syntheticData(None, grid))
+
+    tss = {}
+    for i in range(series):
+        if i % 2:
+            tss["routing_out_areasum_daily"] = tss.get("routing_out_areasum_daily", []) + [["runoff%i_areasum_daily.tss" % i, "var.runoff", False, []]]
+        else:
+            tss["routing_out_tss_daily"] = tss.get("routing_out_tss_daily", []) + [["discharge%i_daily.tss" % i, "var.discharge", False, []]]
+
+    def run():
+        option.update({'reportTss': True, 'reportMap': False})
+        dateVar.update({'curr': 1, 'intSpin': 1, 'laststep': False, 'currwrite': 1, 'checked': [0]})
+        outTss.clear()
+        outTss.update({key: [expression[:3] + [[]] for expression in expressions] for key, expressions in tss.items()})
+        module.dynamic()
+    return run
+
+
+def case_readmeteodata(size, days=10):
+    """
+    readmeteodata: one day of a netCDF meteo stack (compressed, chunked by day)
+    """
+
+    from netCDF4 import Dataset
+
+    maps = synthetic_basin(size, size)
+    meteo = synthetic_meteo(maps, days)
+    set_mask(maps['basin'])
+    folder = tempfile.mkdtemp()
+    temporaryFolders.append(folder)
+    filename = os.path.join(folder, "pr.nc")
+    nf = Dataset(filename, 'w', format='NETCDF4')
+    nf.createDimension('time', None)
+    nf.createDimension('lat', size)
+    nf.createDimension('lon', size)
+    nf.createVariable('time', 'f8', ('time',))[:] = np.arange(days)
+    nf.createVariable('lat', 'f8', ('lat',))[:] = np.arange(size)
+    nf.createVariable('lon', 'f8', ('lon',))[:] = np.arange(size)
+    nf.createVariable('pr', 'f4', ('time', 'lat', 'lon'), zlib=True, complevel=1, chunksizes=(1, size, size))[:] = meteo['pr']
+    nf.close()
+
+    binding['PrecipitationMaps'] = filename
+    option['reducePrecision'] = False
+    meteofiles['PrecipitationMaps'] = [[filename, 0, days - 1]]
+    date = datetime.datetime(2000, 1, 1)
+    counter = [0]
+
+    def run():
+        flagmeteo['PrecipitationMaps'] = 0
+        inputcounter['PrecipitationMaps'] = counter[0] % days
+        counter[0] += 1
+        readmeteodata('PrecipitationMaps', date, value='pr')
+    return run
+
+
+# folders of the input files of the benchmarks, removed after the benchmarks
+temporaryFolders = []
+
+# global settings which are changed by the benchmarks, restored after the benchmarks
+GLOBALS = (validation, option, binding, dateVar, outTss, maskinfo, meteofiles, flagmeteo, inputcounter)
+
+CASES = {
+    'lib2.kinematic': case_kinematic,
+    'soil.dynamic': case_soil,
+    'soil.dynamic_numba': case_soil_numba,
+    'downscale_volume': case_downscale_volume,
+    'npareatotal': case_npareatotal,
+    'outputTssMap.dynamic': case_outputTss,
+    'readmeteodata': case_readmeteodata,
+}
+
+
+def timeit(run, warmup=3, repeats=20):
+    """
+    Time of a function with warm up (compilation of numba functions, caches) and repeats
+
+    :param run: function without arguments
+    :param warmup: number of calls which are not timed
+    :param repeats: number of timed calls
+    :return: dict with minimum, median, mean and standard deviation [s] and the number of repeats
+    """
+
+    for i in range(warmup):
+        run()
+    times = np.empty(repeats)
+    for i in range(repeats):
+        start = perf_counter()
+        run()
+        times[i] = perf_counter() - start
+    return {'min': float(times.min()), 'median': float(np.median(times)), 'mean': float(times.mean()),
+            'std': float(times.std()), 'repeats': repeats}
+
+
+def run_cases(cases, size, warmup=3, repeats=20):
+    """
+    Runs the micro benchmarks
+
+    :param cases: names of the benchmarks (see CASES)
+    :param size: rows and columns of the synthetic basin
+    :param warmup: number of calls which are not timed
+    :param repeats: number of timed calls
+    :return: dict with the machine and versions ('info') and the results of each benchmark ('results')
+    """
+
+    saved = [dict(settings) for settings in GLOBALS]
+    try:
+        # no runtime checks in the benchmarks
+        binding['validationLevel'] = 'off'
+        initValidation()
+        del binding['validationLevel']
+        option['calcWaterBalance'] = False
+
+        results = {}
+        for name in cases:
+            try:
+                run = CASES[name](size)
+            except ImportError as error:
+                print("%-25s skipped: %s" % (name, error))
+                continue
+            results[name] = timeit(run, warmup, repeats)
+            print("%-25s %10.3f ms  (min %.3f, std %.3f)" % (name, 1000 * results[name]['median'], 1000 * results[name]['min'], 1000 * results[name]['std']))
+    finally:
+        for settings, values in zip(GLOBALS, saved):
+            settings.clear()
+            settings.update(values)
+        while temporaryFolders:
+            shutil.rmtree(temporaryFolders.pop(), ignore_errors=True)
+
+    info = {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'machine': platform.node(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'numba': numba.__version__,
+        'numba_threads': numba.config.NUMBA_NUM_THREADS,
+        'size': size,
+        'warmup': warmup,
+        'repeats': repeats,
+    }
+    return {'info': info, 'results': results}
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Compares the median times of two benchmark runs
+
+    :param baseline: benchmark run (see run_cases) of the baseline
+    :param current: benchmark run to compare
+    :param threshold: fraction a benchmark may be slower than the baseline
+    :return: list of the benchmarks which are slower than the threshold
+    """
+
+    if baseline['info'].get('size') != current['info'].get('size'):
+        print("Warning: size of the baseline %s, current %s" % (baseline['info'].get('size'), current['info'].get('size')))
+    if baseline['info'].get('machine') != current['info'].get('machine'):
+        print("Warning: baseline from %s, current on %s" % (baseline['info'].get('machine'), current['info'].get('machine')))
+
+    slower = []
+    print("%-25s %12s %12s %8s" % ("Benchmark", "base[ms]", "now[ms]", "ratio"))
+    for name, base in baseline['results'].items():
+        if name not in current['results']:
+            print("%-25s %12.3f %12s" % (name, 1000 * base['median'], "-"))
+            continue
+        now = current['results'][name]
+        ratio = now['median'] / base['median']
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "SLOWER"
+            slower.append(name)
+        elif ratio < 1 - threshold:
+            flag = "faster"
+        print("%-25s %12.3f %12.3f %8.2f %s" % (name, 1000 * base['median'], 1000 * now['median'], ratio, flag))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro benchmarks of the hot functions")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="runs the benchmarks and writes the results")
+    run.add_argument('--output', help="JSON file of the results (baseline)")
+    compareParser = commands.add_parser('compare', help="compares with a baseline, exit code 1 if slower")
+    compareParser.add_argument('baseline', help="JSON file of the baseline")
+    compareParser.add_argument('current', nargs='?', help="JSON file to compare, otherwise the benchmarks run again")
+    compareParser.add_argument('--threshold', type=float, default=0.1, help="fraction slower than the baseline, default 0.1")
+    compareParser.add_argument('--output', help="JSON file of the new results")
+    for sub in (run, compareParser):
+        sub.add_argument('--cases', nargs='+', choices=list(CASES), default=None, help="benchmarks, default all")
+        sub.add_argument('--size', type=int, default=None, help="rows and columns of the synthetic basin, default 200")
+        sub.add_argument('--warmup', type=int, default=3)
+        sub.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        result = run_cases(args.cases or list(CASES), args.size or 200, args.warmup, args.repeats)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if args.current:
+            with open(args.current) as f:
+                result = json.load(f)
+        else:
+            # the same benchmarks and size as the baseline
+            result = run_cases(args.cases or list(baseline['results']), args.size or baseline['info']['size'], args.warmup, args.repeats)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    if args.command == 'compare':
+        slower = compare(baseline, result, args.threshold)
+        if slower:
+            print("%i benchmarks slower than the baseline: %s" % (len(slower), ", ".join(slower)))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+# -------------------------------------------------------------------------
+# Name:        Scalable benchmark
+# Purpose:     runs the dynamic part on synthetic basins of several sizes with the default and the compiled
+#              kernels and reports time and peak memory of each model part per size
+#
+# Created:     18/10/2026
+# -------------------------------------------------------------------------
+
+"""
+Benchmark of the dynamic part on synthetic basins (see :mod:`benchmark.synthetic_basin`)::
+
+    python -m benchmark.run_benchmark --sizes 100 200 400 --days 30 --hrus 4 --lakes 10 --substeps 8
+    python -m benchmark.run_benchmark --sizes 200 --kernels numpy --write synthetic --trace benchmark_200.json
+
+Each size is a basin of size x size cells with hrus HRUs per cell. The time steps run the modules in the order
+of CWATModel_dyn: meteo, evaporationPot, snow_frost, soil, runoff to grid, lakes_reservoirs and routing_kinematic
+(noRoutingSteps substeps with lakes_reservoirs.dynamic_inloop). snow_frost.dynamic, soil.dynamic and the lakes and
+reservoirs are the modules of the model on the stand-ins of the data layer (see :class:`syntheticHRU`), without
+reading maps and meteo files. --kernels numpy runs the default path of the modules, --kernels numba the compiled
+kernels (ETRefKernel, snowKernel and soilKernel = numba), both are run by default and reported next to each other.
+Time and peak memory are taken with the time spans of the model (see :mod:`cwatm.management_modules.timing`),
+the initial part (river network) is reported separately.
+
+With --write the synthetic basin and meteo stacks are written as netCDF with a settings fragment (synthetic_basin.ini)
+for a full run of the coupled model.
+"""
+
+import os
+import argparse
+import tracemalloc
+from types import SimpleNamespace
+import numpy as np
+
+from cwatm.management_modules import globals
+from cwatm.management_modules.globals import maskinfo, lib2, timing, timeSpans, timeStats, memory, memorySpans, dateVar, \
+    option, validation
+from cwatm.management_modules.timing import timespan, timingSummary, writeTiming
+from cwatm.management_modules.replace_pcr import npareaaverage
+from cwatm.hydrological_modules.routing_reservoirs.routing_sub import defLdd2, kinematic_levels, kinematic_numba
+from cwatm.hydrological_modules.evaporationPot import penman_monteith, penman_monteith_numba
+from cwatm.hydrological_modules.snow_frost import snow_frost
+from cwatm.hydrological_modules.soil import soil, kUnSat_vanGenuchten
+from cwatm.hydrological_modules.lakes_reservoirs import lakes_reservoirs, lake_operators
+from cwatm.management_modules.data_handling import land_use_indices
+from benchmark.synthetic_basin import synthetic_basin, synthetic_meteo, write_maps, LANDCOVER
+
+# 3 snow layers (see snow_frost.initial)
+DELTAINVNORM = np.array([-0.96742157, 0., 0.96742157])
+
+
+def set_mask(basin):
+    """
+    Mask of the synthetic basin, the same as loadsetclone for the mask map
+
+    :param basin: 2D array bool, True inside the basin
+    """
+
+    mask = ~basin
+    mapC = np.ma.compressed(np.ma.masked_array(mask, mask))
+    maskinfo['mask'] = mask
+    maskinfo['shape'] = mask.shape
+    maskinfo['maskflat'] = mask.ravel()
+    maskinfo['shapeflat'] = maskinfo['maskflat'].shape
+    maskinfo['mapC'] = mapC.shape
+    maskinfo['maskall'] = np.ma.masked_all(maskinfo['shapeflat'])
+    maskinfo['maskall'].mask = maskinfo['maskflat']
+    globals.inZero = np.zeros(maskinfo['mapC'])
+
+
+class syntheticHRU(object):
+    """
+    HRU or grid data of the synthetic basin with the functions of the data layer which are used by the modules
+
+    :param size: number of HRUs or grid cells
+    """
+
+    def __init__(self, size):
+        self.size = size
+
+    def full_compressed(self, fill_value, dtype):
+        return np.full(self.size, fill_value, dtype=dtype)
+
+    def zeros(self, size, dtype):
+        return np.zeros(size, dtype=dtype)
+
+    def load_initial(self, name):
+        # no initial state, the modules start with their default
+        return None
+
+
+class syntheticData(object):
+    """
+    model with model.data.HRU and model.data.grid for the modules
+    """
+
+    def __init__(self, HRU, grid):
+        self.data = self
+        self.HRU = HRU
+        self.grid = grid
+
+
+class syntheticReservoirs(object):
+    """
+    Reservoir operators of the agents (model.agents.reservoir_operators): release of the inflow and of 1% of the storage
+    above the normal limit per routing substep
+
+    :param volume: volume of the reservoirs [m3]
+    :param dtRouting: length of a routing substep [s]
+    """
+
+    def __init__(self, volume, dtRouting):
+        self.reservoir_volume = volume
+        self.norm_limit_ratio = np.full(volume.size, 0.5, dtype=np.float32)
+        self.dtRouting = dtRouting
+
+    def initiate_agents(self, waterBodyID):
+        return self
+
+    def regulate_reservoir_outflow(self, storage, inflow, waterBodyID):
+        normLimit = self.norm_limit_ratio * self.reservoir_volume
+        return np.maximum(0., inflow + 0.01 * (storage - normLimit)) / self.dtRouting
+
+
+class syntheticModel(object):
+    """
+    Model of the synthetic basin: state on the grid (compressed cells) and the HRUs, the modules snow_frost, soil
+    and lakes_reservoirs on the stand-ins of the data layer (model.data.HRU, model.data.grid)
+
+    :param maps: synthetic basin (see :meth:`benchmark.synthetic_basin.synthetic_basin`)
+    :param meteo: meteo stacks (see :meth:`benchmark.synthetic_basin.synthetic_meteo`)
+    :param hrus: number of HRUs per cell
+    :param substeps: number of routing substeps per day
+    :param routingNumba: numba kernels of the river network and the kinematic wave instead of the C++ library
+    :param kernels: numpy: default path of the modules, numba: compiled kernels of evaporationPot, snow_frost and soil
+    """
+
+    def __init__(self, maps, meteo, hrus, substeps, routingNumba=False, kernels='numpy'):
+        basin = maps['basin']
+        set_mask(basin)
+        self.meteo = {name: data[:, basin] for name, data in meteo.items()}
+        self.cells = int(basin.sum())
+        self.substeps = substeps
+        self.routingNumba = routingNumba
+        self.kernels = kernels
+        numba = kernels == 'numba'
+        compress = lambda name: np.ascontiguousarray(maps[name][basin])
+
+        # time step of the model (see CWATModel_ini)
+        self.DtDay = 1.
+        self.DtSec = 86400.
+        self.save_initial = False
+        self.grid = syntheticHRU(self.cells)
+        self.HRU = syntheticHRU(self.cells * hrus)
+        self.data = syntheticData(self.HRU, self.grid)
+        grid = self.grid
+
+        # river network
+        self.lddCompress, dirshort, self.dirUp, self.dirupLen, self.dirupID, self.downstruct, self.catchment, self.dirDown, self.lendirDown = defLdd2(compress('Ldd'), routingNumba)
+        self.kinOrder, self.kinLevelStart = kinematic_levels(self.dirDown, self.dirupLen, self.dirupID)
+        self.cellArea = compress('CellArea').astype(np.float64)
+        self.chanLength = compress('chanLength').astype(np.float64)
+        self.beta = 0.6
+        chanGrad = compress('chanGrad').astype(np.float64)
+        wettedPerimeter = compress('chanWidth') + compress('chanDepth')
+        self.channelAlpha = (compress('chanMan') / np.sqrt(chanGrad)) ** self.beta * wettedPerimeter ** (self.beta / 1.5) * 2.5
+        grid.cellArea = self.cellArea
+        grid.discharge = np.full(self.cells, 0.1)
+        grid.runoff = np.zeros(self.cells)
+        self.kinematicStats = np.zeros(3, dtype=np.int64)
+
+        # lakes and reservoirs (see lakes_reservoirs.initWaterbodies): pits in the river network at the water bodies,
+        # the outlet of a water body is the cell with the area of the water body
+        grid.noRoutingSteps = substeps
+        grid.dtRouting = self.DtSec / substeps
+        grid.waterBodyID = compress('waterBodyID').astype(np.int64)
+        grid.waterBodyOut = np.where(compress('waterBodyArea') > 0, grid.waterBodyID, 0)
+        grid.ldd_LR = np.where(grid.waterBodyID > 0, 5, self.lddCompress)
+        grid.lddCompress_LR, dirshort_LR, grid.dirUp_LR, grid.dirupLen_LR, grid.dirupID_LR, \
+            grid.downstruct_LR, grid.catchment_LR, grid.dirDown_LR, grid.lendirDown_LR = defLdd2(grid.ldd_LR, routingNumba)
+        grid.kinOrder_LR, grid.kinLevelStart_LR = kinematic_levels(grid.dirDown_LR, grid.dirupLen_LR, grid.dirupID_LR)
+        grid.compress_LR = grid.waterBodyOut > 0
+        grid.decompress_LR = np.nonzero(grid.waterBodyOut)[0]
+        grid.waterBodyIDC = grid.waterBodyOut[grid.decompress_LR]
+        grid.cell2lake_LR, grid.lake2cell_LR, grid.upstream2lake_LR, grid.lake2ldd_LR, grid.lake2lake_LR = \
+            lake_operators(grid.waterBodyID, grid.decompress_LR, self.downstruct, grid.downstruct_LR)
+        grid.waterBodyTypC = compress('waterBodyTyp')[grid.decompress_LR].astype(np.int64)
+        grid.waterBodyTypCTemp = grid.waterBodyTypC
+        grid.lakeArea = compress('waterBodyArea').astype(np.float64) * 1000 * 1000
+        grid.lakeAreaC = grid.lakeArea[grid.decompress_LR]
+        grid.lakeDis0C = np.maximum(compress('waterBodyDis')[grid.decompress_LR].astype(np.float64), 0.1)
+        # lakeAFactor = 1
+        grid.lakeAC = 0.612 * 2 / 3 * 7.1 * np.power(grid.lakeDis0C, 0.539) * (2 * 9.81) ** 0.5
+        grid.lakeEvaFactorC = np.ones(grid.decompress_LR.size)
+        for name in ('reslakeoutflow', 'lakeVolume', 'lakeInflow', 'lakeOutflow', 'reservoirStorage',
+                     'EvapWaterBodyM', 'lakeResInflowM', 'lakeResOutflowM'):
+            setattr(grid, name, np.zeros(self.cells))
+        grid.outLakeC = np.zeros(grid.decompress_LR.size)
+        reservoirs = grid.waterBodyTypC == 2
+        volume = compress('waterBodyVolRes')[grid.decompress_LR][reservoirs] * 1000 * 1000
+        self.agents = SimpleNamespace(reservoir_operators=syntheticReservoirs(volume, grid.dtRouting))
+        self.lakes_reservoirs_module = lakes_reservoirs(self)
+        self.lakes_reservoirs_module.reservoir_operators = self.agents.reservoir_operators.initiate_agents(grid.waterBodyIDC[reservoirs])
+        self.lakes_reservoirs_module.initial_lakes()
+        self.lakes_reservoirs_module.initial_reservoirs()
+
+        # HRUs: each cell is split into hrus HRUs with the land cover fractions of the cell
+        fractions = maps['fractionLandcover'][:, basin]
+        order = np.argsort(-fractions, axis=0)[:hrus]
+        self.HRU_to_grid = np.repeat(np.arange(self.cells), hrus)
+        self.HRUfraction = np.take_along_axis(fractions, order, axis=0).T.ravel()
+        self.HRUfraction = (self.HRUfraction / np.bincount(self.HRU_to_grid, self.HRUfraction)[self.HRU_to_grid]).astype(np.float32)
+        size = self.HRU_to_grid.size
+        full = lambda value: np.full(size, value, dtype=np.float32)
+        toHRU = lambda name, layer: np.ascontiguousarray(maps[name][layer][basin][self.HRU_to_grid])
+        HRU = self.HRU
+        HRU.land_use_type = order.T.ravel().astype(np.int32)
+        HRU.land_use_indices = land_use_indices(HRU)
+
+        # snow and frost on the HRUs with the parameters of the settings file (see snow_frost.initial)
+        HRU.numberSnowLayers = 3
+        HRU.numberSnowLayersFloat = 3.
+        HRU.deltaInvNorm = DELTAINVNORM
+        HRU.glaciertransportZone = 1
+        HRU.DeltaTSnow = (maps['ElevationStD'][basin][self.HRU_to_grid] * 0.0065).astype(np.float32)
+        HRU.SnowDayDegrees = 0.9856
+        HRU.summerSeasonStart = 165
+        HRU.IceDayDegrees = 180. / (259 - HRU.summerSeasonStart)
+        HRU.SnowSeason = 0.001 * 0.5
+        HRU.TempSnow = 1.
+        HRU.SnowFactor = 1.
+        HRU.SnowMeltCoef = 0.004
+        HRU.IceMeltCoef = 0.007
+        HRU.TempMelt = 1.
+        HRU.SnowCoverS = np.zeros((3, size), dtype=np.float32)
+        HRU.snowCovered = np.zeros(size, dtype=bool)
+        HRU.Afrost = 0.97
+        HRU.FrostIndexThreshold = 56.
+        HRU.SnowWaterEquivalent = 0.45
+        HRU.FrostIndex = full(0)
+        HRU.extfrostindex = False
+        HRU.snowNumba = numba
+        self.snow_frost_module = snow_frost(self)
+        self.snow_frost_module.snowGrid = False
+
+        # soil: 3 layers with van Genuchten parameters (see landcoverType.initial)
+        depth = [full(0.05), np.maximum(0.05, toHRU('StorDepth1', ()) - 0.05), np.maximum(0.05, toHRU('StorDepth2', ()))]
+        soilState = {}
+        for layer in range(3):
+            n = str(layer + 1)
+            lambda1 = toHRU('lambda', layer)
+            alpha = toHRU('alpha', layer)
+            genuM = lambda1 / (lambda1 + 1)
+            ws = toHRU('thetas', layer) * depth[layer]
+            wres = toHRU('thetar', layer) * depth[layer]
+            soilState['ws' + n] = ws
+            soilState['wres' + n] = wres
+            soilState['wfc' + n] = wres + (ws - wres) / ((1 + (alpha * 100) ** (lambda1 + 1)) ** genuM)
+            soilState['wwp' + n] = wres + (ws - wres) / ((1 + (alpha * 10 ** 4.2) ** (lambda1 + 1)) ** genuM)
+            soilState['KSat' + n] = toHRU('KSat', layer) / 100
+            soilState['genuM' + n] = genuM
+            soilState['genuInvM' + n] = 1 / genuM
+            soilState['w' + n] = soilState['wwp' + n] + 0.5 * (soilState['wfc' + n] - soilState['wwp' + n])
+        kFC = [kUnSat_vanGenuchten(soilState['KSat' + n], np.maximum(0., soilState['wfc' + n] - soilState['wres' + n]) / (soilState['ws' + n] - soilState['wres' + n]),
+                                   soilState['genuM' + n], soilState['genuInvM' + n]) for n in "123"]
+        soilState['kunSatFC12'] = np.sqrt(kFC[0] * kFC[1])
+        soilState['kunSatFC23'] = np.sqrt(kFC[1] * kFC[2])
+        for name, value in soilState.items():
+            setattr(HRU, name, value.astype(np.float32))
+        HRU.topwater = full(0)
+        HRU.adjRoot = np.tile(full(1. / 3), (3, 1))
+        HRU.arnoBeta = np.clip((HRU.DeltaTSnow / 0.0065 - 10.) / (HRU.DeltaTSnow / 0.0065 + 1500.), 0.01, 1.2).astype(np.float32)
+        HRU.cPrefFlow = 4.
+        HRU.maxtopwater = 0.05
+        HRU.percolationImp = full(0.3)
+        HRU.cropGroupNumber = full(3.)
+        HRU.cropKC = full(0.8)
+        HRU.soilNumba = numba
+        HRU.soilSubStepTolerance = 0.
+        HRU.soilMaxSubSteps = 30
+        for name in ('capriseindex', 'actual_irrigation_consumption', 'snowEvap', 'interceptEvap',
+                     'actTransTotal', 'actBareSoilEvap', 'actualET'):
+            setattr(HRU, name, full(0))
+        # set in soil.initial
+        self.NoSubSteps = 3
+        self.soil_module = soil(self)
+
+    def dynamic(self, day):
+        """
+        One time step in the order of CWATModel_dyn
+
+        :param day: index of the day in the meteo stacks
+        """
+
+        HRU = self.HRU
+        grid = self.grid
+        numba = self.kernels == 'numba'
+
+        with timespan("readmeteo"):
+            meteo = {name: np.ascontiguousarray(data[day]) for name, data in self.meteo.items()}
+            Tavg = meteo['tas'] - np.float32(273.15)
+
+        with timespan("evaporationPot"):
+            albedoLand = np.full(self.cells, 0.23, dtype=np.float32)
+            albedoWater = np.full(self.cells, 0.05, dtype=np.float32)
+            penmanMonteith = penman_monteith_numba if numba else penman_monteith
+            ETRef, EWRef = penmanMonteith(meteo['tasmin'] - np.float32(273.15), meteo['tasmax'] - np.float32(273.15), Tavg, meteo['ps'],
+                                          meteo['huss'], meteo['rsds'], meteo['rlds'], albedoLand, albedoWater, meteo['sfcWind'], True)
+
+        with timespan("snow_frost"):
+            Precipitation = (meteo['pr'] * np.float32(86.4))[self.HRU_to_grid]
+            HRU.Precipitation = Precipitation
+            self.snow_frost_module.dynamic(Tavg[self.HRU_to_grid])
+
+        with timespan("soil"):
+            HRU.natural_available_water_infiltration = (HRU.Rain + HRU.SnowMelt).astype(np.float32)
+            HRU.EWRef = EWRef[self.HRU_to_grid].astype(np.float32)
+            HRU.totalPotET = ETRef[self.HRU_to_grid].astype(np.float32)
+            size = self.HRU_to_grid.size
+            interflow, directRunoff, groundwater_recharge, perc3toGW, prefFlow, openWaterEvap = self.soil_module.dynamic(
+                np.zeros(size, dtype=np.float32), np.zeros(size, dtype=np.float32), HRU.totalPotET * np.float32(0.8),
+                HRU.totalPotET * np.float32(0.2), HRU.totalPotET)
+
+        with timespan("runoff to grid"):
+            runoffHRU = (directRunoff + interflow + groundwater_recharge * np.float32(0.1)) * self.HRUfraction
+            # open water and sealed HRUs: all precipitation is runoff
+            runoffHRU = np.where(HRU.land_use_type >= 4, Precipitation * self.HRUfraction, runoffHRU)
+            grid.runoff = np.bincount(self.HRU_to_grid, runoffHRU, minlength=self.cells)
+
+        with timespan("lakes_reservoirs"):
+            self.lakes_reservoirs_module.dynamic()
+            # evaporation of the water bodies for each routing substep (see routing_kinematic.dynamic)
+            EWRefavg = npareaaverage(EWRef.astype(np.float64), grid.waterBodyID)
+            eWaterBody = np.maximum(0.0, EWRefavg * grid.lakeArea) / self.substeps
+            grid.evapWaterBodyC = grid.lakeEvaFactorC * eWaterBody[grid.decompress_LR]
+            grid.sumResEvapWaterBodyC = grid.evapWaterBodyC * 0.
+            grid.sumLakeEvapWaterBodyC = grid.evapWaterBodyC * 0.
+
+        with timespan("routing_kinematic"):
+            runoffM3 = grid.runoff * self.cellArea / self.substeps
+            for substep in range(self.substeps):
+                with timespan("substep"):
+                    with timespan("lakes_reservoirs"):
+                        lakesResOut, lakeOutflowDis = self.lakes_reservoirs_module.dynamic_inloop(substep)
+                    sideflow = (runoffM3 + lakesResOut) / self.chanLength / grid.dtRouting
+                    Qnew = np.zeros(self.cells)
+                    if self.routingNumba:
+                        kinematic_numba(grid.discharge, sideflow, grid.kinOrder_LR, grid.kinLevelStart_LR, grid.dirupLen_LR, grid.dirupID_LR, Qnew,
+                                        self.channelAlpha, self.beta, grid.dtRouting, self.chanLength, False, 0.0001, 10, self.kinematicStats)
+                    else:
+                        lib2.kinematic(grid.discharge, sideflow, grid.dirDown_LR, grid.dirupLen_LR, grid.dirupID_LR, Qnew,
+                                       self.channelAlpha, self.beta, grid.dtRouting, self.chanLength, grid.lendirDown_LR)
+                    grid.discharge = Qnew
+
+
+def run_size(size, days, hrus, lakes, substeps, routingNumba=False, kernels='numpy', trace=None, seed=1):
+    """
+    Synthetic basin of size x size cells, initial part and days time steps with time spans and peak memory
+
+    :param size: number of rows and columns
+    :param days: number of time steps
+    :param hrus: number of HRUs per cell
+    :param lakes: number of lakes and reservoirs
+    :param substeps: number of routing substeps
+    :param routingNumba: numba kernel of the kinematic wave
+    :param kernels: numpy: default path of the modules, numba: compiled kernels (see :class:`syntheticModel`)
+    :param trace: filename of the Chrome trace (see :meth:`cwatm.management_modules.timing.writeTiming`) or None
+    :param seed: seed of the synthetic basin
+    :return: dict of path: time span summary with peak memory [bytes] (key 'peak')
+    """
+
+    maps = synthetic_basin(size, size, lakes=lakes, seed=seed)
+    meteo = synthetic_meteo(maps, days, seed=seed)
+
+    # settings of the modules: lakes and reservoirs without inflow, no water balance and runtime checks
+    saved = [dict(settings) for settings in (option, validation, dateVar)]
+    option.update({'includeWaterBodies': True, 'inflow': False, 'calcWaterBalance': False})
+    validation.update({'level': 'off'})
+    dateVar.update({'newStart': False, 'newYear': False})
+
+    timing['on'] = True
+    timing['stack'] = []
+    # single spans only for the Chrome trace
+    timing['trace'] = trace
+    memory['trace'] = True
+    memory['stack'] = []
+    timeSpans.clear()
+    timeStats.clear()
+    memorySpans.clear()
+    tracemalloc.start()
+    try:
+        dateVar['curr'] = 0
+        dateVar['doy'] = 1
+        with timespan("initial"):
+            model = syntheticModel(maps, meteo, hrus, substeps, routingNumba, kernels)
+            # first time step compiles the numba kernels
+            with timespan("compile"):
+                model.dynamic(0)
+        for day in range(days):
+            dateVar['curr'] = day + 1
+            dateVar['doy'] = day % 365 + 1
+            with timespan("dynamic"):
+                model.dynamic(day)
+    finally:
+        tracemalloc.stop()
+        timing['on'] = False
+        memory['trace'] = False
+        for settings, values in zip((option, validation, dateVar), saved):
+            settings.clear()
+            settings.update(values)
+
+    if trace:
+        writeTiming(trace)
+    summary = timingSummary()
+    for path, span in summary.items():
+        span['peak'] = memorySpans[path][1] if path in memorySpans else 0
+    summary['cells'] = model.cells
+    summary['HRUs'] = model.HRU_to_grid.size
+    return summary
+
+
+def print_results(results):
+    """
+    Mean time per time step and peak memory of each model part, one column per size and kernels
+
+    :param results: dict of (size, kernels): summary (see :meth:`run_size`)
+    """
+
+    runs = list(results)
+    paths = []
+    for run in runs:
+        paths += [path for path in results[run] if path not in paths and isinstance(results[run][path], dict) and results[run][path]['steps']]
+    print("\n%-40s" % "" + "".join("%22s" % ("%i %s" % run) for run in runs))
+    print("%-40s" % "cells" + "".join("%22i" % results[run]['cells'] for run in runs))
+    print("%-40s" % "HRUs" + "".join("%22i" % results[run]['HRUs'] for run in runs))
+    print("%-40s" % "Name" + "".join("%22s" % "step[ms]  peak[MB]" for run in runs))
+    for path in sorted(paths, key=lambda path: path.split("/")):
+        span = next(results[run][path] for run in runs if path in results[run])
+        name = "  " * span['depth'] + path.split("/")[-1]
+        row = ""
+        for run in runs:
+            span = results[run].get(path)
+            if span and span['steps']:
+                row += "%12.2f %9.2f " % (1000 * span['mean'], span['peak'] / 2 ** 20)
+            else:
+                row += "%22s" % ""
+        print("%-40s" % name + row)
+    print("%-40s" % "initial[s]" + "".join("%22.2f" % results[run]['initial']['total'] for run in runs))
+    print("%-40s" % "  compile[s]" + "".join("%22.2f" % results[run]['initial/compile']['total'] for run in runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the dynamic part on synthetic basins")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 200, 400], help="rows and columns of the basins")
+    parser.add_argument('--days', type=int, default=30, help="number of time steps")
+    parser.add_argument('--hrus', type=int, default=4, help="HRUs per cell (max 6)")
+    parser.add_argument('--lakes', type=int, default=10, help="number of lakes and reservoirs")
+    parser.add_argument('--substeps', type=int, default=8, help="routing substeps per day")
+    parser.add_argument('--kernels', nargs='+', choices=['numpy', 'numba'], default=['numpy', 'numba'],
+                        help="numpy: default path of the modules, numba: compiled kernels, default both")
+    parser.add_argument('--numba', action='store_true', help="numba kernel of the kinematic wave")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--trace', help="Chrome trace of the largest size")
+    parser.add_argument('--write', help="folder: writes the synthetic basins as netCDF for a full model run")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        for kernels in args.kernels:
+            print("basin %i x %i, %s" % (size, size, kernels))
+            trace = args.trace if size == args.sizes[-1] and kernels == args.kernels[-1] else None
+            results[size, kernels] = run_size(size, args.days, min(args.hrus, len(LANDCOVER)), args.lakes, args.substeps,
+                                              args.numba or lib2 is None, kernels, trace, args.seed)
+        if args.write:
+            maps = synthetic_basin(size, size, lakes=args.lakes, seed=args.seed)
+            write_maps(os.path.join(args.write, "basin_%i" % size), maps, meteo=synthetic_meteo(maps, args.days, seed=args.seed))
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+# -------------------------------------------------------------------------
+# Name:        Synthetic basin
+# Purpose:     self-consistent synthetic basin of any size for benchmarks: mask, river network,
+#              soil and land cover maps, meteo stacks, lakes and reservoirs and a MODFLOW grid
+#
+# Created:     18/10/2026
+# -------------------------------------------------------------------------
+
+import os
+import datetime
+import numpy as np
+from numba import njit
+
+# ldd (keypad numbering, 5 = pit) of the step (row, col) to the downstream cell
+LDD = {(1, -1): 1, (1, 0): 2, (1, 1): 3, (0, -1): 4, (0, 1): 6, (-1, -1): 7, (-1, 0): 8, (-1, 1): 9}
+NEIGHBOURS = np.array(list(LDD.keys()), dtype=np.int64)
+NEIGHBOURS_LDD = np.array(list(LDD.values()), dtype=np.int64)
+
+# land cover classes of CWATM: forest, grassland, paddy irrigation, non paddy irrigation, sealed, water
+LANDCOVER = ['forest', 'grassland', 'irrPaddy', 'irrNonPaddy', 'sealed', 'water']
+
+# meteo variables: binding of the settings file, variable name, unit
+METEO = [('PrecipitationMaps', 'pr', 'kg m-2 s-1'), ('TavgMaps', 'tas', 'K'), ('TminMaps', 'tasmin', 'K'),
+         ('TmaxMaps', 'tasmax', 'K'), ('PSurfMaps', 'ps', 'Pa'), ('RSDSMaps', 'rsds', 'W m-2'),
+         ('RSDLMaps', 'rlds', 'W m-2'), ('WindMaps', 'sfcWind', 'm s-1'), ('QAirMaps', 'huss', 'kg kg-1')]
+
+
+def smooth_field(rng, rows, cols, scale=8):
+    """
+    Smooth random field between 0 and 1 (bilinear interpolation of a coarse random grid)
+
+    :param rng: numpy random generator
+    :param rows: number of rows
+    :param cols: number of columns
+    :param scale: size of the structures in cells
+    :return: 2D array float32
+    """
+
+    coarse = rng.random((rows // scale + 2, cols // scale + 2))
+    y = np.arange(rows) / scale
+    x = np.arange(cols) / scale
+    y0 = y.astype(np.int64)
+    x0 = x.astype(np.int64)
+    wy = (y - y0)[:, None]
+    wx = (x - x0)[None, :]
+    field = (coarse[y0][:, x0] * (1 - wy) * (1 - wx) + coarse[y0 + 1][:, x0] * wy * (1 - wx)
+             + coarse[y0][:, x0 + 1] * (1 - wy) * wx + coarse[y0 + 1][:, x0 + 1] * wy * wx)
+    return field.astype(np.float32)
+
+
+def basin_mask(rows, cols):
+    """
+    Elliptic basin inside the rectangle, the outer ring of cells is outside the basin
+
+    :param rows: number of rows
+    :param cols: number of columns
+    :return: 2D array bool, True inside the basin
+    """
+
+    y = (np.arange(rows) + 0.5 - rows / 2) / (rows / 2 - 1)
+    x = (np.arange(cols) + 0.5 - cols / 2) / (cols / 2 - 1)
+    basin = y[:, None] ** 2 + x[None, :] ** 2 < 1
+    basin[[0, -1], :] = False
+    basin[:, [0, -1]] = False
+    return basin
+
+
+@njit
+def flow_distance(basin, outlet_row, outlet_col):
+    """
+    Number of steps from each cell of the basin to the outlet (breadth first search over the 8 neighbours)
+
+    :param basin: 2D array bool, True inside the basin
+    :param outlet_row: row of the outlet
+    :param outlet_col: column of the outlet
+    :return: 2D array of the distance, -1 outside the basin
+    """
+
+    rows, cols = basin.shape
+    distance = np.full((rows, cols), -1, dtype=np.int64)
+    queue = np.empty(rows * cols, dtype=np.int64)
+    distance[outlet_row, outlet_col] = 0
+    queue[0] = outlet_row * cols + outlet_col
+    head = 0
+    tail = 1
+    while head < tail:
+        r = queue[head] // cols
+        c = queue[head] % cols
+        head += 1
+        for k in range(NEIGHBOURS.shape[0]):
+            rn = r + NEIGHBOURS[k, 0]
+            cn = c + NEIGHBOURS[k, 1]
+            if 0 <= rn < rows and 0 <= cn < cols and basin[rn, cn] and distance[rn, cn] < 0:
+                distance[rn, cn] = distance[r, c] + 1
+                queue[tail] = rn * cols + cn
+                tail += 1
+    return distance
+
+
+@njit
+def flow_directions(distance, noise):
+    """
+    Ldd which points from each cell to the neighbour one step closer to the outlet,
+    of several neighbours the one with the highest noise (meandering river network without loops)
+
+    :param distance: distance to the outlet, -1 outside the basin (see flow_distance)
+    :param noise: 2D random field to choose between neighbours
+    :return: 2D array of the ldd, 0 outside the basin, 5 at the outlet
+    """
+
+    rows, cols = distance.shape
+    ldd = np.zeros((rows, cols), dtype=np.int64)
+    for r in range(rows):
+        for c in range(cols):
+            if distance[r, c] < 0:
+                continue
+            if distance[r, c] == 0:
+                ldd[r, c] = 5
+                continue
+            best = -1.
+            for k in range(NEIGHBOURS.shape[0]):
+                rn = r + NEIGHBOURS[k, 0]
+                cn = c + NEIGHBOURS[k, 1]
+                if 0 <= rn < rows and 0 <= cn < cols and distance[rn, cn] == distance[r, c] - 1:
+                    if noise[rn, cn] > best:
+                        best = noise[rn, cn]
+                        ldd[r, c] = NEIGHBOURS_LDD[k]
+    return ldd
+
+
+def upstream_cells(distance, ldd):
+    """
+    Number of upstream cells (including the cell itself), summed from the sources to the outlet
+
+    :param distance: distance to the outlet (see flow_distance)
+    :param ldd: river network (see flow_directions)
+    :return: 2D array of the number of upstream cells, 0 outside the basin
+    """
+
+    rows, cols = ldd.shape
+    ups = (distance >= 0).astype(np.float64).ravel()
+    step = np.zeros(10, dtype=np.int64)
+    for (dr, dc), code in LDD.items():
+        step[code] = dr * cols + dc
+    cells = np.nonzero(distance.ravel() > 0)[0]
+    cells = cells[np.argsort(-distance.ravel()[cells], kind='stable')]
+    down = cells + step[ldd.ravel()[cells]]
+    for cell, downcell in zip(cells, down):
+        ups[downcell] += ups[cell]
+    return ups.reshape(rows, cols)
+
+
+def place_lakes(rng, ups, ldd, lakes, size=3):
+    """
+    Lakes and reservoirs on the river network: each water body is a river cell with at least 20 upstream cells
+    and its upstream cells within size steps. Odd IDs are lakes, even IDs are reservoirs
+
+    :param rng: numpy random generator
+    :param ups: number of upstream cells (see upstream_cells)
+    :param ldd: river network
+    :param lakes: number of lakes and reservoirs
+    :param size: number of steps upstream of the outlet of the water body
+    :return: 2D array of waterBodyID (0: no water body), outlet cells (row, col) of the water bodies
+    """
+
+    rows, cols = ldd.shape
+    waterBodyID = np.zeros((rows, cols), dtype=np.int32)
+    outlets = []
+    candidates = np.argwhere((ups >= 20) & (ldd != 5))
+    rng.shuffle(candidates)
+    for r, c in candidates:
+        if len(outlets) == lakes:
+            break
+        if waterBodyID[max(r - size - 1, 0):r + size + 2, max(c - size - 1, 0):c + size + 2].any():
+            continue
+        lakeID = len(outlets) + 1
+        cells = [(r, c)]
+        for _ in range(size):
+            upstream = []
+            for rc, cc in cells:
+                for (dr, dc), code in LDD.items():
+                    ru, cu = rc - dr, cc - dc
+                    if 0 <= ru < rows and 0 <= cu < cols and ldd[ru, cu] == code:
+                        upstream.append((ru, cu))
+            cells = cells + [cell for cell in upstream if cell not in cells]
+        for cell in cells:
+            waterBodyID[cell] = lakeID
+        outlets.append((r, c))
+    return waterBodyID, outlets
+
+
+def synthetic_basin(rows, cols, lakes=0, modflow_factor=2, seed=1):
+    """
+    Self-consistent synthetic basin: the river network drains the whole basin to one outlet at the bottom,
+    elevation decreases along the river network, land cover fractions add up to 1 and water bodies
+    are covered by water
+
+    :param rows: number of rows
+    :param cols: number of columns
+    :param lakes: number of lakes and reservoirs
+    :param modflow_factor: number of MODFLOW cells per CWATM cell in each direction
+    :param seed: seed of the random generator
+    :return: dict of 2D maps (soil maps of the 3 layers as 3D arrays, landcover fractions as 3D array,
+             MODFLOW maps with the key modflow_*)
+    """
+
+    rng = np.random.default_rng(seed)
+    basin = basin_mask(rows, cols)
+    outlet_row = np.nonzero(basin.any(axis=1))[0][-1]
+    outlet_col = np.nonzero(basin[outlet_row])[0][np.count_nonzero(basin[outlet_row]) // 2]
+    distance = flow_distance(basin, outlet_row, outlet_col)
+    ldd = flow_directions(distance, rng.random((rows, cols)))
+    ups = upstream_cells(distance, ldd)
+
+    maps = {'basin': basin, 'Ldd': ldd, 'upstream_cells': ups}
+    cellsize = 1 / 12.
+    lat = 50. - (np.arange(rows) + 0.5) * cellsize
+    maps['CellArea'] = np.repeat((np.cos(np.deg2rad(lat)) * (cellsize * 111320.) ** 2)[:, None], cols, axis=1).astype(np.float32)
+    # elevation increases with the distance to the outlet, with hills between the rivers
+    elevation = 100. + 5. * distance + 50. * smooth_field(rng, rows, cols) / (1. + np.log1p(ups))
+    maps['elevation'] = np.where(basin, elevation, np.nan).astype(np.float32)
+    maps['ElevationStD'] = (20. + 80. * smooth_field(rng, rows, cols)).astype(np.float32)
+
+    # channels scaled by upstream area
+    maps['chanLength'] = (cellsize * 111320. * np.where(ldd % 2 == 1, 1.414, 1.)).astype(np.float32)
+    maps['chanGrad'] = np.maximum(1e-4, 5. / maps['chanLength']).astype(np.float32)
+    maps['chanWidth'] = (2. + 0.5 * ups ** 0.6).astype(np.float32)
+    maps['chanDepth'] = (0.5 + 0.05 * ups ** 0.4).astype(np.float32)
+    maps['chanMan'] = np.full((rows, cols), 0.04, dtype=np.float32)
+
+    # soil hydraulic parameters of 3 layers, finer and wetter soils in the valleys
+    texture = smooth_field(rng, rows, cols, scale=16)
+    maps['thetas'] = np.stack([0.40 + 0.10 * texture - 0.02 * layer for layer in range(3)]).astype(np.float32)
+    maps['thetar'] = np.stack([0.05 + 0.05 * texture - 0.01 * layer for layer in range(3)]).astype(np.float32)
+    maps['lambda'] = np.stack([0.2 + 0.3 * (1 - texture) for layer in range(3)]).astype(np.float32)
+    maps['alpha'] = np.stack([0.01 + 0.05 * (1 - texture) for layer in range(3)]).astype(np.float32)
+    maps['KSat'] = np.stack([10 ** (1.5 - 1.5 * texture - 0.3 * layer) for layer in range(3)]).astype(np.float32)
+    maps['StorDepth1'] = (0.30 + 0.20 * texture).astype(np.float32)
+    maps['StorDepth2'] = (0.50 + 1.50 * smooth_field(rng, rows, cols)).astype(np.float32)
+
+    # land cover fractions, water bodies are covered by water
+    waterBodyID, outlets = place_lakes(rng, ups, ldd, lakes)
+    fractions = np.stack([smooth_field(rng, rows, cols, scale=6) ** 2 for name in LANDCOVER])
+    fractions[LANDCOVER.index('water')] *= 0.05
+    fractions[LANDCOVER.index('sealed')] *= 0.2
+    fractions[:, waterBodyID > 0] = 0.
+    fractions[LANDCOVER.index('water'), waterBodyID > 0] = 1.
+    maps['fractionLandcover'] = (fractions / fractions.sum(axis=0)).astype(np.float32)
+
+    maps['waterBodyID'] = waterBodyID
+    maps['waterBodyTyp'] = np.where(waterBodyID > 0, 2 - waterBodyID % 2, 0).astype(np.int32)
+    maps['waterBodyArea'] = np.zeros((rows, cols), dtype=np.float32)
+    maps['waterBodyVolRes'] = np.zeros((rows, cols), dtype=np.float32)
+    maps['waterBodyDis'] = np.zeros((rows, cols), dtype=np.float32)
+    for lakeID, outlet in enumerate(outlets, 1):
+        area = maps['CellArea'][waterBodyID == lakeID].sum()
+        maps['waterBodyArea'][outlet] = area / 1e6
+        maps['waterBodyVolRes'][outlet] = area * 5. / 1e6
+        maps['waterBodyDis'][outlet] = ups[outlet] * 0.01
+
+    # MODFLOW grid: modflow_factor x modflow_factor cells for each CWATM cell
+    fine = np.ones((modflow_factor, modflow_factor), dtype=np.float32)
+    maps['modflow_basin'] = np.kron(basin, fine).astype(bool)
+    maps['modflow_topography'] = np.kron(np.where(basin, elevation, 0.), fine).astype(np.float32) \
+        + np.float32(2.) * smooth_field(rng, rows * modflow_factor, cols * modflow_factor)
+    maps['modflow_permeability'] = np.kron(10 ** (-5. + texture), fine).astype(np.float32)
+    maps['modflow_porosity'] = np.kron(0.05 + 0.15 * texture, fine).astype(np.float32)
+    maps['chanRatio'] = np.where(basin, np.minimum(1., maps['chanWidth'] * maps['chanLength'] / maps['CellArea']), 0.).astype(np.float32)
+    return maps
+
+
+def synthetic_meteo(maps, days, seed=1):
+    """
+    Daily meteo stacks with a seasonal cycle, intermittent precipitation and a lapse rate of temperature
+
+    :param maps: synthetic basin (see synthetic_basin)
+    :param days: number of days
+    :param seed: seed of the random generator
+    :return: dict of variable name: 3D array (days, rows, cols) float32
+    """
+
+    rng = np.random.default_rng(seed + 1)
+    rows, cols = maps['basin'].shape
+    elevation = np.nan_to_num(maps['elevation'], nan=0.)
+    season = np.sin(2 * np.pi * (np.arange(days) - 110) / 365.)[:, None, None]
+
+    tas = 283.15 + 10. * season - 0.0065 * elevation + rng.normal(0., 2., (days, 1, 1))
+    tas = tas + smooth_field(rng, rows, cols)[None] - 0.5
+    wet = rng.random((days, 1, 1)) < 0.4
+    pr = wet * rng.gamma(0.8, 8., (days, 1, 1)) * (0.5 + smooth_field(rng, rows, cols))[None] / 86400.
+
+    meteo = {
+        'pr': pr,
+        'tas': tas,
+        'tasmin': tas - 4. - 2. * rng.random((days, 1, 1)),
+        'tasmax': tas + 4. + 2. * rng.random((days, 1, 1)),
+        'ps': np.broadcast_to(101325. * np.exp(-elevation / 8434.), (days, rows, cols)),
+        'rsds': np.maximum(20., 180. + 120. * season - 100. * wet),
+        'rlds': 300. + 40. * season + 20. * wet,
+        'sfcWind': 1. + 4. * rng.random((days, 1, 1)) * (0.5 + smooth_field(rng, rows, cols))[None],
+        'huss': 0.002 + 0.006 * (season + 1.) / 2. + 0.002 * wet,
+    }
+    return {name: np.ascontiguousarray(np.broadcast_to(data, (days, rows, cols)), dtype=np.float32) for name, data in meteo.items()}
+
+
+def write_maps(folder, maps, startdate=datetime.datetime(2000, 1, 1), meteo=None):
+    """
+    Writes the synthetic basin as netCDF maps (one file per map), meteo stacks as daily netCDF files,
+    the MODFLOW grid as GeoTIFF with the CWATM - MODFLOW indices and a settings fragment with all bindings
+
+    :param folder: output folder
+    :param maps: synthetic basin (see synthetic_basin)
+    :param startdate: date of the first meteo time step
+    :param meteo: meteo stacks (see synthetic_meteo) or None
+    :return: dict of binding: filename
+    """
+
+    from netCDF4 import Dataset, date2num
+
+    os.makedirs(folder, exist_ok=True)
+    rows, cols = maps['basin'].shape
+    cellsize = 1 / 12.
+    lat = 50. - (np.arange(rows) + 0.5) * cellsize
+    lon = 10. + (np.arange(cols) + 0.5) * cellsize
+
+    def create(filename, name, data, unit="", times=None):
+        nf = Dataset(filename, 'w', format='NETCDF4')
+        nf.createDimension('lat', rows)
+        nf.createDimension('lon', cols)
+        nf.createVariable('lat', 'f8', ('lat',))[:] = lat
+        nf.createVariable('lon', 'f8', ('lon',))[:] = lon
+        dims = ('lat', 'lon')
+        if times is not None:
+            nf.createDimension('time', None)
+            time = nf.createVariable('time', 'f8', ('time',))
+            time.units = "days since " + startdate.strftime("%Y-%m-%d")
+            time.calendar = "standard"
+            time[:] = date2num(times, time.units, time.calendar)
+            dims = ('time',) + dims
+        var = nf.createVariable(name, data.dtype, dims, zlib=True, complevel=1,
+                                chunksizes=(1, rows, cols) if times is not None else None)
+        var.units = unit
+        var[:] = data
+        nf.close()
+
+    bindings = {}
+    for name, data in maps.items():
+        if name.startswith('modflow') or name in ('chanRatio', 'basin'):
+            continue
+        if name == 'fractionLandcover':
+            for i, cover in enumerate(LANDCOVER):
+                bindings[cover + '_fracVegCover'] = os.path.join(folder, cover + '_fracVegCover.nc')
+                create(bindings[cover + '_fracVegCover'], cover, data[i])
+        elif data.ndim == 3:
+            for layer in range(data.shape[0]):
+                key = "%s%i" % (name, layer + 1)
+                bindings[key] = os.path.join(folder, key + '.nc')
+                create(bindings[key], key, data[layer])
+        else:
+            bindings[name] = os.path.join(folder, name + '.nc')
+            create(bindings[name], name, data)
+    bindings['MaskMap'] = os.path.join(folder, 'MaskMap.nc')
+    create(bindings['MaskMap'], 'mask', (~maps['basin']).astype(np.int8))
+
+    if meteo is not None:
+        days = next(iter(meteo.values())).shape[0]
+        times = [startdate + datetime.timedelta(days=day) for day in range(days)]
+        for binding, name, unit in METEO:
+            bindings[binding] = os.path.join(folder, name + '.nc')
+            create(bindings[binding], name, meteo[name], unit, times)
+
+    # MODFLOW grid and indices between the CWATM and the MODFLOW grid
+    import rasterio
+    from rasterio.transform import from_origin
+
+    factor = maps['modflow_basin'].shape[0] // rows
+    transform = from_origin(0., rows * factor * 1000., 1000., 1000.)
+    for binding, name in (('modflow_mask', 'modflow_basin'), ('topo_modflow', 'modflow_topography'), ('chanRatio', 'chanRatio')):
+        data = (~maps[name]).astype(np.uint8) if name == 'modflow_basin' else maps[name]
+        bindings[binding] = os.path.join(folder, name + '.tif')
+        with rasterio.open(bindings[binding], 'w', driver='GTiff', height=data.shape[0], width=data.shape[1], count=1,
+                           dtype=data.dtype, transform=transform if name != 'chanRatio' else from_origin(0., rows * factor * 1000., factor * 1000., factor * 1000.)) as dst:
+            dst.write(data, 1)
+
+    cwatm_y, cwatm_x = np.nonzero(maps['basin'])
+    sub_y, sub_x = np.divmod(np.arange(factor * factor), factor)
+    indices = {
+        'cwatm_y': np.repeat(cwatm_y, factor * factor),
+        'cwatm_x': np.repeat(cwatm_x, factor * factor),
+        'modflow_y': (cwatm_y[:, None] * factor + sub_y[None]).ravel(),
+        'modflow_x': (cwatm_x[:, None] * factor + sub_x[None]).ravel(),
+        'area': np.repeat(maps['CellArea'][cwatm_y, cwatm_x] / factor ** 2, factor * factor),
+    }
+    bindings['cwatm_modflow_indices'] = os.path.join(folder, 'modflow_indices')
+    os.makedirs(bindings['cwatm_modflow_indices'], exist_ok=True)
+    for name, data in indices.items():
+        np.save(os.path.join(bindings['cwatm_modflow_indices'], name + '.npy'), data)
+    bindings['permeability'] = str(float(np.median(maps['modflow_permeability'])))
+    bindings['poro'] = str(float(np.median(maps['modflow_porosity'])))
+
+    with open(os.path.join(folder, 'synthetic_basin.ini'), 'w') as f:
+        f.write("# synthetic basin %i x %i, %i cells\n" % (rows, cols, maps['basin'].sum()))
+        for binding, filename in bindings.items():
+            f.write("%s = %s\n" % (binding, filename))
+    return bindings
@@ -15,6 +15,7 @@ class CWATModel_dyn(DynamicModel):
 
     # =========== DYNAMIC ====================================================
 
+    @timed
     def dynamic(self):
         """
         Dynamic part of CWATM
@@ -32,12 +33,8 @@ class CWATModel_dyn(DynamicModel):
         #self.CalendarDate = dateVar['dateStart'] + datetime.timedelta(days=dateVar['curr'])
         #self.CalendarDay = int(self.CalendarDate.strftime("%j"))
         timestep_dynamic(self)
-
-
-        del timeMes[:]
-        timemeasure("Start dynamic")
-
-
+        # profiler starts at the first time step of a window in profileSteps
+        checkProfile()
 
         if Flags['loud']:
             print("%-6i %10s" %(dateVar['currStart'],dateVar['currDatestr']), end=' ')
@@ -63,10 +60,8 @@ class CWATModel_dyn(DynamicModel):
 
 
         self.readmeteo_module.dynamic()
-        timemeasure("Read meteo") # 1. timing after read input maps
 
         Tavg, ETRef, self.data.HRU.EWRef = self.evaporationPot_module.dynamic()
-        timemeasure("ET pot") # 2. timing after read input maps
 
         #if Flags['check']: return  # if check than finish here
 
@@ -79,26 +74,20 @@ class CWATModel_dyn(DynamicModel):
 
         # ***** RAIN AND SNOW *****************************************
         self.snowfrost_module.dynamic(Tavg)
-        timemeasure("Snow")  # 3. timing
 
         # ***** READ land use fraction maps***************************
 
         # *********  Soil splitted in different land cover fractions *************
         interflow, directRunoff, groundwater_recharge, groundwater_abstraction, channel_abstraction, openWaterEvap, returnFlow = self.landcoverType_module.dynamic(ETRef)
-        timemeasure("Soil main")  # 5. timing
 
         self.groundwater_modflow_module.dynamic(groundwater_recharge, groundwater_abstraction)
-        timemeasure("Groundwater")  # 7. timing
 
         self.runoff_concentration_module.dynamic(interflow, directRunoff)
-        timemeasure("Runoff conc.")  # 8. timing
 
         self.lakes_res_small_module.dynamic()
-        timemeasure("Small lakes")  # 9. timing
 
 
         self.routing_kinematic_module.dynamic(openWaterEvap, channel_abstraction, returnFlow)
-        timemeasure("Routing_Kin")  # 10. timing
 
         self.waterquality1.dynamic()
 
@@ -111,17 +100,17 @@ class CWATModel_dyn(DynamicModel):
         # ------------------------------------------------------
 
         # self.waterbalance_module.checkWaterSoilGround()
-        timemeasure("Waterbalance")  # 11. timing
 
         self.environflow_module.dynamic()
         # in case environmental flow is calculated last
 
         self.output_module.dynamic()
-        timemeasure("Output")  # 12. timing
-
-        for i in range(len(timeMes)):
-            #if self.currentTimeStep() == self.firstTimeStep():
-            if self.currentStep == self.firstStep:
-                timeMesSum.append(timeMes[i] - timeMes[0])
-            else:
-                timeMesSum[i] += timeMes[i] - timeMes[0]
\ No newline at end of file
+
+        # state arrays by size at the time steps in memoryReportSteps
+        checkMemoryReport(self)
+        # input and output counters at the end of each month
+        checkIOCounters()
+        # and stops after the last time step of the window
+        checkProfile(end=True)
+        # resident memory, open files and size of the global containers every leakMonitorSteps
+        checkLeakMonitor()
\ No newline at end of file
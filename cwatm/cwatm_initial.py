@@ -30,7 +30,7 @@ from cwatm.hydrological_modules.lakes_reservoirs import lakes_reservoirs
 from cwatm.hydrological_modules.waterquality1 import waterquality1
 from cwatm.management_modules.output import outputTssMap
 from cwatm.management_modules.dynamicModel import DynamicModel
-from cwatm.management_modules.data_handling import loadsetclone, metaNetCDF, checkOption, loadmap
+from cwatm.management_modules.data_handling import loadsetclone, metaNetCDF, checkOption, loadmap, land_use_indices, initValidation, initTiming, timespan, initMemory, checkMemoryReport, initDtypeCheck, initIOCounter, initProfiler, startProfile, stopProfile, profiling, initLeakMonitor
 
 class CWATModel_ini(DynamicModel):
 
@@ -49,74 +49,100 @@ class CWATModel_ini(DynamicModel):
 
         DynamicModel.__init__(self)
 
-        # ----------------------------------------
-        ## MakMap: the maskmap is flexible e.g. col,row,x1,y1  or x1,x2,y1,y2
-        # set the maskmap
-        self.MaskMap = loadsetclone(self, 'MaskMap')
-
-        # ----------------------------------------
-        # include output of tss and maps
-        self.output_module = outputTssMap(self)
-
-        # include all the hydrological modules
-        self.misc_module = miscInitial(self)
-        self.waterbalance_module = waterbalance(self)
-        self.readmeteo_module = readmeteo(self)
-        self.environflow_module = environflow(self)
-        self.evaporationPot_module = evaporationPot(self)
-        self.inflow_module = inflow(self)
-        self.snowfrost_module = snow_frost(self)
-        self.soil_module = soil(self)
-        self.landcoverType_module = landcoverType(self)
-        self.evaporation_module = evaporation(self)
-        self.groundwater_modflow_module = groundwater_modflow(self)
-        self.waterdemand_module = water_demand(self)
-        self.interception_module = interception(self)
-        self.sealed_water_module = sealed_water(self)
-        self.runoff_concentration_module = runoff_concentration(self)
-        self.lakes_res_small_module = lakes_res_small(self)
-        self.routing_kinematic_module = routing_kinematic(self)
-        self.lakes_reservoirs_module = lakes_reservoirs(self)
-        self.waterquality1 = waterquality1(self)
-
-        # reading of the metainformation of variables to put into output netcdfs
-        metaNetCDF()
-
-        # run intial misc to get all global variables
-        self.misc_module.initial()
-
-        self.readmeteo_module.initial()
-        self.inflow_module.initial()
-
-        self.evaporationPot_module.initial()
-
-        ElevationStD = self.data.to_HRU(data=loadmap('ElevationStD'), fn=None)  # checked
-
-        self.snowfrost_module.initial(ElevationStD)
-        soildepth = self.soil_module.initial()
-
-        self.groundwater_modflow_module.initial()
-        # groundwater before meteo, bc it checks steady state
-
-        self.landcoverType_module.initial(ElevationStD, soildepth)
-        self.interception_module.initial()
-
-        self.runoff_concentration_module.initial()
-        self.lakes_res_small_module.initial()
-
-        self.routing_kinematic_module.initial()
-        if checkOption('includeWaterBodies'):
-            self.lakes_reservoirs_module.initWaterbodies()
-            self.lakes_reservoirs_module.initial_lakes()
-            self.lakes_reservoirs_module.initial_reservoirs()
-
-        self.waterdemand_module.initial()
-        self.waterbalance_module.initial()
-        # calculate initial amount of water in the catchment
-
-        self.output_module.initial()
-        self.environflow_module.initial()
-        self.waterquality1.initial()
+        # timing of the model parts: timing, timingTrace or flag -t
+        initTiming()
+        # memory report of the state arrays and peak memory of the model parts
+        initMemory()
+        # counters of the input and output calls
+        initIOCounter()
+        # profile of the initial part and of windows of time steps
+        initProfiler()
+        # memory, open files and global containers every n time steps
+        initLeakMonitor()
+        if profiling['initial']:
+            startProfile("initial")
+
+        with timespan("CWATModel_ini"):
+            # ----------------------------------------
+            ## MakMap: the maskmap is flexible e.g. col,row,x1,y1  or x1,x2,y1,y2
+            # set the maskmap
+            self.MaskMap = loadsetclone(self, 'MaskMap')
+
+            # ----------------------------------------
+            # include output of tss and maps
+            self.output_module = outputTssMap(self)
+
+            # include all the hydrological modules
+            self.misc_module = miscInitial(self)
+            self.waterbalance_module = waterbalance(self)
+            self.readmeteo_module = readmeteo(self)
+            self.environflow_module = environflow(self)
+            self.evaporationPot_module = evaporationPot(self)
+            self.inflow_module = inflow(self)
+            self.snowfrost_module = snow_frost(self)
+            self.soil_module = soil(self)
+            self.landcoverType_module = landcoverType(self)
+            self.evaporation_module = evaporation(self)
+            self.groundwater_modflow_module = groundwater_modflow(self)
+            self.waterdemand_module = water_demand(self)
+            self.interception_module = interception(self)
+            self.sealed_water_module = sealed_water(self)
+            self.runoff_concentration_module = runoff_concentration(self)
+            self.lakes_res_small_module = lakes_res_small(self)
+            self.routing_kinematic_module = routing_kinematic(self)
+            self.lakes_reservoirs_module = lakes_reservoirs(self)
+            self.waterquality1 = waterquality1(self)
+
+            # reading of the metainformation of variables to put into output netcdfs
+            metaNetCDF()
+
+            # level of the runtime checks in the dynamic part: off, sampled or full
+            initValidation()
+
+            # index sets of the land use types, kept until land use is changed with set_land_use_type
+            self.data.HRU.land_use_indices = land_use_indices(self.data.HRU)
+
+            # run intial misc to get all global variables
+            self.misc_module.initial()
+
+            self.readmeteo_module.initial()
+            self.inflow_module.initial()
+
+            self.evaporationPot_module.initial()
+
+            ElevationStD = self.data.to_HRU(data=loadmap('ElevationStD'), fn=None)  # checked
+
+            self.snowfrost_module.initial(ElevationStD)
+            soildepth = self.soil_module.initial()
+
+            self.groundwater_modflow_module.initial()
+            # groundwater before meteo, bc it checks steady state
+
+            self.landcoverType_module.initial(ElevationStD, soildepth)
+            self.interception_module.initial()
+
+            self.runoff_concentration_module.initial()
+            self.lakes_res_small_module.initial()
+
+            self.routing_kinematic_module.initial()
+            if checkOption('includeWaterBodies'):
+                self.lakes_reservoirs_module.initWaterbodies()
+                self.lakes_reservoirs_module.initial_lakes()
+                self.lakes_reservoirs_module.initial_reservoirs()
+
+            self.waterdemand_module.initial()
+            self.waterbalance_module.initial()
+            # calculate initial amount of water in the catchment
+
+            self.output_module.initial()
+            self.environflow_module.initial()
+            self.waterquality1.initial()
+
+        if profiling['initial']:
+            stopProfile()
+        checkMemoryReport(self)
+        # dtype of the state arrays after the initial part, compared after each module
+        initDtypeCheck(self)
 
         # vars = [a for a in dir(self.HRU) if not a.startswith('__')]
         # for varname in vars:
@@ -40,6 +40,7 @@ class environflow(object):
         self.var = model.data.grid
         self.model = model
         
+    @timed
     def initial(self):
         """
         Initial part of environmental flow
@@ -86,6 +87,7 @@ class environflow(object):
 # --------------------------------------------------------------------------
 
     # noinspection PyTypeChecker
+    @timed
     def dynamic(self):
         """
         Dynamic part of the environmental flow module
@@ -8,7 +8,7 @@
 # Copyright:   (c) PB 2016
 # -------------------------------------------------------------------------
 
-from cwatm.management_modules.data_handling import cbinding, checkOption
+from cwatm.management_modules.data_handling import cbinding, checkOption, timed
 import numpy as np
 try:
     import cupy as cp
@@ -38,6 +38,7 @@ class evaporation(object):
         self.var = model.data.HRU
         self.model = model
         
+    @timed
     def dynamic(self, ETRef):
         """
         Dynamic part of the soil module
@@ -9,6 +9,151 @@
 # -------------------------------------------------------------------------
 
 from cwatm.management_modules.data_handling import *
+from numba import njit, prange
+
+
+def penman_monteith(TMin, TMax, Tavg, Psurf, Qair, Rsds, Rsdl, albedoLand, albedoOpenWater, Wind, useHuss):
+    """
+    Reference evapotranspiration and open water evaporation based on Penman Monteith - FAO 56
+
+    :param TMin: minimum air temperature [deg C]
+    :param TMax: maximum air temperature [deg C]
+    :param Tavg: average air temperature [deg C]
+    :param Psurf: surface pressure [Pa]
+    :param Qair: specific humidity [kg/kg] if useHuss else relative humidity [%]
+    :param Rsds: short wave downward surface radiation [W/m2]
+    :param Rsdl: long wave downward surface radiation [W/m2]
+    :param albedoLand: albedo of land surface
+    :param albedoOpenWater: albedo of open water surface
+    :param Wind: wind speed at 10m [m/s]
+    :param useHuss: True if Qair is specific humidity
+    :return: ETRef, EWRef [m/day]
+    """
+
+    ESatmin = 0.6108* np.exp((17.27 * TMin) / (TMin + 237.3))
+    ESatmax = 0.6108* np.exp((17.27 * TMax) / (TMax + 237.3))
+    ESat = (ESatmin + ESatmax) / 2.0   # [KPa]
+    # http://www.fao.org/docrep/X0490E/x0490e07.htm   equation 11/12
+
+    # [Pa] to [KPa]
+    Psurf = Psurf * 0.001
+
+    # Fao 56 Page 36
+    # calculate actual vapour pressure
+    if useHuss:
+        # if specific humidity calculate actual vapour pressure this way
+        EAct = (Psurf * Qair) / ((0.378 * Qair) + 0.622)
+        # http://www.eol.ucar.edu/projects/ceop/dm/documents/refdata_report/eqns.html
+        # (self.var.Psurf * self.var.Qair)/0.622
+        # old calculation not completely ok
+    else:
+        # if relative humidity
+        EAct = ESat * Qair / 100.0
+
+    # ************************************************************
+    # ***** NET ABSORBED RADIATION *******************************
+    # ************************************************************
+    LatHeatVap = 2.501 - 0.002361 * Tavg
+    # latent heat of vaporization [MJ/kg]
+
+    EmNet = (0.34 - 0.14 * np.sqrt(EAct))
+    # Net emissivity
+
+    # longwave radiation balance
+    RNUp = 4.903E-9 * (((TMin + 273.16) ** 4) + ((TMax + 273.16) ** 4)) / 2
+
+    # Conversion factor from [W] to [MJ]
+    WtoMJ = 86400 * 1E-6
+
+    # conversion from W/m2 to MJ/m2/day
+    Rsds = Rsds * WtoMJ
+    Rsdl = Rsdl * WtoMJ
+
+    # Up longwave radiation [MJ/m2/day]
+    RLN = RNUp - Rsdl
+    # RDL is stored on disk as W/m2 but converted in MJ/m2/s in readmeteo.py
+
+    RNA = np.maximum(((1 - albedoLand) * Rsds - RLN) / LatHeatVap, 0.0)
+    RNAWater = np.maximum(((1 - albedoOpenWater) * Rsds - RLN) / LatHeatVap, 0.0)
+
+    VapPressDef = np.maximum(ESat - EAct, 0.0)
+    Delta = ((4098.0 * ESat) / ((Tavg + 237.3)**2))
+    # slope of saturated vapour pressure curve [mbar/deg C]
+    Psycon = 0.665E-3 * Psurf
+    # psychrometric constant [kPa C-1]
+    # http://www.fao.org/docrep/ X0490E/ x0490e07.htm  Equation 8
+    # see http://www.fao.org/docrep/X0490E/x0490e08.htm#penman%20monteith%20equation
+
+    # Adjust wind speed for measurement height: wind speed measured at
+    # 10 m, but needed at 2 m height
+    # Shuttleworth, W.J. (1993) in Maidment, D.R. (1993), p. 4.36
+    Wind = Wind * 0.749
+
+    windpart = 900 * Wind / (Tavg + 273.16)
+    denominator = Delta + Psycon *(1 + 0.34 * Wind)
+    numerator1 = Delta / denominator
+    numerator2 = Psycon / denominator
+
+    RNAN = RNA * numerator1
+    #RNANSoil = RNASoil * numerator1
+    RNANWater = RNAWater * numerator1
+
+    EA = windpart * VapPressDef * numerator2
+
+    # Potential evapo(transpi)ration is calculated for two reference surfaces:
+    # 1. Reference vegetation canopy
+    # 2. Open water surface
+    ETRef = (RNAN + EA) * 0.001
+    # potential reference evapotranspiration rate [m/day]  # from mm to m with 0.001
+    #self.var.ESRef = RNANSoil + EA
+    # potential evaporation rate from a bare soil surface [m/day]
+    EWRef = (RNANWater + EA) * 0.001
+    # potential evaporation rate from water surface [m/day]
+
+    # -> here we are at ET0 (see http://www.fao.org/docrep/X0490E/x0490e04.htm#TopOfPage figure 4:)
+
+    return ETRef, EWRef
+
+
+@njit(parallel=True)
+def penman_monteith_numba(TMin, TMax, Tavg, Psurf, Qair, Rsds, Rsdl, albedoLand, albedoOpenWater, Wind, useHuss):
+    """
+    Same as penman_monteith, but calculated in one pass for each grid cell (in parallel) without temporary arrays
+    """
+
+    ETRef = np.empty_like(Tavg)
+    EWRef = np.empty_like(Tavg)
+    WtoMJ = 86400 * 1E-6
+    for i in prange(Tavg.size):
+        ESat = (0.6108 * np.exp((17.27 * TMin[i]) / (TMin[i] + 237.3)) + 0.6108 * np.exp((17.27 * TMax[i]) / (TMax[i] + 237.3))) / 2.0
+        psurf = Psurf[i] * 0.001
+        if useHuss:
+            EAct = (psurf * Qair[i]) / ((0.378 * Qair[i]) + 0.622)
+        else:
+            EAct = ESat * Qair[i] / 100.0
+
+        LatHeatVap = 2.501 - 0.002361 * Tavg[i]
+        RNUp = 4.903E-9 * (((TMin[i] + 273.16) ** 4) + ((TMax[i] + 273.16) ** 4)) / 2
+        RLN = RNUp - Rsdl[i] * WtoMJ
+        rsds = Rsds[i] * WtoMJ
+        RNA = max(((1 - albedoLand[i]) * rsds - RLN) / LatHeatVap, 0.0)
+        RNAWater = max(((1 - albedoOpenWater[i]) * rsds - RLN) / LatHeatVap, 0.0)
+
+        VapPressDef = max(ESat - EAct, 0.0)
+        Delta = ((4098.0 * ESat) / ((Tavg[i] + 237.3) ** 2))
+        Psycon = 0.665E-3 * psurf
+
+        wind = Wind[i] * 0.749
+        windpart = 900 * wind / (Tavg[i] + 273.16)
+        denominator = Delta + Psycon * (1 + 0.34 * wind)
+        numerator1 = Delta / denominator
+        numerator2 = Psycon / denominator
+        EA = windpart * VapPressDef * numerator2
+
+        ETRef[i] = (RNA * numerator1 + EA) * 0.001
+        EWRef[i] = (RNAWater * numerator1 + EA) * 0.001
+
+    return ETRef, EWRef
 
 
 class evaporationPot(object):
@@ -57,6 +202,7 @@ class evaporationPot(object):
         self.var = model.data.HRU
         self.model = model
         
+    @timed
     def initial(self):
         """
         Initial part of evaporation type module
@@ -70,6 +216,12 @@ class evaporationPot(object):
         self.var.cropCorrect = loadmap('crop_correct')
         self.var.cropCorrect = self.model.data.to_HRU(data=self.var.cropCorrect, fn=None)
 
+        # Penman Monteith: numpy (default) or compiled per grid cell kernel
+        self.var.ETRefNumba = False
+        if "ETRefKernel" in binding:
+            self.var.ETRefNumba = cbinding('ETRefKernel').lower() == "numba"
+
+    @timed
     def dynamic(self):
         """
         Dynamic part of the potential evaporation module
@@ -121,27 +273,19 @@ class evaporationPot(object):
         if Flags['check']:
             checkmap('TavgMaps', "", Tavg, True, True, Tavg)
 
-        TMax = self.model.data.to_HRU(data=TMax, fn=None)  # checked
-        TMin = self.model.data.to_HRU(data=TMin, fn=None)  # checked
-        Tavg = self.model.data.to_HRU(data=Tavg, fn=None)  # checked
 
+        # all meteo input is on grid resolution, so reference ET is calculated per grid cell
+        # and only the results are broadcast to the HRUs at the end
         if checkOption('TemperatureInKelvin'):
-            TMin -= ZeroKelvin
-            TMax -= ZeroKelvin
-            Tavg -= ZeroKelvin
-
-        ESatmin = 0.6108* np.exp((17.27 * TMin) / (TMin + 237.3))
-        ESatmax = 0.6108* np.exp((17.27 * TMax) / (TMax + 237.3))
-        ESat = (ESatmin + ESatmax) / 2.0   # [KPa]
-        # http://www.fao.org/docrep/X0490E/x0490e07.htm   equation 11/12
+            TMin = TMin - ZeroKelvin
+            TMax = TMax - ZeroKelvin
+            Tavg = Tavg - ZeroKelvin
 
         Psurf = readmeteodata('PSurfMaps', dateVar['currDate'], addZeros=True, mapsscale = self.model.data.grid.meteomapsscale)
         Psurf = self.model.readmeteo_module.downscaling2(Psurf)
-        # [Pa] to [KPa]
-        Psurf = Psurf * 0.001
-        Psurf = self.model.data.to_HRU(data=Psurf, fn=None)  # checked
 
-        if returnBool('useHuss'):
+        useHuss = returnBool('useHuss')
+        if useHuss:
             #self.var.Qair = readnetcdf2('QAirMaps', dateVar['currDate'], addZeros = True, meteo = True)
             Qair = readmeteodata('QAirMaps', dateVar['currDate'], addZeros=True, mapsscale =self.model.data.grid.meteomapsscale)
             # 2 m istantaneous specific humidity[kg / kg]
@@ -149,34 +293,6 @@ class evaporationPot(object):
             #self.var.Qair = readnetcdf2('RhsMaps', dateVar['currDate'], addZeros = True, meteo = True)
             Qair = readmeteodata('RhsMaps', dateVar['currDate'], addZeros=True, mapsscale =self.model.data.grid.meteomapsscale)
         Qair = self.model.readmeteo_module.downscaling2(Qair)
-        Qair = self.model.data.to_HRU(data=Qair, fn=None)  # checked
-
-        # Fao 56 Page 36
-        # calculate actual vapour pressure
-        if returnBool('useHuss'):
-            # if specific humidity calculate actual vapour pressure this way
-            EAct = (Psurf * Qair) / ((0.378 * Qair) + 0.622)
-            # http://www.eol.ucar.edu/projects/ceop/dm/documents/refdata_report/eqns.html
-            # (self.var.Psurf * self.var.Qair)/0.622
-            # old calculation not completely ok
-        else:
-            # if relative humidity
-            EAct = ESat * Qair / 100.0
-        del Qair
-
-        # ************************************************************
-        # ***** NET ABSORBED RADIATION *******************************
-        # ************************************************************
-        LatHeatVap = 2.501 - 0.002361 * Tavg
-        # latent heat of vaporization [MJ/kg]
-
-        EmNet = (0.34 - 0.14 * np.sqrt(EAct))
-        # Net emissivity
-
-        # longwave radiation balance
-        RNUp = 4.903E-9 * (((TMin + 273.16) ** 4) + ((TMax + 273.16) ** 4)) / 2
-        del TMax
-        del TMin
 
         #Rsds = readnetcdf2('RSDSMaps', dateVar['currDate'], addZeros = True, meteo = True)
         Rsds = readmeteodata('RSDSMaps', dateVar['currDate'], addZeros=True, mapsscale = self.model.data.grid.meteomapsscale)
@@ -185,71 +301,20 @@ class evaporationPot(object):
         #Rsdl = readnetcdf2('RSDLMaps', dateVar['currDate'], addZeros = True, meteo = True)
         Rsdl = readmeteodata('RSDLMaps', dateVar['currDate'], addZeros=True, mapsscale = self.model.data.grid.meteomapsscale)
         Rsdl = self.model.readmeteo_module.downscaling2(Rsdl)
-        # Conversion factor from [W] to [MJ]
-        WtoMJ = 86400 * 1E-6
-
-        # conversion from W/m2 to MJ/m2/day
-        Rsds = Rsds * WtoMJ
-        Rsdl = Rsdl * WtoMJ
-
-        Rsdl = self.model.data.to_HRU(data=Rsdl, fn=None)  # checked
-        Rsds = self.model.data.to_HRU(data=Rsds, fn=None)  # checked
-
-        # Up longwave radiation [MJ/m2/day]
-        RLN = RNUp - Rsdl
-        # RDL is stored on disk as W/m2 but converted in MJ/m2/s in readmeteo.py
 
         # TODO: Make albedo dynamic based on land type
         albedoLand = readnetcdf2('albedoLand', dateVar['currDate'], useDaily='month')
-        albedoLand = self.model.data.to_HRU(data=albedoLand, fn=None)  # checked
         albedoOpenWater = readnetcdf2('albedoWater', dateVar['currDate'], useDaily='month')
-        albedoOpenWater = self.model.data.to_HRU(data=albedoOpenWater, fn=None)  # checked
-        RNA = np.maximum(((1 - albedoLand) * Rsds - RLN) / LatHeatVap, 0.0)
-        RNAWater = np.maximum(((1 - albedoOpenWater) * Rsds - RLN) / LatHeatVap, 0.0)
-
-        VapPressDef = np.maximum(ESat - EAct, 0.0)
-        Delta = ((4098.0 * ESat) / ((Tavg + 237.3)**2))
-        # slope of saturated vapour pressure curve [mbar/deg C]
-        Psycon = 0.665E-3 * Psurf
-        del Psurf
-        # psychrometric constant [kPa C-1]
-        # http://www.fao.org/docrep/ X0490E/ x0490e07.htm  Equation 8
-        # see http://www.fao.org/docrep/X0490E/x0490e08.htm#penman%20monteith%20equation
 
         # wind speed maps at 10m [m/s]
         Wind = readmeteodata('WindMaps', dateVar['currDate'], addZeros=True, mapsscale = self.model.data.grid.meteomapsscale)
         Wind = self.model.readmeteo_module.downscaling2(Wind)
-        Wind = self.model.data.to_HRU(data=Wind, fn=None)  # checked
-
-        # Adjust wind speed for measurement height: wind speed measured at
-        # 10 m, but needed at 2 m height
-        # Shuttleworth, W.J. (1993) in Maidment, D.R. (1993), p. 4.36
-        Wind = Wind * 0.749
-
-        windpart = 900 * Wind / (Tavg + 273.16)
-        denominator = Delta + Psycon *(1 + 0.34 * Wind)
-        numerator1 = Delta / denominator
-        numerator2 = Psycon / denominator
 
-        del Wind
-
-        RNAN = RNA * numerator1
-        #RNANSoil = RNASoil * numerator1
-        RNANWater = RNAWater * numerator1
-
-        EA = windpart * VapPressDef * numerator2
-
-        # Potential evapo(transpi)ration is calculated for two reference surfaces:
-        # 1. Reference vegetation canopy
-        # 2. Open water surface
-        ETRef = (RNAN + EA) * 0.001
-        # potential reference evapotranspiration rate [m/day]  # from mm to m with 0.001
-        #self.var.ESRef = RNANSoil + EA
-        # potential evaporation rate from a bare soil surface [m/day]
-        EWRef = (RNANWater + EA) * 0.001
-        # potential evaporation rate from water surface [m/day]
-
-        # -> here we are at ET0 (see http://www.fao.org/docrep/X0490E/x0490e04.htm#TopOfPage figure 4:)
+        if self.var.ETRefNumba:
+            ETRef, EWRef = penman_monteith_numba(TMin, TMax, Tavg, Psurf, Qair, Rsds, Rsdl, albedoLand, albedoOpenWater, Wind, useHuss)
+        else:
+            ETRef, EWRef = penman_monteith(TMin, TMax, Tavg, Psurf, Qair, Rsds, Rsdl, albedoLand, albedoOpenWater, Wind, useHuss)
+        del TMin, TMax, Psurf, Qair, Rsds, Rsdl, Wind
 
         #self.var.sumETRef = self.var.sumETRef + self.var.ETRef*1000
 
@@ -259,4 +324,13 @@ class evaporationPot(object):
 
         #report(decompress(self.var.sumETRef), "C:\work\output2/sumetref.map")
 
-        return Tavg, ETRef, EWRef
\ No newline at end of file
+        # grid values are used directly by routing, small lakes and snow (if calculated on grid resolution)
+        self.model.data.grid.Tavg = Tavg
+        self.model.data.grid.ETRef = ETRef
+        self.model.data.grid.EWRef = EWRef
+
+        Tavg = self.model.data.to_HRU(data=Tavg, fn=None)  # checked
+        ETRef = self.model.data.to_HRU(data=ETRef, fn=None)  # checked
+        EWRef = self.model.data.to_HRU(data=EWRef, fn=None)  # checked
+
+        return Tavg, ETRef, EWRef
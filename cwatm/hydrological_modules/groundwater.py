@@ -111,7 +111,8 @@ class groundwater(object):
         self.var.storGroundwater = self.var.storGroundwater + self.var.sum_gwRecharge
 
         self.var.storGroundwater = self.var.storGroundwater - self.var.baseflow - self.var.capillar
-        assert (self.var.storGroundwater > 0).all()
+        if checkValidation():
+            assert (self.var.storGroundwater > 0).all()
 
         # PS: baseflow must be calculated at the end (to ensure the availability of storGroundwater to support nonFossilGroundwaterAbs)
 
@@ -1,7 +1,7 @@
 from math import isclose
 import numpy as np
 import os
-from cwatm.management_modules.data_handling import globals, cbinding, loadmap, returnBool
+from cwatm.management_modules.data_handling import globals, cbinding, loadmap, returnBool, checkValidation, timed
 from cwatm.hydrological_modules.groundwater_modflow.modflow_model import ModFlowSimulation
 import rasterio
 from cwatm.management_modules.data_handling import Flags
@@ -40,7 +40,8 @@ class groundwater_modflow:
             modflow_cell_area = self.modflow_cell_area.ravel()
             area = self.indices['area']
         variable[self.var.mask == 1] = 0
-        assert not (np.isnan(variable).any())
+        if checkValidation():
+            assert not (np.isnan(variable).any())
         array = (np.bincount(
             self.indices['ModFlow_index'],
             variable.ravel()[self.indices['CWatM_index']] * area,
@@ -51,7 +52,8 @@ class groundwater_modflow:
     def modflow2CWATM(self, variable, correct_boundary=False):
         variable = variable.copy()
         variable[self.modflow.basin == False] = 0  
-        assert not (np.isnan(variable).any())
+        if checkValidation():
+            assert not (np.isnan(variable).any())
         if correct_boundary:
             variable = variable / (self.modflow_cell_area_corrected / self.modflow_cell_area)
         cwatm_cell_area = self.var.cell_area_uncompressed.ravel()
@@ -80,6 +82,7 @@ class groundwater_modflow:
     def available_groundwater_m(self):
         return self.var.compress(self.modflow2CWATM(self.available_groundwater_m_modflow))
 
+    @timed
     def initial(self):
         modflow_directory = cbinding('PathGroundwaterModflow')
         self.modflow_resolution = int(cbinding('Modflow_resolution'))
@@ -227,20 +230,26 @@ class groundwater_modflow:
             f.write('date,mean_head,storage_change,recharge,abstraction,outflow\n')
 
 
+    @timed
     def dynamic(self, groundwater_recharge, groundwater_abstraction):
-        assert (groundwater_abstraction + 1e-7 >= 0).all()
+        # runtime checks and storage balance in this time step (see validationLevel)
+        validate = checkValidation()
+        if validate:
+            assert (groundwater_abstraction + 1e-7 >= 0).all()
         groundwater_abstraction[groundwater_abstraction < 0] = 0
-        assert (groundwater_recharge >= 0).all()
-        assert (groundwater_abstraction <= self.available_groundwater_m + 1e-7).all()
-
-        groundwater_storage_pre = np.nansum(self.total_groundwater_m_modflow * self.modflow_cell_area)
+        if validate:
+            assert (groundwater_recharge >= 0).all()
+            assert (groundwater_abstraction <= self.available_groundwater_m + 1e-7).all()
+            groundwater_storage_pre = np.nansum(self.total_groundwater_m_modflow * self.modflow_cell_area)
 
         groundwater_recharge_modflow = self.CWATM2modflow(self.var.decompress(groundwater_recharge, fillvalue=0))
-        assert isclose((groundwater_recharge * self.var.cellArea).sum(), np.nansum(groundwater_recharge_modflow * self.modflow_cell_area), rel_tol=1e-6)
+        if validate:
+            assert isclose((groundwater_recharge * self.var.cellArea).sum(), np.nansum(groundwater_recharge_modflow * self.modflow_cell_area), rel_tol=1e-6)
         self.modflow.set_recharge(groundwater_recharge_modflow)
         
         groundwater_abstraction_modflow = self.CWATM2modflow(self.var.decompress(groundwater_abstraction, fillvalue=0))
-        assert isclose((groundwater_abstraction * self.var.cellArea).sum(), np.nansum(groundwater_abstraction_modflow * self.modflow_cell_area), rel_tol=1e-6)
+        if validate:
+            assert isclose((groundwater_abstraction * self.var.cellArea).sum(), np.nansum(groundwater_abstraction_modflow * self.modflow_cell_area), rel_tol=1e-6)
         self.modflow.set_groundwater_abstraction(groundwater_abstraction_modflow)
 
         self.modflow.step()
@@ -253,19 +262,20 @@ class groundwater_modflow:
             self.model.data.modflow.head  - self.layer_boundaries[0] >= 0,
             (self.model.data.modflow.head  - self.layer_boundaries[0]) * self.coefficient * self.permeability[0],
         0)
-        assert (groundwater_outflow >= 0).all()
-        
-        groundwater_storage_post = np.nansum(self.total_groundwater_m_modflow * self.modflow_cell_area)
-        storage_change = (groundwater_storage_post - groundwater_storage_pre)
-        outflow = np.nansum(groundwater_abstraction_modflow * self.modflow_cell_area) + (groundwater_outflow * self.modflow_cell_area).sum()
-        inflow = np.nansum(groundwater_recharge_modflow * self.modflow_cell_area)
-        with open(self.modflow_test, 'a') as f:
-            f.write(f'{globals.dateVar["currDate"].strftime()}{np.nanmean(self.model.data.modflow.head )},{storage_change},{np.nansum(groundwater_recharge_modflow * self.modflow_resolution ** 2)},{np.nansum(groundwater_abstraction_modflow * self.modflow_resolution ** 2)},{(groundwater_outflow * self.modflow_resolution ** 2).sum()}\n')
-        if not isclose(storage_change, inflow - outflow, rel_tol=0.02) and not isclose(storage_change, inflow - outflow, abs_tol=10_000_000):
-            print('modflow discrepancy', storage_change, inflow - outflow)
+        if validate:
+            assert (groundwater_outflow >= 0).all()
+            groundwater_storage_post = np.nansum(self.total_groundwater_m_modflow * self.modflow_cell_area)
+            storage_change = (groundwater_storage_post - groundwater_storage_pre)
+            outflow = np.nansum(groundwater_abstraction_modflow * self.modflow_cell_area) + (groundwater_outflow * self.modflow_cell_area).sum()
+            inflow = np.nansum(groundwater_recharge_modflow * self.modflow_cell_area)
+            with open(self.modflow_test, 'a') as f:
+                f.write(f'{globals.dateVar["currDate"].strftime()}{np.nanmean(self.model.data.modflow.head )},{storage_change},{np.nansum(groundwater_recharge_modflow * self.modflow_resolution ** 2)},{np.nansum(groundwater_abstraction_modflow * self.modflow_resolution ** 2)},{(groundwater_outflow * self.modflow_resolution ** 2).sum()}\n')
+            if not isclose(storage_change, inflow - outflow, rel_tol=0.02) and not isclose(storage_change, inflow - outflow, abs_tol=10_000_000):
+                print('modflow discrepancy', storage_change, inflow - outflow)
 
         groundwater_outflow_cwatm = self.var.compress(self.modflow2CWATM(groundwater_outflow, correct_boundary=True))
-        assert isclose((groundwater_outflow_cwatm * self.var.cellArea).sum(), (groundwater_outflow * self.modflow_cell_area).sum(), rel_tol=0.0001)
+        if validate:
+            assert isclose((groundwater_outflow_cwatm * self.var.cellArea).sum(), (groundwater_outflow * self.modflow_cell_area).sum(), rel_tol=0.0001)
 
         self.var.capillar = groundwater_outflow_cwatm * (1 - self.var.channel_ratio)
         self.var.baseflow = groundwater_outflow_cwatm * self.var.channel_ratio
@@ -274,4 +284,5 @@ class groundwater_modflow:
         self.model.data.HRU.capriseindex = self.model.data.to_HRU(data=self.var.compress(
             self.modflow2CWATM((groundwater_outflow > 0).astype(np.float32), correct_boundary=False)
         ), fn=None)
-        assert (self.model.data.HRU.capriseindex >= 0).all() and (self.model.data.HRU.capriseindex <= 1).all()
+        if validate:
+            assert (self.model.data.HRU.capriseindex >= 0).all() and (self.model.data.HRU.capriseindex <= 1).all()
@@ -40,6 +40,7 @@ class inflow(object):
         self.var = model.data.grid
         self.model = model
 
+    @timed
     def initial(self):
         """
         Initial part of the inflow module
@@ -159,6 +160,7 @@ class inflow(object):
 
 
 
+    @timed
     def dynamic(self):
         """
         Dynamic part of the inflow module
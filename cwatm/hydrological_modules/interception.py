@@ -9,7 +9,7 @@
 # -------------------------------------------------------------------------
 
 from cwatm.management_modules import globals
-from cwatm.management_modules.data_handling import loadmap, readnetcdf2, divideValues, checkOption
+from cwatm.management_modules.data_handling import loadmap, readnetcdf2, divideValues, checkOption, checkValidation, timed
 import numpy as np
 
 class interception(object):
@@ -43,6 +43,7 @@ class interception(object):
         self.var = model.data.HRU
         self.model = model
 
+    @timed
     def initial(self):
         self.var.minInterceptCap = self.var.full_compressed(np.nan, dtype=np.float32)
         self.var.interceptStor = self.var.full_compressed(np.nan, dtype=np.float32)
@@ -50,12 +51,13 @@ class interception(object):
         self.var.interceptStor = self.model.data.HRU.load_initial("interceptStor", default=self.model.data.HRU.full_compressed(0, dtype=np.float32))
 
         for coverNum, coverType in enumerate(self.model.coverTypes):
-            coverType_indices = np.where(self.var.land_use_type == coverNum)
+            coverType_indices = self.var.land_use_indices[coverNum]
             self.var.minInterceptCap[coverType_indices] = self.model.data.to_HRU(data=loadmap(coverType + "_minInterceptCap"), fn=None)
         
         assert not np.isnan(self.var.interceptStor).any()
         assert not np.isnan(self.var.minInterceptCap).any()
 
+    @timed
     def dynamic(self, potTranspiration):
         """
         Dynamic part of the interception module
@@ -67,12 +69,15 @@ class interception(object):
 
         """
 
-        if checkOption('calcWaterBalance'):
+        # runtime checks and water balance check in this time step (see validationLevel)
+        validate = checkValidation()
+        balanceCheck = checkOption('calcWaterBalance') and validate
+        if balanceCheck:
             interceptStor_pre = self.var.interceptStor.copy()
 
         interceptCap = self.var.full_compressed(np.nan, dtype=np.float32)
         for coverNum, coverType in enumerate(self.model.coverTypes):
-            coverType_indices = np.where(self.var.land_use_type == coverNum)
+            coverType_indices = self.var.land_use_indices[coverNum]
             if coverType in ('forest', 'grassland'):
                 covertype_interceptCapNC = readnetcdf2(coverType + '_interceptCapNC', globals.dateVar['10day'], "10day")
                 covertype_interceptCapNC = self.model.data.to_HRU(data=covertype_interceptCapNC, fn=None)  # checked
@@ -80,7 +85,8 @@ class interception(object):
             else:
                 interceptCap[coverType_indices] = self.var.minInterceptCap[coverType_indices]
         
-        assert not np.isnan(interceptCap).any()
+        if validate:
+            assert not np.isnan(interceptCap).any()
 
         # Rain instead Pr, because snow is substracted later
         # assuming that all interception storage is used the other time step
@@ -92,9 +98,9 @@ class interception(object):
         # availWaterInfiltration Available water for infiltration: throughfall + snow melt
         self.var.natural_available_water_infiltration = np.maximum(0.0, throughfall + self.var.SnowMelt)
 
-        sealed_area = np.where(self.var.land_use_type == 4)
-        water_area = np.where(self.var.land_use_type == 5)
-        bio_area = np.where(self.var.land_use_type < 4)  # 'forest', 'grassland', 'irrPaddy', 'irrNonPaddy'
+        sealed_area = self.var.land_use_indices['sealed']
+        water_area = self.var.land_use_indices['water']
+        bio_area = self.var.land_use_indices['bioarea']  # 'forest', 'grassland', 'irrPaddy', 'irrNonPaddy'
 
         self.var.interceptEvap = self.var.full_compressed(np.nan, dtype=np.float32)
         # interceptEvap evaporation from intercepted water (based on potTranspiration)
@@ -118,7 +124,7 @@ class interception(object):
         # interceptEvap is the first flux in ET, soil evapo and transpiration are added later
         self.var.actualET = self.var.interceptEvap + self.var.snowEvap
 
-        if checkOption('calcWaterBalance'):
+        if balanceCheck:
             self.model.waterbalance_module.waterBalanceCheck(
                 how='cellwise',
                 influxes=[self.var.Rain, self.var.SnowMelt],  # In
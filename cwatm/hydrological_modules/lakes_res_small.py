@@ -68,6 +68,7 @@ class lakes_res_small(object):
         self.var = model.data.grid
         self.model = model
 
+    @timed
     def initial(self):
         """
         Initialize small lakes and reservoirs
@@ -146,6 +147,7 @@ class lakes_res_small(object):
 
 
 
+    @timed
     def dynamic(self):
         """
         Dynamic part to calculate outflow from small lakes and reservoirs
@@ -158,6 +160,9 @@ class lakes_res_small(object):
         :return: outflow in m3 to the network
         """
 
+        # water balance check in this time step (see validationLevel)
+        balanceCheck = checkOption('calcWaterBalance') and checkValidation()
+
         def dynamic_smalllakes(inflow):
             """
             Lake routine to calculate lake outflow
@@ -170,7 +175,7 @@ class lakes_res_small(object):
             # ************************************************************
 
 
-            if checkOption('calcWaterBalance'):
+            if balanceCheck:
                 self.var.preSmalllakeStorage = self.var.smalllakeStorage.copy()
 
             #if (dateVar['curr'] == 998):
@@ -213,7 +218,7 @@ class lakes_res_small(object):
             self.var.smalllakeLevel = divideValues(self.var.smalllakeVolumeM3, self.var.smalllakeArea)
 
 
-            if checkOption('calcWaterBalance'):
+            if balanceCheck:
                 self.var.waterbalance_module.waterBalanceCheck(
                     [self.var.smallLakeIn],  # In
                     [QsmallLakeOut / self.var.cellArea ,self.var.smallevapWaterBody ]  ,  # Out
@@ -275,7 +280,7 @@ class lakes_res_small(object):
             # ------------------------------------------------------------
             #report(decompress(runoff_LR), "C:\work\output3/run.map")
 
-            if checkOption('calcWaterBalance'):
+            if balanceCheck:
                 self.var.waterbalance_module.waterBalanceCheck(
                     [self.var.smallLakeIn],  # In
                     [self.var.smallLakeout,  self.var.smallevapWaterBody],  # Out
@@ -10,12 +10,50 @@
 
 from numpy import dtype
 import rasterio
+import scipy.sparse
 from cwatm.management_modules.data_handling import *
 from cwatm.hydrological_modules.routing_reservoirs.routing_sub import *
 
 from cwatm.management_modules.globals import *
 
 
+def lake_operators(waterBodyID, decompress_LR, downstruct, downstruct_LR):
+    """
+    Sparse operators (CSR) to move water between the cells and the lakes/reservoirs in the routing substeps.
+    Row/column l of the operators is the l-th lake/reservoir outlet in compressed order (decompress_LR)
+
+    :param waterBodyID: lake/reservoir ID of each cell, 0 = no water body
+    :param decompress_LR: index of the outlet cell of each lake/reservoir
+    :param downstruct: downstream cell of each cell (number of cells for pits)
+    :param downstruct_LR: downstream cell of each cell of the river network without lakes/reservoirs
+    :return: cell2lake: sum of all cells of a lake at its outlet (npareatotal at the outlet)
+    :return: lake2cell: lake value spread to all cells of the lake
+    :return: upstream2lake: discharge of the river network without lakes flowing into a lake
+    :return: lake2ldd: outflow of a lake to the downstream cell, if this is not part of a lake
+    :return: lake2lake: outflow of a lake to the outlet of a downstream lake
+    """
+
+    ncells = waterBodyID.size
+    nlakes = decompress_LR.size
+    lakeIndex = np.full(waterBodyID.max() + 1, -1, dtype=np.int64)
+    lakeIndex[waterBodyID[decompress_LR]] = np.arange(nlakes)
+    cellLake = lakeIndex[waterBodyID]
+    cells = np.nonzero(cellLake >= 0)[0]
+    cell2lake = scipy.sparse.csr_matrix((np.ones(cells.size), (cellLake[cells], cells)), shape=(nlakes, ncells))
+    lake2cell = cell2lake.T.tocsr()
+    downLake = np.append(cellLake, -1)[downstruct_LR]
+    cells = np.nonzero(downLake >= 0)[0]
+    upstream2lake = scipy.sparse.csr_matrix((np.ones(cells.size), (downLake[cells], cells)), shape=(nlakes, ncells))
+    # outflow either goes to the river network or into another lake
+    downOut = downstruct[decompress_LR]
+    lakes = np.nonzero(downOut < ncells)[0]
+    lake2down = scipy.sparse.csr_matrix((np.ones(lakes.size), (downOut[lakes], lakes)), shape=(ncells, nlakes))
+    isLake = scipy.sparse.diags((waterBodyID > 0).astype(np.float64))
+    lake2ldd = (lake2down - isLake @ lake2down).tocsr()
+    lake2lake = (cell2lake @ isLake @ lake2down).tocsr()
+    return cell2lake, lake2cell, upstream2lake, lake2ldd, lake2lake
+
+
 class lakes_reservoirs(object):
     """
     LAKES AND RESERVOIRS
@@ -172,6 +210,7 @@ class lakes_reservoirs(object):
         self.var = model.data.grid
         self.model = model
 
+    @timed
     def initWaterbodies(self):
         """
         Initialize water bodies
@@ -244,7 +283,9 @@ class lakes_reservoirs(object):
 
             # create new ldd without lakes reservoirs
             self.var.lddCompress_LR, dirshort_LR, self.var.dirUp_LR, self.var.dirupLen_LR, self.var.dirupID_LR, \
-                self.var.downstruct_LR, self.var.catchment_LR, self.var.dirDown_LR, self.var.lendirDown_LR = defLdd2(self.var.ldd_LR)
+                self.var.downstruct_LR, self.var.catchment_LR, self.var.dirDown_LR, self.var.lendirDown_LR = defLdd2(self.var.ldd_LR, self.var.routingNumba)
+            if self.var.routingNumba:
+                self.var.kinOrder_LR, self.var.kinLevelStart_LR = kinematic_levels(self.var.dirDown_LR, self.var.dirupLen_LR, self.var.dirupID_LR)
 
             #report(ldd(decompress(self.var.lddCompress_LR)), "C:\work\output3/ldd_lr.map")
 
@@ -254,6 +295,10 @@ class lakes_reservoirs(object):
             self.var.decompress_LR = np.nonzero(self.var.waterBodyOut)[0]
             self.var.waterBodyOutC = np.compress(self.var.compress_LR, self.var.waterBodyOut)
 
+            # sparse operators for the routing substeps, so lake inflow and outflow is moved without full-grid passes
+            self.var.cell2lake_LR, self.var.lake2cell_LR, self.var.upstream2lake_LR, self.var.lake2ldd_LR, self.var.lake2lake_LR = \
+                lake_operators(self.var.waterBodyID, self.var.decompress_LR, self.var.downstruct, self.var.downstruct_LR)
+
             # year when the reservoirs is operating
             self.var.resYear = loadmap('waterBodyYear')
             self.var.resYearC = np.compress(self.var.compress_LR, self.var.resYear)
@@ -322,6 +367,7 @@ class lakes_reservoirs(object):
             self.var.reslakeoutflow = globals.inZero.copy()
             self.var.lakeVolume = globals.inZero.copy()
             self.var.outLake = self.var.load_initial("outLake")
+            self.var.outLakeC = np.compress(self.var.compress_LR, self.var.outLake)
 
             self.var.lakeStorage = globals.inZero.copy()
             self.var.lakeInflow = globals.inZero.copy()
@@ -339,6 +385,7 @@ class lakes_reservoirs(object):
                 self.var.lakedaycorrect = globals.inZero.copy()
 
 
+    @timed
     def initial_lakes(self):
         """
         Initial part of the lakes module
@@ -385,6 +432,7 @@ class lakes_reservoirs(object):
         self.var.lakeLevelC = self.var.lakeVolumeM3C / self.var.lakeAreaC
 
 
+    @timed
     def initial_reservoirs(self):
         """
         Initial part of the reservoir module
@@ -421,6 +469,7 @@ class lakes_reservoirs(object):
         np.put(self.var.lakeStorage, self.var.decompress_LR, self.var.lakeStorageC)
         np.put(self.var.resStorage, self.var.decompress_LR, self.var.resStorageC)
 
+    @timed
     def dynamic(self):
         """
         Dynamic part set lakes and reservoirs for each year
@@ -450,6 +499,31 @@ class lakes_reservoirs(object):
             self.var.sumlakeResOutflow = 0
 
 
+    @timed
+    def outflow_inloop(self, outflowC, NoRoutingExecuted):
+        """
+        Moves the outflow of lakes and reservoirs of a routing substep one cell downstream:
+        to the river network or to the outlet of another lake (added to its inflow in the next substep)
+        outLake is written at the last substep
+
+        :param outflowC: outflow of lakes and reservoirs [m3] (compressed)
+        :param NoRoutingExecuted: actual number of routing substep
+        :return: lakeResOutflowDis: outflow [m3/s] on all cells of a lake, outLdd: outflow in m3 to the network
+        """
+
+        np.put(self.var.reslakeoutflow,self.var.decompress_LR,outflowC)
+        lakeResOutflowDis = (self.var.lake2cell_LR @ outflowC) / (self.model.DtSec / self.var.noRoutingSteps)
+        # shift outflow 1 cell downstream
+        # everything with is not going to another lake is output to river network
+        outLdd = self.var.lake2ldd_LR @ outflowC
+        # everything what is not going to the network is going to another lake
+        # sum up all inflow from other lakes at the outflow point
+        self.var.outLakeC = self.var.lake2lake_LR @ outflowC
+        if self.var.noRoutingSteps == (NoRoutingExecuted + 1):
+            self.var.outLake = np.zeros_like(self.var.reslakeoutflow)
+            np.put(self.var.outLake, self.var.decompress_LR, self.var.outLakeC)
+        return lakeResOutflowDis, outLdd
+
     def dynamic_inloop(self, NoRoutingExecuted):
         """
         Dynamic part to calculate outflow from lakes and reservoirs
@@ -461,6 +535,9 @@ class lakes_reservoirs(object):
             outflow to adjected lakes and reservoirs is calculated separately
         """
 
+        # water balance check in this time step (see validationLevel)
+        balanceCheck = checkOption('calcWaterBalance') and checkValidation()
+
         def dynamic_inloop_lakes(inflowC, NoRoutingExecuted):
             """
             Lake routine to calculate lake outflow
@@ -473,7 +550,7 @@ class lakes_reservoirs(object):
             # ***** LAKE
             # ************************************************************
 
-            if checkOption('calcWaterBalance'):
+            if balanceCheck:
             #    ii = 3
                 oldlake = self.var.lakeStorageC.copy()
 
@@ -530,7 +607,7 @@ class lakes_reservoirs(object):
             if self.var.noRoutingSteps == (NoRoutingExecuted + 1):
                 np.put(self.var.lakeStorage, self.var.decompress_LR, self.var.lakeStorageC)
 
-            if checkOption('calcWaterBalance'):
+            if balanceCheck:
                 self.model.waterbalance_module.waterBalanceCheck(
                     influxes=[self.var.lakeIn],  # In [m3/s]
                     outfluxes=[self.var.lakeOutflowC ,self.var.lakeEvapWaterBodyC /self.var.dtRouting]  ,  # Out  self.var.evapWaterBodyC
@@ -540,7 +617,7 @@ class lakes_reservoirs(object):
                     tollerance=1e-7
                 )
 
-            if checkOption('calcWaterBalance'):
+            if balanceCheck:
                 np.put(self.var.lakedaycorrect, self.var.decompress_LR, lakedaycorrectC)
                 self.model.waterbalance_module.waterBalanceCheck(
                     influxes=[inflowC / self.var.dtRouting  ],  # In [m3/s]
@@ -550,7 +627,7 @@ class lakes_reservoirs(object):
                     name="lake2",
                     tollerance=1e-7)
 
-            if checkOption('calcWaterBalance'):
+            if balanceCheck:
                 self.model.waterbalance_module.waterBalanceCheck(
                     influxes=[inflowC],  # In [m3/s]
                     outfluxes=[QLakeOutM3DtC ,self.var.lakeEvapWaterBodyC, lakedaycorrectC]  ,  # Out  self.var.evapWaterBodyC
@@ -578,7 +655,7 @@ class lakes_reservoirs(object):
             # ***** Reservoirs
             # ************************************************************
 
-            if checkOption('calcWaterBalance'):
+            if balanceCheck:
                 oldres = self.var.reservoirStorageM3C.copy()
 
             # QResInM3Dt = inflowC
@@ -592,7 +669,7 @@ class lakes_reservoirs(object):
             self.var.reservoirStorageM3C = self.var.reservoirStorageM3C - self.var.resEvapWaterBodyC
 
             reservoirOutflow = np.zeros(self.var.waterBodyIDC.size, dtype=np.float64)
-            reservoirOutflow[[self.var.waterBodyTypC == 2]] = self.model.agents.reservoir_operators.regulate_reservoir_outflow(
+            reservoirOutflow[self.var.waterBodyTypC == 2] = self.model.agents.reservoir_operators.regulate_reservoir_outflow(
                 self.var.reservoirStorageM3C[self.var.waterBodyTypC == 2],
                 inflowC[self.var.waterBodyTypC == 2],
                 self.var.waterBodyIDC[self.var.waterBodyTypC == 2]
@@ -619,7 +696,7 @@ class lakes_reservoirs(object):
                 np.put(self.var.reservoirStorage, self.var.decompress_LR, self.var.reservoirStorageM3C)
 
 
-            if checkOption('calcWaterBalance'):
+            if balanceCheck:
                 self.model.waterbalance_module.waterBalanceCheck(
                     influxes=[inflowC /self.var.dtRouting],  # In
                     outfluxes=[qResOutM3DtC /self.var.dtRouting ,self.var.resEvapWaterBodyC /self.var.dtRouting]  ,  # Out  self.var.evapWaterBodyC
@@ -634,7 +711,7 @@ class lakes_reservoirs(object):
         # ---------------------------------------------------------------------------------------------
         # lake and reservoirs
 
-        if checkOption('calcWaterBalance'):
+        if balanceCheck:
             prereslake = self.var.lakeResStorageC.copy()
             prelake = self.var.lakeStorageC.copy()
 
@@ -648,26 +725,14 @@ class lakes_reservoirs(object):
         # outflow lakes res -> inflow ldd_LR
         # 1. out = upstream1(self_.var.downstruct, self_.var.outflow)
 
-        # collect discharge from above waterbodies
-        dis_LR = upstream1(self.var.downstruct_LR, self.var.discharge)
-        # only where lakes are and unit convered to [m]
-        dis_LR = np.where(self.var.waterBodyID > 0, dis_LR, 0.) * self.model.DtSec
-
-        # sum up runoff and discharge on the lake
-        inflow = npareatotal(dis_LR + self.var.runoff * self.var.cellArea , self.var.waterBodyID)
-
-        # only once at the outlet
-        inflow = np.where(self.var.waterBodyOut > 0, inflow, 0.) / self.var.noRoutingSteps + self.var.outLake
+        # calculate total inflow into lakes at the waterbodie outflow point (compressed)
+        # inflow to lake is discharge from upstream network + runoff directly into lake + outflow from upstream lakes
+        inflowC = self.var.upstream2lake_LR @ (self.var.discharge * self.model.DtSec) + self.var.cell2lake_LR @ (self.var.runoff * self.var.cellArea)
+        inflowC = inflowC / self.var.noRoutingSteps + self.var.outLakeC
 
         if checkOption('inflow'):
             # if inflow ( from module inflow) goes to a lake this is not counted, because lakes,reservoirs are dislinked from the network
-            inflow2basin = npareatotal(self.var.inflowDt, self.var.waterBodyID)
-            inflow2basin = np.where(self.var.waterBodyOut > 0, inflow2basin, 0.)
-            inflow = inflow + inflow2basin
-
-        # calculate total inflow into lakes and compress it to waterbodie outflow point
-        # inflow to lake is discharge from upstream network + runoff directly into lake + outflow from upstream lakes
-        inflowC = np.compress(self.var.compress_LR, inflow)
+            inflowC = inflowC + self.var.cell2lake_LR @ self.var.inflowDt
 
         # ------------------------------------------------------------
         outflowLakesC = dynamic_inloop_lakes(inflowC, NoRoutingExecuted)
@@ -709,20 +774,8 @@ class lakes_reservoirs(object):
 
         # ------------------------------------------------------------
 
-        np.put(self.var.reslakeoutflow,self.var.decompress_LR,outflowC)
-        lakeResOutflowDis = npareatotal(self.var.reslakeoutflow, self.var.waterBodyID) / (self.model.DtSec / self.var.noRoutingSteps)
-        # shift outflow 1 cell downstream
-        out1 = upstream1(self.var.downstruct, self.var.reslakeoutflow)
-        # everything with is not going to another lake is output to river network
-        outLdd = np.where(self.var.waterBodyID > 0, 0, out1)
-
-        # everything what is not going to the network is going to another lake
-        outLake1 = np.where(self.var.waterBodyID > 0, out1,0)
-        # sum up all inflow from other lakes
-        outLakein = npareatotal(outLake1, self.var.waterBodyID)
-        # use only the value of the outflow point
-        self.var.outLake = np.where(self.var.waterBodyOut > 0, outLakein, 0.)
-        if self.var.noRoutingSteps == (NoRoutingExecuted + 1) and checkOption('calcWaterBalance'):
+        lakeResOutflowDis, outLdd = self.outflow_inloop(outflowC, NoRoutingExecuted)
+        if self.var.noRoutingSteps == (NoRoutingExecuted + 1) and balanceCheck:
             self.model.waterbalance_module.waterBalanceCheck(
                 how='cellwise',
                 influxes=[inflowCorrC],                   # In
@@ -14,11 +14,12 @@ try:
 except (ModuleNotFoundError, ImportError):
     pass
 import pandas as pd
-from numba import njit
+from numba import njit, prange
 import calendar
 from datetime import datetime
 from cwatm.management_modules import globals
-from cwatm.management_modules.data_handling import checkOption, readnetcdf2, returnBool, cbinding, binding, loadmap, divideValues
+from cwatm.management_modules.data_handling import checkOption, checkValidation, readnetcdf2, returnBool, cbinding, binding, loadmap, divideValues, timed
+from cwatm.hydrological_modules.soil import kUnSat_vanGenuchten
 
 
 @njit
@@ -26,8 +27,19 @@ def interpolate_kc(stage_start, stage_end, crop_progress, stage_start_kc, stage_
     stage_progress = (crop_progress - stage_start) / (stage_end - stage_start)
     return (stage_end_kc - stage_start_kc) * stage_progress + stage_start_kc
 
-@njit
-def get_crop_kc(crop_map, crop_age_days_map, crop_harvest_age_days_map, crop_stage_data, kc_crop_stage):
+crop_parameters_dtype = np.dtype([
+    ('L_ini', np.float32), ('L_dev', np.float32), ('L_mid', np.float32), ('L_late', np.float32),
+    ('kc_ini', np.float32), ('kc_mid', np.float32), ('kc_end', np.float32)
+])
+
+@njit(parallel=True)
+def get_crop_kc(crop_map, crop_age_days_map, crop_harvest_age_days_map, crop_parameters, cropped):
+    """
+    crop factor of the HRUs with a crop, all other HRUs are nan
+
+    :param crop_parameters: stage lengths and crop factors of each crop (crop_parameters_dtype)
+    :param cropped: indices of the HRUs which can have a crop, only these are calculated (in parallel)
+    """
     shape = crop_map.shape
     crop_map = crop_map.ravel()
     crop_age_days_map = crop_age_days_map.ravel()
@@ -35,38 +47,85 @@ def get_crop_kc(crop_map, crop_age_days_map, crop_harvest_age_days_map, crop_sta
     
     kc = np.full(crop_map.size, np.nan, dtype=np.float32)
 
-    for i in range(crop_map.size):
+    # crops beyond the harvest age (stage > 3), checked after the loop
+    invalid_stage = 0
+    for j in prange(cropped.size):
+        i = cropped[j]
         crop = crop_map[i]
         if crop != -1:
+            parameters = crop_parameters[crop]
             age_days = crop_age_days_map[i]
             harvest_day = crop_harvest_age_days_map[i]
             crop_progress = age_days / harvest_day
-            stage = np.searchsorted(crop_stage_data[crop], crop_progress, side='left')
+            # same as np.searchsorted(stages, crop_progress, side='left')
+            stage = (parameters.L_ini < crop_progress) + (parameters.L_dev < crop_progress) + (parameters.L_mid < crop_progress) + (parameters.L_late < crop_progress)
             if stage == 0:
-                field_kc = kc_crop_stage[crop, 0]
+                field_kc = parameters.kc_ini
             elif stage == 1:
                 field_kc = interpolate_kc(
-                    stage_start=crop_stage_data[crop, 0],
-                    stage_end=crop_stage_data[crop, 1],
+                    stage_start=parameters.L_ini,
+                    stage_end=parameters.L_dev,
                     crop_progress=crop_progress,
-                    stage_start_kc=kc_crop_stage[crop, 0],
-                    stage_end_kc=kc_crop_stage[crop, 1]
+                    stage_start_kc=parameters.kc_ini,
+                    stage_end_kc=parameters.kc_mid
                 )
             elif stage == 2:
-                field_kc = kc_crop_stage[crop, 1]
+                field_kc = parameters.kc_mid
             else:
-                assert stage == 3
+                invalid_stage += stage > 3
                 field_kc = interpolate_kc(
-                    stage_start=crop_stage_data[crop, 2],
+                    stage_start=parameters.L_mid,
                     stage_end=1,
                     crop_progress=crop_progress,
-                    stage_start_kc=kc_crop_stage[crop, 1],
-                    stage_end_kc=kc_crop_stage[crop, 2]
+                    stage_start_kc=parameters.kc_mid,
+                    stage_end_kc=parameters.kc_end
                 )
             kc[i] = field_kc
+    assert invalid_stage == 0
     return kc.reshape(shape)
 
 
+def waterbody_storage_m(grid):
+    """
+    Storage of the lakes and reservoirs in meter on all cells of the lake/reservoir.
+    The storage is stored at the outlet of each lake/reservoir (decompress_LR), the sparse operators from
+    lakes_reservoirs.initWaterbodies sum up the lake cells at the outlet (cell2lake_LR) and spread it back (lake2cell_LR)
+
+    :param grid: grid data with the lake/reservoir storage and the lake operators
+    :return: lake storage [m], reservoir storage [m]
+    """
+
+    waterBodyTypOutC = grid.waterBodyTypTemp[grid.decompress_LR]
+    isLakeC = (waterBodyTypOutC == 1).astype(np.float64)  # this is a lake
+    isResC = ((waterBodyTypOutC != 0) & (waterBodyTypOutC != 1)).astype(np.float64)  # this is a reservoir
+    # computing the lake/reservoir area, required to keep mass balance rigth
+    area_storC = grid.cell2lake_LR @ grid.cellArea
+
+    # computing the lake/reservoir storage in meter and put this value in each cell including the lake/reservoir
+    lakestor_id = np.copy(grid.lakeStorage)
+    lakecells = (grid.lake2cell_LR @ isLakeC) > 0
+    lakestor_id[lakecells] = (grid.lake2cell_LR @ (isLakeC * grid.lakeStorage[grid.decompress_LR] / area_storC))[lakecells]  # in meter
+    resstor_id = np.copy(grid.resStorage)
+    rescells = (grid.lake2cell_LR @ isResC) > 0
+    resstor_id[rescells] = (grid.lake2cell_LR @ (isResC * grid.resStorage[grid.decompress_LR] / area_storC))[rescells]  # in meter
+    return lakestor_id, resstor_id
+
+
+def waterbody_leakage_m3(grid, lakebedExchangeM):
+    """
+    Converting the lake/reservoir leakage from meter to cubic meter and put this value in the cell corresponding to the outlet.
+    Lakes without storage have no leakage (limited by the storage), it goes to the outlet as well
+
+    :param grid: grid data with the lake operators
+    :param lakebedExchangeM: leakage of each cell [m]
+    :return: leakage at the outlet of the lakes/reservoirs [m3]
+    """
+
+    lakebedExchangeM3 = np.zeros(grid.compressed_size, dtype=np.float32)
+    lakebedExchangeM3[grid.decompress_LR] = grid.cell2lake_LR @ (lakebedExchangeM * grid.cellArea)  # in m3
+    return lakebedExchangeM3
+
+
 class landcoverType(object):
 
     """
@@ -194,6 +253,7 @@ class landcoverType(object):
         self.model = model
         self.farmers = model.agents.farmers
 
+    @timed
     def initial(self, ElevationStD, soildepth):
         """
         Initial part of the land cover type module
@@ -222,7 +282,7 @@ class landcoverType(object):
         maxRootDepth = self.var.full_compressed(np.nan, dtype=np.float32)
         soildepth_factor = loadmap('soildepth_factor')
         for coverNum, coverType in enumerate(self.model.coverTypes[:4]):
-            land_use_indices = np.where(self.var.land_use_type == coverNum)
+            land_use_indices = self.var.land_use_indices[coverNum]
             rootFraction1[land_use_indices] = self.model.data.to_HRU(data=loadmap(coverType + "_rootFraction1"), fn=None)[land_use_indices]
             maxRootDepth[land_use_indices] = self.model.data.to_HRU(data=loadmap(coverType + "_maxRootDepth") * soildepth_factor, fn=None)[land_use_indices]
 
@@ -230,7 +290,7 @@ class landcoverType(object):
         rootDepth2 = self.var.full_compressed(np.nan, dtype=np.float32)
         rootDepth3 = self.var.full_compressed(np.nan, dtype=np.float32)
         for coverNum, coverType in enumerate(self.model.coverTypes[:4]):
-            land_use_indices = np.where(self.var.land_use_type == coverNum)
+            land_use_indices = self.var.land_use_indices[coverNum]
             # calculate rootdepth for each soillayer and each land cover class
             rootDepth1[land_use_indices] = soildepth[0][land_use_indices]  # 0.05 m
             if coverNum in (0, 2, 3):  # forest, paddy irrigated, non-paddy irrigated
@@ -262,7 +322,7 @@ class landcoverType(object):
         thetar3 = self.var.full_compressed(np.nan, dtype=np.float32)
 
         for coverNum, coverType in enumerate(self.model.coverTypes[:4]):
-            land_use_indices = np.where(self.var.land_use_type == coverNum)
+            land_use_indices = self.var.land_use_indices[coverNum]
             # for forest there is a special map, for the other land use types the same map is used
             if coverType == 'forest':
                 pre = "forest_"
@@ -284,7 +344,15 @@ class landcoverType(object):
             thetar1[land_use_indices] = self.model.data.to_HRU(data=loadmap(pre + "thetar1"), fn=None)[land_use_indices]  # checked
             thetar2[land_use_indices] = self.model.data.to_HRU(data=loadmap(pre + "thetar2"), fn=None)[land_use_indices]  # checked
             thetar3[land_use_indices] = self.model.data.to_HRU(data=loadmap(pre + "thetar3"), fn=None)[land_use_indices]  # checked
-            
+
+        # van Genuchten exponent m = lambda / (lambda + 1) and 1 / m, these do not change during the run
+        self.var.genuM1 = self.var.lambda1 / (self.var.lambda1 + 1)
+        self.var.genuM2 = self.var.lambda2 / (self.var.lambda2 + 1)
+        self.var.genuM3 = self.var.lambda3 / (self.var.lambda3 + 1)
+        self.var.genuInvM1 = 1 / self.var.genuM1
+        self.var.genuInvM2 = 1 / self.var.genuM2
+        self.var.genuInvM3 = 1 / self.var.genuM3
+
         self.var.wwp1 = self.var.full_compressed(np.nan, dtype=np.float32)
         self.var.wwp2 = self.var.full_compressed(np.nan, dtype=np.float32)
         self.var.wwp3 = self.var.full_compressed(np.nan, dtype=np.float32)
@@ -304,7 +372,7 @@ class landcoverType(object):
         self.var.kunSatFC23 = self.var.full_compressed(np.nan, dtype=np.float32)
 
         for coverNum, coverType in enumerate(self.model.coverTypes[:4]):
-            land_use_indices = np.where(self.var.land_use_type == coverNum)
+            land_use_indices = self.var.land_use_indices[coverNum]
             self.var.ws1[land_use_indices] = thetas1[land_use_indices] * rootDepth1[land_use_indices]
             self.var.ws2[land_use_indices] = thetas2[land_use_indices] * rootDepth2[land_use_indices]
             self.var.ws3[land_use_indices] = thetas3[land_use_indices] * rootDepth3[land_use_indices]
@@ -314,21 +382,21 @@ class landcoverType(object):
             self.var.wres3[land_use_indices] = thetar3[land_use_indices] * rootDepth3[land_use_indices]
 
             # Soil moisture at field capacity (pF2, 100 cm) [mm water slice]    # Mualem equation (van Genuchten, 1980)
-            self.var.wfc1[land_use_indices] = self.var.wres1[land_use_indices] + (self.var.ws1[land_use_indices] - self.var.wres1[land_use_indices]) / ((1 + (alpha1[land_use_indices] * 100) ** (self.var.lambda1[land_use_indices] + 1)) ** (self.var.lambda1[land_use_indices] / (self.var.lambda1[land_use_indices] + 1)))
-            self.var.wfc2[land_use_indices] = self.var.wres2[land_use_indices] + (self.var.ws2[land_use_indices] - self.var.wres2[land_use_indices]) / ((1 + (alpha2[land_use_indices] * 100) ** (self.var.lambda2[land_use_indices] + 1)) ** (self.var.lambda2[land_use_indices] / (self.var.lambda2[land_use_indices] + 1)))
-            self.var.wfc3[land_use_indices] = self.var.wres3[land_use_indices] + (self.var.ws3[land_use_indices] - self.var.wres3[land_use_indices]) / ((1 + (alpha3[land_use_indices] * 100) ** (self.var.lambda3[land_use_indices] + 1)) ** (self.var.lambda3[land_use_indices] / (self.var.lambda3[land_use_indices] + 1)))
+            self.var.wfc1[land_use_indices] = self.var.wres1[land_use_indices] + (self.var.ws1[land_use_indices] - self.var.wres1[land_use_indices]) / ((1 + (alpha1[land_use_indices] * 100) ** (self.var.lambda1[land_use_indices] + 1)) ** self.var.genuM1[land_use_indices])
+            self.var.wfc2[land_use_indices] = self.var.wres2[land_use_indices] + (self.var.ws2[land_use_indices] - self.var.wres2[land_use_indices]) / ((1 + (alpha2[land_use_indices] * 100) ** (self.var.lambda2[land_use_indices] + 1)) ** self.var.genuM2[land_use_indices])
+            self.var.wfc3[land_use_indices] = self.var.wres3[land_use_indices] + (self.var.ws3[land_use_indices] - self.var.wres3[land_use_indices]) / ((1 + (alpha3[land_use_indices] * 100) ** (self.var.lambda3[land_use_indices] + 1)) ** self.var.genuM3[land_use_indices])
 
             # Soil moisture at wilting point (pF4.2, 10**4.2 cm) [mm water slice]    # Mualem equation (van Genuchten, 1980)
-            self.var.wwp1[land_use_indices] = self.var.wres1[land_use_indices] + (self.var.ws1[land_use_indices] - self.var.wres1[land_use_indices]) / ((1 + (alpha1[land_use_indices] * (10**4.2)) ** (self.var.lambda1[land_use_indices] + 1)) ** (self.var.lambda1[land_use_indices] / (self.var.lambda1[land_use_indices] + 1)))
-            self.var.wwp2[land_use_indices] = self.var.wres2[land_use_indices] + (self.var.ws2[land_use_indices] - self.var.wres2[land_use_indices]) / ((1 + (alpha2[land_use_indices] * (10**4.2)) ** (self.var.lambda2[land_use_indices] + 1)) ** (self.var.lambda2[land_use_indices] / (self.var.lambda2[land_use_indices] + 1)))
-            self.var.wwp3[land_use_indices] = self.var.wres3[land_use_indices] + (self.var.ws3[land_use_indices] - self.var.wres3[land_use_indices]) / ((1 + (alpha3[land_use_indices] * (10**4.2)) ** (self.var.lambda3[land_use_indices] + 1)) ** (self.var.lambda3[land_use_indices] / (self.var.lambda3[land_use_indices] + 1)))
+            self.var.wwp1[land_use_indices] = self.var.wres1[land_use_indices] + (self.var.ws1[land_use_indices] - self.var.wres1[land_use_indices]) / ((1 + (alpha1[land_use_indices] * (10**4.2)) ** (self.var.lambda1[land_use_indices] + 1)) ** self.var.genuM1[land_use_indices])
+            self.var.wwp2[land_use_indices] = self.var.wres2[land_use_indices] + (self.var.ws2[land_use_indices] - self.var.wres2[land_use_indices]) / ((1 + (alpha2[land_use_indices] * (10**4.2)) ** (self.var.lambda2[land_use_indices] + 1)) ** self.var.genuM2[land_use_indices])
+            self.var.wwp3[land_use_indices] = self.var.wres3[land_use_indices] + (self.var.ws3[land_use_indices] - self.var.wres3[land_use_indices]) / ((1 + (alpha3[land_use_indices] * (10**4.2)) ** (self.var.lambda3[land_use_indices] + 1)) ** self.var.genuM3[land_use_indices])
 
             satTerm1FC = np.maximum(0., self.var.wfc1[land_use_indices] - self.var.wres1[land_use_indices]) / (self.var.ws1[land_use_indices] - self.var.wres1[land_use_indices])
             satTerm2FC = np.maximum(0., self.var.wfc2[land_use_indices] - self.var.wres2[land_use_indices]) / (self.var.ws2[land_use_indices] - self.var.wres2[land_use_indices])
             satTerm3FC = np.maximum(0., self.var.wfc3[land_use_indices] - self.var.wres3[land_use_indices]) / (self.var.ws3[land_use_indices] - self.var.wres3[land_use_indices])
-            kUnSat1FC = self.var.KSat1[land_use_indices] * np.sqrt(satTerm1FC) * np.square(1 - (1 - satTerm1FC ** (1 / (self.var.lambda1[land_use_indices] / (self.var.lambda1[land_use_indices] + 1)))) ** (self.var.lambda1[land_use_indices] / (self.var.lambda1[land_use_indices] + 1)))
-            kUnSat2FC = self.var.KSat2[land_use_indices] * np.sqrt(satTerm2FC) * np.square(1 - (1 - satTerm2FC ** (1 / (self.var.lambda2[land_use_indices] / (self.var.lambda2[land_use_indices] + 1)))) ** (self.var.lambda2[land_use_indices] / (self.var.lambda2[land_use_indices] + 1)))
-            kUnSat3FC = self.var.KSat3[land_use_indices] * np.sqrt(satTerm3FC) * np.square(1 - (1 - satTerm3FC ** (1 / (self.var.lambda3[land_use_indices] / (self.var.lambda3[land_use_indices] + 1)))) ** (self.var.lambda3[land_use_indices] / (self.var.lambda3[land_use_indices] + 1)))
+            kUnSat1FC = kUnSat_vanGenuchten(self.var.KSat1[land_use_indices], satTerm1FC, self.var.genuM1[land_use_indices], self.var.genuInvM1[land_use_indices])
+            kUnSat2FC = kUnSat_vanGenuchten(self.var.KSat2[land_use_indices], satTerm2FC, self.var.genuM2[land_use_indices], self.var.genuInvM2[land_use_indices])
+            kUnSat3FC = kUnSat_vanGenuchten(self.var.KSat3[land_use_indices], satTerm3FC, self.var.genuM3[land_use_indices], self.var.genuInvM3[land_use_indices])
             self.var.kunSatFC12[land_use_indices] = np.sqrt(kUnSat1FC * kUnSat2FC)
             self.var.kunSatFC23[land_use_indices] = np.sqrt(kUnSat2FC * kUnSat3FC)
 
@@ -362,7 +430,7 @@ class landcoverType(object):
             #self.var.cropDeplFactor.append(loadmap(coverType + "_cropDeplFactor"))
             # parameter values
 
-            land_use_indices = np.where(self.var.land_use_type == coverNum)[0]
+            land_use_indices = self.var.land_use_indices[coverNum]
 
             arnoBeta = self.model.data.to_HRU(data=loadmap(coverType + "_arnoBeta"), fn=None)
             if not isinstance(arnoBeta, float):
@@ -407,21 +475,14 @@ class landcoverType(object):
 
         crop_factors = self.farmers.get_crop_factors()
         
-        self.crop_stage_data = np.zeros((26, 4), dtype=np.float32)
-        self.crop_stage_data[:, 0] = crop_factors['L_ini']
-        self.crop_stage_data[:, 1] = crop_factors['L_dev']
-        self.crop_stage_data[:, 2] = crop_factors['L_mid']
-        self.crop_stage_data[:, 3] = crop_factors['L_late']
-
-        self.kc_crop_stage = np.zeros((26, 3), dtype=np.float32)
-        self.kc_crop_stage[:, 0] = crop_factors['kc_ini']
-        self.kc_crop_stage[:, 1] = crop_factors['kc_mid']
-        self.kc_crop_stage[:, 2] = crop_factors['kc_end']
+        self.crop_parameters = np.zeros(26, dtype=crop_parameters_dtype)
+        for parameter in crop_parameters_dtype.names:
+            self.crop_parameters[parameter] = crop_factors[parameter]
 
     def water_body_exchange(self, groundwater_recharge):
         """computing leakage from rivers"""
         riverbedExchangeM3 = self.model.data.grid.leakageriver_factor * self.var.cellArea * ((1 - self.var.capriseindex + 0.25) // 1)
-        riverbedExchangeM3[self.var.land_use_type != 5] = 0
+        riverbedExchangeM3[self.var.land_use_indices['land']] = 0
         riverbedExchangeM3 = self.model.data.to_grid(HRU_data=riverbedExchangeM3, fn='sum')
         riverbedExchangeM3 = np.minimum(
             riverbedExchangeM3,
@@ -437,31 +498,7 @@ class landcoverType(object):
         self.model.data.grid.riverbedExchangeM3 = riverbedExchangeM3  # to be used in routing_kinematic
 
         # first, lakes variable need to be extended to their area and not only to the discharge point
-        lakeIDbyID = np.unique(self.model.data.grid.waterBodyID)
-
-        lakestor_id = np.copy(self.model.data.grid.lakeStorage)
-        resstor_id = np.copy(self.model.data.grid.resStorage)
-        for id in range(len(lakeIDbyID)):  # for each lake or reservoir
-            if lakeIDbyID[id] != 0:
-                temp_map = np.where(self.model.data.grid.waterBodyID == lakeIDbyID[id], np.where(self.model.data.grid.lakeStorage > 0, 1, 0), 0)  # Looking for the discharge point of the lake
-                if np.sum(temp_map) == 0:  # try reservoir
-                    temp_map = np.where(self.model.data.grid.waterBodyID == lakeIDbyID[id], np.where(self.model.data.grid.resStorage > 0, 1, 0), 0)  # Looking for the discharge point of the reservoir
-                discharge_point = np.nanargmax(temp_map)  # Index of the cell where the lake outlet is stored
-                if self.model.data.grid.waterBodyTypTemp[discharge_point] != 0:
-
-                    if self.model.data.grid.waterBodyTypTemp[discharge_point] == 1:  # this is a lake
-                        # computing the lake area
-                        area_stor = np.sum(np.where(self.model.data.grid.waterBodyID == lakeIDbyID[id], self.model.data.grid.cellArea, 0))  # required to keep mass balance rigth
-                        # computing the lake storage in meter and put this value in each cell including the lake
-                        lakestor_id = np.where(self.model.data.grid.waterBodyID == lakeIDbyID[id],
-                                                self.model.data.grid.lakeStorage[discharge_point] / area_stor, lakestor_id)  # in meter
-
-                    else:  # this is a reservoir
-                        # computing the reservoir area
-                        area_stor = np.sum(np.where(self.model.data.grid.waterBodyID == lakeIDbyID[id], self.model.data.grid.cellArea, 0))  # required to keep mass balance rigth
-                        # computing the reservoir storage in meter and put this value in each cell including the reservoir
-                        resstor_id = np.where(self.model.data.grid.waterBodyID == lakeIDbyID[id],
-                                                self.model.data.grid.resStorage[discharge_point] / area_stor, resstor_id)  # in meter
+        lakestor_id, resstor_id = waterbody_storage_m(self.model.data.grid)
 
         # Gathering lakes and reservoirs in the same array
         lakeResStorage = np.where(self.model.data.grid.waterBodyTypTemp == 0, 0., np.where(self.model.data.grid.waterBodyTypTemp == 1,
@@ -471,7 +508,7 @@ class landcoverType(object):
 
         # leakage depends on water bodies storage, water bodies fraction and modflow saturated area
         lakebedExchangeM = self.model.data.grid.leakagelake_factor * ((1 - self.var.capriseindex + 0.25) // 1)
-        lakebedExchangeM[self.var.land_use_type != 5] = 0
+        lakebedExchangeM[self.var.land_use_indices['land']] = 0
         lakebedExchangeM = self.model.data.to_grid(HRU_data=lakebedExchangeM, fn='sum')
         lakebedExchangeM = np.minimum(
             lakebedExchangeM,
@@ -479,16 +516,7 @@ class landcoverType(object):
         )
 
         # Now, leakage is converted again from the lake/reservoir area to discharge point to be removed from the lake/reservoir store
-        self.model.data.grid.lakebedExchangeM3 = np.zeros(self.model.data.grid.compressed_size, dtype=np.float32)
-        for id in range(len(lakeIDbyID)):  # for each lake or reservoir
-            if lakeIDbyID[id] != 0:
-                temp_map = np.where(self.model.data.grid.waterBodyID == lakeIDbyID[id], np.where(self.model.data.grid.lakeStorage > 0, 1, 0), 0)  # Looking for the discharge point of the lake
-                if np.sum(temp_map) == 0:  # try reservoir
-                    temp_map = np.where(self.model.data.grid.waterBodyID == lakeIDbyID[id], np.where(self.model.data.grid.resStorage > 0, 1, 0), 0)  # Looking for the discharge point of the reservoir
-                discharge_point = np.nanargmax(temp_map)  # Index of the cell where the lake outlet is stored
-            # Converting the lake/reservoir leakage from meter to cubic meter and put this value in the cell corresponding to the outlet
-            self.model.data.grid.lakebedExchangeM3[discharge_point] = np.sum(np.where(self.model.data.grid.waterBodyID == lakeIDbyID[id],
-                                                                                                lakebedExchangeM * self.model.data.grid.cellArea, 0))  # in m3
+        self.model.data.grid.lakebedExchangeM3 = waterbody_leakage_m3(self.model.data.grid, lakebedExchangeM)  # in m3
         self.model.data.grid.lakebedExchangeM = self.model.data.grid.M3toM(self.model.data.grid.lakebedExchangeM3)
 
         # compressed version for lakes and reservoirs
@@ -511,6 +539,7 @@ class landcoverType(object):
 
         groundwater_recharge += waterbed_recharge
 
+    @timed
     def dynamic(self, ETRef):
         """
         Dynamic part of the land cover type module
@@ -525,7 +554,10 @@ class landcoverType(object):
         And sums every thing up depending on the land cover type fraction
         """
 
-        if checkOption('calcWaterBalance'):
+        # runtime checks and water balance check in this time step (see validationLevel)
+        validate = checkValidation()
+        balanceCheck = checkOption('calcWaterBalance') and validate
+        if balanceCheck:
             interceptStor_pre = self.var.interceptStor.copy()
             w1_pre = self.var.w1.copy()
             w2_pre = self.var.w2.copy()
@@ -537,8 +569,9 @@ class landcoverType(object):
             self.var.crop_map.get() if self.model.args.use_gpu else self.var.crop_map,
             self.var.crop_age_days_map.get() if self.model.args.use_gpu else self.var.crop_age_days_map,
             self.var.crop_harvest_age_days_map.get() if self.model.args.use_gpu else self.var.crop_harvest_age_days_map,
-            self.crop_stage_data,
-            self.kc_crop_stage
+            self.crop_parameters,
+            # crops only grow on paddy and non-paddy land
+            self.var.land_use_indices.as_array('irrigated')
         )
         if self.model.args.use_gpu:
             self.var.cropKC = cp.array(self.var.cropKC)
@@ -548,8 +581,9 @@ class landcoverType(object):
             fn=None
         )
         
-        self.var.cropKC[self.var.land_use_type == 0] = forest_cropCoefficientNC[self.var.land_use_type == 0]
-        self.var.cropKC[self.var.land_use_type == 1] = self.var.minCropKC
+        forest = self.var.land_use_indices['forest']
+        self.var.cropKC[forest] = forest_cropCoefficientNC[forest]
+        self.var.cropKC[self.var.land_use_indices['grassland']] = self.var.minCropKC
 
         potTranspiration, potBareSoilEvap, totalPotET = self.model.evaporation_module.dynamic(ETRef)
         potTranspiration = self.model.interception_module.dynamic(potTranspiration)
@@ -568,13 +602,14 @@ class landcoverType(object):
         self.var.actual_transpiration_crop += self.var.actTransTotal
         self.var.potential_transpiration_crop += potTranspiration
 
-        assert not np.isnan(interflow).any()
-        assert not np.isnan(groundwater_recharge).any()
-        assert not np.isnan(groundwater_abstaction).any()
-        assert not np.isnan(channel_abstraction_m).any()
-        assert not np.isnan(openWaterEvap).any()
+        if validate:
+            assert not np.isnan(interflow).any()
+            assert not np.isnan(groundwater_recharge).any()
+            assert not np.isnan(groundwater_abstaction).any()
+            assert not np.isnan(channel_abstraction_m).any()
+            assert not np.isnan(openWaterEvap).any()
 
-        if checkOption('calcWaterBalance'):
+        if balanceCheck:
             self.model.waterbalance_module.waterBalanceCheck(
                 how='cellwise',
                 influxes=[self.var.Rain, self.var.SnowMelt],
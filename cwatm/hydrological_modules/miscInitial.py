@@ -51,6 +51,7 @@ class miscInitial(object):
         self.model = model
 
 
+    @timed
     def initial(self):
         """
         Initialization of some basic parameters e.g. cellArea
@@ -70,6 +70,7 @@ class readmeteo(object):
         self.model = model
         self.var = model.data.grid
 
+    @timed
     def initial(self):
         """
         Initial part of meteo
@@ -281,6 +282,7 @@ class readmeteo(object):
 
 
 
+    @timed
     def dynamic(self):
         """
         Dynamic part of the readmeteo module
@@ -127,7 +127,7 @@ class routing_kinematic(object):
         lddOrder[maskinfo['mask']] = -1
         lddOrder = np.array(lddOrder.data, dtype=np.int64)
 
-        dirshort = lddshort(ldd2D, lddOrder)
+        dirshort = lddshort(ldd2D, lddOrder, routingKernelsNumba())
         dirUp, dirupLen, dirupID = dirUpstream(dirshort)
 
 
@@ -155,6 +155,7 @@ class routing_kinematic(object):
 # --------------------------------------------------------------------------
 # --------------------------------------------------------------------------
 
+    @timed
     def initial(self):
         """
         Initial part of the routing module
@@ -165,14 +166,20 @@ class routing_kinematic(object):
         * calculate manning's roughness coefficient
         """
 
+        # routing kernels: C++ library (default) or numba
+        self.var.routingNumba = routingKernelsNumba()
+
         ldd = loadmap('Ldd')
         # l1 = decompress(ldd)
 
-        self.var.lddCompress, dirshort, self.var.dirUp, self.var.dirupLen, self.var.dirupID, self.var.downstruct, self.var.catchment, self.var.dirDown, self.var.lendirDown = defLdd2(ldd)
+        self.var.lddCompress, dirshort, self.var.dirUp, self.var.dirupLen, self.var.dirupID, self.var.downstruct, self.var.catchment, self.var.dirDown, self.var.lendirDown = defLdd2(ldd, self.var.routingNumba)
 
         #self.var.ups = upstreamArea(dirDown, dirshort, self.var.cellArea)
-        self.var.UpArea1 = upstreamArea(self.var.dirDown, dirshort, self.var.full_compressed(1, dtype=np.float64))
-        self.var.UpArea = upstreamArea(self.var.dirDown, dirshort, self.var.cellArea.astype(np.float64))
+        self.var.UpArea1 = upstreamArea(self.var.dirDown, dirshort, self.var.full_compressed(1, dtype=np.float64), numba=self.var.routingNumba)
+        self.var.UpArea = upstreamArea(self.var.dirDown, dirshort, self.var.cellArea.astype(np.float64), numba=self.var.routingNumba)
+        if self.var.routingNumba:
+            # river network sorted by levels for the parallel kinematic wave
+            self.var.kinOrder, self.var.kinLevelStart = kinematic_levels(self.var.dirDown, self.var.dirupLen, self.var.dirupID)
         #d1 =downstream1(self.var.dirUp, self.var.UpArea1)
         #up1 = upstream1( self.var.downstruct,self.var.UpArea1)
 
@@ -188,6 +195,19 @@ class routing_kinematic(object):
 
         # number of substep per day
         self.var.noRoutingSteps = int(loadmap('NoRoutingSteps'))
+        # Newton solver of the kinematic wave: warm start from discharge of the previous substep,
+        # convergence criterium and maximum number of iterations
+        self.var.kinematicWarmStart = False
+        if "kinematicWarmStart" in binding:
+            self.var.kinematicWarmStart = returnBool('kinematicWarmStart')
+        self.var.kinematicEpsilon = 0.0001
+        if "kinematicEpsilon" in binding:
+            self.var.kinematicEpsilon = float(cbinding('kinematicEpsilon'))
+        self.var.kinematicMaxIter = 10
+        if "kinematicMaxIter" in binding:
+            self.var.kinematicMaxIter = int(cbinding('kinematicMaxIter'))
+        # sum of Newton iterations, cells not converged and cells solved per timestep
+        self.var.kinematicStats = np.zeros(3, dtype=np.int64)
         # kinematic wave parameter: 0.6 is for broad sheet flow
         self.var.beta = loadmap('chanBeta')
         # Channel Manning's n
@@ -284,6 +304,7 @@ class routing_kinematic(object):
     # --------------------------------------------------------------------------
 # --------------------------------------------------------------------------
 
+    @timed
     def dynamic(self, openWaterEvap, channel_abstraction_m, returnFlow):
         """
         Dynamic part of the routing module
@@ -299,7 +320,10 @@ class routing_kinematic(object):
         if not(checkOption('includeRouting')):
             return
 
-        if checkOption('calcWaterBalance'):
+        # runtime checks and water balance check in this time step (see validationLevel)
+        validate = checkValidation()
+        balanceCheck = checkOption('calcWaterBalance') and validate
+        if balanceCheck:
             self.var.prechannelStorageM3 = self.var.channelStorageM3.copy()
             if checkOption('includeWaterBodies'):
                 self.var.prelakeResStorage = self.var.lakeResStorage.copy()
@@ -312,7 +336,7 @@ class routing_kinematic(object):
         # put all the water area in which is not reflected in the lakes ,res
         #channelFraction = np.maximum(self.var.fracVegCover[5], channelFraction)
 
-        EWRefact = self.var.lakeEvaFactor * self.model.data.to_grid(HRU_data=self.model.data.HRU.EWRef, fn='mean') - self.model.data.to_grid(HRU_data=openWaterEvap, fn='mean')  # checked
+        EWRefact = self.var.lakeEvaFactor * self.var.EWRef - self.model.data.to_grid(HRU_data=openWaterEvap, fn='mean')  # checked
         # evaporation from channel minus the calculated evaporation from rainfall
         EvapoChannel = EWRefact * channelFraction * self.var.cellArea
         #EvapoChannel = self.var.EWRef * channelFraction * self.var.cellArea
@@ -412,73 +436,107 @@ class routing_kinematic(object):
         # Question: Is this fine?? It is already used above differently
         #self.var.prechannelStorageM3 = self.var.channelAlpha * self.var.chanLength * self.var.discharge ** self.var.beta
         avgDis = 0
+        self.var.kinematicStats[:] = 0
 
 
         for subrouting in range(self.var.noRoutingSteps):
-            # Runoff - Evaporation ( -riverbed exchange), this could be negative  with riverbed exhange also
-            sideflowChanM3 = runoffM3.copy()
-            # minus evaporation from channels
-            sideflowChanM3 -= EvapoChannelM3Dt
-            # minus riverbed exchange
-            sideflowChanM3 -= riverbedExchangeDt
-
-
-            if checkOption('includeWaterDemand'):
-                sideflowChanM3 -= WDAddM3Dt
-                # minus waterdemand + returnflow
-
-            if checkOption('inflow'):
-                self.var.inflowDt = (self.var.QInM3Old + (subrouting + 1) * self.var.QDelta) / self.var.noRoutingSteps
-                # flow from inlets per sub step
-                sideflowChanM3 += self.var.inflowDt
-
-            if checkOption('includeWaterBodies'):
-                lakesResOut, lakeOutflowDis = self.model.lakes_reservoirs_module.dynamic_inloop(subrouting)
-                sideflowChanM3 += lakesResOut
-
-            else:
-                lakesResOut = 0
-
-            # self.var.adjusted_channelFlow = np.minimum(sideflowChanM3*self.var.cellArea, globals.inZero.copy())*-1
-            #sideflowChanM3 = np.maximum(sideflowChanM3, globals.inZero.copy())
-            self.var.sideflowChanM3 = sideflowChanM3.copy() #for output TODO get this output -- is it negative?
-
-            #sideflowChan = sideflowChanM3 * self.var.invchanLength * self.model.InvDtSec
-            sideflowChan = sideflowChanM3 * self.var.invchanLength * 1/ self.var.dtRouting
-
-            if checkOption('includeWaterBodies'):
-               lib2.kinematic(
-                   self.var.discharge.astype(np.float64),
-                   sideflowChan.astype(np.float64),
-                   self.var.dirDown_LR,
-                   self.var.dirupLen_LR,
-                   self.var.dirupID_LR,
-                   Qnew,
-                   self.var.channelAlpha.astype(np.float64),
-                   self.var.beta,
-                   self.var.dtRouting,
-                   self.var.chanLength.astype(np.float64),
-                   self.var.lendirDown_LR
-                )
-
-            else:
-               lib2.kinematic(
-                   self.var.discharge.astype(np.float64),
-                   sideflowChan.astype(np.float64),
-                   self.var.dirDown,
-                   self.var.dirupLen,
-                   self.var.dirupID,
-                   Qnew,
-                   self.var.channelAlpha.astype(np.float64),
-                   self.var.beta,
-                   self.var.dtRouting,
-                   self.var.chanLength.astype(np.float64),
-                   self.var.lendirDown
-                )
-            self.var.discharge = Qnew.copy()
-
-            self.var.sumsideflow = self.var.sumsideflow + sideflowChanM3
-            avgDis = avgDis  + self.var.discharge / self.var.noRoutingSteps
+            with timespan("substep"):
+                # Runoff - Evaporation ( -riverbed exchange), this could be negative  with riverbed exhange also
+                sideflowChanM3 = runoffM3.copy()
+                # minus evaporation from channels
+                sideflowChanM3 -= EvapoChannelM3Dt
+                # minus riverbed exchange
+                sideflowChanM3 -= riverbedExchangeDt
+
+
+                if checkOption('includeWaterDemand'):
+                    sideflowChanM3 -= WDAddM3Dt
+                    # minus waterdemand + returnflow
+
+                if checkOption('inflow'):
+                    self.var.inflowDt = (self.var.QInM3Old + (subrouting + 1) * self.var.QDelta) / self.var.noRoutingSteps
+                    # flow from inlets per sub step
+                    sideflowChanM3 += self.var.inflowDt
+
+                if checkOption('includeWaterBodies'):
+                    lakesResOut, lakeOutflowDis = self.model.lakes_reservoirs_module.dynamic_inloop(subrouting)
+                    sideflowChanM3 += lakesResOut
+
+                else:
+                    lakesResOut = 0
+
+                # self.var.adjusted_channelFlow = np.minimum(sideflowChanM3*self.var.cellArea, globals.inZero.copy())*-1
+                #sideflowChanM3 = np.maximum(sideflowChanM3, globals.inZero.copy())
+                self.var.sideflowChanM3 = sideflowChanM3.copy() #for output TODO get this output -- is it negative?
+
+                #sideflowChan = sideflowChanM3 * self.var.invchanLength * self.model.InvDtSec
+                sideflowChan = sideflowChanM3 * self.var.invchanLength * 1/ self.var.dtRouting
+
+                if checkOption('includeWaterBodies'):
+                    dirDown, dirupLen, dirupID, lendirDown = self.var.dirDown_LR, self.var.dirupLen_LR, self.var.dirupID_LR, self.var.lendirDown_LR
+                else:
+                    dirDown, dirupLen, dirupID, lendirDown = self.var.dirDown, self.var.dirupLen, self.var.dirupID, self.var.lendirDown
+
+                if self.var.routingNumba:
+                    # in place on Qnew, no copies of the routing arrays
+                    if checkOption('includeWaterBodies'):
+                        kinOrder, kinLevelStart = self.var.kinOrder_LR, self.var.kinLevelStart_LR
+                    else:
+                        kinOrder, kinLevelStart = self.var.kinOrder, self.var.kinLevelStart
+                    kinematic_numba(
+                        self.var.discharge,
+                        sideflowChan,
+                        kinOrder,
+                        kinLevelStart,
+                        dirupLen,
+                        dirupID,
+                        Qnew,
+                        self.var.channelAlpha,
+                        self.var.beta,
+                        self.var.dtRouting,
+                        self.var.chanLength,
+                        self.var.kinematicWarmStart,
+                        self.var.kinematicEpsilon,
+                        self.var.kinematicMaxIter,
+                        self.var.kinematicStats
+                    )
+                elif hasattr(lib2, 'kinematicStats'):
+                    lib2.kinematicStats(
+                        self.var.discharge.astype(np.float64),
+                        sideflowChan.astype(np.float64),
+                        dirDown,
+                        dirupLen,
+                        dirupID,
+                        Qnew,
+                        self.var.channelAlpha.astype(np.float64),
+                        self.var.beta,
+                        self.var.dtRouting,
+                        self.var.chanLength.astype(np.float64),
+                        lendirDown,
+                        int(self.var.kinematicWarmStart),
+                        self.var.kinematicEpsilon,
+                        self.var.kinematicMaxIter,
+                        self.var.kinematicStats
+                    )
+                else:
+                    # prebuilt library without convergence statistics
+                    lib2.kinematic(
+                        self.var.discharge.astype(np.float64),
+                        sideflowChan.astype(np.float64),
+                        dirDown,
+                        dirupLen,
+                        dirupID,
+                        Qnew,
+                        self.var.channelAlpha.astype(np.float64),
+                        self.var.beta,
+                        self.var.dtRouting,
+                        self.var.chanLength.astype(np.float64),
+                        lendirDown
+                    )
+                self.var.discharge = Qnew.copy()
+
+                self.var.sumsideflow = self.var.sumsideflow + sideflowChanM3
+                avgDis = avgDis  + self.var.discharge / self.var.noRoutingSteps
 
         # -- end substeping ---------------------
         if checkOption('includeWaterBodies'):
@@ -487,7 +545,13 @@ class routing_kinematic(object):
             # these outflow is used for the whole lake
             self.var.discharge = np.where(self.var.waterBodyID > 0, lakeOutflowDis, self.var.discharge)
 
-        assert not np.isnan(self.var.discharge).any()
+        if validate:
+            assert not np.isnan(self.var.discharge).any()
+
+        if self.var.kinematicStats[1] > 0 and Flags['loud']:
+            msg = "Kinematic wave: " + str(self.var.kinematicStats[1]) + " of " + str(self.var.kinematicStats[2]) + " cell solutions did not converge"
+            msg += " (epsilon: " + str(self.var.kinematicEpsilon) + ", max. iterations: " + str(self.var.kinematicMaxIter) + ")"
+            print(CWATMWarning(msg))
 
         self.var.channelStorageM3 = self.var.channelAlpha * self.var.chanLength * Qnew ** self.var.beta
 
@@ -495,7 +559,7 @@ class routing_kinematic(object):
              self.var.QInM3Old = self.var.inflowM3.copy()
 
         if checkOption('includeWaterBodies'):
-            if checkOption('calcWaterBalance'):
+            if balanceCheck:
                 self.model.waterbalance_module.waterBalanceCheck(
                     influxes=[self.var.lakeResInflowM],  # In
                     outfluxes=[self.var.lakeResOutflowM , self.var.EvapWaterBodyM]  ,  # Out  self.var.evapWaterBodyC
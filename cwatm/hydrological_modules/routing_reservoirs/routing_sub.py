@@ -11,6 +11,7 @@
 
 import numpy as np
 import math
+from numba import njit, prange
 from cwatm.management_modules.data_handling import *
 
 """
@@ -142,18 +143,22 @@ def dirDownstream(dirUp,lddcomp,dirDown):
 
 
 
-def upstreamArea(dirDown,dirshort,area):
+def upstreamArea(dirDown,dirshort,area,numba=False):
     """
     calculates upstream area
 
     :param dirDown: array which point from each cell to the next downstream cell
     :param dirshort:
     :param area: area in m2 for a single gridcell
+    :param numba: (optional) use numba kernel instead of the C++ library
     :return: upstream area
     """
 
     ups = area.copy()
-    lib2.ups(dirDown,dirshort, ups,len(dirDown))
+    if numba:
+        ups_numba(dirDown, dirshort, ups)
+    else:
+        lib2.ups(dirDown,dirshort, ups,len(dirDown))
     return ups
 
 def upstream1(downstruct, weight):
@@ -246,11 +251,28 @@ def subcatchment1(dirUp, points,ups):
 
 
 
-def defLdd2(ldd):
+def routingKernelsNumba():
+    """
+    Routing kernels of the settings file: routingKernels = numba or the C++ library (default)
+
+    :return: True if the numba kernels are used
+    :raises CWATMError: if the C++ library is used but could not be loaded
+    """
+
+    numba = "routingKernels" in binding and cbinding('routingKernels').lower() == "numba"
+    if not numba and lib2 is None:
+        msg = "The routing library (t5) could not be loaded on this platform\n"
+        msg += "Use routingKernels = numba in the settings file"
+        raise CWATMError(msg)
+    return numba
+
+
+def defLdd2(ldd, numba=False):
     """
     defines river network
 
     :param ldd: river network
+    :param numba: (optional) use numba kernels instead of the C++ library
     :return: ldd variables
     """
 
@@ -268,7 +290,7 @@ def defLdd2(ldd):
     lddOrder = np.array(lddOrder.data, dtype=np.int64)
 
 
-    lddCompress, dirshort = lddrepair(ldd2D, lddOrder)
+    lddCompress, dirshort = lddrepair(ldd2D, lddOrder, numba)
     dirUp, dirupLen, dirupID = dirUpstream(dirshort)
 
     # for upstream calculation
@@ -287,12 +309,13 @@ def defLdd2(ldd):
     return lddCompress, dirshort, dirUp, dirupLen, dirupID, downstruct, catchment, dirDown, lendirDown
 
 
-def lddshort(lddnp,lddOrder):
+def lddshort(lddnp,lddOrder,numba=False):
     """
     return short for calculating a catchment from a river network
 
     :param lddnp: rivernetwork as 1D array
     :param lddOrder:
+    :param numba: (optional) use numba kernels instead of the C++ library
     :return: short ldd
     """
 
@@ -306,13 +329,16 @@ def lddshort(lddnp,lddOrder):
     #lib2.repairLdd1(lddnp, yi,xi)
 
     lddcomp = compressArray(lddnp).astype(np.int64)
-    lib2.dirID(lddOrder, lddnp, dir,yi,xi)
+    if numba:
+        dirID_numba(lddOrder, lddnp, dir)
+    else:
+        lib2.dirID(lddOrder, lddnp, dir,yi,xi)
     dirshort = compressArray(dir).astype(np.int64)
 
     return dirshort
 
 
-def lddrepair(lddnp,lddOrder):
+def lddrepair(lddnp,lddOrder,numba=False):
     """
     repairs a river network
 
@@ -321,6 +347,7 @@ def lddrepair(lddnp,lddOrder):
 
     :param lddnp: rivernetwork as 1D array
     :param lddOrder:
+    :param numba: (optional) use numba kernels instead of the C++ library
     :return: repaired ldd
     """
 
@@ -332,14 +359,23 @@ def lddrepair(lddnp,lddOrder):
     dir = np.array(np.empty(maskinfo['shape']), dtype=np.int64)
     dir.fill(-1)
 
-    lib2.repairLdd1(lddnp, yi,xi)
+    if numba:
+        repairLdd1_numba(lddnp)
+    else:
+        lib2.repairLdd1(lddnp, yi,xi)
 
     lddcomp = compressArray(lddnp).astype(np.int64)
-    lib2.dirID(lddOrder, lddnp, dir,yi,xi)
+    if numba:
+        dirID_numba(lddOrder, lddnp, dir)
+    else:
+        lib2.dirID(lddOrder, lddnp, dir,yi,xi)
     dirshort = compressArray(dir).astype(np.int64)
 
     check = np.array(np.zeros(maskinfo['mapC'][0]),dtype=np.int64)
-    lib2.repairLdd2(lddcomp, dirshort, check,maskinfo['mapC'][0] )
+    if numba:
+        repairLdd2_numba(lddcomp, dirshort, check)
+    else:
+        lib2.repairLdd2(lddcomp, dirshort, check,maskinfo['mapC'][0] )
     ii=2
 	
 	
@@ -361,3 +397,208 @@ def lddrepair(lddnp,lddOrder):
 
 
     return lddcomp, dirshort
+
+
+# ----------------------------------------------------------------
+# numba versions of the C++ routing kernels (t5.cpp), used if routingKernels = numba in the settings file
+# same arithmetic as the C++ code, so results are the same as with the compiled library
+
+
+@njit
+def ups_numba(dirDown, dirshort, ups):
+    """
+    Compute the upstream area (in place) - numba version of lib2.ups
+
+    :param dirDown: river network from source to outlet
+    :param dirshort: downstream cell of each cell
+    :param ups: area of each cell -> upstream area
+    """
+
+    for i in range(dirDown.size):
+        j = dirDown[i]
+        k = dirshort[j]
+        if k > -1:
+            ups[k] = ups[k] + ups[j]
+
+
+# direction of the ldd values 1-9 (numeric keypad) in x (column) and y (row)
+LDD_DIRX = np.array([0, -1, 0, 1, -1, 0, 1, -1, 0, 1], dtype=np.int64)
+LDD_DIRY = np.array([0, 1, 1, 1, 0, 0, 0, -1, -1, -1], dtype=np.int64)
+
+
+@njit
+def repairLdd1_numba(ldd):
+    """
+    Pits at cells which flow out of the map or into a cell without ldd (in place) - numba version of lib2.repairLdd1
+
+    :param ldd: river network 2D
+    """
+
+    sizei, sizej = ldd.shape
+    for i in range(sizei):
+        for j in range(sizej):
+            lddvalue = ldd[i, j]
+            if lddvalue > 9:
+                lddvalue = 0
+            if lddvalue != 0 and lddvalue != 5:
+                x = j + LDD_DIRX[lddvalue]
+                y = i + LDD_DIRY[lddvalue]
+                if y < 0 or y == sizei or x < 0 or x == sizej:
+                    ldd[i, j] = 5
+                elif ldd[y, x] == 0:
+                    ldd[i, j] = 5
+
+
+@njit
+def dirID_numba(lddOrder, ldd, dir):
+    """
+    Order of the downstream cell of each cell (in place on dir) - numba version of lib2.dirID
+
+    :param lddOrder: order of each cell 2D
+    :param ldd: river network 2D
+    :param dir: order of the downstream cell, unchanged for pits and cells without ldd
+    """
+
+    sizei, sizej = ldd.shape
+    for i in range(sizei):
+        for j in range(sizej):
+            lddvalue = ldd[i, j]
+            if lddvalue > 9:
+                lddvalue = 0
+            if lddvalue != 0 and lddvalue != 5:
+                dir[i, j] = lddOrder[i + LDD_DIRY[lddvalue], j + LDD_DIRX[lddvalue]]
+
+
+@njit
+def repairLdd2_numba(ldd, dir, check):
+    """
+    Breaks loops in the river network with a pit at the last cell of the loop (in place) - numba version of lib2.repairLdd2
+
+    :param ldd: river network 1D
+    :param dir: downstream cell of each cell, -1 at the new pits
+    :param check: 1 for cells with a path to a pit
+    """
+
+    size = ldd.size
+    # cells of the path from cell i, onPath[j] == i if cell j is on this path
+    path = np.empty(size, dtype=np.int64)
+    onPath = np.full(size, -1, dtype=np.int64)
+    for i in range(size):
+        k = 0
+        j = i
+        while True:
+            if onPath[j] == i:
+                id = path[k - 1]
+                ldd[id] = 5
+                dir[id] = -1
+                break
+            if ldd[j] == 5 or check[j] == 1:
+                break
+            path[k] = j
+            onPath[j] = i
+            k += 1
+            j = dir[j]
+        for kk in range(k):
+            check[path[kk]] = 1
+
+
+@njit
+def kinematic_levels(dirDown, dirupLen, dirupID):
+    """
+    Sorts the river network into levels: a cell is one level below its highest upstream cell.
+    All cells of a level are independent and can be calculated in parallel
+
+    :param dirDown: river network from source to outlet
+    :param dirupLen: index of the first upstream cell in dirupID for each cell
+    :param dirupID: upstream cells
+    :return: order: cells sorted by level, levelStart: index in order where each level starts
+    """
+
+    level = np.zeros(dirupLen.size - 1, dtype=np.int64)
+    for i in range(dirDown.size):
+        down = dirDown[i]
+        for j in range(dirupLen[down], dirupLen[down + 1]):
+            if level[dirupID[j]] + 1 > level[down]:
+                level[down] = level[dirupID[j]] + 1
+    levels = level[dirDown]
+    sort = np.argsort(levels, kind='mergesort')
+    order = dirDown[sort]
+    levelStart = np.searchsorted(levels[sort], np.arange(levels.max() + 2))
+    return order, levelStart
+
+
+@njit
+def IterateToQnew(Qin, Qold, q, alpha, beta, betam1, deltaTX, deltaT, warmstart, epsilon, maxiters):
+    """
+    Newton iteration for the kinematic wave of one cell - numba version of IterateToQnew in t5.cpp
+
+    :return: Qnew, number of iterations, converged
+    """
+
+    # if no input then output = 0
+    if (Qin + Qold + q) == 0:
+        return 0., 0, 1
+
+    # common terms
+    ab = alpha * beta
+    C = deltaTX * Qin + alpha * Qold ** beta + deltaT * q
+
+    # first step for both guesses, afterwards Newton approaches the solution from below
+    if warmstart and Qold > 0:
+        Qkx = Qold
+    else:
+        ab_pQ = ab * ((Qold + Qin) / 2) ** betam1
+        Qkx = (deltaTX * Qin + Qold * ab_pQ + deltaT * q) / (deltaTX + ab_pQ)
+    fQkx = deltaTX * Qkx + alpha * Qkx ** beta - C
+    dfQkx = deltaTX + ab * Qkx ** betam1
+    Qkx -= fQkx / dfQkx
+    Qkx = Qkx if Qkx > 1e-30 else 1e-30
+
+    count = 0
+    while True:
+        fQkx = deltaTX * Qkx + alpha * Qkx ** beta - C
+        dfQkx = deltaTX + ab * Qkx ** betam1
+        Qkx -= fQkx / dfQkx
+        count += 1
+        if not (abs(fQkx) > epsilon and count < maxiters):
+            break
+
+    converged = 1
+    if abs(fQkx) > epsilon:
+        converged = 0
+
+    return (Qkx if Qkx > 0. else 0.), count, converged
+
+
+@njit(parallel=True)
+def kinematic_numba(Qold, q, order, levelStart, dirupLen, dirupID, Qnew, alpha, beta, deltaT, deltaX, warmstart, epsilon, maxiters, stats):
+    """
+    Kinematic wave (in place on Qnew) - numba version of lib2.kinematicStats
+    cells of the same level are calculated in parallel
+
+    :param order: cells sorted by level (see kinematic_levels)
+    :param levelStart: index in order where each level starts
+    :param stats: sum of Newton iterations, cells not converged, cells solved (added to)
+    """
+
+    betam1 = beta - 1
+    for level in range(levelStart.size - 1):
+        iters = 0
+        notconverged = 0
+        solved = 0
+        for i in prange(levelStart[level], levelStart[level + 1]):
+            down = order[i]
+            Qin = 0.0
+            for j in range(dirupLen[down], dirupLen[down + 1]):
+                Qin += Qnew[dirupID[j]]
+            Q, count, converged = IterateToQnew(Qin, Qold[down], q[down], alpha[down], beta, betam1, deltaT / deltaX[down],
+                                                deltaT, warmstart, epsilon, maxiters)
+            Qnew[down] = Q
+            if count > 0:
+                iters += count
+                notconverged += 1 - converged
+                solved += 1
+        stats[0] += iters
+        stats[1] += notconverged
+        stats[2] += solved
+
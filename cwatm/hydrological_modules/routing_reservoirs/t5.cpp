@@ -3,6 +3,9 @@
 #include <stdio.h>
 #include <vector>
 #include <algorithm>
+#ifdef _OPENMP
+   #include <omp.h>
+#endif
 #define mmax(x, y) ((x > y) ? (x) : (y))
 
 #ifdef __unix__
@@ -21,6 +24,7 @@ DLLEXPORT void dirID(long long* lddorder, long long* ldd, long long* out_array,
 DLLEXPORT void repairLdd1(long long * ldd, int sizei, int sizej);
 DLLEXPORT void repairLdd2(long long* ldd, long long* dir,long long* check, int sizei);
 DLLEXPORT void kinematic(double * Qold, double * q,long long* dirDown,long long* dirUpLen, long long* dirUpID, double * Qnew,double * alpha, double beta, double deltaT, double * deltaX, int size);
+DLLEXPORT void kinematicStats(double * Qold, double * q,long long* dirDown,long long* dirUpLen, long long* dirUpID, double * Qnew,double * alpha, double beta, double deltaT, double * deltaX, int size, int warmstart, double epsilon, int maxiters, long long* stats);
 
 DLLEXPORT void runoffConc(double * conc, double * peak, double * fraction, double * flow, int maxlag, int size);
 
@@ -140,6 +144,7 @@ for y in xrange(yi):
       if (value!=0) and (value <> 5):
          dir[y,x]=lddOrder[y+dirY[value],x+dirX[value]]  */
 
+    #pragma omp parallel for private(j,k,lddvalue,x,y,xy)
     for(i=0;i<sizei;i++){
         for(j=0;j<sizej;j++){
            k = i * sizej + j;
@@ -172,27 +177,25 @@ for y in xrange(yi):
 
 
 
-static double IterateToQnew(double Qin, double Qold, double q, double alpha, double beta,double deltaT, double deltaX)
+static double IterateToQnew(double Qin, double Qold, double q, double alpha, double beta, double betam1, double deltaTX, double deltaT,
+                            int warmstart, double epsilon, int maxiters, int * iters, int * converged)
 {
     /* Q at loop k+1 for i+1, j+1 */
-    double ab_pQ, deltaTX, C;
+    double ab, ab_pQ, C;
     int   count;
 
     double Qkx;
     double fQkx;
     double dfQkx;
-    double epsilon;
-    int MAX_ITERS;
 
-    MAX_ITERS = 10;
-    epsilon =  0.0001;
+    *iters = 0;
+    *converged = 1;
     /* if no input then output = 0 */
     if ((Qin+Qold+q) == 0)
         return(0);
 
     /* common terms */
-    ab_pQ = alpha*beta*pow(((Qold+Qin)/2),beta-1);
-    deltaTX = deltaT/deltaX;
+    ab = alpha * beta;
     C = deltaTX*Qin + alpha*pow(Qold,beta) + deltaT*q;
 
     /*  1. Initial guess Qk1.             */
@@ -205,10 +208,21 @@ static double IterateToQnew(double Qin, double Qold, double q, double alpha, dou
      * for Qkx's > 0. Sometimes the first guess results in a Qkx+1 which is
      * negative or 0. In that case we change Qkx+1 to 1e-30. This keeps the
      * convergence loop healthy.
+     * With warmstart the discharge of the previous substep is the first guess,
+     * which is already close to the solution if the flow changes slowly.
+     * The first step is done for both guesses: the function is concave, so after
+     * the first step (and the 1e-30 limit) Newton approaches the solution from below
+     * and cannot jump to negative Qkx.
      */
-    Qkx   = (deltaTX * Qin + Qold * ab_pQ + deltaT * q) / (deltaTX + ab_pQ);
+    if (warmstart && Qold > 0) {
+        Qkx = Qold;
+    }
+    else {
+        ab_pQ = ab*pow(((Qold+Qin)/2),betam1);
+        Qkx   = (deltaTX * Qin + Qold * ab_pQ + deltaT * q) / (deltaTX + ab_pQ);
+    }
     fQkx  = deltaTX * Qkx + alpha * pow(Qkx, beta) - C;   /* Current k */
-    dfQkx = deltaTX + alpha * beta * pow(Qkx, beta - 1);  /* Current k */
+    dfQkx = deltaTX + ab * pow(Qkx, betam1);              /* Current k */
     Qkx   -= fQkx / dfQkx;                                /* Next k */
     /*Qkx   = MAX(Qkx, 1e-30);*/
     Qkx   = mmax(Qkx, 1e-30);
@@ -217,10 +231,14 @@ static double IterateToQnew(double Qin, double Qold, double q, double alpha, dou
     do
     {
       fQkx  = deltaTX * Qkx + alpha * pow(Qkx, beta) - C;   /* Current k */
-      dfQkx = deltaTX + alpha * beta * pow(Qkx, beta - 1);  /* Current k */
+      dfQkx = deltaTX + ab * pow(Qkx, betam1);              /* Current k */
       Qkx   -= fQkx / dfQkx;                                /* Next k */
       count++;
-    } while(fabs(fQkx) > epsilon && count < MAX_ITERS);
+    } while(fabs(fQkx) > epsilon && count < maxiters);
+
+    *iters = count;
+    if (fabs(fQkx) > epsilon)
+        *converged = 0;
 
     /*Qk1 = Qkx;*/
     /*Qk1 = max(Qk1,0.0);*/
@@ -228,84 +246,78 @@ static double IterateToQnew(double Qin, double Qold, double q, double alpha, dou
     return(mmax(Qkx,0.0));
 }
 
-void kinematic(double * Qold,double * q,long long* dirDown,long long* dirUpLen,long long* dirUpID,double * Qnew, double * alpha, double beta, double deltaT, double * deltaX, int size){
+void kinematicStats(double * Qold,double * q,long long* dirDown,long long* dirUpLen,long long* dirUpID,double * Qnew, double * alpha, double beta, double deltaT, double * deltaX, int size,
+                    int warmstart, double epsilon, int maxiters, long long* stats){
 
+    /* stats[0]: sum of Newton iterations, stats[1]: cells not converged, stats[2]: cells solved */
     int i,j;
+    int iters, converged;
     long long minID,maxID,down;
     double Qin;
+    double betam1;
+
+    betam1 = beta - 1;
 
-	
     for(i=0;i<size;i++){
 
         Qin = 0.0;
         down = dirDown[i];
-        /*printf("------------- %u %u\n", i,down); */
 
         minID = dirUpLen[down];
         maxID = dirUpLen[down+1];
         for(j=minID;j<maxID;j++)
             Qin += Qnew[dirUpID[j]];
-            /*printf("  -> ID %u %u %u %u  \n", minID,maxID,j,id);
-            printf("Qnew_id  %g \n", Qnew[id]);
-        printf("Qin %g \n", Qin);
-        printf("Qold %g \n", Qold[down]);  */
-
-        Qnew[down] = IterateToQnew(Qin,Qold[down],q[down],alpha[down],beta,deltaT,deltaX[down]);
-        //Qnew[down] = Qin;
-        //printf("Qnew_down %u %g \n",down, Qnew[down]);
+
+        Qnew[down] = IterateToQnew(Qin,Qold[down],q[down],alpha[down],beta,betam1,deltaT/deltaX[down],deltaT,
+                                   warmstart,epsilon,maxiters,&iters,&converged);
+        if (iters > 0) {
+            stats[0] += iters;
+            stats[1] += 1 - converged;
+            stats[2] += 1;
+        }
     }
 }
+
+void kinematic(double * Qold,double * q,long long* dirDown,long long* dirUpLen,long long* dirUpID,double * Qnew, double * alpha, double beta, double deltaT, double * deltaX, int size){
+
+    long long stats[3] = {0, 0, 0};
+
+    kinematicStats(Qold,q,dirDown,dirUpLen,dirUpID,Qnew,alpha,beta,deltaT,deltaX,size,0,0.0001,10,stats);
+}
   
 
 void runoffConc(double * conc, double * peak, double * fraction, double * flow, int maxlag, int size){
-	
+
+	/* every cell is independent -> loop over the cells outside, so it can run in parallel */
 	int i,k,lag;
-	double lag1, lag2;
-	double * lag1alt = new double[size];
-	double * div = new double[size];
-	double * areaFractionOld = new double[size];
-	double * area = new double[size];
-	double * areaAlt = new double[size];
-	double * areaFraction = new double[size];
-	double * areaFractionSum = new double[size];
+	double lag1, lag2, lag1alt, div, area, areaAlt, areaFraction, areaFractionSum, areaFractionOld;
 
+	#pragma omp parallel for private(k,lag,lag1,lag2,lag1alt,div,area,areaAlt,areaFraction,areaFractionSum,areaFractionOld)
 	for(i=0;i<size;i++){
-		div[i] = 2 * pow(peak[i], 2);
-		areaFractionOld[i] = 0.0;
-	}
+		div = 2 * pow(peak[i], 2);
+		areaFractionOld = 0.0;
 
-	for(lag=0;lag<maxlag;lag++){
-		double lag1 = lag + 1;
-		lag2 = pow(lag1, 2);
-		
-		for(i=0;i<size;i++){
+		for(lag=0;lag<maxlag;lag++){
+			lag1 = lag + 1;
+			lag2 = pow(lag1, 2);
+
+			lag1alt = 2 * peak[i] - lag1;
+			area = lag2 / div;
+			areaAlt = 1 - pow(lag1alt, 2) / div;
+
+			if (lag1 > peak[i]) areaFractionSum = areaAlt;
+			else 	areaFractionSum = area;
+			if (lag1alt < 1)	areaFractionSum = 1.0;
+
+			areaFraction = areaFractionSum - areaFractionOld;
+			areaFractionOld = areaFractionSum;
 
-			lag1alt[i] = 2 * peak[i] - lag1;
-			area[i] = lag2 / div[i];
-            areaAlt[i] = 1 - pow(lag1alt[i], 2) / div[i];
-			
-			if (lag1 > peak[i]) areaFractionSum[i] = areaAlt[i];
-			else 	areaFractionSum[i] = area[i];
-			if (lag1alt[i] < 1)	areaFractionSum[i] = 1.0;
-			
-            areaFraction[i] = areaFractionSum[i] - areaFractionOld[i];
-            areaFractionOld[i] = areaFractionSum[i];
-			
 			k = lag * size + i;
-			conc[k] = conc[k] + fraction[i] * flow[i] * areaFraction[i];
-			
+			conc[k] = conc[k] + fraction[i] * flow[i] * areaFraction;
 		}
-    }
-
-		delete [] div;
-		delete [] lag1alt;
-		delete [] areaFractionOld;
-		delete [] area;
-		delete [] areaAlt;
-		delete [] areaFraction;
-		delete [] areaFractionSum;
+	}
 
 	// source http://stackoverflow.com/questions/24040984/transformation-using-triangular-weighting-function-in-python
-	
+
 }
 		
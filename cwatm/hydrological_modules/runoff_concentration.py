@@ -67,6 +67,7 @@ class runoff_concentration(object):
         self.var = model.data.grid
         self.model = model
 
+    @timed
     def initial(self):
         """
         Initial part of the  runoff concentration module
@@ -84,6 +85,7 @@ class runoff_concentration(object):
         """
         return None
 
+    @timed
     def dynamic(self, interflow, directRunoff):
         self.var.runoff = directRunoff + interflow + self.var.baseflow
 
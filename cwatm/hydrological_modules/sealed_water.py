@@ -9,7 +9,7 @@
 # -------------------------------------------------------------------------
 
 import numpy as np
-from cwatm.management_modules.data_handling import checkOption
+from cwatm.management_modules.data_handling import checkOption, checkValidation, timed
 
 class sealed_water(object):
     """
@@ -42,6 +42,7 @@ class sealed_water(object):
         self.var = model.data.HRU
         self.model = model
 
+    @timed
     def dynamic(self, capillar, openWaterEvap, directRunoff):
         """
         Dynamic part of the sealed_water module
@@ -53,10 +54,10 @@ class sealed_water(object):
         """
 
         mult = self.var.full_compressed(0, dtype=np.float32)
-        mult[self.var.land_use_type == 5] = 1
-        mult[self.var.land_use_type == 4] = 0.2
+        mult[self.var.land_use_indices['water']] = 1
+        mult[self.var.land_use_indices['sealed']] = 0.2
 
-        sealed_area = np.where((self.var.land_use_type == 4) | self.var.land_use_type == 5)
+        sealed_area = self.var.land_use_indices['sealed_water']
 
         # GW capillary rise in sealed area is added to the runoff
         openWaterEvap[sealed_area] = np.minimum(mult[sealed_area] * self.var.EWRef[sealed_area], self.var.natural_available_water_infiltration[sealed_area] + capillar[sealed_area])
@@ -65,7 +66,7 @@ class sealed_water(object):
         # open water evaporation is directly substracted from the river, lakes, reservoir
         self.var.actualET[sealed_area] = self.var.actualET[sealed_area] +  openWaterEvap[sealed_area]
 
-        if checkOption('calcWaterBalance'):
+        if checkOption('calcWaterBalance') and checkValidation():
             self.model.waterbalance_module.waterBalanceCheck(
                 how='cellwise',
                 influxes=[self.var.natural_available_water_infiltration[sealed_area], capillar[sealed_area]],
@@ -11,12 +11,61 @@
 from cwatm.management_modules.data_handling import *
 import numpy as np
 import math
+from numba import njit, prange
 try:
     import cupy as cp
 except (ModuleNotFoundError, ImportError):
     pass
 
 
+@njit(parallel=True)
+def snow_layers_numba(Tavg, DeltaTSnow, deltaInvNorm, Precipitation, TempSnow, SnowFactor, TempMelt, SeasSnowMeltCoef,
+                      IceMeltCoef, DtDay, SummerSeason, glaciertransportZone, numberSnowLayersFloat,
+                      SnowCoverS, snowCovered, Rain, SnowMelt, SnowCover):
+    """
+    Rain, snow melt and snow cover of all snow layers, calculated in one pass for each unit (in parallel)
+
+    Units without snow cover (snowCovered) and a temperature above TempSnow in the coldest layer are skipped,
+    all precipitation is rain there. SnowCoverS, snowCovered, Rain, SnowMelt and SnowCover are updated in place
+    """
+
+    for i in prange(Tavg.size):
+        TavgCold = Tavg[i] + min(DeltaTSnow[i] * deltaInvNorm[0], DeltaTSnow[i] * deltaInvNorm[-1])
+        if not snowCovered[i] and TavgCold >= TempSnow[i]:
+            Rain[i] = Precipitation[i]
+            continue
+
+        rain = 0.
+        snowMelt = 0.
+        snowCover = 0.
+        for j in range(deltaInvNorm.size):
+            TavgS = Tavg[i] + DeltaTSnow[i] * deltaInvNorm[j]
+            if TavgS < TempSnow[i]:
+                SnowS = SnowFactor[i] * Precipitation[i]
+                RainS = 0.
+            else:
+                SnowS = 0.
+                RainS = Precipitation[i]
+            SnowMeltS = max((TavgS - TempMelt[i]) * SeasSnowMeltCoef[i] * (1 + 0.01 * RainS) * DtDay, 0.)
+
+            # ice melt with the middle temperature for the upper layers (glacier transport to lower zones)
+            if j <= glaciertransportZone:
+                IceMeltS = max(Tavg[i] * IceMeltCoef[i] * DtDay * SummerSeason, 0.)
+            else:
+                IceMeltS = max(TavgS * IceMeltCoef[i] * DtDay * SummerSeason, 0.)
+
+            SnowMeltS = max(min(SnowMeltS + IceMeltS, SnowCoverS[j, i]), 0.)
+            SnowCoverS[j, i] = SnowCoverS[j, i] + SnowS - SnowMeltS
+            rain += RainS
+            snowMelt += SnowMeltS
+            snowCover += SnowCoverS[j, i]
+
+        Rain[i] = rain / numberSnowLayersFloat
+        SnowMelt[i] = snowMelt / numberSnowLayersFloat
+        SnowCover[i] = snowCover
+        snowCovered[i] = snowCover != 0
+
+
 class snow_frost(object):
 
     """
@@ -80,6 +129,7 @@ class snow_frost(object):
         self.model = model
 
 
+    @timed
     def initial(self, ElevationStD):
         """
         Initial part of the snow and frost module
@@ -88,6 +138,15 @@ class snow_frost(object):
         * loads the parameter for frost
         """
 
+        # all forcing of the snow module (temperature, precipitation, elevation) is on grid resolution,
+        # so snow cover and frost index can be calculated per grid cell and layer and broadcast to the HRUs
+        self.snowGrid = False
+        if "snowGridResolution" in binding:
+            self.snowGrid = returnBool('snowGridResolution')
+        if self.snowGrid:
+            self.var = self.model.data.grid
+            ElevationStD = loadmap('ElevationStD')
+
         self.var.numberSnowLayersFloat = loadmap('NumberSnowLayers')    # default 3
         self.var.numberSnowLayers = int(self.var.numberSnowLayersFloat)
         self.var.glaciertransportZone = int(loadmap('GlacierTransportZone'))  # default 1 -> highest zone is transported to middle zone
@@ -116,7 +175,10 @@ class snow_frost(object):
 
         #self.var.DeltaTSnow =  uNorm[self.var.numberSnowLayers] * ElevationStD * loadmap('TemperatureLapseRate')
         #self.var.DeltaTSnow = 0.9674 * ElevationStD * loadmap('TemperatureLapseRate')
-        self.var.DeltaTSnow = ElevationStD * self.model.data.to_HRU(data=loadmap('TemperatureLapseRate'), fn=None)  # checked
+        if self.snowGrid:
+            self.var.DeltaTSnow = ElevationStD * loadmap('TemperatureLapseRate')
+        else:
+            self.var.DeltaTSnow = ElevationStD * self.model.data.to_HRU(data=loadmap('TemperatureLapseRate'), fn=None)  # checked
 
 
         self.var.SnowDayDegrees = 0.9856
@@ -137,8 +199,15 @@ class snow_frost(object):
 
         # initialize snowcovers as many as snow layers -> read them as SnowCover1 , SnowCover2 ...
         # SnowCover1 is the highest zone
-        SnowCoverS = np.tile(self.model.data.to_HRU(data=self.model.data.grid.full_compressed(0, dtype=np.float32), fn=None), (self.var.numberSnowLayers, 1))
-        self.var.SnowCoverS = self.model.data.HRU.load_initial("SnowCoverS", default=SnowCoverS)
+        # the initial conditions of snow cover and frost index are always on HRU resolution, with snowGridResolution
+        # they are averaged to the grid cells, so they can be used with and without snowGridResolution
+        HRU = self.model.data.HRU
+        SnowCoverS_default = np.tile(HRU.full_compressed(0, dtype=np.float32), (self.var.numberSnowLayers, 1))
+        SnowCoverS = HRU.load_initial("SnowCoverS", default=SnowCoverS_default)
+        self.checkInitial("SnowCoverS", SnowCoverS, SnowCoverS_default.shape)
+        if self.snowGrid:
+            SnowCoverS = np.stack([self.model.data.to_grid(HRU_data=SnowCover, fn='mean') for SnowCover in SnowCoverS]).astype(np.float32)
+        self.var.SnowCoverS = SnowCoverS
 
         # Pixel-average initial snow cover: average of values in 3 elevation
         # zones
@@ -151,7 +220,18 @@ class snow_frost(object):
         self.var.FrostIndexThreshold = loadmap('FrostIndexThreshold')
         self.var.SnowWaterEquivalent = loadmap('SnowWaterEquivalent')
 
-        self.var.FrostIndex = self.model.data.HRU.load_initial('FrostIndex', default=self.model.data.HRU.full_compressed(0, dtype=np.float32))
+        FrostIndex = HRU.load_initial('FrostIndex', default=HRU.full_compressed(0, dtype=np.float32))
+        self.checkInitial("FrostIndex", FrostIndex, SnowCoverS_default[0].shape)
+        if self.snowGrid:
+            FrostIndex = self.model.data.to_grid(HRU_data=FrostIndex, fn='mean').astype(np.float32)
+        self.var.FrostIndex = FrostIndex
+
+        if self.snowGrid:
+            # used on HRU level by the soil and land cover modules, snow cover and frost index are kept on HRU level
+            # for the initial conditions
+            HRU.numberSnowLayersFloat = self.var.numberSnowLayersFloat
+            HRU.FrostIndexThreshold = self.var.FrostIndexThreshold
+            self.broadcastHRU()
 
         self.var.extfrostindex = False
         if "morefrost" in binding:
@@ -163,7 +243,40 @@ class snow_frost(object):
             for i in range(self.var.numberSnowLayers):
                 self.var.frostindexS.append(globals.inZero)
 
+        # snow layers: numpy (default) or compiled per unit kernel, which skips units without snow cover and
+        # snow fall. The frost index of each snow layer (morefrost) is only calculated with numpy
+        self.var.snowNumba = False
+        if "snowKernel" in binding:
+            self.var.snowNumba = cbinding('snowKernel').lower() == "numba" and not self.var.extfrostindex
+        # units with snow cover in any layer, maintained by the compiled kernel
+        self.var.snowCovered = (self.var.SnowCoverS != 0).any(axis=0)
+
+
+    def checkInitial(self, name, value, shape):
+        """
+        Initial conditions of snow cover and frost index have to be on HRU resolution (see initial)
 
+        :param name: name of the initial condition
+        :param value: initial condition
+        :param shape: shape on HRU resolution
+        """
+
+        if np.shape(value) != shape:
+            msg = "Initial value: \"" + name + "\" has the shape: " + str(np.shape(value)) + " instead of: " + str(shape) + "\n"
+            msg += "Snow cover (one row for each snow layer) and frost index are stored for each HRU,\n"
+            msg += "also with \"snowGridResolution = True\""
+            raise CWATMError(msg)
+
+    def broadcastHRU(self):
+        """
+        Snow cover and frost index from the grid cells to the HRUs (with snowGridResolution)
+        """
+
+        HRU = self.model.data.HRU
+        HRU.FrostIndex = self.model.data.to_HRU(data=self.var.FrostIndex, fn=None)
+        HRU.SnowCoverS = np.stack([self.model.data.to_HRU(data=SnowCover, fn=None) for SnowCover in self.var.SnowCoverS])
+
+    @timed
     def dynamic(self, Tavg):
         """
         Dynamic part of the snow module
@@ -182,7 +295,12 @@ class snow_frost(object):
         Todo:
             calculate sinus shape function for the southern hemisspere
         """
-        if checkOption('calcWaterBalance'):
+        if self.snowGrid:
+            Tavg = self.model.data.grid.Tavg
+
+        # snow cover before the time step for the water balance check of landcoverType (see validationLevel)
+        balanceCheck = checkOption('calcWaterBalance') and checkValidation()
+        if balanceCheck:
             self.var.prevSnowCover = np.sum(self.var.SnowCoverS, axis=0)
 
         SeasSnowMeltCoef = self.var.SnowSeason * np.sin(math.radians((dateVar['doy'] - 81)
@@ -200,50 +318,67 @@ class snow_frost(object):
         else:
             SummerSeason = 0.0
 
-        Snow = self.var.full_compressed(0, dtype=np.float32)
-        self.var.Rain = self.var.full_compressed(0, dtype=np.float32)
-        self.var.SnowMelt = self.var.full_compressed(0, dtype=np.float32)
-
-        for i in range(self.var.numberSnowLayers):
-            TavgS = Tavg + self.var.DeltaTSnow * self.var.deltaInvNorm[i]
-            # Temperature at center of each zone (temperature at zone B equals Tavg)
-            # i=0 -> highest zone
-            # i=2 -> lower zone
-            SnowS = np.where(TavgS < self.var.TempSnow, self.var.SnowFactor * self.var.Precipitation, self.var.full_compressed(0, dtype=np.float32))
-            # Precipitation is assumed to be snow if daily average temperature is below TempSnow
-            # Snow is multiplied by correction factor to account for undercatch of
-            # snow precipitation (which is common)
-            RainS = np.where(TavgS >= self.var.TempSnow, self.var.Precipitation, self.var.full_compressed(0, dtype=np.float32))
-            # if it's snowing then no rain
-            # snowmelt coeff in m/deg C/day
-            SnowMeltS = (TavgS - self.var.TempMelt) * SeasSnowMeltCoef * (1 + 0.01 * RainS) * self.model.DtDay
-            SnowMeltS = np.maximum(SnowMeltS, self.var.full_compressed(0, dtype=np.float32))
-
-            # for which layer the ice melt is calcultated with the middle temp.
-            # for the others it is calculated with the corrected temp
-            # this is to mimic glacier transport to lower zones
-            if i <= self.var.glaciertransportZone:
-                IceMeltS = Tavg * self.var.IceMeltCoef * self.model.DtDay * SummerSeason
-                # if i = 0 and 1 -> higher and middle zone
-                # Ice melt coeff in m/C/deg
-            else:
-                IceMeltS = TavgS * self.var.IceMeltCoef * self.model.DtDay * SummerSeason
-
-            IceMeltS = np.maximum(IceMeltS, self.var.full_compressed(0, dtype=np.float32))
-            SnowMeltS = np.maximum(np.minimum(SnowMeltS + IceMeltS, self.var.SnowCoverS[i]), self.var.full_compressed(0, dtype=np.float32))
-            # check if snow+ice not bigger than snowcover
-            self.var.SnowCoverS[i] = self.var.SnowCoverS[i] + SnowS - SnowMeltS
-            Snow += SnowS
-            self.var.Rain += RainS
-            self.var.SnowMelt += SnowMeltS
-
-
-            if self.var.extfrostindex:
-                Kfrost = np.where(TavgS < 0, 0.08, 0.5)
-                FrostIndexChangeRate = -(1 - self.var.Afrost) * self.var.frostindexS[i] - TavgS *\
-                        np.exp(-0.4 * 100 * Kfrost * np.minimum(1.0, self.var.SnowCoverS[i] / self.var.SnowWaterEquivalent))
-                self.var.frostindexS[i] = np.maximum(self.var.frostindexS[i] + FrostIndexChangeRate * self.model.DtDay, 0)
+        if self.var.snowNumba:
+            # all snow layers of a unit in one pass, units without snow cover and snow fall are skipped
+            self.var.Rain = self.var.full_compressed(0, dtype=np.float32)
+            self.var.SnowMelt = self.var.full_compressed(0, dtype=np.float32)
+            SnowCover = self.var.full_compressed(0, dtype=np.float32)
+            shape = self.var.SnowCoverS[0].shape
+            snow_layers_numba(Tavg, np.broadcast_to(self.var.DeltaTSnow, shape), self.var.deltaInvNorm, self.var.Precipitation,
+                np.broadcast_to(self.var.TempSnow, shape), np.broadcast_to(self.var.SnowFactor, shape), np.broadcast_to(self.var.TempMelt, shape),
+                np.broadcast_to(SeasSnowMeltCoef, shape), np.broadcast_to(self.var.IceMeltCoef, shape), self.model.DtDay, SummerSeason,
+                self.var.glaciertransportZone, self.var.numberSnowLayersFloat,
+                self.var.SnowCoverS, self.var.snowCovered, self.var.Rain, self.var.SnowMelt, SnowCover)
+        else:
+            Snow = self.var.full_compressed(0, dtype=np.float32)
+            self.var.Rain = self.var.full_compressed(0, dtype=np.float32)
+            self.var.SnowMelt = self.var.full_compressed(0, dtype=np.float32)
 
+            for i in range(self.var.numberSnowLayers):
+                TavgS = Tavg + self.var.DeltaTSnow * self.var.deltaInvNorm[i]
+                # Temperature at center of each zone (temperature at zone B equals Tavg)
+                # i=0 -> highest zone
+                # i=2 -> lower zone
+                SnowS = np.where(TavgS < self.var.TempSnow, self.var.SnowFactor * self.var.Precipitation, self.var.full_compressed(0, dtype=np.float32))
+                # Precipitation is assumed to be snow if daily average temperature is below TempSnow
+                # Snow is multiplied by correction factor to account for undercatch of
+                # snow precipitation (which is common)
+                RainS = np.where(TavgS >= self.var.TempSnow, self.var.Precipitation, self.var.full_compressed(0, dtype=np.float32))
+                # if it's snowing then no rain
+                # snowmelt coeff in m/deg C/day
+                SnowMeltS = (TavgS - self.var.TempMelt) * SeasSnowMeltCoef * (1 + 0.01 * RainS) * self.model.DtDay
+                SnowMeltS = np.maximum(SnowMeltS, self.var.full_compressed(0, dtype=np.float32))
+
+                # for which layer the ice melt is calcultated with the middle temp.
+                # for the others it is calculated with the corrected temp
+                # this is to mimic glacier transport to lower zones
+                if i <= self.var.glaciertransportZone:
+                    IceMeltS = Tavg * self.var.IceMeltCoef * self.model.DtDay * SummerSeason
+                    # if i = 0 and 1 -> higher and middle zone
+                    # Ice melt coeff in m/C/deg
+                else:
+                    IceMeltS = TavgS * self.var.IceMeltCoef * self.model.DtDay * SummerSeason
+
+                IceMeltS = np.maximum(IceMeltS, self.var.full_compressed(0, dtype=np.float32))
+                SnowMeltS = np.maximum(np.minimum(SnowMeltS + IceMeltS, self.var.SnowCoverS[i]), self.var.full_compressed(0, dtype=np.float32))
+                # check if snow+ice not bigger than snowcover
+                self.var.SnowCoverS[i] = self.var.SnowCoverS[i] + SnowS - SnowMeltS
+                Snow += SnowS
+                self.var.Rain += RainS
+                self.var.SnowMelt += SnowMeltS
+
+
+                if self.var.extfrostindex:
+                    Kfrost = np.where(TavgS < 0, 0.08, 0.5)
+                    FrostIndexChangeRate = -(1 - self.var.Afrost) * self.var.frostindexS[i] - TavgS *\
+                            np.exp(-0.4 * 100 * Kfrost * np.minimum(1.0, self.var.SnowCoverS[i] / self.var.SnowWaterEquivalent))
+                    self.var.frostindexS[i] = np.maximum(self.var.frostindexS[i] + FrostIndexChangeRate * self.model.DtDay, 0)
+
+            Snow /= self.var.numberSnowLayersFloat
+            self.var.Rain /= self.var.numberSnowLayersFloat
+            self.var.SnowMelt /= self.var.numberSnowLayersFloat
+            # all in pixel
+            SnowCover = np.sum(self.var.SnowCoverS, axis=0)
 
         if self.var.extfrostindex:
             if dateVar['curr'] >= dateVar['intSpin']:
@@ -256,11 +391,6 @@ class snow_frost(object):
 
 
 
-        Snow /= self.var.numberSnowLayersFloat
-        self.var.Rain /= self.var.numberSnowLayersFloat
-        self.var.SnowMelt /= self.var.numberSnowLayersFloat
-        # all in pixel
-
         # DEBUG Snow
         # if checkOption('calcWaterBalance'):
         #     self.var.waterbalance_module.waterBalanceCheck(
@@ -275,7 +405,7 @@ class snow_frost(object):
         # Dynamic part of frost index
         Kfrost = np.where(Tavg < 0, 0.08, 0.5).astype(Tavg.dtype)
         FrostIndexChangeRate = -(1 - self.var.Afrost) * self.var.FrostIndex - Tavg * \
-            np.exp(-0.4 * 100 * Kfrost * np.minimum(1.0, (np.sum(self.var.SnowCoverS, axis=0) / self.var.numberSnowLayersFloat) / self.var.SnowWaterEquivalent))
+            np.exp(-0.4 * 100 * Kfrost * np.minimum(1.0, (SnowCover / self.var.numberSnowLayersFloat) / self.var.SnowWaterEquivalent))
         # Rate of change of frost index (expressed as rate, [degree days/day])
         self.var.FrostIndex = np.maximum(self.var.FrostIndex + FrostIndexChangeRate * self.model.DtDay, 0)
         # frost index in soil [degree days] based on Molnau and Bissel (1983, A Continuous Frozen Ground Index for Flood
@@ -289,6 +419,14 @@ class snow_frost(object):
         # Afrost, (daily decay coefficient) is taken as 0.97 (Handbook of Hydrology, p. 7.28)
         # Kfrost, (snow depth reduction coefficient) is taken as 0.57 [1/cm], (HH, p. 7.28) -> from Molnau taken as 0.5 for t> 0 and 0.08 for T<0
 
+        if self.snowGrid:
+            # broadcast rain, snow melt and frost index from grid cells to HRUs
+            self.model.data.HRU.Rain = self.model.data.to_HRU(data=self.var.Rain, fn=None)
+            self.model.data.HRU.SnowMelt = self.model.data.to_HRU(data=self.var.SnowMelt, fn=None)
+            self.broadcastHRU()
+            if balanceCheck:
+                self.model.data.HRU.prevSnowCover = self.model.data.to_HRU(data=self.var.prevSnowCover, fn=None)
+
         """
         if self.var.extfrostindex:
 
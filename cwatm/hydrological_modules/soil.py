@@ -9,7 +9,297 @@
 # -------------------------------------------------------------------------
 
 import numpy as np
-from cwatm.management_modules.data_handling import cbinding, loadmap, divideValues, checkOption
+from numba import njit, prange
+from cwatm.management_modules.data_handling import cbinding, loadmap, divideValues, checkOption, checkValidation, binding, timed
+
+
+def kUnSat_vanGenuchten(KSat, satTerm, genuM, genuInvM):
+    """
+    unsaturated hydraulic conductivity after van Genuchten
+
+    :math:`k = K_{sat} \\sqrt{S} (1 - (1 - S^{1/m})^m)^2`
+
+    :param KSat: saturated conductivity
+    :param satTerm: saturation term S (between 0 and 1)
+    :param genuM: van Genuchten m = lambda / (lambda + 1), precomputed in landcoverType.initial
+    :param genuInvM: 1 / m, precomputed in landcoverType.initial
+    :return: unsaturated conductivity
+    """
+    return KSat * np.sqrt(satTerm) * np.square(1 - (1 - satTerm ** genuInvM) ** genuM)
+
+
+@njit
+def kUnSat_vanGenuchten_numba(KSat, satTerm, genuM, genuInvM):
+    """
+    unsaturated hydraulic conductivity after van Genuchten for one HRU (same as kUnSat_vanGenuchten)
+    """
+    one = np.float32(1)
+    k = one - (one - satTerm ** genuInvM) ** genuM
+    return KSat * np.sqrt(satTerm) * (k * k)
+
+
+@njit
+def rws_clip(x, y):
+    """
+    transpiration reduction factor x / y between 0 and 1, same as np.maximum(np.minimum(1., divideValues(x, y)), 0.)
+    """
+    if y == 0:
+        if x > 0:
+            return np.float32(1)
+        return np.float32(0)
+    r = x / y
+    if r != r:
+        return np.float32(0)
+    return max(min(np.float32(1), r), np.float32(0))
+
+
+@njit
+def flux_ratio(kUnSat, availWater):
+    """
+    percolation in one day relative to the available water of a layer, same as divideValues(kUnSat, availWater)
+    """
+    if availWater > 0:
+        return kUnSat / availWater
+    return np.float32(0)
+
+
+@njit(parallel=True)
+def soil_column_numba(
+    land_use_type, natural_available_water_infiltration, actual_irrigation_consumption, cropKC, EWRef, capillar,
+    potTranspiration, potBareSoilEvap, totalPotET, cropGroupNumber, adjRoot, FrostIndex, FrostIndexThreshold,
+    arnoBeta, cPrefFlow, capriseindex, maxtopwater, percolationImp,
+    ws1, ws2, ws3, wres1, wres2, wres3, wfc1, wfc2, wfc3, wwp1, wwp2, wwp3,
+    KSat1, KSat2, KSat3, genuM1, genuM2, genuM3, genuInvM1, genuInvM2, genuInvM3, kunSatFC12, kunSatFC23, NoSubSteps, subStepTolerance, MaxSubSteps,
+    w1, w2, w3, topwater, openWaterEvap, actTransTotal, actBareSoilEvap, actualET,
+    directRunoff, perc3toGW, prefFlow, interflow, groundwater_recharge, subSteps
+):
+    """
+    Soil column of soil.dynamic in one pass for each HRU, parallel over HRUs
+
+    The same steps as the numpy version: paddy flooding, capillary rise, transpiration, bare soil evaporation,
+    infiltration (Arno), preferential flow, capillary rise between layers, percolation in NoSubSteps substeps and interflow.
+    With subStepTolerance > 0 the length of the substeps is adaptive for each HRU as in soil.dynamic (at most
+    MaxSubSteps substeps, the number is stored in subSteps).
+    State (w1, w2, w3, topwater) and fluxes are updated in place, only HRUs with land use type < 4 are calculated.
+
+    All arithmetic is single precision like the numpy version on the float32 HRU arrays. The van Genuchten
+    conductivity is very steep close to saturation, calculating in double precision would change percolation.
+    """
+    zero = np.float32(0)
+    one = np.float32(1)
+    for i in prange(land_use_type.size):
+        if land_use_type[i] >= 4:
+            continue
+        paddy = land_use_type[i] == 2
+        flooded = cropKC[i] > 0.75
+        frozen = FrostIndex[i] > FrostIndexThreshold
+
+        availWaterInfiltration = max(natural_available_water_infiltration[i] + actual_irrigation_consumption[i], zero)
+        top = topwater[i]
+
+        # paddy fields are flooded if cropKC > 0.75, open water evaporation from the paddy field
+        if paddy:
+            if flooded:
+                top = top + availWaterInfiltration
+            openWaterEvap[i] = min(max(zero, top), EWRef[i])
+            top = top - openWaterEvap[i]
+            if flooded:
+                availWaterInfiltration = top
+            else:
+                availWaterInfiltration = top + availWaterInfiltration
+            potBareSoilEvap[i] = max(zero, potBareSoilEvap[i] - openWaterEvap[i])
+
+        # capillary rise from GW, if a layer is full it is send to the layer above, then to runoff
+        wl1 = w1[i]
+        wl2 = w2[i]
+        wl3 = w3[i] + capillar[i]
+        if wl3 > ws3[i]:
+            wl2 = wl2 + (wl3 - ws3[i])
+        wl3 = min(ws3[i], wl3)
+        if wl2 > ws2[i]:
+            wl1 = wl1 + (wl2 - ws2[i])
+        wl2 = min(ws2[i], wl2)
+        saverunofffromGW = zero
+        if wl1 > ws1[i]:
+            saverunofffromGW = wl1 - ws1[i]
+        wl1 = min(ws1[i], wl1)
+
+        # soil water depletion fraction - Van Diepen et al., 1988: WOFOST 6.0, p.87
+        etpotMax = min(np.float32(0.1) * (totalPotET[i] * np.float32(1000.)), one)
+        if land_use_type[i] >= 2:
+            p = one / (np.float32(0.76) + np.float32(1.5) * etpotMax) - np.float32(0.4)
+            p = p + (etpotMax - np.float32(0.6)) / np.float32(4)
+        else:
+            p = one / (np.float32(0.76) + np.float32(1.5) * etpotMax) - np.float32(0.10) * (np.float32(5) - cropGroupNumber[i])
+            if cropGroupNumber[i] <= 2.5:
+                p = p + (etpotMax - np.float32(0.6)) / (cropGroupNumber[i] * (cropGroupNumber[i] + np.float32(3)))
+        p = max(min(p, one), zero)
+
+        wCrit1 = ((one - p) * (wfc1[i] - wwp1[i])) + wwp1[i]
+        wCrit2 = ((one - p) * (wfc2[i] - wwp2[i])) + wwp2[i]
+        wCrit3 = ((one - p) * (wfc3[i] - wwp3[i])) + wwp3[i]
+
+        # transpiration reduction factor (in case of water stress)
+        rws1 = rws_clip(wl1 - wwp1[i], wCrit1 - wwp1[i]) * adjRoot[0, i]
+        rws2 = rws_clip(wl2 - wwp2[i], wCrit2 - wwp2[i]) * adjRoot[1, i]
+        rws3 = rws_clip(wl3 - wwp3[i], wCrit3 - wwp3[i]) * adjRoot[2, i]
+
+        TaMax = potTranspiration[i] * (rws1 + rws2 + rws3)
+        # transpiration is 0 when soil is frozen
+        if frozen:
+            TaMax = zero
+
+        ta1 = max(min(TaMax * adjRoot[0, i], wl1 - wwp1[i]), zero)
+        ta2 = max(min(TaMax * adjRoot[1, i], wl2 - wwp2[i]), zero)
+        ta3 = max(min(TaMax * adjRoot[2, i], wl3 - wwp3[i]), zero)
+        wl1 = wl1 - ta1
+        wl2 = wl2 - ta2
+        wl3 = wl3 - ta3
+        actTransTotal[i] = ta1 + ta2 + ta3
+
+        # actual bare soil evaporation - upper layer, none in the inundated paddy field
+        bareSoilEvap = min(potBareSoilEvap[i], max(zero, wl1 - wres1[i]))
+        if frozen or (paddy and top > 0):
+            bareSoilEvap = zero
+        actBareSoilEvap[i] = bareSoilEvap
+        wl1 = wl1 - bareSoilEvap
+
+        # infiltration capacity - Arno scheme with the first 2 soil layers
+        soilWaterStorageCap = ws1[i] + ws2[i]
+        relSat = min((wl1 + wl2) / soilWaterStorageCap, one)
+        satAreaFrac = max(min(one - (one - relSat) ** arnoBeta[i], one), zero)
+        store = soilWaterStorageCap / (arnoBeta[i] + one)
+        potBeta = (arnoBeta[i] + one) / arnoBeta[i]
+        potInf = store - store * (one - (one - satAreaFrac) ** potBeta)
+
+        # preferential flow
+        pref = availWaterInfiltration * relSat ** cPrefFlow
+        if frozen or paddy:
+            pref = zero
+        pref = pref * (one - capriseindex[i])
+
+        # infiltration, limited with KSat1 and available water in topWaterLayer
+        infiltration = min(potInf, availWaterInfiltration - pref)
+        if frozen:
+            infiltration = zero
+        runoff = max(zero, availWaterInfiltration - infiltration - pref)
+
+        # if paddy fields flooded only runoff if topwater > maxtopwater
+        if paddy:
+            top = max(zero, top - infiltration)
+            if flooded:
+                runoff = max(zero, top - maxtopwater)
+            top = max(zero, top - runoff)
+        runoff = runoff + saverunofffromGW
+
+        # infiltration to soilayer 1 , if this is full it is send to soil layer 2
+        wl1 = wl1 + infiltration
+        if wl1 > ws1[i]:
+            wl2 = wl2 + (wl1 - ws1[i])
+        wl1 = min(ws1[i], wl1)
+
+        # capillar rise between the soil layers
+        availWater3 = max(zero, wl3 - wres3[i])
+        satTerm2 = max(min(max(zero, wl2 - wres2[i]) / (ws2[i] - wres2[i]), one), zero)
+        satTerm3 = max(min(availWater3 / (ws3[i] - wres3[i]), one), zero)
+        kUnSat2 = kUnSat_vanGenuchten_numba(KSat2[i], satTerm2, genuM2[i], genuInvM2[i])
+        kUnSat3 = kUnSat_vanGenuchten_numba(KSat3[i], satTerm3, genuM3[i], genuInvM3[i])
+
+        satTermFC1 = max(zero, wl1 - wres1[i]) / (wfc1[i] - wres1[i])
+        satTermFC2 = max(zero, wl2 - wres2[i]) / (wfc2[i] - wres2[i])
+        capRise1 = min(max(zero, (one - satTermFC1) * kUnSat2), kunSatFC12[i])
+        capRise2 = min(max(zero, (one - satTermFC2) * kUnSat3), kunSatFC23[i])
+        capRise2 = min(capRise2, availWater3)
+
+        wl1 = wl1 + capRise1
+        wl2 = wl2 - capRise1 + capRise2
+        wl3 = wl3 - capRise2
+
+        # percolation in substeps
+        availWater1 = max(zero, wl1 - wres1[i])
+        availWater2 = max(zero, wl2 - wres2[i])
+        availWater3 = max(zero, wl3 - wres3[i])
+        capLayer2 = ws2[i] - wl2
+        capLayer3 = ws3[i] - wl3
+        wtemp1 = wl1
+        wtemp2 = wl2
+        wtemp3 = wl3
+        perc1to2 = zero
+        perc2to3 = zero
+        perc3 = zero
+        adaptive = subStepTolerance > 0
+        tolerance = np.float32(subStepTolerance)
+        noSubSteps = NoSubSteps
+        if adaptive:
+            noSubSteps = MaxSubSteps
+        DtSub = np.float32(1. / NoSubSteps)
+        remaining = one
+        steps = 0
+        for s in range(noSubSteps):
+            if adaptive and remaining <= 0:
+                break
+            if s == 0:
+                satTerm1 = availWater1 / (ws1[i] - wres1[i])
+                satTerm2 = availWater2 / (ws2[i] - wres2[i])
+                satTerm3 = availWater3 / (ws3[i] - wres3[i])
+            else:
+                satTerm1 = max(zero, wtemp1 - wres1[i]) / (ws1[i] - wres1[i])
+                satTerm2 = max(zero, wtemp2 - wres2[i]) / (ws2[i] - wres2[i])
+                satTerm3 = max(zero, wtemp3 - wres3[i]) / (ws3[i] - wres3[i])
+            satTerm1 = max(min(satTerm1, one), zero)
+            satTerm2 = max(min(satTerm2, one), zero)
+            satTerm3 = max(min(satTerm3, one), zero)
+            kUnSat1 = kUnSat_vanGenuchten_numba(KSat1[i], satTerm1, genuM1[i], genuInvM1[i])
+            kUnSat2 = kUnSat_vanGenuchten_numba(KSat2[i], satTerm2, genuM2[i], genuInvM2[i])
+            kUnSat3 = kUnSat_vanGenuchten_numba(KSat3[i], satTerm3, genuM3[i], genuInvM3[i])
+
+            if adaptive:
+                # length of the substep from the largest ratio of percolation to available water, the last one takes the rest of the day
+                if s < noSubSteps - 1:
+                    ratio = max(max(flux_ratio(kUnSat1, availWater1), flux_ratio(kUnSat2, availWater2)), flux_ratio(kUnSat3, availWater3))
+                    DtSub = min(remaining, tolerance / max(ratio, tolerance))
+                else:
+                    DtSub = remaining
+                remaining = remaining - DtSub
+            steps += 1
+
+            subperc1to2 = min(availWater1, min(kUnSat1 * DtSub, capLayer2))
+            subperc2to3 = min(availWater2, min(kUnSat2 * DtSub, capLayer3))
+            subperc3toGW = min(availWater3, min(kUnSat3 * DtSub, availWater3)) * (one - capriseindex[i])
+
+            availWater1 = availWater1 - subperc1to2
+            availWater2 = availWater2 + subperc1to2 - subperc2to3
+            availWater3 = availWater3 + subperc2to3 - subperc3toGW
+            wtemp1 = availWater1 + wres1[i]
+            wtemp2 = availWater2 + wres2[i]
+            wtemp3 = availWater3 + wres3[i]
+            capLayer2 = ws2[i] - wtemp2
+            capLayer3 = ws3[i] - wtemp3
+
+            perc1to2 += subperc1to2
+            perc2to3 += subperc2to3
+            perc3 += subperc3toGW
+
+        # when the soil is frozen no perc1 and 2
+        if frozen:
+            perc1to2 = zero
+            perc2to3 = zero
+
+        w1[i] = wl1 - perc1to2
+        w2[i] = wl2 + perc1to2 - perc2to3
+        w3[i] = wl3 + perc2to3 - perc3
+        topwater[i] = top
+
+        actualET[i] = actualET[i] + actBareSoilEvap[i] + openWaterEvap[i] + actTransTotal[i]
+
+        directRunoff[i] = runoff
+        perc3toGW[i] = perc3
+        prefFlow[i] = pref
+        toGWorInterflow = perc3 + pref
+        interflow[i] = percolationImp[i] * toGWorInterflow
+        groundwater_recharge[i] = (one - percolationImp[i]) * toGWorInterflow
+        subSteps[i] = steps
+
 
 class soil(object):
 
@@ -111,6 +401,7 @@ class soil(object):
         self.var = model.data.HRU
         self.model = model
 
+    @timed
     def initial(self):
         """
         Initial part of the soil module
@@ -157,8 +448,26 @@ class soil(object):
         soildepth[2] = soildepth[2] * soildepth_factor
 
         self.model.data.grid.soildepth_12 = self.model.data.to_grid(HRU_data=soildepth[1] + soildepth[2], fn='mean')
+
+        # soil column: numpy (default) or compiled per HRU kernel
+        self.var.soilNumba = False
+        if "soilKernel" in binding:
+            self.var.soilNumba = cbinding('soilKernel').lower() == "numba"
+
+        # number of substeps of the percolation, same for the numpy and the compiled soil column
+        self.model.NoSubSteps = 3
+
+        # adaptive percolation substeps: in one substep at most soilSubStepTolerance of the available water of a layer
+        # percolates, with at most soilMaxSubSteps substeps per day (soilSubStepTolerance = 0: always NoSubSteps)
+        self.var.soilSubStepTolerance = 0.
+        if "soilSubStepTolerance" in binding:
+            self.var.soilSubStepTolerance = float(cbinding('soilSubStepTolerance'))
+        self.var.soilMaxSubSteps = 10 * self.model.NoSubSteps
+        if "soilMaxSubSteps" in binding:
+            self.var.soilMaxSubSteps = int(cbinding('soilMaxSubSteps'))
         return soildepth
 
+    @timed
     def dynamic(self, capillar, openWaterEvap, potTranspiration, potBareSoilEvap, totalPotET):
         """
         Dynamic part of the soil module
@@ -168,20 +477,25 @@ class soil(object):
         Dependend on soil depth, soil hydraulic parameters
         """
 
-        from time import time
-        t0 = time()
+        if self.var.soilNumba:
+            return self.dynamic_numba(capillar, openWaterEvap, potTranspiration, potBareSoilEvap, totalPotET)
 
-        if checkOption('calcWaterBalance'):
+        # runtime checks and water balance check in this time step (see validationLevel)
+        validate = checkValidation()
+        balanceCheck = checkOption('calcWaterBalance') and validate
+        if balanceCheck:
             w1_pre = self.var.w1.copy()
             w2_pre = self.var.w2.copy()
             w3_pre = self.var.w3.copy()
             topwater_pre = self.var.topwater.copy()
 
-        bioarea = np.where(self.var.land_use_type < 4)[0].astype(np.int32)
-        paddy_irrigated_land = np.where(self.var.land_use_type == 2)
-        irrigated_land = np.where((self.var.land_use_type == 2) | (self.var.land_use_type == 3))
+        # slices if the HRUs are sorted by land use type, otherwise indices
+        bioarea = self.var.land_use_indices['bioarea']
+        paddy_irrigated_land = self.var.land_use_indices['paddy_irrigated']
+        irrigated_land = self.var.land_use_indices['irrigated']
         availWaterInfiltration = self.var.natural_available_water_infiltration + self.var.actual_irrigation_consumption
-        assert (availWaterInfiltration + 1e-6 >= 0).all()
+        if validate:
+            assert (availWaterInfiltration + 1e-6 >= 0).all()
         availWaterInfiltration[availWaterInfiltration < 0] = 0
 
         # depending on the crop calender -> here if cropKC > 0.75 paddies are flooded to 50mm (as set in settings file)
@@ -192,7 +506,8 @@ class soil(object):
         openWaterEvap[paddy_irrigated_land] = np.minimum(np.maximum(0., self.var.topwater[paddy_irrigated_land]), self.var.EWRef[paddy_irrigated_land])
         self.var.topwater[paddy_irrigated_land] = self.var.topwater[paddy_irrigated_land] - openWaterEvap[paddy_irrigated_land]
 
-        assert (self.var.topwater >= 0).all()
+        if validate:
+            assert (self.var.topwater >= 0).all()
 
         # if paddies are flooded, avail water is calculated before: top + avail, otherwise it is calculated here
         availWaterInfiltration[paddy_irrigated_land] = np.where(self.var.cropKC[paddy_irrigated_land] > 0.75, self.var.topwater[paddy_irrigated_land], self.var.topwater[paddy_irrigated_land] + availWaterInfiltration[paddy_irrigated_land])
@@ -213,9 +528,10 @@ class soil(object):
         saverunofffromGW = np.where(self.var.w1[bioarea] > self.var.ws1[bioarea], self.var.w1[bioarea] - self.var.ws1[bioarea], 0)
         self.var.w1[bioarea] = np.minimum(self.var.ws1[bioarea], self.var.w1[bioarea])
 
-        assert (self.var.w1 >= 0).all()
-        assert (self.var.w2 >= 0).all()
-        assert (self.var.w3 >= 0).all()
+        if validate:
+            assert (self.var.w1 >= 0).all()
+            assert (self.var.w2 >= 0).all()
+            assert (self.var.w3 >= 0).all()
 
         # ---------------------------------------------------------
         # calculate transpiration
@@ -237,7 +553,7 @@ class soil(object):
         # for irrigation it is expected that the crop has a low adaptation to dry climate
  
         # for non-irrigated bioland
-        non_irrigated_bioland = np.where((self.var.land_use_type == 0) | (self.var.land_use_type == 1))
+        non_irrigated_bioland = self.var.land_use_indices['non_irrigated_bioland']
         p[non_irrigated_bioland] = 1 / (0.76 + 1.5 * etpotMax[non_irrigated_bioland]) - 0.10 * (5 - self.var.cropGroupNumber[non_irrigated_bioland])
         # soil water depletion fraction (easily available soil water)
         # Van Diepen et al., 1988: WOFOST 6.0, p.87
@@ -295,9 +611,10 @@ class soil(object):
         self.var.w2[bioarea] = self.var.w2[bioarea] - ta2
         self.var.w3[bioarea] = self.var.w3[bioarea] - ta3
 
-        assert (self.var.w1 >= 0).all()
-        assert (self.var.w2 >= 0).all()
-        assert (self.var.w3 >= 0).all()
+        if validate:
+            assert (self.var.w1 >= 0).all()
+            assert (self.var.w2 >= 0).all()
+            assert (self.var.w3 >= 0).all()
 
         self.var.actTransTotal[bioarea] = ta1 + ta2 + ta3
 
@@ -382,9 +699,27 @@ class soil(object):
         self.var.w1[bioarea] = np.minimum(self.var.ws1[bioarea], self.var.w1[bioarea])
 
         del infiltration
-        assert (self.var.w1 >= 0).all()
-        assert (self.var.w2 >= 0).all()
-        assert (self.var.w3 >= 0).all()
+        if validate:
+            assert (self.var.w1 >= 0).all()
+            assert (self.var.w2 >= 0).all()
+            assert (self.var.w3 >= 0).all()
+
+        # van Genuchten parameters (exponents precomputed in landcoverType.initial), taken once for all substeps
+        KSat1 = self.var.KSat1[bioarea]
+        KSat2 = self.var.KSat2[bioarea]
+        KSat3 = self.var.KSat3[bioarea]
+        genuM1 = self.var.genuM1[bioarea]
+        genuM2 = self.var.genuM2[bioarea]
+        genuM3 = self.var.genuM3[bioarea]
+        genuInvM1 = self.var.genuInvM1[bioarea]
+        genuInvM2 = self.var.genuInvM2[bioarea]
+        genuInvM3 = self.var.genuInvM3[bioarea]
+        ws1 = self.var.ws1[bioarea]
+        ws2 = self.var.ws2[bioarea]
+        ws3 = self.var.ws3[bioarea]
+        wres1 = self.var.wres1[bioarea]
+        wres2 = self.var.wres2[bioarea]
+        wres3 = self.var.wres3[bioarea]
 
         # Available water in both soil layers [m]
         availWater1 = np.maximum(0., self.var.w1[bioarea] - self.var.wres1[bioarea])
@@ -400,12 +735,13 @@ class soil(object):
         satTerm3[satTerm3 > 1] = 1
         
         # Saturation term in Van Genuchten equation (always between 0 and 1)
-        assert (satTerm2 >= 0).all() and (satTerm2 <= 1).all()
-        assert (satTerm3 >= 0).all() and (satTerm3 <= 1).all()
+        if validate:
+            assert (satTerm2 >= 0).all() and (satTerm2 <= 1).all()
+            assert (satTerm3 >= 0).all() and (satTerm3 <= 1).all()
 
 
-        kUnSat2 = self.var.KSat2[bioarea] * np.sqrt(satTerm2) * np.square(1 - (1 - satTerm2 ** (1 / (self.var.lambda2[bioarea] / (self.var.lambda2[bioarea] + 1)))) ** (self.var.lambda2[bioarea] / (self.var.lambda2[bioarea] + 1)))
-        kUnSat3 = self.var.KSat3[bioarea] * np.sqrt(satTerm3) * np.square(1 - (1 - satTerm3 ** (1 / (self.var.lambda3[bioarea] / (self.var.lambda3[bioarea] + 1)))) ** (self.var.lambda3[bioarea] / (self.var.lambda3[bioarea] + 1)))
+        kUnSat2 = kUnSat_vanGenuchten(KSat2, satTerm2, genuM2, genuInvM2)
+        kUnSat3 = kUnSat_vanGenuchten(KSat3, satTerm3, genuM3, genuInvM3)
 
         ## ----------------------------------------------------------
         # Capillar Rise
@@ -420,17 +756,19 @@ class soil(object):
         del satTermFC1
         del satTermFC2
 
-        assert (self.var.w1 >= 0).all()
-        assert (self.var.w2 >= 0).all()
-        assert (self.var.w3 >= 0).all()
+        if validate:
+            assert (self.var.w1 >= 0).all()
+            assert (self.var.w2 >= 0).all()
+            assert (self.var.w3 >= 0).all()
 
         self.var.w1[bioarea] = self.var.w1[bioarea] + capRise1
         self.var.w2[bioarea] = self.var.w2[bioarea] - capRise1 + capRise2
         self.var.w3[bioarea] = self.var.w3[bioarea] - capRise2
 
-        assert (self.var.w1 >= 0).all()
-        assert (self.var.w2 >= 0).all()
-        assert (self.var.w3 >= 0).all()
+        if validate:
+            assert (self.var.w1 >= 0).all()
+            assert (self.var.w2 >= 0).all()
+            assert (self.var.w3 >= 0).all()
 
         del capRise1
         del capRise2
@@ -455,13 +793,24 @@ class soil(object):
         satTerm3 = np.maximum(np.minimum(satTerm3, 1.0), 0)
 
         # Unsaturated conductivity
-        kUnSat1 = self.var.KSat1[bioarea] * np.sqrt(satTerm1) * np.square(1 - (1 - satTerm1 ** (1 / (self.var.lambda1[bioarea] / (self.var.lambda1[bioarea] + 1)))) ** (self.var.lambda1[bioarea] / (self.var.lambda1[bioarea] + 1)))
-        kUnSat2 = self.var.KSat2[bioarea] * np.sqrt(satTerm2) * np.square(1 - (1 - satTerm2 ** (1 / (self.var.lambda2[bioarea] / (self.var.lambda2[bioarea] + 1)))) ** (self.var.lambda2[bioarea] / (self.var.lambda2[bioarea] + 1)))
-        kUnSat3 = self.var.KSat3[bioarea] * np.sqrt(satTerm3) * np.square(1 - (1 - satTerm3 ** (1 / (self.var.lambda3[bioarea] / (self.var.lambda3[bioarea] + 1)))) ** (self.var.lambda3[bioarea] / (self.var.lambda3[bioarea] + 1)))
+        kUnSat1 = kUnSat_vanGenuchten(KSat1, satTerm1, genuM1, genuInvM1)
+        kUnSat2 = kUnSat_vanGenuchten(KSat2, satTerm2, genuM2, genuInvM2)
+        kUnSat3 = kUnSat_vanGenuchten(KSat3, satTerm3, genuM3, genuInvM3)
 
-        self.model.NoSubSteps = 3
         DtSub = 1. / self.model.NoSubSteps
 
+        # adaptive substeps: in each substep at most soilSubStepTolerance of the available water of a layer percolates
+        # (conductivity * length of the substep / available water), HRUs with little percolation are calculated with
+        # fewer substeps, wet HRUs with more than NoSubSteps (at most soilMaxSubSteps)
+        adaptive = self.var.soilSubStepTolerance > 0
+        noSubSteps = self.model.NoSubSteps
+        if adaptive:
+            noSubSteps = self.var.soilMaxSubSteps
+            tolerance = np.float32(self.var.soilSubStepTolerance)
+            remaining = np.ones(ws1.size, dtype=np.float32)
+            subSteps = np.zeros(ws1.size, dtype=np.int32)
+            act = np.arange(ws1.size)
+
         # Copy current value of W1 and W2 to temporary variables,
         # because computed fluxes may need correction for storage
         # capacity of subsoil and in case soil is frozen (after loop)
@@ -471,58 +820,81 @@ class soil(object):
 
         # Initialize top- to subsoil flux (accumulated value for all sub-steps)
         # Initialize fluxes out of subsoil (accumulated value for all sub-steps)
-        perc1to2 = self.var.zeros(bioarea.size, dtype=np.float32)
-        perc2to3 = self.var.zeros(bioarea.size, dtype=np.float32)
+        perc1to2 = self.var.zeros(wtemp1.size, dtype=np.float32)
+        perc2to3 = self.var.zeros(wtemp1.size, dtype=np.float32)
+        perc3toGW_bioarea = self.var.zeros(wtemp1.size, dtype=np.float32)
         perc3toGW = self.var.full_compressed(0, dtype=np.float32)
+        capriseindex = self.var.capriseindex[bioarea]
 
-        assert (self.var.w1 >= 0).all()
-        assert (self.var.w2 >= 0).all()
-        assert (self.var.w3 >= 0).all()
+        if validate:
+            assert (self.var.w1 >= 0).all()
+            assert (self.var.w2 >= 0).all()
+            assert (self.var.w3 >= 0).all()
 
         # Start iterating
 
-        for i in range(self.model.NoSubSteps):
+        for i in range(noSubSteps):
+            if not adaptive:
+                act = slice(None)
+            elif i > 0:
+                # HRUs which are still iterating
+                act = act[remaining[act] > 0]
+                if act.size == 0:
+                    break
+
             if i > 0:
                 # Saturation term in Van Genuchten equation
-                satTerm1 = np.maximum(0., wtemp1 - self.var.wres1[bioarea]) / (self.var.ws1[bioarea] - self.var.wres1[bioarea])
-                satTerm2 = np.maximum(0., wtemp2 - self.var.wres2[bioarea]) / (self.var.ws2[bioarea] - self.var.wres2[bioarea])
-                satTerm3 = np.maximum(0., wtemp3 - self.var.wres3[bioarea]) / (self.var.ws3[bioarea] - self.var.wres3[bioarea])
+                satTerm1 = np.maximum(0., wtemp1[act] - wres1[act]) / (ws1[act] - wres1[act])
+                satTerm2 = np.maximum(0., wtemp2[act] - wres2[act]) / (ws2[act] - wres2[act])
+                satTerm3 = np.maximum(0., wtemp3[act] - wres3[act]) / (ws3[act] - wres3[act])
 
                 satTerm1 = np.maximum(np.minimum(satTerm1, 1.0), 0)
                 satTerm2 = np.maximum(np.minimum(satTerm2, 1.0), 0)
                 satTerm3 = np.maximum(np.minimum(satTerm3, 1.0), 0)
 
                 # Unsaturated hydraulic conductivities
-                kUnSat1 = self.var.KSat1[bioarea] * np.sqrt(satTerm1) * np.square(1 - (1 - satTerm1 ** (1 / (self.var.lambda1[bioarea] / (self.var.lambda1[bioarea] + 1)))) ** (self.var.lambda1[bioarea] / (self.var.lambda1[bioarea] + 1)))
-                kUnSat2 = self.var.KSat2[bioarea] * np.sqrt(satTerm2) * np.square(1 - (1 - satTerm2 ** (1 / (self.var.lambda2[bioarea] / (self.var.lambda2[bioarea] + 1)))) ** (self.var.lambda2[bioarea] / (self.var.lambda2[bioarea] + 1)))
-                kUnSat3 = self.var.KSat3[bioarea] * np.sqrt(satTerm3) * np.square(1 - (1 - satTerm3 ** (1 / (self.var.lambda3[bioarea] / (self.var.lambda3[bioarea] + 1)))) ** (self.var.lambda3[bioarea] / (self.var.lambda3[bioarea] + 1)))
+                kUnSat1 = kUnSat_vanGenuchten(KSat1[act], satTerm1, genuM1[act], genuInvM1[act])
+                kUnSat2 = kUnSat_vanGenuchten(KSat2[act], satTerm2, genuM2[act], genuInvM2[act])
+                kUnSat3 = kUnSat_vanGenuchten(KSat3[act], satTerm3, genuM3[act], genuInvM3[act])
+
+            if adaptive:
+                # length of the substep from the largest ratio of percolation to available water, the last one takes the rest of the day
+                if i < noSubSteps - 1:
+                    ratio = np.maximum(np.maximum(divideValues(kUnSat1, availWater1[act]), divideValues(kUnSat2, availWater2[act])), divideValues(kUnSat3, availWater3[act]))
+                    DtSub = np.minimum(remaining[act], tolerance / np.maximum(ratio, tolerance))
+                    del ratio
+                else:
+                    DtSub = remaining[act]
+                remaining[act] = remaining[act] - DtSub
+                subSteps[act] += 1
 
             # Flux from top- to subsoil
-            subperc1to2 =  np.minimum(availWater1, np.minimum(kUnSat1 * DtSub, capLayer2))
-            subperc2to3 =  np.minimum(availWater2, np.minimum(kUnSat2 * DtSub, capLayer3))
-            subperc3toGW = np.minimum(availWater3, np.minimum(kUnSat3 * DtSub, availWater3)) * (1 - self.var.capriseindex[bioarea])
+            subperc1to2 =  np.minimum(availWater1[act], np.minimum(kUnSat1 * DtSub, capLayer2[act]))
+            subperc2to3 =  np.minimum(availWater2[act], np.minimum(kUnSat2 * DtSub, capLayer3[act]))
+            subperc3toGW = np.minimum(availWater3[act], np.minimum(kUnSat3 * DtSub, availWater3[act])) * (1 - capriseindex[act])
 
             # Update water balance for all layers
-            availWater1 = availWater1 - subperc1to2
-            availWater2 = availWater2 + subperc1to2 - subperc2to3
-            availWater3 = availWater3 + subperc2to3 - subperc3toGW
+            availWater1[act] = availWater1[act] - subperc1to2
+            availWater2[act] = availWater2[act] + subperc1to2 - subperc2to3
+            availWater3[act] = availWater3[act] + subperc2to3 - subperc3toGW
             # Update WTemp1 and WTemp2
 
-            wtemp1 = availWater1 + self.var.wres1[bioarea]
-            wtemp2 = availWater2 + self.var.wres2[bioarea]
-            wtemp3 = availWater3 + self.var.wres3[bioarea]
+            wtemp1[act] = availWater1[act] + wres1[act]
+            wtemp2[act] = availWater2[act] + wres2[act]
+            wtemp3[act] = availWater3[act] + wres3[act]
 
             # Update available storage capacity in layer 2,3
-            capLayer2 = self.var.ws2[bioarea] - wtemp2
-            capLayer3 = self.var.ws3[bioarea] - wtemp3
+            capLayer2[act] = ws2[act] - wtemp2[act]
+            capLayer3[act] = ws3[act] - wtemp3[act]
 
-            perc1to2  += subperc1to2
-            perc2to3  += subperc2to3
-            perc3toGW[bioarea] += subperc3toGW
+            perc1to2[act] += subperc1to2
+            perc2to3[act] += subperc2to3
+            perc3toGW_bioarea[act] += subperc3toGW
 
-            assert not np.isnan(perc1to2).any()
-            assert not np.isnan(perc2to3).any()
-            assert not np.isnan(perc3toGW[bioarea]).any()
+            if validate:
+                assert not np.isnan(perc1to2).any()
+                assert not np.isnan(perc2to3).any()
+                assert not np.isnan(perc3toGW_bioarea).any()
 
             del subperc1to2
             del subperc2to3
@@ -547,22 +919,35 @@ class soil(object):
         del availWater2
         del availWater3
 
+        perc3toGW[bioarea] = perc3toGW_bioarea
+        del perc3toGW_bioarea
+
+        if adaptive:
+            # number of substeps of each HRU in this time step
+            self.var.soilSubSteps = self.var.full_compressed(0, dtype=np.int32)
+            self.var.soilSubSteps[bioarea] = subSteps
+            del subSteps
+            del remaining
+
         # When the soil is frozen (frostindex larger than threshold), no perc1 and 2
         perc1to2 = np.where(self.var.FrostIndex[bioarea] > self.var.FrostIndexThreshold, 0, perc1to2)
         perc2to3 = np.where(self.var.FrostIndex[bioarea] > self.var.FrostIndexThreshold, 0, perc2to3)
 
         # Update soil moisture
-        assert (self.var.w1 >= 0).all()
+        if validate:
+            assert (self.var.w1 >= 0).all()
         self.var.w1[bioarea] = self.var.w1[bioarea] - perc1to2
-        assert (self.var.w1 >= 0).all()
+        if validate:
+            assert (self.var.w1 >= 0).all()
         self.var.w2[bioarea] = self.var.w2[bioarea] + perc1to2 - perc2to3
-        assert (self.var.w2 >= 0).all()
+        if validate:
+            assert (self.var.w2 >= 0).all()
         self.var.w3[bioarea] = self.var.w3[bioarea] + perc2to3 - perc3toGW[bioarea]
-        assert (self.var.w3 >= 0).all()
-
-        assert not np.isnan(self.var.w1).any()
-        assert not np.isnan(self.var.w2).any()
-        assert not np.isnan(self.var.w3).any()
+        if validate:
+            assert (self.var.w3 >= 0).all()
+            assert not np.isnan(self.var.w1).any()
+            assert not np.isnan(self.var.w2).any()
+            assert not np.isnan(self.var.w3).any()
 
         del perc1to2
         del perc2to3
@@ -599,10 +984,11 @@ class soil(object):
         groundwater_recharge = self.var.full_compressed(0, dtype=np.float32)
         groundwater_recharge[bioarea] = (1 - self.var.percolationImp[bioarea]) * toGWorInterflow
 
-        assert not np.isnan(interflow).any()
-        assert not np.isnan(groundwater_recharge).any()
+        if validate:
+            assert not np.isnan(interflow).any()
+            assert not np.isnan(groundwater_recharge).any()
 
-        if checkOption('calcWaterBalance'):
+        if balanceCheck:
             self.model.waterbalance_module.waterBalanceCheck(
                 how='cellwise',
                 influxes=[self.var.natural_available_water_infiltration[bioarea], capillar[bioarea], self.var.actual_irrigation_consumption[bioarea]],
@@ -621,6 +1007,88 @@ class soil(object):
                 tollerance=1e-6
             )
 
-        print(time() - t0)
+        return interflow, directRunoff, groundwater_recharge, perc3toGW, prefFlow, openWaterEvap
+
+    def dynamic_numba(self, capillar, openWaterEvap, potTranspiration, potBareSoilEvap, totalPotET):
+        """
+        Dynamic part of the soil module with the compiled kernel soil_column_numba
+
+        Same as dynamic, but the whole soil column is calculated in one pass for each HRU (in parallel),
+        without temporary arrays. Used if soilKernel = numba in the settings file
+        """
+
+        balanceCheck = checkOption('calcWaterBalance') and checkValidation()
+        if balanceCheck:
+            w1_pre = self.var.w1.copy()
+            w2_pre = self.var.w2.copy()
+            w3_pre = self.var.w3.copy()
+            topwater_pre = self.var.topwater.copy()
+
+        directRunoff = self.var.full_compressed(0, dtype=np.float32)
+        perc3toGW = self.var.full_compressed(0, dtype=np.float32)
+        prefFlow = self.var.full_compressed(0, dtype=np.float32)
+        interflow = self.var.full_compressed(0, dtype=np.float32)
+        groundwater_recharge = self.var.full_compressed(0, dtype=np.float32)
+        # number of substeps of each HRU in this time step
+        self.var.soilSubSteps = self.var.full_compressed(0, dtype=np.int32)
+
+        soil_column_numba(
+            self.var.land_use_type,
+            self.var.natural_available_water_infiltration,
+            self.var.actual_irrigation_consumption,
+            self.var.cropKC,
+            self.var.EWRef,
+            capillar,
+            potTranspiration,
+            potBareSoilEvap,
+            totalPotET,
+            self.var.cropGroupNumber,
+            self.var.adjRoot,
+            self.var.FrostIndex,
+            np.float32(self.var.FrostIndexThreshold),
+            self.var.arnoBeta,
+            np.float32(self.var.cPrefFlow),
+            self.var.capriseindex,
+            np.float32(self.var.maxtopwater),
+            self.var.percolationImp,
+            self.var.ws1, self.var.ws2, self.var.ws3,
+            self.var.wres1, self.var.wres2, self.var.wres3,
+            self.var.wfc1, self.var.wfc2, self.var.wfc3,
+            self.var.wwp1, self.var.wwp2, self.var.wwp3,
+            self.var.KSat1, self.var.KSat2, self.var.KSat3,
+            self.var.genuM1, self.var.genuM2, self.var.genuM3,
+            self.var.genuInvM1, self.var.genuInvM2, self.var.genuInvM3,
+            self.var.kunSatFC12, self.var.kunSatFC23,
+            self.model.NoSubSteps,
+            self.var.soilSubStepTolerance,
+            self.var.soilMaxSubSteps,
+            self.var.w1, self.var.w2, self.var.w3, self.var.topwater,
+            openWaterEvap,
+            self.var.actTransTotal,
+            self.var.actBareSoilEvap,
+            self.var.actualET,
+            directRunoff, perc3toGW, prefFlow, interflow, groundwater_recharge,
+            self.var.soilSubSteps
+        )
+
+        if balanceCheck:
+            bioarea = self.var.land_use_indices['bioarea']
+            self.model.waterbalance_module.waterBalanceCheck(
+                how='cellwise',
+                influxes=[self.var.natural_available_water_infiltration[bioarea], capillar[bioarea], self.var.actual_irrigation_consumption[bioarea]],
+                outfluxes=[directRunoff[bioarea], perc3toGW[bioarea], prefFlow[bioarea], self.var.actTransTotal[bioarea], self.var.actBareSoilEvap[bioarea], openWaterEvap[bioarea]],
+                prestorages=[w1_pre[bioarea], w2_pre[bioarea], w3_pre[bioarea], topwater_pre[bioarea]],
+                poststorages=[self.var.w1[bioarea], self.var.w2[bioarea], self.var.w3[bioarea], self.var.topwater[bioarea]],
+                tollerance=1e-6
+            )
+
+            self.model.waterbalance_module.waterBalanceCheck(
+                how='cellwise',
+                influxes=[self.var.natural_available_water_infiltration[bioarea], capillar[bioarea], self.var.actual_irrigation_consumption[bioarea], self.var.snowEvap[bioarea], self.var.interceptEvap[bioarea]],
+                outfluxes=[directRunoff[bioarea], interflow[bioarea], groundwater_recharge[bioarea], self.var.actualET[bioarea]],
+                prestorages=[w1_pre[bioarea], w2_pre[bioarea], w3_pre[bioarea], topwater_pre[bioarea]],
+                poststorages=[self.var.w1[bioarea], self.var.w2[bioarea], self.var.w3[bioarea], self.var.topwater[bioarea]],
+                tollerance=1e-6
+            )
 
-        return interflow, directRunoff, groundwater_recharge, perc3toGW, prefFlow, openWaterEvap
\ No newline at end of file
+        return interflow, directRunoff, groundwater_recharge, perc3toGW, prefFlow, openWaterEvap
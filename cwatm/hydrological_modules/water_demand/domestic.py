@@ -15,7 +15,7 @@ try:
 except (ModuleNotFoundError, ImportError):
     pass
 import cftime
-from cwatm.management_modules.data_handling import returnBool, binding, cbinding, divideValues, downscale_volume, checkOption
+from cwatm.management_modules.data_handling import returnBool, binding, cbinding, divideValues, downscale_volume, checkOption, checkValidation, timed, readNetCDFReader
 from honeybees.library.mapIO import NetCDFReader
 
 class waterdemand_domestic:
@@ -49,6 +49,7 @@ class waterdemand_domestic:
         self.var = model.data.HRU
         self.model = model
 
+    @timed
     def initial(self):
         """
         Initial part of the water demand module
@@ -77,6 +78,7 @@ class waterdemand_domestic:
         self.domestic_water_consumption_ds = NetCDFReader(cbinding('domesticWaterDemandFile'), self.domConsumptionVar, self.model.bounds)
         self.domestic_water_consumption_ds_SSP2 = NetCDFReader(cbinding('domesticWaterDemandFile_SSP2'), self.domConsumptionVar, self.model.bounds)
 
+    @timed
     def dynamic(self):
         """
         Dynamic part of the water demand module - domestic
@@ -111,7 +113,7 @@ class waterdemand_domestic:
             domestic_water_demand_ds = self.domestic_water_demand_ds_SSP2
         else:
             domestic_water_demand_ds = self.domestic_water_demand_ds
-        domestic_water_demand = domestic_water_demand_ds.get_data_array(date) * 1_000_000 / timediv
+        domestic_water_demand = readNetCDFReader(domestic_water_demand_ds, date) * 1_000_000 / timediv
         domestic_water_demand = downscale_volume(
             self.domestic_water_demand_ds.gt,
             self.model.data.grid.gt,
@@ -129,7 +131,7 @@ class waterdemand_domestic:
             domestic_water_consumption_ds = self.domestic_water_consumption_ds_SSP2
         else:
             domestic_water_consumption_ds = self.domestic_water_consumption_ds
-        domestic_water_consumption = domestic_water_consumption_ds.get_data_array(date) * 1_000_000 / timediv
+        domestic_water_consumption = readNetCDFReader(domestic_water_consumption_ds, date) * 1_000_000 / timediv
         domestic_water_consumption = downscale_volume(
             self.domestic_water_consumption_ds.gt,
             self.model.data.grid.gt,
@@ -146,6 +148,7 @@ class waterdemand_domestic:
         efficiency = divideValues(domestic_water_consumption, domestic_water_demand)
         efficiency = self.model.data.to_grid(HRU_data=efficiency, fn='max')
         
-        assert (efficiency <= 1).all()
-        assert (efficiency >= 0).all()
+        if checkValidation():
+            assert (efficiency <= 1).all()
+            assert (efficiency >= 0).all()
         return domestic_water_demand, efficiency
\ No newline at end of file
@@ -9,7 +9,7 @@
 # -------------------------------------------------------------------------
 
 from cwatm.management_modules import globals
-from cwatm.management_modules.data_handling import returnBool, binding, readnetcdf2
+from cwatm.management_modules.data_handling import returnBool, binding, readnetcdf2, timed
 import numpy as np
 
 class waterdemand_environmental_need:
@@ -40,8 +40,10 @@ class waterdemand_environmental_need:
         self.var = model.data.HRU
         self.model = model
 
+    @timed
     def initial(self):
         pass
 
+    @timed
     def dynamic(self):
         return self.var.full_compressed(0, dtype=np.float32)
\ No newline at end of file
@@ -15,7 +15,7 @@ try:
 except (ModuleNotFoundError, ImportError):
     pass
 import cftime
-from cwatm.management_modules.data_handling import returnBool, binding, cbinding, loadmap, readnetcdf2, divideValues, downscale_volume, checkOption
+from cwatm.management_modules.data_handling import returnBool, binding, cbinding, loadmap, readnetcdf2, divideValues, downscale_volume, checkOption, checkValidation, timed, readNetCDFReader
 from honeybees.library.mapIO import NetCDFReader
 
 class waterdemand_industry:
@@ -47,6 +47,7 @@ class waterdemand_industry:
         self.var = model.data.HRU
         self.model = model
 
+    @timed
     def initial(self):
         """
         Initial part of the water demand module - industry
@@ -75,6 +76,7 @@ class waterdemand_industry:
         self.industry_water_demand_ds_SSP2 = NetCDFReader(cbinding('industryWaterDemandFile_SSP2'), self.indWithdrawalVar, self.model.bounds)
         self.industry_water_consumption_ds_SSP2 = NetCDFReader(cbinding('industryWaterDemandFile_SSP2'), self.indConsumptionVar, self.model.bounds)
 
+    @timed
     def dynamic(self):
         if self.industryTime == 'monthly':
             timediv = globals.dateVar['daysInMonth']
@@ -103,7 +105,7 @@ class waterdemand_industry:
             industry_water_demand_ds = self.industry_water_demand_ds_SSP2
         else:
             industry_water_demand_ds = self.industry_water_demand_ds
-        industry_water_demand = industry_water_demand_ds.get_data_array(date) * 1_000_000 / timediv
+        industry_water_demand = readNetCDFReader(industry_water_demand_ds, date) * 1_000_000 / timediv
         industry_water_demand = downscale_volume(
             self.industry_water_demand_ds.gt,
             self.model.data.grid.gt,
@@ -121,7 +123,7 @@ class waterdemand_industry:
             industry_water_consumption_ds = self.industry_water_consumption_ds_SSP2
         else:
             industry_water_consumption_ds = self.industry_water_consumption_ds
-        industry_water_consumption = industry_water_consumption_ds.get_data_array(date) * 1_000_000 / timediv
+        industry_water_consumption = readNetCDFReader(industry_water_consumption_ds, date) * 1_000_000 / timediv
         industry_water_consumption = downscale_volume(
             self.industry_water_consumption_ds.gt,
             self.model.data.grid.gt,
@@ -138,6 +140,7 @@ class waterdemand_industry:
         efficiency = divideValues(industry_water_consumption, industry_water_demand)
         efficiency = self.model.data.to_grid(HRU_data=efficiency, fn='max')
         
-        assert (efficiency <= 1).all()
-        assert (efficiency >= 0).all()
+        if checkValidation():
+            assert (efficiency <= 1).all()
+            assert (efficiency >= 0).all()
         return industry_water_demand, efficiency
\ No newline at end of file
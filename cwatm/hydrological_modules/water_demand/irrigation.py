@@ -9,6 +9,7 @@
 # -------------------------------------------------------------------------
 
 import numpy as np
+from cwatm.management_modules.data_handling import timed
 try:
     import cupy as cp
 except (ModuleNotFoundError, ImportError):
@@ -63,6 +64,7 @@ class waterdemand_irrigation:
         self.var = model.data.HRU
         self.model = model
 
+    @timed
     def initial(self):
         """
         Initial part of the water demand module
@@ -70,6 +72,7 @@ class waterdemand_irrigation:
 
         """
 
+    @timed
     def dynamic(self, totalPotET):
         """
         Dynamic part of the water demand module
@@ -82,7 +85,7 @@ class waterdemand_irrigation:
         # Non paddy irrigation -> No = 3
 
         # a function of cropKC (evaporation and transpiration) and available water see Wada et al. 2014 p. 19        
-        paddy_irrigated_land = np.where(self.var.land_use_type == 2)
+        paddy_irrigated_land = self.var.land_use_indices['paddy_irrigated']
         pot_irrConsumption[paddy_irrigated_land] = np.where(
             self.var.cropKC[paddy_irrigated_land] > 0.75,
             np.maximum(
@@ -91,7 +94,7 @@ class waterdemand_irrigation:
             ), 
             0.)
 
-        nonpaddy_irrigated_land = np.where(self.var.land_use_type == 3)[0]
+        nonpaddy_irrigated_land = self.var.land_use_indices['nonpaddy_irrigated']
 
         # Infiltration capacity
         #  ========================================
@@ -15,7 +15,7 @@ try:
 except (ModuleNotFoundError, ImportError):
     pass
 from cwatm.management_modules import globals
-from cwatm.management_modules.data_handling import returnBool, binding, cbinding, loadmap, readnetcdf2, checkOption, downscale_volume
+from cwatm.management_modules.data_handling import returnBool, binding, cbinding, loadmap, readnetcdf2, checkOption, downscale_volume, timed, readNetCDFReader
 from honeybees.library.mapIO import NetCDFReader
 
 class waterdemand_livestock:
@@ -48,6 +48,7 @@ class waterdemand_livestock:
         self.var = model.data.HRU
         self.model = model
 
+    @timed
     def initial(self):
         """
         Initial part of the water demand module - livestock
@@ -71,6 +72,7 @@ class waterdemand_livestock:
         self.livestock_water_demand_ds = NetCDFReader(cbinding('livestockWaterDemandFile'), self.livestockVar, self.model.bounds)
         self.livestock_water_demand_ds_SSP2 = NetCDFReader(cbinding('livestockWaterDemandFile_SSP2'), self.livestockVar, self.model.bounds)
 
+    @timed
     def dynamic(self):
         """
         Dynamic part of the water demand module - livestock
@@ -108,7 +110,7 @@ class waterdemand_livestock:
         else:
             livestock_water_demand_ds = self.livestock_water_demand_ds
 
-        livestock_water_demand = livestock_water_demand_ds.get_data_array(date) * 1_000_000 / timediv
+        livestock_water_demand = readNetCDFReader(livestock_water_demand_ds, date) * 1_000_000 / timediv
         livestock_water_demand = downscale_volume(
             self.livestock_water_demand_ds.gt,
             self.model.data.grid.gt,
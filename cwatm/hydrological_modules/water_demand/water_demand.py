@@ -15,7 +15,7 @@ except (ModuleNotFoundError, ImportError):
     pass
 import rasterio
 from cwatm.management_modules import globals
-from cwatm.management_modules.data_handling import option, cbinding, loadmap, checkOption
+from cwatm.management_modules.data_handling import option, cbinding, loadmap, checkOption, checkValidation, timed
 from cwatm.hydrological_modules.water_demand.domestic import waterdemand_domestic
 from cwatm.hydrological_modules.water_demand.industry import waterdemand_industry
 from cwatm.hydrological_modules.water_demand.livestock import waterdemand_livestock
@@ -135,6 +135,7 @@ class water_demand:
         self.irrigation = waterdemand_irrigation(model)
         self.environmental_need = waterdemand_environmental_need(model)
 
+    @timed
     def initial(self):
         """
         Initial part of the water demand module
@@ -191,6 +192,7 @@ class water_demand:
         demand -= withdrawal  # update in place
         return withdrawal
 
+    @timed
     def dynamic(self, totalPotET):
         """
         Dynamic part of the water demand module
@@ -200,6 +202,9 @@ class water_demand:
         """
 
         if checkOption('includeWaterDemand'):
+            # runtime checks and water balance check in this time step (see validationLevel)
+            validate = checkValidation()
+            balanceCheck = checkOption('calcWaterBalance') and validate
 
             # WATER DEMAND
             domestic_water_demand, domestic_water_efficiency = self.domestic.dynamic()
@@ -207,10 +212,11 @@ class water_demand:
             livestock_water_demand, livestock_water_efficiency = self.livestock.dynamic()
             pot_irrConsumption = self.irrigation.dynamic(totalPotET)
 
-            assert (domestic_water_demand >= 0).all()
-            assert (industry_water_demand >= 0).all()
-            assert (livestock_water_demand >= 0).all()
-            assert (pot_irrConsumption >= 0).all()
+            if validate:
+                assert (domestic_water_demand >= 0).all()
+                assert (industry_water_demand >= 0).all()
+                assert (livestock_water_demand >= 0).all()
+                assert (pot_irrConsumption >= 0).all()
 
             available_channel_storage_m3, available_reservoir_storage_m3, available_groundwater_m, groundwater_head = self.get_available_water()
             available_groundwater_m3 = self.model.data.grid.MtoM3(available_groundwater_m)
@@ -263,7 +269,7 @@ class water_demand:
                 command_areas=self.var.reservoir_command_areas.get() if self.model.args.use_gpu else self.var.reservoir_command_areas,
             )
 
-            if checkOption('calcWaterBalance'):
+            if balanceCheck:
                 self.model.waterbalance_module.waterBalanceCheck(
                     how='cellwise',
                     influxes=[irrigation_water_withdrawal_m],
@@ -280,15 +286,17 @@ class water_demand:
                 self.var.actual_irrigation_consumption = irrigation_water_consumption_m
                 addtoevapotrans = addtoevapotrans_m
 
-            assert (pot_irrConsumption + 1e-6 >= self.var.actual_irrigation_consumption).all()
-            assert (self.var.actual_irrigation_consumption + 1e-6 >= 0).all()
+            if validate:
+                assert (pot_irrConsumption + 1e-6 >= self.var.actual_irrigation_consumption).all()
+                assert (self.var.actual_irrigation_consumption + 1e-6 >= 0).all()
 
             groundwater_abstraction_m3 = available_groundwater_m3_pre - available_groundwater_m3
             channel_abstraction_m3 = available_channel_storage_m3_pre - available_channel_storage_m3
             
             if checkOption('includeWaterBodies'): 
                 reservoir_abstraction_m3 = available_reservoir_storage_m3_pre - available_reservoir_storage_m3
-                assert (self.model.data.grid.waterBodyTypC[np.where(reservoir_abstraction_m3 > 0)] == 2).all()
+                if validate:
+                    assert (self.model.data.grid.waterBodyTypC[np.where(reservoir_abstraction_m3 > 0)] == 2).all()
                 # print('reservoir_abs_ratio_sum', round(reservoir_abstraction_m3[[self.model.data.grid.waterBodyTypC == 2]].sum() / self.model.data.grid.reservoirStorageM3C[[self.model.data.grid.waterBodyTypC == 2]].sum(), 3))
                 reservoir_abstraction_m3[reservoir_abstraction_m3 > 0] = reservoir_abstraction_m3[reservoir_abstraction_m3 > 0] / self.model.data.grid.area_command_area_in_study_area[reservoir_abstraction_m3 > 0]
                 reservoir_abstraction_m3 = np.minimum(available_reservoir_storage_m3_pre, reservoir_abstraction_m3)
@@ -304,7 +312,7 @@ class water_demand:
 
             returnFlow = self.model.data.to_grid(HRU_data=return_flow_irrigation_m, fn='mean') + domestic_return_flow_m + industry_return_flow_m + livestock_return_flow_m
                 
-            if checkOption('calcWaterBalance'):
+            if balanceCheck:
                 self.model.waterbalance_module.waterBalanceCheck(
                     how='sum',
                     influxes=[],
@@ -10,6 +10,68 @@
 #-------------------------------------------------------------------------
 
 from cwatm.management_modules.data_handling import *
+from numba import njit, prange
+
+
+@njit(parallel=True)
+def add_balance_term(balance, term, sign):
+    """
+    Adds a flux or storage term to the cellwise balance in place (sign 1: in, -1: out)
+    """
+    for i in prange(balance.size):
+        balance[i] += sign * term[i]
+
+
+@njit
+def max_abs_balance(balance):
+    """
+    Largest absolute residual of the balance and its signed value in one pass
+    """
+    max_abs = 0.
+    value = 0.
+    for i in range(balance.size):
+        if abs(balance[i]) > max_abs:
+            max_abs = abs(balance[i])
+            value = balance[i]
+    return max_abs, value
+
+
+@njit
+def add_catchment_term(catchment_balance, catchments, term, sign):
+    """
+    Adds a flux or storage term to the balance of each catchment (sign 1: in, -1: out)
+    """
+    for i in range(catchments.size):
+        catchment_balance[catchments[i]] += sign * term[i]
+
+
+def cellwise_balance(terms):
+    """
+    Cellwise residual of a list of (term, sign) without intermediate arrays for each term
+
+    Scalar terms are added to all cells, all other terms need to have the same size.
+    The residual is summed in double precision, also for single precision terms.
+
+    :param terms: list of (term, sign)
+    :return: residual as float64 array (or scalar if there are only scalar terms)
+    """
+    balance = None
+    offset = 0.
+    for term, sign in terms:
+        if np.ndim(term) == 0:
+            offset += sign * term
+            continue
+        if balance is None:
+            balance = np.zeros(np.size(term), dtype=np.float64)
+        elif np.size(term) != balance.size:
+            raise ValueError(f"Water balance term with {np.size(term)} values instead of {balance.size}")
+        add_balance_term(balance, np.ravel(term), sign)
+    if balance is None:
+        return np.float64(offset)
+    if offset != 0:
+        balance += offset
+    return balance
+
 
 class waterbalance(object):
     """
@@ -42,6 +104,7 @@ class waterbalance(object):
 # --------------------------------------------------------------------------
 # --------------------------------------------------------------------------
 
+    @timed
     def initial(self):
         """
         Initial part of the water balance module
@@ -85,6 +148,9 @@ class waterbalance(object):
         :return: -
         """
 
+        if not checkValidation():
+            return True
+
         income =  0
         out = 0
         store = 0
@@ -95,18 +161,17 @@ class waterbalance(object):
         assert isinstance(poststorages, list)
 
         if how == 'cellwise':
-            for fluxIn in influxes:   
-                income += fluxIn
-            for fluxOut in outfluxes:
-                out += fluxOut
-            for preStorage in prestorages:
-                store += preStorage
-            for endStorage in poststorages: 
-                store -= endStorage
-            balance = income + store - out
-            
-            if np.abs(balance).max() > tollerance:
-                text = f"{balance[np.abs(balance).argmax()]} is larger than tollerance {tollerance}"
+            # residual and largest error accumulated in place, instead of summing up the term arrays
+            balance = cellwise_balance(
+                [(fluxIn, 1.) for fluxIn in influxes] +
+                [(preStorage, 1.) for preStorage in prestorages] +
+                [(fluxOut, -1.) for fluxOut in outfluxes] +
+                [(endStorage, -1.) for endStorage in poststorages]
+            )
+            max_abs, value = max_abs_balance(np.atleast_1d(balance))
+
+            if max_abs > tollerance:
+                text = f"{value} is larger than tollerance {tollerance}"
                 if name:
                     print(name, text)
                 else:
@@ -160,23 +225,15 @@ class waterbalance(object):
             maxB = 0
             maxBB = 0
 
-            income =  0
-            out = 0
-            store =  0
-
-            for fluxIn in fluxesIn:
-                if not(isinstance(fluxIn,np.ndarray)) : fluxIn = globals.inZero
-                income = income + np.bincount(self.var.catchmentAll,weights=fluxIn)
-            for fluxOut in fluxesOut:
-                if not (isinstance(fluxOut, np.ndarray)): fluxOut = globals.inZero
-                out = out + np.bincount(self.var.catchmentAll,weights=fluxOut)
-            for preStorage in preStorages:
-                if not (isinstance(preStorage, np.ndarray)): preStorage = globals.inZero
-                store = store + np.bincount(self.var.catchmentAll,weights=preStorage)
-            for endStorage in endStorages:
-                if not (isinstance(endStorage, np.ndarray)): endStorage = globals.inZero
-                store = store - np.bincount(self.var.catchmentAll,weights=endStorage)
-            balance =  income + store - out
+            # one pass per term into the catchment sums, no bincount arrays for each term
+            # terms which are not arrays count as zero
+            balance = np.zeros(self.var.catchmentAll.max() + 1, dtype=np.float64)
+            for terms, sign in ((fluxesIn, 1.), (preStorages, 1.), (fluxesOut, -1.), (endStorages, -1.)):
+                for term in terms:
+                    if isinstance(term, np.ndarray):
+                        if term.size != self.var.catchmentAll.size:
+                            raise ValueError(f"{processName}: water balance term with {term.size} values instead of {self.var.catchmentAll.size}")
+                        add_catchment_term(balance, self.var.catchmentAll, np.ravel(term), sign)
             #balance = endStorages
             #if balance.size:
                 #minB = np.amin(balance)
@@ -199,6 +256,7 @@ class waterbalance(object):
             return balance[no]
 
 
+    @timed
     def dynamic(self):
         """
         Dynamic part of the water balance module
@@ -46,6 +46,7 @@ class waterquality1(object):
         self.var = model.data.grid
         self.model = model
 
+    @timed
     def initial(self):
         """
         Initial part of waterquality1 flow
@@ -79,6 +80,7 @@ class waterquality1(object):
 # --------------------------------------------------------------------------
 
 
+    @timed
     def dynamic(self):
         """
         Dynamic part of the waterquality1 module
@@ -9,6 +9,7 @@
 # -------------------------------------------------------------------------
 
 import os, glob
+import tracemalloc
 
 import numpy as np
 from numba import njit
@@ -27,6 +28,11 @@ from cwatm.management_modules.messages import *
 
 import difflib  # to check the closest word in settingsfile, if an error occurs
 from cwatm.management_modules.dynamicModel import *
+from cwatm.management_modules.timing import timespan, timed, printTiming, writeTiming, finishTiming
+from cwatm.management_modules.memory import memoryReport, checkMemoryReport, finishMemory, dtypeSnapshot
+from cwatm.management_modules.iocounter import iocount, readNetCDFReader, checkIOCounters, finishIOCounter
+from cwatm.management_modules.profiler import startProfile, stopProfile, checkProfile, finishProfile
+from cwatm.management_modules.leakmonitor import checkLeakMonitor, finishLeakMonitor
 
 from netCDF4 import Dataset, num2date, date2num
 
@@ -310,6 +316,7 @@ def maskfrompoint(mask2D, xleft, yup):
     return mapC
 
 
+@timed
 def loadmap(name, compress=True, local=False, cut=True):
     """
     load a static map either value or pc raster map or netcdf
@@ -341,7 +348,9 @@ def loadmap(name, compress=True, local=False, cut=True):
 
         filename, varname = value.split(':')
 
+        io = iocount('loadmap')
         nf1 = Dataset(filename, 'r')
+        io.opened()
         cut0, cut1, cut2, cut3 = mapattrNetCDF(filename, check = False)
 
         # load netcdf map but only the rectangle needed
@@ -378,14 +387,18 @@ def loadmap(name, compress=True, local=False, cut=True):
                     mapnp = nf1.variables[varname][:]
 
         nf1.close()
+        io.done(filename, varname, mapnp)
 
     else:
 
         filename = cbinding(name)
         try:
+            io = iocount('loadmap')
             nf2 = gdal.Open(filename, gdalconst.GA_ReadOnly)
+            io.opened()
             band = nf2.GetRasterBand(1)
             mapnp = band.ReadAsArray(0, 0, nf2.RasterXSize, nf2.RasterYSize).astype(np.float64)
+            io.done(filename, name, mapnp)
             # if local no cut
             if not local:
                 if cut:
@@ -518,6 +531,7 @@ def readCoord(name):
 
     try:
         nf1 = Dataset(namenc, 'r')
+        nf1.close()
         nc = True
     except:
         nc = False
@@ -895,6 +909,7 @@ def multinetdf(meteomaps, startcheck = 'dateBegin'):
 
 
 
+@timed
 def readmeteodata(name, date, value='None', addZeros = False, zeros = 0.0,mapsscale = True, modflowSteady = False):
     """
     load stack of maps 1 at each timestamp in netcdf format
@@ -923,11 +938,13 @@ def readmeteodata(name, date, value='None', addZeros = False, zeros = 0.0,mapssc
             msg = "Netcdf map error for: " + name + " -> " + cbinding(name) + " on: " + date1 + ": \n"
             raise CWATMError(msg)
 
+    io = iocount('readmeteodata')
     try:
        nf1 = Dataset(filename, 'r')
     except:
         msg = "Netcdf map stacks: \n"
         raise CWATMFileError(filename,msg, sname = name)
+    io.opened()
 
     warnings.filterwarnings("ignore")
     if value == "None":
@@ -956,6 +973,7 @@ def readmeteodata(name, date, value='None', addZeros = False, zeros = 0.0,mapssc
         ii =1
 
     nf1.close()
+    io.done(filename, value, mapnp)
 
     # add zero values to maps in order to supress missing values
     if addZeros: mapnp[np.isnan(mapnp)] = zeros
@@ -995,6 +1013,7 @@ def readmeteodata(name, date, value='None', addZeros = False, zeros = 0.0,mapssc
 
 
 
+@timed
 def readnetcdf2(namebinding, date, useDaily='daily', addZeros = False,cut = True, zeros = 0.0,meteo = False, usefilename = False, compress = True):
     """
     load stack of maps 1 at each timestamp in netcdf format
@@ -1024,11 +1043,13 @@ def readnetcdf2(namebinding, date, useDaily='daily', addZeros = False,cut = True
     filename, value = name.split(':')
     filename =  os.path.normpath(filename)
 
+    io = iocount('readnetcdf2')
     try:
        nf1 = Dataset(filename, 'r')
     except:
         msg = "Netcdf map stacks: \n"
         raise CWATMFileError(filename,msg, sname = namebinding)
+    io.opened()
 
     # date if used daily, monthly or yearly or day of year
     idx = None  # will produce an error and indicates something is wrong with date
@@ -1077,7 +1098,8 @@ def readnetcdf2(namebinding, date, useDaily='daily', addZeros = False,cut = True
         mapnp = mapnp.data
     except:
         ii =1
-    # nf1.close()
+    nf1.close()
+    io.done(filename, value, mapnp)
 
     # add zero values to maps in order to supress missing values
     if addZeros: mapnp[np.isnan(mapnp)] = zeros
@@ -1101,6 +1123,7 @@ def readnetcdf2(namebinding, date, useDaily='daily', addZeros = False,cut = True
     return mapC
 
 
+@timed
 def readnetcdfWithoutTime(name, value="None"):
     """
     load maps in netcdf format (has no time format)
@@ -1112,16 +1135,19 @@ def readnetcdfWithoutTime(name, value="None"):
 
     filename =  os.path.normpath(name)
 
+    io = iocount('readnetcdfWithoutTime')
     try:
        nf1 = Dataset(filename, 'r')
     except:
         msg = "Netcdf map stacks: \n"
         raise CWATMFileError(filename,msg)
+    io.opened()
     if value == "None":
         value = list(nf1.variables.items())[-1][0]  # get the last variable name
 
     mapnp = nf1.variables[value][cutmap[2]:cutmap[3], cutmap[0]:cutmap[1]].astype(np.float64)
     nf1.close()
+    io.done(filename, value, mapnp)
 
     mapC = compressArray(mapnp, name=filename)
     if Flags['check']:
@@ -1134,6 +1160,7 @@ def readnetcdfWithoutTime(name, value="None"):
 
 
 
+@timed
 def readnetcdfInitial(name, value,default = 0.0):
     """
     load initial condition from netcdf format
@@ -1148,16 +1175,19 @@ def readnetcdfInitial(name, value,default = 0.0):
     """
 
     filename =  os.path.normpath(name)
+    io = iocount('readnetcdfInitial')
     try:
        nf1 = Dataset(filename, 'r')
     except:
         msg = "Netcdf Initial file: \n"
         raise CWATMFileError(filename,msg)
+    io.opened()
     if value in list(nf1.variables.keys()):
         try:
             #mapnp = nf1.variables[value][cutmap[2]:cutmap[3], cutmap[0]:cutmap[1]]
             mapnp = (nf1.variables[value][:].astype(np.float64))
             nf1.close()
+            io.done(filename, value, mapnp)
             mapC = compressArray(mapnp, name=filename)
             if Flags['check']:
                 checkmap(value, filename, mapnp, True, True, mapC)
@@ -1188,6 +1218,7 @@ def readnetcdfInitial(name, value,default = 0.0):
 # --------------------------------------------------------------------------------------------
 
 
+@timed
 def writenetcdf(var, netfile,prename,addname,varunits,inputmap, timeStamp, posCnt, flag,flagTime, nrdays=None, dateunit="days"):
     """
     write a netcdf stack
@@ -1227,6 +1258,7 @@ def writenetcdf(var, netfile,prename,addname,varunits,inputmap, timeStamp, posCn
     # create real varname with variable name + time depending name e.g. discharge + monthavg
     varname = prename + addname
 
+    io = iocount('writenetcdf')
     if not flag:
         nf1 = Dataset(netfile, 'w', format='NETCDF4')
 
@@ -1366,6 +1398,7 @@ def writenetcdf(var, netfile,prename,addname,varunits,inputmap, timeStamp, posCn
 
     else:
         nf1 = Dataset(netfile, 'a')
+    io.opened()
 
     if flagTime:
         date_time = nf1.variables['time']
@@ -1404,6 +1437,7 @@ def writenetcdf(var, netfile,prename,addname,varunits,inputmap, timeStamp, posCn
         nf1.variables[varname][:, :] = mapnp
 
     nf1.close()
+    io.done(netfile, varname, mapnp)
     flag = True
 
     return flag
@@ -1412,6 +1446,7 @@ def writenetcdf(var, netfile,prename,addname,varunits,inputmap, timeStamp, posCn
 # --------------------------------------------------------------------------------------------
 
 
+@timed
 def writeIniNetcdf(netfile,varlist, inputlist):
     """
     write variables to netcdf init file
@@ -1425,7 +1460,9 @@ def writeIniNetcdf(netfile,varlist, inputlist):
     row = np.abs(cutmap[3] - cutmap[2])
     col = np.abs(cutmap[1] - cutmap[0])
 
+    io = iocount('writeIniNetcdf')
     nf1 = Dataset(netfile, 'w', format='NETCDF4')
+    io.opened()
 
     # general Attributes
     nf1.settingsfile = os.path.realpath(settingsfile[0])
@@ -1517,6 +1554,7 @@ def writeIniNetcdf(netfile,varlist, inputlist):
 
 
     nf1.close()
+    io.done(netfile, "%i variables" % len(varlist), inputlist)
 
 # --------------------------------------------------------------------------------------------
 # report .tif and .maps
@@ -1692,6 +1730,176 @@ def cbinding(inBinding):
         raise CWATMError(msg)
 
 
+def initValidation():
+    """
+    Reads the level of the runtime checks (asserts and water balance checks) in the dynamic part
+
+    validationLevel = full (default): every time step
+    validationLevel = sampled: every validationInterval time step (default 10)
+    validationLevel = off: no checks
+    """
+
+    validation['level'] = 'full'
+    validation['interval'] = 10
+    if "validationLevel" in binding:
+        validation['level'] = cbinding('validationLevel').lower()
+    if validation['level'] not in ('off', 'sampled', 'full'):
+        msg = "Value in: \"validationLevel\" is not off, sampled or full! \nbut: " + cbinding('validationLevel')
+        raise CWATMError(msg)
+    if "validationInterval" in binding:
+        validation['interval'] = max(1, int(cbinding('validationInterval')))
+
+
+def checkValidation():
+    """
+    Check if the runtime checks are done in this time step (see initValidation)
+
+    :return: True if the checks are done
+    """
+
+    level = validation.get('level', 'full')
+    if level == 'full':
+        return True
+    if level == 'off':
+        return False
+    return dateVar.get('curr', 0) % validation['interval'] == 0
+
+
+def initTiming():
+    """
+    Switches on the timing of the model parts (see :meth:`management_modules.timing.timespan`)
+
+    timing = True or flag -t: time spans are taken and aggregated per path, printed at the end with flag -t
+    timingTrace = file: all single time spans are kept and written at the end of the run as Chrome trace (JSON)
+    """
+
+    timing['on'] = Flags['printtime']
+    timing['trace'] = None
+    if "timing" in binding:
+        timing['on'] = timing['on'] or returnBool('timing')
+    if "timingTrace" in binding:
+        timing['trace'] = cbinding('timingTrace')
+        timing['on'] = True
+    timing['stack'] = []
+    timing['start'] = xtime.perf_counter()
+    timeSpans.clear()
+    timeStats.clear()
+
+
+def initMemory():
+    """
+    Reads the options of the memory report (see :meth:`management_modules.memory.memoryReport`)
+
+    memoryReport = True: state arrays by size after the initial part
+    memoryReportSteps = 1 365: state arrays by size at these time steps
+    memoryTrace = True: peak memory of each time span (tracemalloc), printed at the end of the run
+    """
+
+    memory['steps'] = []
+    if "memoryReport" in binding and returnBool('memoryReport'):
+        memory['steps'].append(0)
+    if "memoryReportSteps" in binding:
+        memory['steps'] += [int(step) for step in cbinding('memoryReportSteps').replace(',', ' ').split()]
+    memory['trace'] = "memoryTrace" in binding and returnBool('memoryTrace')
+    memory['stack'] = []
+    memorySpans.clear()
+    if memory['trace']:
+        # the peaks are taken for each time span
+        timing['on'] = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+def initDtypeCheck(model):
+    """
+    Reads the options of the dtype check (debug mode, see :meth:`management_modules.memory.checkDtypes`)
+    and takes the dtype of all state arrays at the end of the initial part
+
+    dtypeCheck = True: reports after each time span (module dynamic, I/O) which arrays changed their dtype,
+    new float64 state arrays and float64 arrays returned by the modules
+    dtypeCheckSize = 10000: only float64 arrays with at least this number of elements are reported
+
+    :param model: CWATM model
+    """
+
+    memory['dtypeCheck'] = "dtypeCheck" in binding and returnBool('dtypeCheck')
+    memory['dtypeSize'] = 10000
+    if "dtypeCheckSize" in binding:
+        memory['dtypeSize'] = int(cbinding('dtypeCheckSize'))
+    memory['dtypeChanges'] = {}
+    if memory['dtypeCheck']:
+        # the dtypes are checked at the end of each time span
+        timing['on'] = True
+        memory['model'] = model
+        memory['dtypes'] = dtypeSnapshot(model)
+
+
+def initIOCounter():
+    """
+    Reads the options of the input and output counters (see :meth:`management_modules.iocounter.iocount`)
+
+    ioCounter = True: calls, opened files, bytes and time of each read and write per file and variable,
+    printed at the end of the run
+    ioCounterMonthly = True: also printed at the end of each month
+    """
+
+    ioCounter['on'] = "ioCounter" in binding and returnBool('ioCounter')
+    ioCounter['monthly'] = "ioCounterMonthly" in binding and returnBool('ioCounterMonthly')
+    if ioCounter['monthly']:
+        ioCounter['on'] = True
+    ioCounters.clear()
+    ioCountersMonth.clear()
+
+
+def initProfiler():
+    """
+    Reads the options of the windowed profiler (see :meth:`management_modules.profiler.checkProfile`)
+
+    profileSteps = 400-430 1000-1010: time steps which are profiled, each window is written to its own file
+    profileInitial = True: the initial part (CWATModel_ini) is profiled
+    profileMode = sampling (default): collapsed stacks of a statistical profiler (.folded)
+                  cProfile: in addition a deterministic profile (.prof, pstats)
+    profileInterval = 0.005: sampling interval [s]
+    profileFile = cwatm_profile: path and first part of the output file names
+    """
+
+    profiling.clear()
+    profiling['windows'] = []
+    if "profileSteps" in binding:
+        for window in cbinding('profileSteps').replace(',', ' ').split():
+            first, _, last = window.partition('-')
+            profiling['windows'].append((int(first), int(last or first)))
+    profiling['initial'] = "profileInitial" in binding and returnBool('profileInitial')
+    profiling['mode'] = 'sampling'
+    if "profileMode" in binding:
+        profiling['mode'] = cbinding('profileMode').lower()
+        if profiling['mode'] not in ('sampling', 'cprofile'):
+            msg = "Value in: \"profileMode\" is not sampling or cProfile! \nbut: " + cbinding('profileMode')
+            raise CWATMError(msg)
+    profiling['interval'] = 0.005
+    if "profileInterval" in binding:
+        profiling['interval'] = float(cbinding('profileInterval'))
+    profiling['file'] = "cwatm_profile"
+    if "profileFile" in binding:
+        profiling['file'] = cbinding('profileFile')
+
+
+def initLeakMonitor():
+    """
+    Reads the options of the leak monitor (see :meth:`management_modules.leakmonitor.checkLeakMonitor`)
+
+    leakMonitor = True: resident memory, open files and size of the dicts and lists in globals
+    are sampled and their trend is printed at the end of the run
+    leakMonitorSteps = 30: time steps between the samples (default 10)
+    """
+
+    leakMonitor['on'] = "leakMonitor" in binding and returnBool('leakMonitor')
+    leakMonitor['steps'] = 10
+    if "leakMonitorSteps" in binding:
+        leakMonitor['steps'] = max(1, int(cbinding('leakMonitorSteps')))
+    leakSamples.clear()
+
+
 # --------------------------------------------------------------------------------------------
 
 def divideValues(x, y, default = 0.):
@@ -1713,6 +1921,139 @@ def divideValues(x, y, default = 0.):
     # have to solve this without err handler to get the error message back
     return np.nan_to_num(x / y)
 
+# --------------------------------------------------------------------------------------------
+# HRUs of land use types: slices if the HRUs are sorted by land use type
+
+def land_use_order(land_use_type, HRU_to_grid):
+    """
+    returns the order of the HRUs sorted by land use type and within a land use type by grid cell
+
+    The HRU structure itself is built outside of CWatM. To use this order, the HRU builder sorts all HRU arrays
+    (land_use_type, land_use_ratio, HRU_to_grid, ...) with the returned indices and maps the old HRU numbers in
+    var_to_HRU to the new positions, e.g.:
+
+        order = land_use_order(land_use_type, HRU_to_grid)
+        land_use_type, HRU_to_grid = land_use_type[order], HRU_to_grid[order]
+        new_position = np.empty_like(order); new_position[order] = np.arange(order.size)
+        var_to_HRU = new_position[var_to_HRU]
+
+    The HRUs of a land use type (and of neighbouring types e.g. forest to irrigated non paddy) are then contiguous
+    and land_use_subset and land_use_indices return slices instead of indices. Within a land use type HRU_to_grid
+    stays sorted, so aggregation to the grid can still be done by segments
+
+    :param land_use_type: land use type of each HRU
+    :param HRU_to_grid: grid cell of each HRU
+    :return: indices to sort the HRU arrays
+    """
+    return np.lexsort((HRU_to_grid, land_use_type))
+
+
+def land_use_subset(land_use_type, types):
+    """
+    returns the HRUs with one of the land use types
+
+    :param land_use_type: land use type of each HRU
+    :param types: tuple of land use types
+    :return: slice if the HRUs are contiguous (HRUs sorted by land use type), otherwise array of indices
+    """
+    indices = np.flatnonzero(np.isin(land_use_type, types))
+    if indices.size == 0:
+        return slice(0, 0)
+    if indices[-1] - indices[0] + 1 == indices.size:
+        return slice(int(indices[0]), int(indices[-1]) + 1)
+    return indices
+
+class land_use_indices(object):
+    """
+    index sets of the HRUs for each land use type and groups of land use types
+
+    A set is calculated when it is used first and kept until the land use changes. land_use_type should only be
+    changed with set_land_use_type, which clears the sets. If the whole array is replaced by another array
+    the sets are calculated again. If land_use_type is changed in place in another way, invalidate has to be called;
+    with the runtime checks (see checkValidation) one cached set per time step is compared with the land use types.
+
+    Use: self.var.land_use_indices['bioarea'] or self.var.land_use_indices[coverNum]
+    """
+
+    groups = {
+        'forest': (0, ),
+        'grassland': (1, ),
+        'paddy_irrigated': (2, ),
+        'nonpaddy_irrigated': (3, ),
+        'sealed': (4, ),
+        'water': (5, ),
+        'bioarea': (0, 1, 2, 3),
+        'irrigated': (2, 3),
+        'non_irrigated_bioland': (0, 1),
+        'sealed_water': (4, 5),
+        'land': (0, 1, 2, 3, 4),
+    }
+
+    def __init__(self, HRU):
+        self.HRU = HRU
+        self.cache = {}
+        # land_use_type array the sets were calculated from (a reference, so its id cannot be reused)
+        self.land_use_array = None
+        # time step of the last comparison of a cached set with land_use_type
+        self.checked = None
+
+    def types(self, group):
+        """
+        :param group: name of a group of land use types or number of a land use type
+        :return: tuple of land use types
+        """
+        if isinstance(group, str):
+            return self.groups[group]
+        return (group, )
+
+    def __getitem__(self, group):
+        """
+        :param group: name of a group of land use types or number of a land use type
+        :return: slice or array of indices (see land_use_subset)
+        """
+        land_use_type = self.HRU.land_use_type
+        if land_use_type is not self.land_use_array:
+            self.invalidate()
+            self.land_use_array = land_use_type
+        if group not in self.cache:
+            self.cache[group] = land_use_subset(land_use_type, self.types(group))
+        elif checkValidation() and self.checked != dateVar.get('curr', 0):
+            self.checked = dateVar.get('curr', 0)
+            HRUs = np.arange(land_use_type.size)
+            assert np.array_equal(HRUs[self.cache[group]], HRUs[land_use_subset(land_use_type, self.types(group))]), \
+                "land_use_type changed without land_use_indices.set_land_use_type or invalidate"
+        return self.cache[group]
+
+    def as_array(self, group):
+        """
+        :param group: name of a group of land use types or number of a land use type
+        :return: array of indices (e.g. for compiled functions looping over the HRUs of a group)
+        """
+        key = ('array', group)
+        if key not in self.cache:
+            subset = self[group]
+            if isinstance(subset, slice):
+                subset = np.arange(subset.start, subset.stop)
+            self.cache[key] = subset
+        return self.cache[key]
+
+    def set_land_use_type(self, HRUs, land_use_type):
+        """
+        changes the land use type of HRUs and clears the index sets
+
+        :param HRUs: indices of the HRUs
+        :param land_use_type: new land use type
+        """
+        self.HRU.land_use_type[HRUs] = land_use_type
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        clears the index sets, they are calculated again from land_use_type when they are used
+        """
+        self.cache.clear()
+        self.land_use_array = None
+
 @njit
 def downscale_volume(
     data_gt: Tuple[float, float, float, float, float, float],
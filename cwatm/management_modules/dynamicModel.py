@@ -1,5 +1,11 @@
 # initial and dynamic model-> idea taken from PC_Raster
 
+from cwatm.management_modules.timing import finishTiming
+from cwatm.management_modules.memory import finishMemory
+from cwatm.management_modules.iocounter import finishIOCounter
+from cwatm.management_modules.profiler import finishProfile
+from cwatm.management_modules.leakmonitor import finishLeakMonitor
+
 class DynamicModel:
     i = 1
 
@@ -29,7 +35,14 @@ class ModelFrame:
     def step(self):
         self._model.currentStep = self.currentStep
         self._model.dynamic()
-        self.currentStep += 1    
+        self.currentStep += 1
+        if self.currentStep > self._model.lastStep:
+            # Chrome trace and peak memory of the time spans, input and output counters, open profile and leak monitor at the end of the run
+            finishTiming()
+            finishMemory()
+            finishIOCounter()
+            finishProfile()
+            finishLeakMonitor()
 
     def initialize_run(self):
         self.currentStep = self._model.firstStep
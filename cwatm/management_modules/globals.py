@@ -17,6 +17,7 @@ import os.path
 import sys
 
 import ctypes
+import importlib.machinery
 import numpy.ctypeslib as npct
 import numpy as np
 
@@ -46,6 +47,18 @@ def globalclear():
     initCondVar.clear()
 
     dateVar.clear()
+    validation.clear()
+    timing.clear()
+    timeSpans.clear()
+    timeStats.clear()
+    memory.clear()
+    memorySpans.clear()
+    ioCounter.clear()
+    ioCounters.clear()
+    ioCountersMonth.clear()
+    profiling.clear()
+    leakMonitor.clear()
+    leakSamples.clear()
 
     outDir.clear()
     outMap.clear()
@@ -106,6 +119,10 @@ global dateVar
 # noinspection PyRedeclaration
 dateVar = {}
 
+# level of the runtime checks in the dynamic part - set in initValidation
+global validation
+validation = {}
+
 # Output variables
 global outDir, outsection, outputTyp
 global outMap, outTss
@@ -139,10 +156,32 @@ cutmapVfine = [0, 1, 0, 1]
 cdfFlag = [0, 0, 0,0,0,0,0]  # flag for netcdf output for all, steps and end, monthly (steps), yearly(steps), monthly , yearly
 metadataNCDF = {}
 
-global timeMes,timeMesString, timeMesSum
-timeMes=[]
-timeMesString = []  # name of the time measure - filled in dynamic
-timeMesSum = []    # time measure of hydrological modules
+# time spans of the model parts - set in initTiming, aggregated per path by timespan (timeStats),
+# single spans only for the Chrome trace (timeSpans)
+global timing, timeSpans, timeStats
+timing = {}
+timeSpans = []
+timeStats = {}
+
+# memory report and peak memory of the time spans - set in initMemory
+global memory, memorySpans
+memory = {}
+memorySpans = {}
+
+# counters of the input and output calls - set in initIOCounter
+global ioCounter, ioCounters, ioCountersMonth
+ioCounter = {}
+ioCounters = {}
+ioCountersMonth = {}
+
+# windows of the profiler and the running profile - set in initProfiler
+global profiling
+profiling = {}
+
+# options and samples of the leak monitor - set in initLeakMonitor
+global leakMonitor, leakSamples
+leakMonitor = {}
+leakSamples = []
 
 
 global coverresult
@@ -178,7 +217,24 @@ else:
     dll_routing = os.path.join(os.path.split(path_global)[0],"hydrological_modules","routing_reservoirs","t5_linux.so")
 
 #dll_routing = "C:/work2/test1/t4.dll"
-lib2 = ctypes.cdll.LoadLibrary(dll_routing)
+# the library compiled from t5.cpp during installation (setup.py build_ext) is used first
+# if it is not there or cannot be loaded, the precompiled library is used
+# if no library can be loaded lib2 is None and only routingKernels = numba can be used
+lib2 = None
+for suffix in importlib.machinery.EXTENSION_SUFFIXES:
+    dll_build = os.path.join(os.path.split(path_global)[0],"hydrological_modules","routing_reservoirs","t5_build" + suffix)
+    if os.path.exists(dll_build):
+        try:
+            lib2 = ctypes.cdll.LoadLibrary(dll_build)
+            dll_routing = dll_build
+            break
+        except OSError:
+            pass
+if lib2 is None:
+    try:
+        lib2 = ctypes.cdll.LoadLibrary(dll_routing)
+    except OSError:
+        lib2 = None
 
 # setup the return typs and argument types
 # input type for the cos_doubles function
@@ -191,26 +247,33 @@ array_1d_int = npct.ndpointer(dtype=np.int64, ndim=1)
 array_2d_double = npct.ndpointer(dtype=np.double, ndim=2, flags='CONTIGUOUS')
 
 
-lib2.ups.restype = None
-lib2.ups.argtypes = [array_1d_int, array_1d_int, array_1d_double, ctypes.c_int]
+if lib2 is not None:
+    lib2.ups.restype = None
+    lib2.ups.argtypes = [array_1d_int, array_1d_int, array_1d_double, ctypes.c_int]
+
+    lib2.dirID.restype = None
+    lib2.dirID.argtypes = [array_2d_int, array_2d_int, array_2d_int, ctypes.c_int,ctypes.c_int]
 
-lib2.dirID.restype = None
-lib2.dirID.argtypes = [array_2d_int, array_2d_int, array_2d_int, ctypes.c_int,ctypes.c_int]
+    #lib2.repairLdd1.argtypes = [ array_2d_int, ctypes.c_int,ctypes.c_int]
+    lib2.repairLdd1.argtypes = [ array_2d_int, ctypes.c_int,ctypes.c_int]
 
-#lib2.repairLdd1.argtypes = [ array_2d_int, ctypes.c_int,ctypes.c_int]
-lib2.repairLdd1.argtypes = [ array_2d_int, ctypes.c_int,ctypes.c_int]
+    lib2.repairLdd2.restype = None
+    lib2.repairLdd2.argtypes = [ array_1d_int, array_1d_int, array_1d_int, ctypes.c_int]
 
-lib2.repairLdd2.restype = None
-lib2.repairLdd2.argtypes = [ array_1d_int, array_1d_int, array_1d_int, ctypes.c_int]
+    lib2.kinematic.restype = None
+    #lib2.kinematic.argtypes = [array_1d_double,array_1d_double, array_1d_int, array_1d_int, array_1d_int,  array_1d_double,  ctypes.c_double, ctypes.c_double,ctypes.c_double, ctypes.c_double, ctypes.c_int]
+    #                             qold            q               dirdown        diruplen     dirupid         Qnew              alpha             beta            deltaT          deltaX           size
+    lib2.kinematic.argtypes = [array_1d_double,array_1d_double, array_1d_int, array_1d_int, array_1d_int,  array_1d_double,  array_1d_double, ctypes.c_double,ctypes.c_double, array_1d_double, ctypes.c_int]
 
-lib2.kinematic.restype = None
-#lib2.kinematic.argtypes = [array_1d_double,array_1d_double, array_1d_int, array_1d_int, array_1d_int,  array_1d_double,  ctypes.c_double, ctypes.c_double,ctypes.c_double, ctypes.c_double, ctypes.c_int]
-#                             qold            q               dirdown        diruplen     dirupid         Qnew              alpha             beta            deltaT          deltaX           size
-lib2.kinematic.argtypes = [array_1d_double,array_1d_double, array_1d_int, array_1d_int, array_1d_int,  array_1d_double,  array_1d_double, ctypes.c_double,ctypes.c_double, array_1d_double, ctypes.c_int]
+    # kinematic with warm start and convergence statistics - only in libraries compiled from the current t5.cpp
+    if hasattr(lib2, 'kinematicStats'):
+        lib2.kinematicStats.restype = None
+        #                                 qold            q               dirdown        diruplen     dirupid         Qnew              alpha             beta            deltaT          deltaX           size          warmstart     epsilon          maxiters      stats
+        lib2.kinematicStats.argtypes = [array_1d_double,array_1d_double, array_1d_int, array_1d_int, array_1d_int,  array_1d_double,  array_1d_double, ctypes.c_double,ctypes.c_double, array_1d_double, ctypes.c_int, ctypes.c_int, ctypes.c_double, ctypes.c_int, array_1d_int]
 
 
-lib2.runoffConc.restype = None
-lib2.runoffConc.argtypes = [array_2d_double,array_1d_double,array_1d_double,array_1d_double,ctypes.c_int, ctypes.c_int]
+    lib2.runoffConc.restype = None
+    lib2.runoffConc.argtypes = [array_2d_double,array_1d_double,array_1d_double,array_1d_double,ctypes.c_int, ctypes.c_int]
 
 
 
@@ -0,0 +1,169 @@
+# -------------------------------------------------------------------------
+# Name:        Input and output counters
+# Purpose:     calls, opened files, bytes and wall time of every read and write
+#              per file and variable, printed at the end of the run or per month
+#
+# Created:     18/10/2026
+# -------------------------------------------------------------------------
+
+import os
+from time import perf_counter
+
+from cwatm.management_modules.globals import ioCounter, ioCounters, ioCountersMonth, dateVar
+
+# bytes read and written by the process (Linux), includes the compressed netCDF chunks
+PROC_IO = "/proc/self/io"
+
+
+def processIO():
+    """
+    Bytes read and written by the process so far (rchar, wchar of /proc/self/io)
+
+    :return: bytes read, bytes written or 0, 0 if not available
+    """
+
+    try:
+        with open(PROC_IO) as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+
+class ioCount(object):
+    """
+    Counter of one input or output call::
+
+        io = ioCount('readnetcdf2')
+        nf1 = Dataset(filename, 'r')
+        io.opened()
+        mapnp = nf1.variables[value][idx]
+        io.done(filename, value, mapnp)
+
+    File bytes are the bytes read or written by the process between start and done
+    (compressed data of the file), data bytes are the bytes of the decoded array
+    """
+
+    __slots__ = ('function', 'start', 'startIO', 'opens')
+
+    def __init__(self, function):
+        self.function = function
+        self.opens = 0
+        self.startIO = processIO()
+        self.start = perf_counter()
+
+    def opened(self):
+        self.opens += 1
+
+    def done(self, filename, variable, data=None):
+        """
+        Adds the call to the counters of file and variable
+
+        :param filename: name of the file
+        :param variable: name of the variable
+        :param data: decoded array (or list of arrays) which is read or written
+        """
+
+        seconds = perf_counter() - self.start
+        endIO = processIO()
+        fileBytes = endIO[0] - self.startIO[0] + endIO[1] - self.startIO[1]
+        if isinstance(data, (list, tuple)):
+            dataBytes = sum(getattr(array, 'nbytes', 0) for array in data)
+        else:
+            dataBytes = getattr(data, 'nbytes', 0)
+        key = (self.function, os.path.basename(str(filename)), str(variable))
+        for counters in (ioCounters, ioCountersMonth):
+            # calls, opens, file bytes, data bytes, wall time
+            counter = counters.setdefault(key, [0, 0, 0, 0, 0.])
+            counter[0] += 1
+            counter[1] += self.opens
+            counter[2] += fileBytes
+            counter[3] += dataBytes
+            counter[4] += seconds
+
+
+class ioCountOff(object):
+    """
+    Counter which is used if the input and output counters are switched off (no overhead)
+    """
+
+    __slots__ = ()
+
+    def opened(self):
+        pass
+
+    def done(self, filename, variable, data=None):
+        pass
+
+
+IOCOUNTOFF = ioCountOff()
+
+
+def iocount(function):
+    """
+    Starts the counter of an input or output call, if ioCounter is in the settings file
+    (see :meth:`management_modules.data_handling.initIOCounter`)
+
+    :param function: name of the reading or writing function
+    :return: counter with the methods opened and done
+    """
+
+    if ioCounter.get('on'):
+        return ioCount(function)
+    return IOCOUNTOFF
+
+
+def readNetCDFReader(reader, date):
+    """
+    get_data_array of a honeybees NetCDFReader with input counter
+    file and variable are taken from the netCDF dataset (ds) and variable (var) of the reader
+
+    :param reader: NetCDFReader
+    :param date: date of the data
+    :return: array of the data
+    """
+
+    io = iocount('NetCDFReader')
+    data = reader.get_data_array(date)
+    if ioCounter.get('on'):
+        ds = getattr(reader, 'ds', None)
+        filename = ds.filepath() if hasattr(ds, 'filepath') else type(reader).__name__
+        io.done(filename, getattr(getattr(reader, 'var', None), 'name', ''), data)
+    return data
+
+
+def printIOCounters(counters, title):
+    """
+    Prints the counters per function, file and variable, largest wall time first
+
+    :param counters: dict of (function, file, variable): calls, opens, file bytes, data bytes, wall time
+    :param title: title of the table
+    """
+
+    print("\n\nInput/Output " + title)
+    print("%-18s %-40s %-25s %8s %7s %12s %12s %10s %10s" % ("Function", "File", "Variable", "calls", "opens", "file[MB]", "data[MB]", "time[s]", "call[ms]"))
+    for (function, filename, variable), (calls, opens, fileBytes, dataBytes, seconds) in sorted(counters.items(), key=lambda item: item[1][4], reverse=True):
+        print("%-18s %-40s %-25s %8i %7i %12.2f %12.2f %10.2f %10.2f" % (function, filename, variable, calls, opens,
+            fileBytes / 2 ** 20, dataBytes / 2 ** 20, seconds, 1000 * seconds / calls))
+    total = [sum(counter[i] for counter in counters.values()) for i in range(5)]
+    print("%-18s %-40s %-25s %8i %7i %12.2f %12.2f %10.2f" % ("total", "", "", total[0], total[1], total[2] / 2 ** 20, total[3] / 2 ** 20, total[4]))
+
+
+def checkIOCounters():
+    """
+    Prints the counters of the month at the last day of a month, if ioCounterMonthly is in the settings file
+    """
+
+    if ioCounter.get('monthly') and dateVar.get('curr', 0) > 0:
+        if dateVar['currDate'].day == dateVar['daysInMonth'] or dateVar['laststep']:
+            printIOCounters(ioCountersMonth, dateVar['currDate'].strftime("%m/%Y"))
+            ioCountersMonth.clear()
+
+
+def finishIOCounter():
+    """
+    Prints the counters of the whole run at the end of the run, if ioCounter is in the settings file
+    """
+
+    if ioCounter.get('on'):
+        printIOCounters(ioCounters, "whole run")
@@ -0,0 +1,153 @@
+# -------------------------------------------------------------------------
+# Name:        Leak monitor
+# Purpose:     resident memory, open files and size of the global containers every n time steps
+#              with the trend over the run, to find leaks of long runs in short test runs
+#
+# Created:     18/10/2026
+# -------------------------------------------------------------------------
+
+import os
+import numpy as np
+
+from cwatm.management_modules import globals
+from cwatm.management_modules.globals import leakMonitor, leakSamples, dateVar
+
+# resident memory and open file descriptors of the process (Linux)
+PROC_STATUS = "/proc/self/status"
+PROC_FD = "/proc/self/fd"
+
+
+def processMemory():
+    """
+    Resident memory of the process (VmRSS of /proc/self/status)
+
+    :return: resident memory [bytes] or 0 if not available
+    """
+
+    try:
+        with open(PROC_STATUS) as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def openFiles():
+    """
+    Number of open file descriptors of the process (entries of /proc/self/fd)
+
+    :return: number of open files or 0 if not available
+    """
+
+    try:
+        return len(os.listdir(PROC_FD))
+    except OSError:
+        return 0
+
+
+def containerSize(obj, depth=4):
+    """
+    Number of items in a container including the items of nested lists, tuples and dicts
+    e.g. outTss: one value per time step and time series until the time series are written
+
+    :param obj: dict, list or tuple
+    :param depth: levels of nested containers which are counted
+    :return: number of items
+    """
+
+    if isinstance(obj, dict):
+        items = obj.values()
+    elif isinstance(obj, (list, tuple)):
+        items = obj
+    else:
+        return 1
+    if depth == 0:
+        return len(items)
+    return sum(containerSize(item, depth - 1) for item in items)
+
+
+def globalContainers():
+    """
+    Size of all dicts and lists of management_modules.globals, without the samples of the leak monitor
+
+    :return: dict of name: number of items
+    """
+
+    sizes = {}
+    for name, value in vars(globals).items():
+        if isinstance(value, (dict, list)) and not name.startswith('_') and value is not leakSamples and value is not leakMonitor:
+            sizes[name] = containerSize(value)
+    return sizes
+
+
+def sampleResources(step):
+    """
+    Stores resident memory, open files and size of the global containers of a time step
+
+    :param step: time step
+    """
+
+    leakSamples.append((step, processMemory(), openFiles(), globalContainers()))
+
+
+def trend(steps, values):
+    """
+    Growth per 1000 time steps (least squares) and if the values grow monotonic
+
+    :param steps: time steps of the samples
+    :param values: values of the samples
+    :return: growth per 1000 time steps, True if the values never decrease and the last is larger than the first
+    """
+
+    if len(steps) < 2:
+        return 0., False
+    slope = np.polyfit(np.array(steps, dtype=np.float64), np.array(values, dtype=np.float64), 1)[0]
+    growing = len(values) > 2 and values[-1] > values[0] and all(b >= a for a, b in zip(values[:-1], values[1:]))
+    return 1000 * slope, growing
+
+
+def printLeakMonitor(samples):
+    """
+    Prints the samples and the trend of resident memory, open files and the global containers which changed,
+    containers with monotonic growth are flagged
+
+    :param samples: list of (time step, resident memory, open files, dict of container sizes)
+    """
+
+    print("\n\nLeak monitor: %i samples" % len(samples))
+    print("%8s %12s %8s %12s" % ("Step", "RSS[MB]", "files", "items"))
+    for step, rss, files, sizes in samples:
+        print("%8i %12.1f %8i %12i" % (step, rss / 2 ** 20, files, sum(sizes.values())))
+
+    steps = [sample[0] for sample in samples]
+    series = [("RSS[MB]", [sample[1] / 2 ** 20 for sample in samples]), ("open files", [sample[2] for sample in samples])]
+    for name in samples[-1][3]:
+        values = [sample[3].get(name, 0) for sample in samples]
+        if min(values) != max(values):
+            series.append((name, values))
+
+    print("\n%-25s %12s %12s %14s  %s" % ("Trend", "first", "last", "per 1000 steps", ""))
+    for name, values in series:
+        slope, growing = trend(steps, values)
+        print("%-25s %12.1f %12.1f %14.1f  %s" % (name, values[0], values[-1], slope, "growing" if growing else ""))
+
+
+def checkLeakMonitor():
+    """
+    Samples every leakMonitorSteps time steps and at the last time step, if leakMonitor is in the settings file
+    """
+
+    if leakMonitor.get('on') and dateVar.get('curr', 0) > 0:
+        if dateVar['curr'] % leakMonitor['steps'] == 0 or dateVar.get('laststep'):
+            sampleResources(dateVar['curr'])
+
+
+def finishLeakMonitor():
+    """
+    Prints the samples and the trends at the end of the run, if leakMonitor is in the settings file
+    """
+
+    if leakMonitor.get('on') and leakSamples:
+        printLeakMonitor(leakSamples)
@@ -0,0 +1,260 @@
+# -------------------------------------------------------------------------
+# Name:        Memory of the model state
+# Purpose:     report of the state arrays on HRU, grid and the modules by size
+#              and peak memory (tracemalloc) of the time spans in the dynamic part
+#
+# Created:     18/10/2026
+# -------------------------------------------------------------------------
+
+import tracemalloc
+import numpy as np
+
+from cwatm.management_modules.globals import memory, memorySpans, dateVar
+
+
+def stateArrays(model):
+    """
+    All numpy arrays of the model state: variables of model.data.HRU and model.data.grid
+    and arrays stored in the modules (all attributes of the model with a var attribute)
+
+    :param model: CWATM model
+    :return: list of (owner, name, array)
+    """
+
+    owners = [('HRU', model.data.HRU), ('grid', model.data.grid)]
+    for name, module in vars(model).items():
+        if hasattr(module, 'var') and hasattr(module, 'model'):
+            owners.append((name, module))
+
+    arrays = []
+    for owner, obj in owners:
+        for name, value in vars(obj).items():
+            if isinstance(value, np.ndarray):
+                arrays.append((owner, name, value))
+    return arrays
+
+
+def rootArray(array):
+    """
+    Array which owns the memory of a view: follows the base of the array as long as it is a numpy array
+    (arrays returned by numba or made from a buffer have a base which is not a numpy array)
+
+    :param array: numpy array
+    :return: array at the end of the chain of bases, the array itself if it is not a view
+    """
+
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def memoryReport(model, title="", printTrue=True):
+    """
+    Lists every state array by owner, name, shape, dtype and size, largest first
+
+    Arrays which are stored under several names are only counted once,
+    views on other state arrays are listed but do not count to the total.
+    Views on arrays which are not in the state count with the memory of that array, once per array
+
+    :param model: CWATM model
+    :param title: title of the report e.g. initial or the time step
+    :param printTrue: print the report on the screen
+    :return: list of (owner, name, shape, dtype, bytes, note) and total bytes
+    """
+
+    arrays = stateArrays(model)
+    listed = set(id(array) for owner, name, array in arrays)
+    rows = []
+    seen = {}
+    counted = set()
+    byOwner = {}
+    total = 0
+    for owner, name, array in arrays:
+        root = rootArray(array)
+        if id(array) in seen:
+            note = "same as " + seen[id(array)]
+        elif (root is not array and id(root) in listed) or id(root) in counted:
+            note = "view"
+        else:
+            note = ""
+            counted.add(id(root))
+            total += root.nbytes
+            byOwner[owner] = byOwner.get(owner, 0) + root.nbytes
+        seen.setdefault(id(array), owner + "." + name)
+        rows.append((owner, name, array.shape, str(array.dtype), array.nbytes, note))
+    rows.sort(key=lambda row: row[4], reverse=True)
+
+    if printTrue:
+        print("\nMemory report %s: %i arrays, %.1f MB" % (title, len(rows), total / 2 ** 20))
+        print("%-20s %-35s %-16s %-8s %10s  %s" % ("Owner", "Name", "Shape", "dtype", "MB", ""))
+        for owner, name, shape, dtype, nbytes, note in rows:
+            print("%-20s %-35s %-16s %-8s %10.2f  %s" % (owner, name, shape, dtype, nbytes / 2 ** 20, note))
+        for owner, nbytes in sorted(byOwner.items(), key=lambda item: item[1], reverse=True):
+            print("%-20s %-35s %-16s %-8s %10.2f" % (owner, "total", "", "", nbytes / 2 ** 20))
+    return rows, total
+
+
+def checkMemoryReport(model):
+    """
+    Memory report after the initial part (step 0) and at the time steps in memoryReportSteps
+    (see :meth:`management_modules.data_handling.initMemory`)
+
+    :param model: CWATM model
+    """
+
+    step = dateVar.get('curr', 0)
+    if step in memory.get('steps', ()):
+        memoryReport(model, "initial" if step == 0 else "time step %i" % step)
+
+
+def memorySpanEnter():
+    """
+    Start of a time span in tracemalloc mode (see :meth:`management_modules.timing.timespan`)
+
+    The peak of tracemalloc is reset for each span. The peak of the outer span is kept
+    on the stack, so nested spans do not hide the peak of the outer span
+    """
+
+    current, peak = tracemalloc.get_traced_memory()
+    stack = memory['stack']
+    if stack:
+        stack[-1][1] = max(stack[-1][1], peak)
+    tracemalloc.reset_peak()
+    # memory at the start of the span, highest peak within the span
+    stack.append([current, current])
+
+
+def memorySpanExit(path):
+    """
+    End of a time span in tracemalloc mode: stores the peak above the memory at the start
+    and the memory which is left allocated by the span
+
+    :param path: path of the span
+    """
+
+    current, peak = tracemalloc.get_traced_memory()
+    start, highest = memory['stack'].pop()
+    highest = max(highest, peak)
+    tracemalloc.reset_peak()
+    if memory['stack']:
+        memory['stack'][-1][1] = max(memory['stack'][-1][1], highest)
+
+    # calls, maximum peak, sum of memory left allocated
+    span = memorySpans.setdefault(path, [0, 0, 0])
+    span[0] += 1
+    span[1] = max(span[1], highest - start)
+    span[2] += current - start
+
+
+def printMemorySpans():
+    """
+    Prints the peak memory of each time span (tracemalloc mode), largest first
+    """
+
+    print("\n\nPeak memory (tracemalloc)")
+    print("%-70s %8s %12s %12s" % ("Name", "calls", "peak[MB]", "left[MB]"))
+    for path, (calls, peak, left) in sorted(memorySpans.items(), key=lambda item: item[1][1], reverse=True):
+        print("%-70s %8i %12.2f %12.2f" % (path, calls, peak / 2 ** 20, left / 2 ** 20))
+
+
+def dtypeSnapshot(model):
+    """
+    dtype and size of all state arrays (see :meth:`stateArrays`)
+
+    :param model: CWATM model
+    :return: dict of (owner, name): (dtype, size)
+    """
+
+    return {(owner, name): (array.dtype, array.size) for owner, name, array in stateArrays(model)}
+
+
+def addDtypeChange(path, variable, old, new):
+    """
+    Stores a dtype change, it is printed the first time it occurs
+
+    :param path: path of the time span e.g. CWATModel_dyn.dynamic/landcoverType.dynamic/soil.dynamic
+    :param variable: owner.name of the array or the return value
+    :param old: dtype before the span (None: new array)
+    :param new: dtype after the span
+    """
+
+    key = (path, variable, str(old), str(new))
+    changes = memory['dtypeChanges']
+    if key not in changes:
+        changes[key] = [dateVar.get('curr', 0), 0]
+        print("dtype: %s %s %s -> %s" % (path, variable, "new" if old is None else old, new))
+    changes[key][1] += 1
+
+
+def snapshotDtypes():
+    """
+    Takes the dtype of all state arrays at the start of a time span without a parent span
+    """
+
+    if dateVar.get('curr', 0) > 0:
+        memory['dtypes'] = dtypeSnapshot(memory['model'])
+
+
+def checkDtypes(path):
+    """
+    Compares the dtype of all state arrays with the snapshot before, at the start and at the end of each time span.
+    Reports arrays which changed the dtype and new float64 arrays above dtypeCheckSize
+    (see :meth:`management_modules.data_handling.initDtypeCheck`)
+
+    :param path: path of the time span
+    """
+
+    if dateVar.get('curr', 0) == 0:
+        return
+    before = memory['dtypes']
+    after = dtypeSnapshot(memory['model'])
+    for key, (dtype, size) in after.items():
+        if key not in before:
+            if dtype == np.float64 and size >= memory['dtypeSize']:
+                addDtypeChange(path, ".".join(key), None, dtype)
+        elif before[key][0] != dtype:
+            addDtypeChange(path, ".".join(key), before[key][0], dtype)
+    memory['dtypes'] = after
+
+
+def checkReturnDtypes(name, result):
+    """
+    Reports float64 arrays above dtypeCheckSize which are returned by a module e.g. runoff of landcoverType.dynamic
+
+    :param name: name of the function
+    :param result: return value of the function
+    """
+
+    if dateVar.get('curr', 0) == 0:
+        return
+    if not isinstance(result, tuple):
+        result = (result,)
+    for i, value in enumerate(result):
+        if isinstance(value, np.ndarray) and value.dtype == np.float64 and value.size >= memory['dtypeSize']:
+            addDtypeChange(name, "return value %i" % i, None, value.dtype)
+
+
+def printDtypeChanges():
+    """
+    Prints all dtype changes with the first time step and the number of time steps with this change
+    """
+
+    print("\n\ndtype changes")
+    print("%-70s %-35s %-10s %-10s %6s %8s" % ("Name", "Variable", "before", "after", "first", "count"))
+    for (path, variable, old, new), (first, count) in memory['dtypeChanges'].items():
+        print("%-70s %-35s %-10s %-10s %6i %8i" % (path, variable, "new" if old == "None" else old, new, first, count))
+
+
+def finishMemory():
+    """
+    Prints the peak memory of the time spans at the end of the run, if memoryTrace is in the settings file
+    and the dtype changes if dtypeCheck is in the settings file
+    """
+
+    if memory.get('trace'):
+        printMemorySpans()
+        memory['trace'] = False
+        tracemalloc.stop()
+    if memory.get('dtypeCheck'):
+        printDtypeChanges()
+        memory['dtypeCheck'] = False
@@ -58,6 +58,7 @@ class outputTssMap(object):
         self.HRU = model.data.HRU
         self.model = model
 
+    @timed
     def initial(self):
         """
         Initial part of the output module
@@ -214,6 +215,7 @@ class outputTssMap(object):
 
 
 
+    @timed
     def dynamic(self, ef = False):
         """
         Dynamic part of the output module
@@ -306,11 +308,13 @@ class outputTssMap(object):
 
             outputFilename = expression[0]
 
+            io = iocount('writeTssFile')
             if expression[2]:
                 writeFileHeader(outputFilename,expression)
                 outputFile = open(outputFilename, "a")
             else:
                 outputFile = open(outputFilename, "w")
+            io.opened()
 
             assert outputFile
             if len(expression[3]):
@@ -331,6 +335,7 @@ class outputTssMap(object):
                         outputFile.write(row)
 
             outputFile.close()
+            io.done(outputFilename, os.path.basename(outputFilename))
 
         def writeFileHeader(outputFilename,expression):
             """
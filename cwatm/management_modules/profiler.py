@@ -0,0 +1,162 @@
+# -------------------------------------------------------------------------
+# Name:        Windowed profiler
+# Purpose:     profile of the initial part and of windows of time steps (e.g. 400-430)
+#              written as collapsed stacks (flame graph) and with cProfile as pstats
+#
+# Created:     18/10/2026
+# -------------------------------------------------------------------------
+
+import os
+import sys
+import threading
+import cProfile
+from time import perf_counter
+
+from cwatm.management_modules.globals import profiling, dateVar
+
+
+def frameName(frame):
+    """
+    Name of a stack frame: module and function e.g. soil.soil.dynamic
+
+    :param frame: frame of the stack
+    :return: name
+    """
+
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return module + "." + getattr(code, 'co_qualname', code.co_name)
+
+
+class stackSampler(object):
+    """
+    Statistical profiler: a thread which takes the stack of the model thread every interval seconds
+
+    Each stack gets the wall time since the previous sample [microseconds], so time in compiled functions
+    which hold the GIL (numba, C++ routing) is given to the function which calls them
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.thread = threading.get_ident()
+        self.counts = {}
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.sample, name="stackSampler", daemon=True)
+
+    def start(self):
+        self.sampler.start()
+
+    def sample(self):
+        last = perf_counter()
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread)
+            now = perf_counter()
+            stack = []
+            while frame is not None:
+                stack.append(frameName(frame))
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + int((now - last) * 1e6)
+            last = now
+
+    def stop(self):
+        """
+        :return: dict of collapsed stack: wall time [microseconds]
+        """
+        self.stopped.set()
+        self.sampler.join()
+        return self.counts
+
+
+def writeCollapsed(counts, filename):
+    """
+    Writes collapsed stacks (one line per stack: functions separated by ; and the time)
+    for flamegraph.pl, speedscope or inferno
+
+    :param counts: dict of collapsed stack: wall time [microseconds]
+    :param filename: name of the output file
+    """
+
+    with open(filename, 'w') as f:
+        for stack, count in sorted(counts.items()):
+            if count > 0:
+                f.write("%s %i\n" % (stack, count))
+
+
+def printCollapsed(counts, title, top=15):
+    """
+    Prints the functions with the highest own time (top of the stack) and total time
+
+    :param counts: dict of collapsed stack: wall time [microseconds]
+    :param title: name of the profile
+    :param top: number of functions
+    """
+
+    own = {}
+    total = {}
+    for stack, count in counts.items():
+        names = stack.split(";")
+        own[names[-1]] = own.get(names[-1], 0) + count
+        for name in set(names):
+            total[name] = total.get(name, 0) + count
+    alltime = sum(counts.values()) or 1
+
+    print("\n\nProfile " + title)
+    print("%-70s %10s %6s %10s %6s" % ("Function", "own[s]", "%", "total[s]", "%"))
+    for name, count in sorted(own.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print("%-70s %10.2f %6.1f %10.2f %6.1f" % (name[-70:], count / 1e6, 100 * count / alltime, total[name] / 1e6, 100 * total[name] / alltime))
+
+
+def startProfile(name):
+    """
+    Starts the profiler (see :meth:`management_modules.data_handling.initProfiler`)
+
+    :param name: name of the profile e.g. initial or steps400-430, part of the output file names
+    """
+
+    sampler = stackSampler(profiling['interval'])
+    sampler.start()
+    deterministic = None
+    if profiling['mode'] == 'cprofile':
+        deterministic = cProfile.Profile()
+        deterministic.enable()
+    profiling['active'] = (name, sampler, deterministic)
+
+
+def stopProfile():
+    """
+    Stops the profiler and writes the collapsed stacks (.folded) and with profileMode = cProfile the pstats file (.prof)
+    """
+
+    name, sampler, deterministic = profiling.pop('active')
+    if deterministic is not None:
+        deterministic.disable()
+        deterministic.dump_stats(profiling['file'] + "_" + name + ".prof")
+    counts = sampler.stop()
+    writeCollapsed(counts, profiling['file'] + "_" + name + ".folded")
+    printCollapsed(counts, name)
+
+
+def checkProfile(end=False):
+    """
+    Starts the profiler at the first time step of a window and stops it after the last time step,
+    called at the beginning and at the end of the dynamic part
+
+    :param end: True at the end of the time step
+    """
+
+    step = dateVar.get('curr', 0)
+    for first, last in profiling.get('windows', ()):
+        if not end and step == first and 'active' not in profiling:
+            startProfile("steps%i-%i" % (first, last))
+        if end and step == last and 'active' in profiling:
+            stopProfile()
+
+
+def finishProfile():
+    """
+    Stops the profiler at the end of the run if the last window is not closed
+    """
+
+    if 'active' in profiling:
+        stopProfile()
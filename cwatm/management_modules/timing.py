@@ -0,0 +1,219 @@
+# -------------------------------------------------------------------------
+# Name:        Timing of the model parts
+# Purpose:     nested time spans of the initial and dynamic part, routing substeps and I/O
+#              printed with flag -t and exported as Chrome trace (chrome://tracing, Perfetto)
+#
+# Created:     18/10/2026
+# -------------------------------------------------------------------------
+
+import os
+import json
+import math
+import functools
+from time import perf_counter
+
+from cwatm.management_modules.globals import timing, timeSpans, timeStats, dateVar, memory
+from cwatm.management_modules.memory import memorySpanEnter, memorySpanExit, checkDtypes, snapshotDtypes, checkReturnDtypes
+
+
+class timespan(object):
+    """
+    Time span of a part of the model, used as context manager::
+
+        with timespan("routing substep"):
+            ...
+
+    Spans can be nested, the name of a span is the path of all open spans e.g.
+    CWATModel_dyn.dynamic/routing_kinematic.dynamic/routing substep.
+    Time is only taken if timing is switched on (see :meth:`management_modules.data_handling.initTiming`),
+    with memoryTrace also the peak memory (see :meth:`management_modules.memory.memorySpanEnter`)
+    and with dtypeCheck the dtype changes of the state arrays at the start and the end of the span
+    (see :meth:`management_modules.memory.checkDtypes`)
+    """
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if timing.get('on'):
+            stack = timing['stack']
+            if memory.get('dtypeCheck'):
+                # changes before the span belong to the parent span, not to this one
+                if stack:
+                    checkDtypes(stack[-1])
+                else:
+                    snapshotDtypes()
+            stack.append(stack[-1] + "/" + self.name if stack else self.name)
+            if memory.get('trace'):
+                memorySpanEnter()
+            self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            end = perf_counter()
+            stack = timing['stack']
+            path = stack.pop()
+            if memory.get('trace'):
+                memorySpanExit(path)
+            if memory.get('dtypeCheck'):
+                checkDtypes(path)
+            step = dateVar.get('curr', 0)
+            addTimeSpan(path, len(stack), step, end - self.start)
+            if timing.get('trace'):
+                # path, depth, time step (0: initial part), start, end
+                timeSpans.append((path, len(stack), step, self.start, end))
+            self.start = None
+        return False
+
+
+def addTimeSpan(path, depth, step, duration):
+    """
+    Adds a time span to the aggregates of its path: calls, total time, time of the initial part and
+    the time per time step (sum of the spans of the current time step, mean, variance, minimum and maximum
+    over the finished time steps are updated when the next time step starts)
+
+    :param path: path of the span
+    :param depth: number of open parent spans
+    :param step: time step (0: initial part)
+    :param duration: time [s]
+    """
+
+    span = timeStats.get(path)
+    if span is None:
+        span = timeStats[path] = {'calls': 0, 'depth': depth, 'initial': 0., 'total': 0., 'step': 0, 'stepTime': 0.,
+                                  'steps': 0, 'mean': 0., 'm2': 0., 'min': math.inf, 'max': -math.inf}
+    span['calls'] += 1
+    span['total'] += duration
+    if step == 0:
+        span['initial'] += duration
+        return
+    if step != span['step']:
+        finishStep(span)
+        span['step'] = step
+    span['stepTime'] += duration
+
+
+def finishStep(span):
+    """
+    Adds the time of the current time step of a path to mean, variance (Welford), minimum and maximum
+
+    :param span: aggregates of a path (see :meth:`addTimeSpan`)
+    """
+
+    if span['step'] == 0:
+        return
+    x = span['stepTime']
+    span['steps'] += 1
+    delta = x - span['mean']
+    span['mean'] += delta / span['steps']
+    span['m2'] += delta * (x - span['mean'])
+    span['min'] = min(span['min'], x)
+    span['max'] = max(span['max'], x)
+    span['step'] = 0
+    span['stepTime'] = 0.
+
+
+def timed(func):
+    """
+    Decorator for the time span of a function or method, named after the function e.g. soil.dynamic
+
+    :param func: function to be timed
+    :return: function which is timed if timing is switched on
+    """
+
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not timing.get('on'):
+            return func(*args, **kwargs)
+        with timespan(name):
+            result = func(*args, **kwargs)
+        if memory.get('dtypeCheck'):
+            checkReturnDtypes(name, result)
+        return result
+    return wrapper
+
+
+def timingSummary():
+    """
+    Time spans per path, aggregated while the model runs (see :meth:`addTimeSpan`)
+
+    :return: dict of path: calls, depth, time of the initial part, total time and
+             mean, standard deviation, minimum and maximum time per time step [s]
+    """
+
+    summary = {}
+    for path, stats in timeStats.items():
+        stats = dict(stats)
+        # time step which is still running
+        finishStep(stats)
+        span = {'calls': stats['calls'], 'depth': stats['depth'], 'initial': stats['initial'], 'total': stats['total'], 'steps': stats['steps']}
+        if stats['steps']:
+            span['mean'] = stats['mean']
+            span['std'] = math.sqrt(stats['m2'] / stats['steps'])
+            span['min'] = stats['min']
+            span['max'] = stats['max']
+        summary[path] = span
+    return summary
+
+
+def printTiming():
+    """
+    Prints the time of all spans, indented by nesting, with flag -t
+    """
+
+    summary = timingSummary()
+    total = sum(span['total'] for span in summary.values() if span['depth'] == 0)
+
+    print("\n\nTime profiling")
+    print("%3s %-50s %8s %10s %6s %10s %10s" % ("No", "Name", "calls", "time[s]", "%", "step[ms]", "std[ms]"))
+    for i, path in enumerate(sorted(summary, key=lambda path: path.split("/"))):
+        span = summary[path]
+        name = "  " * span['depth'] + path.split("/")[-1]
+        percent = 100 * span['total'] / total if total > 0 else 0.
+        if span['steps']:
+            print("%3i %-50s %8i %10.2f %6.1f %10.2f %10.2f" % (i, name, span['calls'], span['total'], percent, 1000 * span['mean'], 1000 * span['std']))
+        else:
+            print("%3i %-50s %8i %10.2f %6.1f" % (i, name, span['calls'], span['total'], percent))
+
+
+def writeTiming(filename):
+    """
+    Writes the time spans as Chrome trace (JSON) which can be opened with chrome://tracing or Perfetto,
+    with the aggregates per time step (see :meth:`timingSummary`) under 'spanSummary'.
+    Single spans are only kept with timingTrace in the settings file
+
+    :param filename: name of the JSON file
+    """
+
+    start = timing.get('start', timeSpans[0][3] if timeSpans else 0.)
+    pid = os.getpid()
+    events = []
+    for path, depth, step, spanStart, spanEnd in timeSpans:
+        events.append({
+            "name": path.split("/")[-1],
+            "cat": "initial" if step == 0 else "dynamic",
+            "ph": "X",
+            "ts": (spanStart - start) * 1e6,
+            "dur": (spanEnd - spanStart) * 1e6,
+            "pid": pid,
+            "tid": 0,
+            "args": {"step": step, "path": path}
+        })
+
+    with open(filename, 'w') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms", "spanSummary": timingSummary()}, f)
+
+
+def finishTiming():
+    """
+    Writes the Chrome trace at the end of the run, if timingTrace is in the settings file
+    """
+
+    if timing.get('trace'):
+        writeTiming(timing['trace'])
@@ -42,8 +42,8 @@ import sys
 import time
 import datetime
 
-from cwatm.management_modules.configuration import globalFlags, settingsfile, versioning, platform1, parse_configuration, read_metanetcdf, dateVar, CWATMRunInfo, timeMesSum, timeMesString, globalclear
-from cwatm.management_modules.data_handling import Flags, cbinding
+from cwatm.management_modules.configuration import globalFlags, settingsfile, versioning, platform1, parse_configuration, read_metanetcdf, dateVar, CWATMRunInfo, globalclear
+from cwatm.management_modules.data_handling import Flags, cbinding, printTiming
 from cwatm.management_modules.timestep import checkifDate
 from cwatm.management_modules.dynamicModel import ModelFrame
 from cwatm.cwatm_model import CWATModel
@@ -61,6 +61,7 @@ def usage():
     * -c --check       input maps and stack maps are checked, output for each input map BUT no model run
     * -h --noheader    .tss file have no header and start immediately with the time series
     * -t --printtime   the computation time for hydrological modules are printed
+      (nested time spans, a Chrome trace is written with timingTrace = file in the settings file)
 
     """
     print('CWatM - Community Water Model')
@@ -134,13 +135,7 @@ def CWATMexe(settings):
     # pyreverse -AS -f ALL -o png cwatm.py -p Main
 
     if Flags['printtime']:
-        print("\n\nTime profiling")
-        print("%2s %-17s %10s %8s" % ("No", "Name", "time[s]", "%"))
-
-        timeSum = np.array(timeMesSum)
-        timePrint = timeSum
-        for i in range(len(timePrint)):
-            print("%2i %-17s %10.2f %8.1f" % (i, timeMesString[i], timePrint[i], 100 * timePrint[i] / timePrint[-1]))
+        printTiming()
     current_time = datetime.datetime.now().time()
     print(start_time.isoformat())
     print(current_time.isoformat())
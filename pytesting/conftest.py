@@ -8,6 +8,30 @@ import sys,os
 import importlib
 
 
+@pytest.fixture
+def reset_settings():
+    """
+    Resets global settings after a test: reset(keys, *inits, dates=('curr',)) removes the keys from the binding
+    and the dates from dateVar and calls the functions inits in this order e.g. the init function of the option
+    """
+
+    from cwatm.management_modules.globals import binding, dateVar
+
+    resets = []
+
+    def reset(keys, *inits, dates=('curr',)):
+        resets.append((keys, dates, inits))
+
+    yield reset
+    for keys, dates, inits in resets:
+        for key in keys:
+            binding.pop(key, None)
+        for key in dates:
+            dateVar.pop(key, None)
+        for init in inits:
+            init()
+
+
 def pytest_addoption(parser):
     parser.addoption("--settingsfile", action="store")
     parser.addoption("--cwatm", action="store")
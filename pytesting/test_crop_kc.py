@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from cwatm.hydrological_modules.landcoverType import get_crop_kc, crop_parameters_dtype
+
+# ------------------------------------------------------
+# crop factor of the cropped HRUs from the stage lengths and crop factors of each crop
+
+crop_parameters = np.zeros(2, dtype=crop_parameters_dtype)
+crop_parameters[1] = (0.2, 0.4, 0.8, 1.0, 0.4, 1.2, 0.6)
+
+
+def test_get_crop_kc():
+    """crop stages: initial, development (interpolated), mid season, late season (interpolated)"""
+    crop_map = np.array([1, 1, 1, 1, 1, -1, 1])
+    crop_harvest_age_days_map = np.full(crop_map.size, 100)
+    crop_age_days_map = np.array([10, 30, 60, 90, 100, 50, 50])
+    cropped = np.array([0, 1, 2, 3, 4, 5])
+
+    kc = get_crop_kc(crop_map, crop_age_days_map, crop_harvest_age_days_map, crop_parameters, cropped)
+    np.testing.assert_allclose(kc[:5], [0.4, 0.8, 1.2, 0.9, 0.6], rtol=1e-6)
+    # no crop and not in the cropped HRUs
+    assert np.isnan(kc[5:]).all()
+
+
+def test_get_crop_kc_after_harvest():
+    """crops older than the harvest age are not allowed"""
+    with pytest.raises(AssertionError):
+        get_crop_kc(np.array([1]), np.array([120]), np.array([100]), crop_parameters, np.array([0]))
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from cwatm.hydrological_modules.evaporationPot import penman_monteith, penman_monteith_numba
+
+# ------------------------------------------------------
+# compiled Penman Monteith kernel has to give the same results as the numpy expressions
+
+
+def meteo(size=5000, seed=1):
+    rng = np.random.default_rng(seed)
+    Tavg = rng.uniform(-30., 40., size)
+    TMin = Tavg - rng.uniform(0., 15., size)
+    TMax = Tavg + rng.uniform(0., 15., size)
+    Psurf = rng.uniform(60000., 104000., size)
+    Rsds = rng.uniform(0., 350., size)
+    Rsdl = rng.uniform(150., 450., size)
+    albedoLand = rng.uniform(0.1, 0.8, size)
+    albedoOpenWater = rng.uniform(0.05, 0.1, size)
+    Wind = rng.uniform(0., 15., size)
+    return TMin, TMax, Tavg, Psurf, Rsds, Rsdl, albedoLand, albedoOpenWater, Wind
+
+
+@pytest.mark.parametrize("useHuss", [True, False])
+def test_penman_monteith_numba(useHuss):
+    """same results as numpy for specific and relative humidity"""
+    TMin, TMax, Tavg, Psurf, Rsds, Rsdl, albedoLand, albedoOpenWater, Wind = meteo()
+    rng = np.random.default_rng(2)
+    if useHuss:
+        Qair = rng.uniform(0.0001, 0.02, Tavg.size)
+    else:
+        Qair = rng.uniform(5., 100., Tavg.size)
+
+    args = (TMin, TMax, Tavg, Psurf, Qair, Rsds, Rsdl, albedoLand, albedoOpenWater, Wind, useHuss)
+    ETRef, EWRef = penman_monteith(*args)
+    ETRef_numba, EWRef_numba = penman_monteith_numba(*args)
+
+    np.testing.assert_allclose(ETRef_numba, ETRef, rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(EWRef_numba, EWRef, rtol=1e-12, atol=1e-15)
+    assert (ETRef >= 0).all() and (EWRef >= 0).all()
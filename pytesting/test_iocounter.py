@@ -0,0 +1,72 @@
+import datetime
+import numpy as np
+import pytest
+
+from cwatm.management_modules.data_handling import initIOCounter, binding, dateVar
+from cwatm.management_modules.iocounter import iocount, readNetCDFReader, checkIOCounters, IOCOUNTOFF
+from cwatm.management_modules.globals import ioCounters, ioCountersMonth
+
+# ------------------------------------------------------
+# counters of the input and output calls per file and variable
+
+
+@pytest.fixture(autouse=True)
+def settings(reset_settings):
+    reset_settings(('ioCounter', 'ioCounterMonthly'), initIOCounter, dates=('curr', 'currDate', 'daysInMonth', 'laststep'))
+
+
+def read(filename):
+    io = iocount('read')
+    with open(filename, 'rb') as f:
+        io.opened()
+        data = np.frombuffer(f.read(), dtype=np.float32)
+    io.done(filename, 'w1', data)
+    return data
+
+
+def test_iocounter(tmp_path):
+    binding['ioCounter'] = 'True'
+    initIOCounter()
+    filename = tmp_path / "state.bin"
+    np.arange(2 ** 16, dtype=np.float32).tofile(filename)
+    for i in range(3):
+        read(filename)
+
+    calls, opens, fileBytes, dataBytes, seconds = ioCounters[('read', 'state.bin', 'w1')]
+    assert calls == 3 and opens == 3
+    assert dataBytes == 3 * 4 * 2 ** 16
+    # bytes read by the process, if /proc/self/io is available
+    assert fileBytes == 0 or fileBytes >= dataBytes
+    assert seconds > 0
+
+
+def test_iocounter_off():
+    initIOCounter()
+    assert iocount('read') is IOCOUNTOFF
+    assert not ioCounters
+
+
+class Variable(object):
+    name = 'demand'
+
+
+class NetCDFReader(object):
+    var = Variable()
+
+    def get_data_array(self, date):
+        return np.ones(10)
+
+
+def test_iocounter_monthly():
+    binding['ioCounterMonthly'] = 'True'
+    initIOCounter()
+    dateVar.update({'curr': 30, 'currDate': datetime.datetime(2000, 4, 29), 'daysInMonth': 30, 'laststep': False})
+    readNetCDFReader(NetCDFReader(), dateVar['currDate'])
+    checkIOCounters()
+    assert ioCountersMonth[('NetCDFReader', 'NetCDFReader', 'demand')][0] == 1
+
+    # last day of the month: printed and cleared
+    dateVar['currDate'] = datetime.datetime(2000, 4, 30)
+    checkIOCounters()
+    assert not ioCountersMonth
+    assert ioCounters[('NetCDFReader', 'NetCDFReader', 'demand')][3] == 80
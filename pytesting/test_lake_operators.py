@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from cwatm.management_modules.replace_pcr import npareatotal
+from cwatm.hydrological_modules.routing_reservoirs.routing_sub import upstream1
+from cwatm.hydrological_modules.lakes_reservoirs import lake_operators, lakes_reservoirs
+
+# ------------------------------------------------------
+# sparse operators of the lakes and reservoirs in the routing substeps
+# have to give the same inflow and outflow as npareatotal/upstream1 on the full grid
+
+
+def lake_network():
+    """
+    5 x 6 cells: every row flows east into the last column, the last column flows south to a pit
+    lake 1 (cells 10, 16) flows into lake 2 (cells 17, 23), lake 2 flows to the pit (cell 29),
+    lake 3 (cells 24, 25) flows to the river
+    """
+
+    rows, cols = 5, 6
+    ncells = rows * cols
+    downstruct = np.empty(ncells, dtype=np.int64)
+    for cell in range(ncells):
+        row, col = divmod(cell, cols)
+        if col < cols - 1:
+            downstruct[cell] = cell + 1
+        elif row < rows - 1:
+            downstruct[cell] = cell + cols
+        else:
+            downstruct[cell] = ncells
+    waterBodyID = np.zeros(ncells, dtype=np.int64)
+    waterBodyID[[10, 16]] = 1
+    waterBodyID[[17, 23]] = 2
+    waterBodyID[[24, 25]] = 3
+    waterBodyOut = np.zeros(ncells, dtype=np.int64)
+    waterBodyOut[[16, 23, 25]] = [1, 2, 3]
+    # lakes are pits in the river network without lakes
+    downstruct_LR = np.where(waterBodyID > 0, ncells, downstruct)
+    return waterBodyID, waterBodyOut, downstruct, downstruct_LR
+
+
+def test_lake_operators():
+    waterBodyID, waterBodyOut, downstruct, downstruct_LR = lake_network()
+    ncells = waterBodyID.size
+    decompress_LR = np.nonzero(waterBodyOut)[0]
+    compress_LR = waterBodyOut > 0
+    cell2lake, lake2cell, upstream2lake, lake2ldd, lake2lake = lake_operators(waterBodyID, decompress_LR, downstruct, downstruct_LR)
+
+    rng = np.random.default_rng(5)
+    discharge = rng.random(ncells)
+    runoff = rng.random(ncells)
+
+    # inflow: discharge from upstream network and runoff on the lake, at the outlet
+    dis_LR = np.where(waterBodyID > 0, upstream1(downstruct_LR, discharge), 0.)
+    inflow = npareatotal(dis_LR + runoff, waterBodyID)
+    inflow = np.compress(compress_LR, np.where(waterBodyOut > 0, inflow, 0.))
+    np.testing.assert_allclose(upstream2lake @ discharge + cell2lake @ runoff, inflow, rtol=1e-14)
+
+    # outflow: one cell downstream, to the river network or to the outlet of another lake
+    outflowC = rng.random(decompress_LR.size)
+    reslakeoutflow = np.zeros(ncells)
+    np.put(reslakeoutflow, decompress_LR, outflowC)
+    np.testing.assert_allclose(lake2cell @ outflowC, npareatotal(reslakeoutflow, waterBodyID) * (waterBodyID > 0), rtol=1e-14)
+    out1 = upstream1(downstruct, reslakeoutflow)
+    np.testing.assert_allclose(lake2ldd @ outflowC, np.where(waterBodyID > 0, 0, out1), rtol=1e-14)
+    outLake = np.where(waterBodyOut > 0, npareatotal(np.where(waterBodyID > 0, out1, 0), waterBodyID), 0.)
+    np.testing.assert_allclose(lake2lake @ outflowC, np.compress(compress_LR, outLake), rtol=1e-14)
+    assert (lake2lake @ outflowC)[1] == outflowC[0]
+
+
+def test_outlake_last_substep():
+    waterBodyID, waterBodyOut, downstruct, downstruct_LR = lake_network()
+    ncells = waterBodyID.size
+    decompress_LR = np.nonzero(waterBodyOut)[0]
+    operators = lake_operators(waterBodyID, decompress_LR, downstruct, downstruct_LR)
+    grid = SimpleNamespace(decompress_LR=decompress_LR, noRoutingSteps=3, reslakeoutflow=np.zeros(ncells), outLake=np.zeros(ncells),
+                           cell2lake_LR=operators[0], lake2cell_LR=operators[1], lake2ldd_LR=operators[3], lake2lake_LR=operators[4])
+    lakes = lakes_reservoirs(SimpleNamespace(data=SimpleNamespace(grid=grid), DtSec=86400.))
+
+    for substep in range(3):
+        outflowC = np.array([1., 2., 3.]) * (substep + 1)
+        lakeResOutflowDis, outLdd = lakes.outflow_inloop(outflowC, substep)
+        np.testing.assert_array_equal(grid.outLakeC, [0., outflowC[0], 0.])
+        if substep < 2:
+            assert not grid.outLake.any()
+    assert grid.outLake[23] == 3. and grid.outLake.sum() == 3.
+    assert outLdd[26] == 9. and outLdd[29] == 6. and outLdd.sum() == 15.
+    np.testing.assert_allclose(lakeResOutflowDis[[24, 25]], 9. / (86400. / 3))
@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from cwatm.management_modules.globals import dateVar, validation
+from cwatm.management_modules.data_handling import land_use_order, land_use_subset, land_use_indices
+
+# ------------------------------------------------------
+# HRUs of land use types: slices for HRUs sorted by land use type, indices otherwise
+
+
+def test_land_use_subset_sorted():
+    land_use_type = np.array([0, 0, 1, 2, 2, 3, 4, 4, 5])
+    assert land_use_subset(land_use_type, (0, 1, 2, 3)) == slice(0, 6)
+    assert land_use_subset(land_use_type, (2, )) == slice(3, 5)
+    assert land_use_subset(land_use_type, (4, 5)) == slice(6, 9)
+    assert land_use_subset(land_use_type, (6, )) == slice(0, 0)
+    values = np.arange(land_use_type.size, dtype=np.float32)
+    assert np.shares_memory(values[land_use_subset(land_use_type, (2, 3))], values)
+
+
+def test_land_use_subset_unsorted():
+    land_use_type = np.array([0, 4, 1, 2, 5, 2, 3, 0, 4])
+    for types in ((0, 1, 2, 3), (2, ), (4, 5)):
+        subset = land_use_subset(land_use_type, types)
+        assert isinstance(subset, np.ndarray)
+        np.testing.assert_array_equal(subset, np.flatnonzero(np.isin(land_use_type, types)))
+    # one HRU or neighbouring HRUs are still a slice
+    assert land_use_subset(land_use_type, (3, )) == slice(6, 7)
+
+
+def test_land_use_order():
+    land_use_type = np.array([4, 0, 2, 0, 1, 5, 3, 2, 0, 4])
+    HRU_to_grid = np.array([0, 0, 0, 1, 1, 1, 2, 2, 2, 3])
+    order = land_use_order(land_use_type, HRU_to_grid)
+    np.testing.assert_array_equal(order, [1, 3, 8, 4, 2, 7, 6, 0, 9, 5])
+    sorted_type, sorted_grid = land_use_type[order], HRU_to_grid[order]
+    for types in ((0, 1, 2, 3), (2, ), (2, 3), (4, 5)):
+        subset = land_use_subset(sorted_type, types)
+        assert isinstance(subset, slice)
+        np.testing.assert_array_equal(np.sort(land_use_type[np.isin(land_use_type, types)]), sorted_type[subset])
+    for coverNum in range(6):
+        assert (np.diff(sorted_grid[sorted_type == coverNum]) >= 0).all()
+    # the grid cells of the HRUs are kept when var_to_HRU is mapped to the new positions
+    var_to_HRU = np.array([3, 9, 5])
+    new_position = np.empty_like(order)
+    new_position[order] = np.arange(order.size)
+    np.testing.assert_array_equal(sorted_grid[new_position[var_to_HRU]], HRU_to_grid[var_to_HRU])
+
+
+def test_land_use_indices_getitem():
+    HRU = SimpleNamespace(land_use_type=np.array([0, 0, 1, 2, 3, 3, 4, 5]))
+    indices = land_use_indices(HRU)
+    assert indices['bioarea'] == slice(0, 6)
+    assert indices['sealed_water'] == slice(6, 8)
+    assert indices[2] == slice(3, 4)
+    assert indices['bioarea'] is indices.cache['bioarea']
+    np.testing.assert_array_equal(indices.as_array('irrigated'), [3, 4, 5])
+    assert indices.as_array('irrigated') is indices.as_array('irrigated')
+
+
+def test_land_use_indices_invalidation():
+    HRU = SimpleNamespace(land_use_type=np.array([0, 0, 1, 2, 3, 3, 4, 5]))
+    indices = land_use_indices(HRU)
+    assert indices['forest'] == slice(0, 2)
+    np.testing.assert_array_equal(indices.as_array('sealed'), [6])
+
+    # HRU 1 from forest to sealed: no longer contiguous
+    indices.set_land_use_type([1], 4)
+    assert indices['forest'] == slice(0, 1)
+    np.testing.assert_array_equal(indices['sealed'], [1, 6])
+    np.testing.assert_array_equal(indices.as_array('sealed'), [1, 6])
+
+    # land_use_type replaced by another array (same or other size)
+    HRU.land_use_type = np.array([5, 5, 0, 0, 0, 1, 1, 1])
+    assert indices['forest'] == slice(2, 5)
+    HRU.land_use_type = np.array([0, 1])
+    assert indices['forest'] == slice(0, 1)
+    assert indices['water'] == slice(0, 0)
+
+
+def test_land_use_indices_replaced_twice(monkeypatch):
+    """a new array of the same size can get the id of the freed array, the sets are still calculated again"""
+    monkeypatch.setitem(validation, 'level', 'off')
+    HRU = SimpleNamespace(land_use_type=np.array([0, 0, 1, 2, 3, 3, 4, 5]))
+    indices = land_use_indices(HRU)
+    assert indices['forest'] == slice(0, 2)
+    for first in (3, 5):
+        # the old array is only kept by land_use_indices
+        HRU.land_use_type = np.array([1] * first + [0] * (8 - first))
+        assert indices['forest'] == slice(first, 8)
+        assert indices.land_use_array is HRU.land_use_type
+
+
+def test_land_use_indices_validation(monkeypatch):
+    monkeypatch.setitem(validation, 'level', 'full')
+    monkeypatch.setitem(dateVar, 'curr', 1)
+    HRU = SimpleNamespace(land_use_type=np.array([0, 0, 1, 2]))
+    indices = land_use_indices(HRU)
+    assert indices['forest'] == slice(0, 2)
+    # changed in place without set_land_use_type: found by the runtime checks
+    HRU.land_use_type[0] = 1
+    with pytest.raises(AssertionError):
+        indices['forest']
+    indices.invalidate()
+    assert indices['forest'] == slice(1, 2)
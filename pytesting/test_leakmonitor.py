@@ -0,0 +1,44 @@
+import pytest
+
+from cwatm.management_modules.data_handling import initLeakMonitor, binding, dateVar
+from cwatm.management_modules.leakmonitor import checkLeakMonitor, finishLeakMonitor, containerSize, trend
+from cwatm.management_modules.globals import leakSamples, timeSpans
+
+# ------------------------------------------------------
+# leak monitor: samples every n time steps, trend and monotonic growth
+
+
+@pytest.fixture(autouse=True)
+def settings(reset_settings):
+    reset_settings(('leakMonitor', 'leakMonitorSteps'), timeSpans.clear, initLeakMonitor, dates=('curr', 'laststep'))
+
+
+def test_container_size():
+    assert containerSize({'a': [1, 2, 3], 'b': {'c': (4, 5)}}) == 5
+    assert containerSize([]) == 0
+
+
+def test_trend():
+    slope, growing = trend([10, 20, 30, 40], [5, 6, 6, 8])
+    assert growing and slope == pytest.approx(90.)
+    assert not trend([10, 20, 30], [5, 4, 6])[1]
+    assert not trend([10, 20, 30], [5, 5, 5])[1]
+
+
+def test_leak_monitor(capsys):
+    binding['leakMonitor'] = 'True'
+    binding['leakMonitorSteps'] = '5'
+    initLeakMonitor()
+    for step in range(1, 13):
+        dateVar['curr'] = step
+        dateVar['laststep'] = step == 12
+        timeSpans.append(('span', step))
+        checkLeakMonitor()
+
+    assert [sample[0] for sample in leakSamples] == [5, 10, 12]
+    assert [sample[3]['timeSpans'] for sample in leakSamples] == [10, 20, 24]
+    assert all(sample[1] > 0 and sample[2] > 0 for sample in leakSamples)
+
+    finishLeakMonitor()
+    lines = capsys.readouterr().out.splitlines()
+    assert [line for line in lines if line.startswith('timeSpans')][0].endswith('growing')
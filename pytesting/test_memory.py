@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+from numba import njit
+
+from cwatm.management_modules.data_handling import initMemory, initTiming, initDtypeCheck, binding, dateVar
+from cwatm.management_modules.memory import memoryReport, finishMemory
+from cwatm.management_modules.timing import timespan, timed
+from cwatm.management_modules.globals import memory, memorySpans
+
+# ------------------------------------------------------
+# memory report of the state arrays and peak memory of the time spans
+
+
+class Data(object):
+    pass
+
+
+class module(object):
+    def __init__(self, model):
+        self.model = model
+        self.var = model.data.HRU
+        self.parameters = np.zeros(10, dtype=np.float32)
+
+
+class model(object):
+    def __init__(self):
+        self.data = Data()
+        self.data.HRU = Data()
+        self.data.grid = Data()
+        self.data.HRU.w1 = np.zeros(1000, dtype=np.float32)
+        self.data.HRU.w1_again = self.data.HRU.w1
+        self.data.HRU.w2 = np.zeros(1000, dtype=np.float64)
+        self.data.grid.discharge = np.zeros((10, 10))
+        self.data.grid.discharge_view = self.data.grid.discharge[1:]
+        self.data.grid.name = "not an array"
+        self.soil_module = module(self)
+
+
+@pytest.fixture(autouse=True)
+def settings(reset_settings):
+    reset_settings(('memoryTrace', 'memoryReport', 'memoryReportSteps', 'dtypeCheck', 'dtypeCheckSize'),
+                   finishMemory, initMemory, lambda: initDtypeCheck(None), initTiming)
+
+
+def test_memory_report():
+    rows, total = memoryReport(model(), printTrue=False)
+    assert [row[:2] for row in rows] == [
+        ('HRU', 'w2'), ('HRU', 'w1'), ('HRU', 'w1_again'), ('grid', 'discharge'), ('grid', 'discharge_view'), ('soil_module', 'parameters')
+    ]
+    assert rows[2][5] == "same as HRU.w1" and rows[4][5] == "view"
+    # same array and views are not counted
+    assert total == 8000 + 4000 + 800 + 40
+
+
+@njit
+def numba_zeros(n):
+    return np.zeros(n)
+
+
+def test_memory_report_numba():
+    """arrays returned by numba have a base which is not a state array, they are counted"""
+    test_model = model()
+    test_model.data.HRU.w3 = numba_zeros(1000)
+    assert test_model.data.HRU.w3.base is not None
+    # view on an array which is not in the state: the whole array counts, only once
+    temporary = np.zeros(2000, dtype=np.float32)
+    test_model.data.HRU.w4 = temporary[:1000]
+    test_model.data.HRU.w5 = temporary[1000:]
+    rows, total = memoryReport(test_model, printTrue=False)
+    notes = {row[1]: row[5] for row in rows}
+    assert notes['w3'] == "" and notes['discharge_view'] == "view"
+    assert sorted([notes['w4'], notes['w5']]) == ["", "view"]
+    assert total == 8000 + 4000 + 800 + 40 + 8000 + 8000
+def test_memory_report_steps():
+    binding['memoryReport'] = 'True'
+    binding['memoryReportSteps'] = '1, 365'
+    initMemory()
+    assert memory['steps'] == [0, 1, 365] and not memory['trace']
+
+
+def test_memory_trace():
+    binding['memoryTrace'] = 'True'
+    initTiming()
+    initMemory()
+    with timespan("dynamic"):
+        with timespan("temporary"):
+            temporary = np.ones(2 ** 20)
+            del temporary
+        with timespan("left"):
+            left = np.ones(2 ** 18)
+    assert memorySpans["dynamic/temporary"][1] >= 8 * 2 ** 20
+    assert memorySpans["dynamic/temporary"][2] < 2 ** 20
+    assert memorySpans["dynamic/left"][2] >= 2 * 2 ** 20
+    # peak of the inner span is also the peak of the outer span
+    assert memorySpans["dynamic"][1] >= memorySpans["dynamic/temporary"][1]
+
+
+class soil(object):
+    def __init__(self, model):
+        self.model = model
+        self.var = model.data.HRU
+
+    @timed
+    def dynamic(self):
+        self.var.w1 = self.var.w1 * 2.  # stays float32
+        self.var.w2 = self.var.w2.astype(np.float32)
+        self.var.w3 = self.var.w1.astype(np.float64)
+        return self.var.w1, self.var.w3
+
+
+def test_dtype_check():
+    binding['dtypeCheck'] = 'True'
+    binding['dtypeCheckSize'] = '100'
+    initTiming()
+    test_model = model()
+    test_model.soil_module = soil(test_model)
+    initDtypeCheck(test_model)
+    for curr in (1, 2):
+        dateVar['curr'] = curr
+        test_model.soil_module.dynamic()
+
+    changes = memory['dtypeChanges']
+    assert set(changes) == {
+        ("soil.dynamic", "HRU.w2", "float64", "float32"),
+        ("soil.dynamic", "HRU.w3", "None", "float64"),
+        ("soil.dynamic", "return value 1", "None", "float64"),
+    }
+    # w2 is only changed in the first time step, the float64 array is returned in both
+    assert changes[("soil.dynamic", "HRU.w2", "float64", "float32")] == [1, 1]
+    assert changes[("soil.dynamic", "return value 1", "None", "float64")] == [1, 2]
+
+
+class landcover(object):
+    def __init__(self, model):
+        self.model = model
+        self.var = model.data.HRU
+        self.soil_module = soil(model)
+
+    @timed
+    def dynamic(self):
+        self.var.w4 = self.var.w1.astype(np.int32)
+        self.soil_module.dynamic()
+
+
+def test_dtype_check_nested():
+    """changes of the parent span before a nested span are not blamed on the nested span"""
+    binding['dtypeCheck'] = 'True'
+    binding['dtypeCheckSize'] = '100'
+    initTiming()
+    test_model = model()
+    test_model.data.HRU.w4 = np.zeros(1000, dtype=np.float32)
+    test_model.landcover_module = landcover(test_model)
+    initDtypeCheck(test_model)
+    dateVar['curr'] = 1
+    test_model.landcover_module.dynamic()
+
+    changes = set(memory['dtypeChanges'])
+    assert ("landcover.dynamic", "HRU.w4", "float32", "int32") in changes
+    assert ("landcover.dynamic/soil.dynamic", "HRU.w2", "float64", "float32") in changes
+    assert not [change for change in changes if change[0] == "landcover.dynamic/soil.dynamic" and change[1] == "HRU.w4"]
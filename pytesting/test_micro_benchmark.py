@@ -0,0 +1,67 @@
+import os
+import tempfile
+
+import pytest
+
+from benchmark.micro import timeit, compare, run_cases, CASES, temporaryFolders
+from benchmark.run_benchmark import run_size
+from cwatm.management_modules.globals import option, validation, dateVar, lib2
+
+# ------------------------------------------------------
+# micro benchmarks: timing with repeats and comparison against a baseline
+
+
+def result(**medians):
+    return {'info': {'size': 50, 'machine': 'test'},
+            'results': {name: {'median': median} for name, median in medians.items()}}
+
+
+def test_timeit():
+    calls = []
+    times = timeit(lambda: calls.append(1), warmup=2, repeats=5)
+    assert len(calls) == 7
+    assert times['repeats'] == 5
+    assert 0 <= times['min'] <= times['median'] <= max(times['mean'] * 5, times['median'])
+
+
+def test_compare_threshold():
+    baseline = result(kinematic=1.0, soil=2.0, tss=1.0)
+    current = result(kinematic=1.05, soil=2.5, tss=0.5)
+    assert compare(baseline, current, threshold=0.1) == ['soil']
+    assert compare(baseline, current, threshold=0.3) == []
+
+
+def test_run_cases():
+    run = run_cases(['npareatotal', 'downscale_volume'], 30, warmup=1, repeats=2)
+    assert set(run['results']) == {'npareatotal', 'downscale_volume'}
+    assert run['info']['size'] == 30
+
+
+def test_run_cases_restore(monkeypatch):
+    """settings of the run and the input files of the benchmarks are not left behind"""
+    folders = []
+
+    def case_files(size):
+        folders.append(tempfile.mkdtemp())
+        temporaryFolders.append(folders[-1])
+        option['calcWaterBalance'] = True
+        return lambda: None
+
+    monkeypatch.setitem(CASES, 'files', case_files)
+    before = dict(option), dict(validation), dict(dateVar)
+    run_cases(['files', 'outputTssMap.dynamic'], 30, warmup=1, repeats=2)
+    assert (dict(option), dict(validation), dict(dateVar)) == before
+    assert folders and not os.path.exists(folders[0]) and not temporaryFolders
+
+
+@pytest.mark.parametrize("kernels", ["numpy", "numba"])
+def test_run_size_modules(kernels):
+    """the time steps run the modules of the model, the settings of the run are not left behind"""
+    before = dict(option), dict(validation), dict(dateVar)
+    summary = run_size(20, 2, 3, 2, 2, routingNumba=lib2 is None, kernels=kernels)
+    for path in ('dynamic/snow_frost/snow_frost.dynamic', 'dynamic/soil/soil.dynamic',
+                 'dynamic/lakes_reservoirs/lakes_reservoirs.dynamic', 'dynamic/routing_kinematic/substep/lakes_reservoirs'):
+        assert summary[path]['steps'] == 2, path
+    assert summary['dynamic/routing_kinematic/substep']['calls'] == 4
+    assert summary['HRUs'] == 3 * summary['cells']
+    assert (dict(option), dict(validation), dict(dateVar)) == before
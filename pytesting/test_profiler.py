@@ -0,0 +1,49 @@
+import time
+import pytest
+
+from cwatm.management_modules.data_handling import initProfiler, binding, dateVar, CWATMError
+from cwatm.management_modules.profiler import checkProfile, finishProfile
+from cwatm.management_modules.globals import profiling
+
+# ------------------------------------------------------
+# windowed profiler: windows of time steps, collapsed stacks per window
+
+
+@pytest.fixture(autouse=True)
+def settings(reset_settings):
+    reset_settings(('profileSteps', 'profileMode', 'profileInterval', 'profileFile'), initProfiler)
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def test_profile_windows(tmp_path):
+    binding['profileSteps'] = '3-4 7'
+    binding['profileInterval'] = '0.001'
+    binding['profileFile'] = str(tmp_path / "run")
+    initProfiler()
+    assert profiling['windows'] == [(3, 4), (7, 7)]
+    assert profiling['mode'] == 'sampling' and not profiling['initial']
+
+    for step in range(1, 9):
+        dateVar['curr'] = step
+        checkProfile()
+        assert ('active' in profiling) == (step in (3, 4, 7))
+        busy(0.02)
+        checkProfile(end=True)
+        assert ('active' in profiling) == (step == 3)
+    finishProfile()
+
+    assert sorted(f.name for f in tmp_path.iterdir()) == ['run_steps3-4.folded', 'run_steps7-7.folded']
+    stacks = (tmp_path / 'run_steps3-4.folded').read_text().splitlines()
+    assert any('test_profiler.busy' in stack for stack in stacks)
+    assert sum(int(stack.rsplit(' ', 1)[1]) for stack in stacks) > 20000
+
+
+def test_profile_mode():
+    binding['profileMode'] = 'gprof'
+    with pytest.raises(CWATMError):
+        initProfiler()
@@ -0,0 +1,322 @@
+import glob
+import os
+import platform
+import shutil
+import subprocess
+import ctypes
+import importlib.machinery
+
+import numpy as np
+import numpy.ctypeslib as npct
+import pytest
+
+# ------------------------------------------------------
+# routing kernels compiled during installation (setup.py build_ext -> t5_build)
+# have to give the same results as the precompiled library shipped with CWatM
+# (t5.dll, on Linux the object file t5_linux.o linked as it is)
+
+routing_dir = os.path.join(os.path.dirname(__file__), "..", "cwatm", "hydrological_modules", "routing_reservoirs")
+windows = platform.uname()[0] == "Windows"
+linker = shutil.which("g++") or shutil.which("c++")
+
+built = []
+for suffix in importlib.machinery.EXTENSION_SUFFIXES:
+    built += glob.glob(os.path.join(routing_dir, "t5_build" + suffix))
+
+array_1d_double = npct.ndpointer(dtype=np.double, ndim=1, flags='CONTIGUOUS')
+array_2d_int = npct.ndpointer(dtype=np.int64, ndim=2)
+array_1d_int = npct.ndpointer(dtype=np.int64, ndim=1)
+array_2d_double = npct.ndpointer(dtype=np.double, ndim=2, flags='CONTIGUOUS')
+
+
+def load(dll):
+    lib = ctypes.cdll.LoadLibrary(dll)
+    lib.ups.restype = None
+    lib.ups.argtypes = [array_1d_int, array_1d_int, array_1d_double, ctypes.c_int]
+    lib.dirID.restype = None
+    lib.dirID.argtypes = [array_2d_int, array_2d_int, array_2d_int, ctypes.c_int, ctypes.c_int]
+    lib.repairLdd1.argtypes = [array_2d_int, ctypes.c_int, ctypes.c_int]
+    lib.repairLdd2.restype = None
+    lib.repairLdd2.argtypes = [array_1d_int, array_1d_int, array_1d_int, ctypes.c_int]
+    lib.kinematic.restype = None
+    lib.kinematic.argtypes = [array_1d_double, array_1d_double, array_1d_int, array_1d_int, array_1d_int, array_1d_double,
+                              array_1d_double, ctypes.c_double, ctypes.c_double, array_1d_double, ctypes.c_int]
+    if hasattr(lib, 'kinematicStats'):
+        lib.kinematicStats.restype = None
+        lib.kinematicStats.argtypes = lib.kinematic.argtypes + [ctypes.c_int, ctypes.c_double, ctypes.c_int, array_1d_int]
+    lib.runoffConc.restype = None
+    lib.runoffConc.argtypes = [array_2d_double, array_1d_double, array_1d_double, array_1d_double, ctypes.c_int, ctypes.c_int]
+    return lib
+
+
+class numba_library(object):
+    """
+    numba kernels of the river network with the arguments of the C++ library
+    """
+
+    @staticmethod
+    def repairLdd1(ldd, rows, cols):
+        from cwatm.hydrological_modules.routing_reservoirs.routing_sub import repairLdd1_numba
+        repairLdd1_numba(ldd)
+
+    @staticmethod
+    def dirID(order, ldd, dir, rows, cols):
+        from cwatm.hydrological_modules.routing_reservoirs.routing_sub import dirID_numba
+        dirID_numba(order, ldd, dir)
+
+    @staticmethod
+    def repairLdd2(ldd, dir, check, size):
+        from cwatm.hydrological_modules.routing_reservoirs.routing_sub import repairLdd2_numba
+        repairLdd2_numba(ldd, dir, check)
+
+
+def network(lib, rng, rows, cols):
+    """
+    random ldd repaired and sorted into a river network
+
+    :param lib: ctypes library
+    :param rng: random generator
+    :return: dictionary with ldd, dir and the network arrays dirshort, dirDown, dirupLen, dirupID
+    """
+
+    size = rows * cols
+    net = {}
+    ldd = rng.integers(1, 10, size=(rows, cols)).astype(np.int64)
+    ldd[rng.random((rows, cols)) < 0.01] = 5
+    lib.repairLdd1(ldd, rows, cols)
+    net['repairLdd1'] = ldd.copy()
+
+    order = np.arange(size, dtype=np.int64).reshape(rows, cols)
+    dir = np.full((rows, cols), -1, dtype=np.int64)
+    lib.dirID(order, ldd, dir, rows, cols)
+    net['dirID'] = dir.copy()
+
+    lddcomp = ldd.flatten()
+    dirshort = dir.flatten()
+    check = np.zeros(size, dtype=np.int64)
+    lib.repairLdd2(lddcomp, dirshort, check, size)
+    net['repairLdd2'] = lddcomp.copy()
+    net['repairLdd2_dir'] = dirshort.copy()
+
+    # network in upstream direction and from source to outlet
+    dirUp = [[] for i in range(size)]
+    for i in range(size):
+        if dirshort[i] > -1:
+            dirUp[dirshort[i]].append(i)
+    net['dirupLen'] = np.cumsum([0] + [len(up) for up in dirUp]).astype(np.int64)
+    net['dirupID'] = np.array([i for up in dirUp for i in up], dtype=np.int64)
+    dirDown = []
+    for pit in np.nonzero(dirshort == -1)[0]:
+        stack = [(pit, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                dirDown.append(node)
+            else:
+                stack.append((node, True))
+                for up in reversed(dirUp[node]):
+                    stack.append((up, False))
+    net['dirDown'] = np.array(dirDown, dtype=np.int64)
+    net['dirshort'] = dirshort
+    return net
+
+
+def flows(rng, size):
+    """
+    random discharge, sideflow and channel parameters of the kinematic wave
+    """
+
+    Qold = rng.random(size) * 100.
+    Qold[rng.random(size) < 0.05] = 0.
+    q = rng.random(size) * 1e-3 - 2e-4
+    alpha = rng.random(size) * 5 + 0.5
+    deltaX = rng.random(size) * 5000. + 1000.
+    return Qold, q, alpha, deltaX
+
+
+def run_kernels(lib):
+    """
+    runs all routing kernels on a reference network of 60 x 80 cells with a random ldd
+
+    :param lib: ctypes library
+    :return: dictionary with the results of every kernel
+    """
+
+    rng = np.random.default_rng(12345)
+    rows, cols = 60, 80
+    size = rows * cols
+    net = network(lib, rng, rows, cols)
+    results = {name: net[name] for name in ('repairLdd1', 'dirID', 'repairLdd2', 'repairLdd2_dir')}
+    dirDown, dirshort, dirupLen, dirupID = net['dirDown'], net['dirshort'], net['dirupLen'], net['dirupID']
+
+    ups = rng.random(size) * 1e6
+    lib.ups(dirDown, dirshort, ups, size)
+    results['ups'] = ups
+
+    Qold, q, alpha, deltaX = flows(rng, size)
+    Qnew = np.zeros(size)
+    lib.kinematic(Qold, q, dirDown, dirupLen, dirupID, Qnew, alpha, 0.6, 3600., deltaX, size)
+    results['kinematic'] = Qnew
+
+    maxlag = 10
+    conc = np.zeros((maxlag, size))
+    peak = rng.random(size) * 5 + 0.5
+    fraction = rng.random(size)
+    flow = rng.random(size) * 1e-2
+    lib.runoffConc(conc, peak, fraction, flow, maxlag, size)
+    results['runoffConc'] = conc
+
+    return results
+
+
+@pytest.fixture
+def prebuilt(tmp_path):
+    """
+    precompiled library: t5.dll or the shipped t5_linux.o linked without compiling
+    """
+
+    if windows:
+        return os.path.join(routing_dir, "t5.dll")
+    if linker is None:
+        pytest.skip("no linker for t5_linux.o")
+    library = str(tmp_path / "t5_linux.so")
+    subprocess.run([linker, "-shared", "-o", library, os.path.join(routing_dir, "t5_linux.o")], check=True)
+    return library
+
+
+@pytest.mark.skipif(not built, reason="routing kernels are not compiled from source")
+def test_routing_kernels_bitwise(prebuilt):
+    """routing kernels compiled at installation are bit-for-bit equal to the precompiled library"""
+
+    reference = run_kernels(load(prebuilt))
+    result = run_kernels(load(built[0]))
+    for name in reference:
+        assert np.array_equal(reference[name], result[name]), name
+
+
+@pytest.mark.skipif(not built, reason="routing kernels are not compiled from source")
+def test_kinematic_stats():
+    """kinematic wave with warm start, epsilon, max. iterations and convergence statistics"""
+
+    lib = load(built[0])
+    rng = np.random.default_rng(7)
+    rows, cols = 20, 30
+    size = rows * cols
+    net = network(lib, rng, rows, cols)
+    Qold, q, alpha, deltaX = flows(rng, size)
+
+    def kinematic(Qold, warmstart, epsilon, maxiters):
+        Qnew = np.zeros(size)
+        stats = np.zeros(3, dtype=np.int64)
+        lib.kinematicStats(Qold, q, net['dirDown'], net['dirupLen'], net['dirupID'], Qnew, alpha, 0.6, 3600., deltaX, size,
+                           warmstart, epsilon, maxiters, stats)
+        return Qnew, stats
+
+    # defaults are the same as the old kinematic
+    Qnew, stats = kinematic(Qold, 0, 0.0001, 10)
+    reference = np.zeros(size)
+    lib.kinematic(Qold, q, net['dirDown'], net['dirupLen'], net['dirupID'], reference, alpha, 0.6, 3600., deltaX, size)
+    assert np.array_equal(Qnew, reference)
+
+    # iterations, cells not converged, cells solved
+    assert stats[2] == np.count_nonzero(Qold + q) and stats[2] > 0
+    assert stats[0] >= stats[2]
+    assert stats[1] == 0
+
+    # next substep: warm start from the previous discharge gives the same solution
+    cold, coldStats = kinematic(Qnew, 0, 1e-6, 20)
+    warm, warmStats = kinematic(Qnew, 1, 1e-6, 20)
+    np.testing.assert_allclose(warm, cold, rtol=1e-9, atol=1e-6)
+    assert warmStats[1] == 0 and warmStats[2] == coldStats[2]
+
+    # one iteration is not enough for all cells
+    Qone, oneStats = kinematic(Qold, 0, 0.0001, 1)
+    assert oneStats[0] == oneStats[2]
+    assert 0 < oneStats[1] <= oneStats[2]
+
+
+def test_routing_kernels_numba(prebuilt):
+    """numba kernels (routingKernels = numba) are bit-for-bit equal to the C++ library"""
+
+    from cwatm.hydrological_modules.routing_reservoirs.routing_sub import ups_numba, kinematic_levels, kinematic_numba
+
+    lib = load(prebuilt)
+    rng = np.random.default_rng(12345)
+    rows, cols = 60, 80
+    size = rows * cols
+    net = network(lib, rng, rows, cols)
+    dirDown, dirshort, dirupLen, dirupID = net['dirDown'], net['dirshort'], net['dirupLen'], net['dirupID']
+
+    ups = rng.random(size) * 1e6
+    reference = ups.copy()
+    lib.ups(dirDown, dirshort, reference, size)
+    ups_numba(dirDown, dirshort, ups)
+    assert np.array_equal(ups, reference)
+
+    # river network with loops and cells flowing out of the map
+    net_numba = network(numba_library, np.random.default_rng(12345), rows, cols)
+    for name in ('repairLdd1', 'dirID', 'repairLdd2', 'repairLdd2_dir'):
+        assert np.array_equal(net_numba[name], net[name]), name
+
+    Qold, q, alpha, deltaX = flows(rng, size)
+    reference = np.zeros(size)
+    lib.kinematic(Qold, q, dirDown, dirupLen, dirupID, reference, alpha, 0.6, 3600., deltaX, size)
+    order, levelStart = kinematic_levels(dirDown, dirupLen, dirupID)
+    Qnew = np.zeros(size)
+    stats = np.zeros(3, dtype=np.int64)
+    kinematic_numba(Qold, q, order, levelStart, dirupLen, dirupID, Qnew, alpha, 0.6, 3600., deltaX, False, 0.0001, 10, stats)
+    assert np.array_equal(Qnew, reference)
+
+    # warm start and statistics against the library compiled from t5.cpp
+    if built:
+        lib = load(built[0])
+        for warmstart in (0, 1):
+            reference = np.zeros(size)
+            referenceStats = np.zeros(3, dtype=np.int64)
+            lib.kinematicStats(Qnew, q, dirDown, dirupLen, dirupID, reference, alpha, 0.6, 3600., deltaX, size,
+                               warmstart, 1e-6, 20, referenceStats)
+            result = np.zeros(size)
+            resultStats = np.zeros(3, dtype=np.int64)
+            kinematic_numba(Qnew, q, order, levelStart, dirupLen, dirupID, result, alpha, 0.6, 3600., deltaX, bool(warmstart),
+                            1e-6, 20, resultStats)
+            assert np.array_equal(result, reference)
+            assert np.array_equal(resultStats, referenceStats)
+
+
+def test_routing_without_library(monkeypatch):
+    """routingKernels = numba sets up the river network without the C++ library"""
+
+    from cwatm.management_modules.globals import binding, CWATMError
+    from cwatm.hydrological_modules.routing_reservoirs import routing_sub
+    from benchmark.run_benchmark import set_mask
+
+    rows, cols = 30, 40
+    rng = np.random.default_rng(3)
+    ldd = rng.integers(1, 10, size=rows * cols).astype(np.int64)
+    ldd[rng.random(rows * cols) < 0.01] = 5
+    set_mask(np.ones((rows, cols), dtype=bool))
+    area = rng.random(rows * cols) * 1e6
+    reference = None
+    if routing_sub.lib2 is not None:
+        network = routing_sub.defLdd2(ldd)
+        reference = network + (routing_sub.upstreamArea(network[7], network[1], area),)
+
+    monkeypatch.setattr(routing_sub, 'lib2', None)
+    monkeypatch.delitem(binding, 'routingKernels', raising=False)
+    with pytest.raises(CWATMError):
+        routing_sub.routingKernelsNumba()
+    monkeypatch.setitem(binding, 'routingKernels', 'numba')
+    assert routing_sub.routingKernelsNumba()
+
+    network = routing_sub.defLdd2(ldd, numba=True)
+    result = network + (routing_sub.upstreamArea(network[7], network[1], area, numba=True),)
+    lddCompress, dirshort, dirDown = result[0], result[1], result[7]
+    # every cell drains to a pit
+    assert dirDown.size == rows * cols and ((dirshort == -1) == (lddCompress == 5)).all()
+    if reference is not None:
+        for name, value, expected in zip(('lddCompress', 'dirshort', 'dirUp', 'dirupLen', 'dirupID', 'downstruct',
+                                          'catchment', 'dirDown', 'lendirDown', 'ups'), result, reference):
+            if isinstance(value, list):
+                assert [list(up) for up in value] == [list(up) for up in expected], name
+            else:
+                assert np.array_equal(value, expected), name
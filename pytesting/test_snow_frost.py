@@ -0,0 +1,180 @@
+import copy
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from cwatm.management_modules.globals import binding, option, dateVar
+from cwatm.management_modules.data_handling import CWATMError
+from cwatm.hydrological_modules import snow_frost as snow_frost_module
+from cwatm.hydrological_modules.snow_frost import snow_layers_numba, snow_frost
+
+# ------------------------------------------------------
+# compiled snow layer kernel: units without snow cover and snow fall are skipped,
+# snow fall, snow melt and rain have to close the balance of the snow cover
+
+deltaInvNorm = np.array([-0.96742157,  0.,  0.96742157])
+
+
+def run_kernel(Tavg, SnowCoverS, SummerSeason=0.):
+    size = Tavg.size
+    rng = np.random.default_rng(3)
+    DeltaTSnow = rng.uniform(0., 3., size)
+    Precipitation = rng.uniform(0., 0.02, size).astype(np.float32)
+    full = lambda value: np.full(size, value)
+    snowCovered = (SnowCoverS != 0).any(axis=0)
+    Rain = np.zeros(size, dtype=np.float32)
+    SnowMelt = np.zeros(size, dtype=np.float32)
+    SnowCover = np.zeros(size, dtype=np.float32)
+    snow_layers_numba(Tavg, DeltaTSnow, deltaInvNorm, Precipitation, full(1.), full(1.), full(1.), full(0.004), full(0.007),
+                      1., SummerSeason, 1, 3., SnowCoverS, snowCovered, Rain, SnowMelt, SnowCover)
+    return Precipitation, snowCovered, Rain, SnowMelt, SnowCover
+
+
+def test_snow_layers_skip():
+    """warm units without snow cover: all precipitation is rain"""
+    Tavg = np.linspace(5., 25., 1000)
+    SnowCoverS = np.zeros((3, Tavg.size), dtype=np.float32)
+    Precipitation, snowCovered, Rain, SnowMelt, SnowCover = run_kernel(Tavg, SnowCoverS, SummerSeason=0.5)
+    assert np.array_equal(Rain, Precipitation)
+    assert (SnowMelt == 0).all() and (SnowCover == 0).all() and not snowCovered.any()
+
+
+def test_snow_layers_balance():
+    """snow cover change = precipitation - rain - snow melt (snow factor 1)"""
+    Tavg = np.linspace(-10., 10., 1000)
+    SnowCoverS = np.tile(np.linspace(0., 0.1, Tavg.size, dtype=np.float32), (3, 1))
+    pre = SnowCoverS.sum(axis=0, dtype=np.float64)
+    Precipitation, snowCovered, Rain, SnowMelt, SnowCover = run_kernel(Tavg, SnowCoverS, SummerSeason=0.5)
+    np.testing.assert_allclose((SnowCover - pre) / 3, Precipitation - Rain - SnowMelt, atol=1e-7)
+    np.testing.assert_allclose(SnowCover, SnowCoverS.sum(axis=0), rtol=1e-6)
+    assert np.array_equal(snowCovered, (SnowCoverS != 0).any(axis=0))
+    assert (SnowCoverS >= 0).all()
+
+
+# ------------------------------------------------------
+# snowGridResolution: snow on grid cells broadcast to the HRUs has to give the same as snow on each HRU,
+# initial conditions are on HRU resolution in both modes
+
+HRUs_per_cell = np.array([3, 1, 4, 2])
+HRU_to_grid = np.repeat(np.arange(HRUs_per_cell.size), HRUs_per_cell)
+snow_parameters = {'NumberSnowLayers': 3, 'GlacierTransportZone': 1, 'SnowSeasonAdj': 0.001, 'TempSnow': 1.0, 'SnowFactor': 1.0,
+                   'SnowMeltCoef': 0.004, 'IceMeltCoef': 0.007, 'TempMelt': 1.0, 'Afrost': 0.97, 'FrostIndexThreshold': 56.,
+                   'SnowWaterEquivalent': 0.45, 'TemperatureLapseRate': 0.0065, 'ElevationStD': np.array([50., 400., 200., 800.])}
+
+
+class snowLevel(object):
+    """HRU or grid data with initial conditions"""
+
+    def __init__(self, size, initial):
+        self.size = size
+        self.initial = initial
+
+    def full_compressed(self, fill_value, dtype):
+        return np.full(self.size, fill_value, dtype=dtype)
+
+    def load_initial(self, name, default):
+        return self.initial.get(name, default)
+
+
+class snowData(object):
+    """HRUs of a grid cell with different land use ratios, to_grid is the area weighted mean"""
+
+    def __init__(self, initial):
+        self.land_use_ratio = np.random.default_rng(2).random(HRU_to_grid.size)
+        self.land_use_ratio /= np.bincount(HRU_to_grid, self.land_use_ratio)[HRU_to_grid]
+        self.HRU = snowLevel(HRU_to_grid.size, initial)
+        self.grid = snowLevel(HRUs_per_cell.size, {})
+
+    def to_HRU(self, data=None, fn=None):
+        return data[HRU_to_grid] if isinstance(data, np.ndarray) else data
+
+    def to_grid(self, HRU_data=None, fn=None):
+        return np.bincount(HRU_to_grid, HRU_data * self.land_use_ratio)
+
+
+@pytest.fixture
+def snow_settings(monkeypatch):
+    monkeypatch.setattr(snow_frost_module, 'loadmap', lambda name: copy.copy(snow_parameters[name]))
+    monkeypatch.setattr(snow_frost_module, 'returnBool', lambda name: binding[name] == 'True')
+    monkeypatch.setitem(option, 'calcWaterBalance', False)
+    monkeypatch.setitem(dateVar, 'curr', 0)
+    monkeypatch.setitem(dateVar, 'doy', 1)
+    monkeypatch.delitem(binding, 'snowKernel', raising=False)
+    monkeypatch.delitem(binding, 'morefrost', raising=False)
+    return monkeypatch
+
+
+def snow_model(snowGrid, monkeypatch, initial=None):
+    monkeypatch.setitem(binding, 'snowGridResolution', str(snowGrid))
+    model = SimpleNamespace(data=snowData({} if initial is None else initial), DtDay=1.)
+    snow = snow_frost(model)
+    snow.initial(model.data.to_HRU(data=snow_parameters['ElevationStD']))
+    return model, snow
+
+
+def run_snow(model, snow, days, start=0):
+    """cold winter with snow fall and warm days with melt, all HRUs of a cell with the same forcing"""
+    out = []
+    for day in range(start, start + days):
+        rng = np.random.default_rng(day)
+        Tavg = rng.uniform(-12., 4., HRUs_per_cell.size) + 8. * np.sin(2 * np.pi * day / 40.)
+        Precipitation = np.maximum(rng.uniform(-0.005, 0.01, HRUs_per_cell.size), 0.).astype(np.float32)
+        dateVar['doy'] = day + 1
+        model.data.grid.Tavg = Tavg
+        model.data.grid.Precipitation = Precipitation
+        model.data.HRU.Precipitation = Precipitation[HRU_to_grid]
+        snow.dynamic(Tavg[HRU_to_grid])
+        HRU = model.data.HRU
+        out.append((HRU.Rain.copy(), HRU.SnowMelt.copy(), HRU.FrostIndex.copy(), HRU.SnowCoverS.copy()))
+    return out
+
+
+def assert_same_snow(out_grid, out_HRU):
+    for day_grid, day_HRU in zip(out_grid, out_HRU):
+        for grid_value, HRU_value in zip(day_grid, day_HRU):
+            np.testing.assert_allclose(grid_value, HRU_value, rtol=1e-5, atol=1e-9)
+
+
+def test_snow_grid_resolution(snow_settings):
+    model_HRU, snow_HRU = snow_model(False, snow_settings)
+    model_grid, snow_grid = snow_model(True, snow_settings)
+    out_HRU = run_snow(model_HRU, snow_HRU, 60)
+    out_grid = run_snow(model_grid, snow_grid, 60)
+    assert_same_snow(out_grid, out_HRU)
+    assert max(day[3].max() for day in out_HRU) > 0.01 and max(day[2].max() for day in out_HRU) > 0
+    assert model_grid.data.HRU.SnowCoverS.shape == model_HRU.data.HRU.SnowCoverS.shape == (3, HRU_to_grid.size)
+
+
+def test_snow_grid_resolution_initial(snow_settings):
+    """initial conditions saved without snowGridResolution are used with it and the other way round"""
+    model, snow = snow_model(False, snow_settings)
+    reference = run_snow(model, snow, 60)
+
+    for snowGrid in (False, True):
+        model, snow = snow_model(snowGrid, snow_settings)
+        run_snow(model, snow, 30)
+        # initial conditions stored from HRU level
+        initial = {'SnowCoverS': model.data.HRU.SnowCoverS.copy(), 'FrostIndex': model.data.HRU.FrostIndex.copy()}
+        model, snow = snow_model(not snowGrid, snow_settings, initial)
+        assert_same_snow(run_snow(model, snow, 30, start=30), reference[30:])
+
+
+def test_snow_grid_resolution_average(snow_settings):
+    """different snow cover of the HRUs of a cell: the cell gets the area weighted mean"""
+    rng = np.random.default_rng(4)
+    initial = {'SnowCoverS': rng.random((3, HRU_to_grid.size)).astype(np.float32) * 0.1,
+               'FrostIndex': rng.random(HRU_to_grid.size).astype(np.float32) * 80.}
+    model, snow = snow_model(True, snow_settings, initial)
+    for layer in range(3):
+        np.testing.assert_allclose(model.data.grid.SnowCoverS[layer], model.data.to_grid(HRU_data=initial['SnowCoverS'][layer]), rtol=1e-6)
+        np.testing.assert_allclose(model.data.HRU.SnowCoverS[layer], model.data.grid.SnowCoverS[layer][HRU_to_grid])
+    np.testing.assert_allclose(model.data.grid.FrostIndex, model.data.to_grid(HRU_data=initial['FrostIndex']), rtol=1e-6)
+
+
+def test_snow_initial_shape(snow_settings):
+    """initial conditions on grid resolution are rejected"""
+    initial = {'SnowCoverS': np.zeros((3, HRUs_per_cell.size), dtype=np.float32)}
+    for snowGrid in (False, True):
+        with pytest.raises(CWATMError):
+            snow_model(snowGrid, snow_settings, initial)
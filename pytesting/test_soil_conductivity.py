@@ -0,0 +1,33 @@
+import numpy as np
+
+from cwatm.hydrological_modules.soil import kUnSat_vanGenuchten, kUnSat_vanGenuchten_numba
+
+# ------------------------------------------------------
+# unsaturated conductivity with the van Genuchten exponents precomputed in landcoverType.initial
+# has to give the same results as the formula with lambda used before
+
+KSat = np.array([0.5, 0.5, 0.1, 1.2, 0.3, 0.8], dtype=np.float32)
+satTerm = np.array([0., 0.25, 0.5, 0.8, 0.99, 1.], dtype=np.float32)
+lambda_ = np.array([0.2, 0.35, 0.15, 0.5, 0.25, 0.4], dtype=np.float32)
+genuM = lambda_ / (lambda_ + 1)
+genuInvM = 1 / genuM
+
+# results of the formula with lambda (float32)
+reference = np.array([0.0, 3.8237945432229026e-07, 2.92637238885618e-08, 0.048558324575424194, 0.061230458319187164, 0.800000011920929], dtype=np.float32)
+
+
+def test_kUnSat_vanGenuchten_lambda():
+    """same results as the formula with lambda, bit for bit"""
+    kUnSat = KSat * np.sqrt(satTerm) * np.square(1 - (1 - satTerm ** (1 / (lambda_ / (lambda_ + 1)))) ** (lambda_ / (lambda_ + 1)))
+    assert np.array_equal(kUnSat_vanGenuchten(KSat, satTerm, genuM, genuInvM), kUnSat)
+
+
+def test_kUnSat_vanGenuchten_reference():
+    """pinned results"""
+    np.testing.assert_allclose(kUnSat_vanGenuchten(KSat, satTerm, genuM, genuInvM), reference, rtol=1e-6)
+
+
+def test_kUnSat_vanGenuchten_numba():
+    """per HRU version of the compiled soil kernel"""
+    kUnSat = np.array([kUnSat_vanGenuchten_numba(KSat[i], satTerm[i], genuM[i], genuInvM[i]) for i in range(KSat.size)])
+    np.testing.assert_allclose(kUnSat, reference, rtol=1e-6)
@@ -0,0 +1,171 @@
+import numpy as np
+import pytest
+
+from cwatm.management_modules.globals import option, validation
+from cwatm.management_modules.data_handling import land_use_indices
+from cwatm.hydrological_modules.soil import soil, kUnSat_vanGenuchten
+from benchmark.micro import syntheticHRU, syntheticData
+
+# ------------------------------------------------------
+# compiled soil column (soilKernel = numba) has to give the same state and fluxes as the numpy version
+# for all land use types, paddy fields (flooded or not), irrigated land and frozen soil
+
+
+def soil_state(n=600, seed=3):
+    """
+    float32 HRU state for soil.dynamic: land use types 0 to 5, three soil layers with van Genuchten parameters
+    """
+
+    rng = np.random.default_rng(seed)
+    HRU = syntheticHRU(n)
+    HRU.land_use_type = rng.integers(0, 6, n).astype(np.int32)
+    HRU.land_use_indices = land_use_indices(HRU)
+    kFC = []
+    for n_, depth in zip("123", (0.05, 0.3, 0.7)):
+        wres = np.full(n, 0.02 * depth)
+        ws = (0.4 + 0.1 * rng.random(n)) * depth
+        genuM = rng.uniform(0.15, 0.35, n)
+        wfc = wres + 0.6 * (ws - wres)
+        wwp = wres + 0.2 * (ws - wres)
+        KSat = rng.uniform(0.05, 1.0, n)
+        setattr(HRU, 'ws' + n_, ws.astype(np.float32))
+        setattr(HRU, 'wres' + n_, wres.astype(np.float32))
+        setattr(HRU, 'wfc' + n_, wfc.astype(np.float32))
+        setattr(HRU, 'wwp' + n_, wwp.astype(np.float32))
+        setattr(HRU, 'KSat' + n_, KSat.astype(np.float32))
+        setattr(HRU, 'genuM' + n_, genuM.astype(np.float32))
+        setattr(HRU, 'genuInvM' + n_, (1 / genuM).astype(np.float32))
+        # from dry (wilting point) to saturated
+        setattr(HRU, 'w' + n_, (wwp + rng.random(n) * (ws - wwp)).astype(np.float32))
+        kFC.append(kUnSat_vanGenuchten(KSat, (wfc - wres) / (ws - wres), genuM, 1 / genuM))
+    HRU.kunSatFC12 = np.sqrt(kFC[0] * kFC[1]).astype(np.float32)
+    HRU.kunSatFC23 = np.sqrt(kFC[1] * kFC[2]).astype(np.float32)
+
+    paddy = HRU.land_use_type == 2
+    HRU.topwater = np.where(paddy, rng.random(n) * 0.06, 0.).astype(np.float32)
+    adjRoot = rng.random((3, n))
+    HRU.adjRoot = (adjRoot / adjRoot.sum(axis=0)).astype(np.float32)
+    HRU.arnoBeta = rng.uniform(0.1, 0.8, n).astype(np.float32)
+    HRU.cPrefFlow = 4.
+    HRU.maxtopwater = 0.05
+    HRU.FrostIndexThreshold = 56.
+    # about a fifth of the HRUs frozen
+    HRU.FrostIndex = np.where(rng.random(n) < 0.2, 80., rng.random(n) * 50.).astype(np.float32)
+    HRU.capriseindex = np.where(rng.random(n) < 0.3, rng.random(n), 0.).astype(np.float32)
+    HRU.percolationImp = (rng.random(n) * 0.5).astype(np.float32)
+    HRU.cropGroupNumber = rng.uniform(1., 5., n).astype(np.float32)
+    # paddy fields flooded (cropKC > 0.75) or not
+    HRU.cropKC = rng.uniform(0.2, 1.2, n).astype(np.float32)
+    HRU.natural_available_water_infiltration = (rng.random(n) * 0.03).astype(np.float32)
+    HRU.actual_irrigation_consumption = np.where(HRU.land_use_type >= 2, rng.random(n) * 0.01, 0.).astype(np.float32)
+    HRU.actual_irrigation_consumption[HRU.land_use_type >= 4] = 0.
+    HRU.EWRef = rng.uniform(0.001, 0.006, n).astype(np.float32)
+    HRU.totalPotET = rng.uniform(0.001, 0.008, n).astype(np.float32)
+    for name in ('snowEvap', 'interceptEvap', 'actTransTotal', 'actBareSoilEvap', 'actualET'):
+        setattr(HRU, name, np.zeros(n, dtype=np.float32))
+    inputs = {
+        'capillar': (rng.random(n) * 0.002).astype(np.float32),
+        'openWaterEvap': np.zeros(n, dtype=np.float32),
+        'potTranspiration': HRU.totalPotET * np.float32(0.8),
+        'potBareSoilEvap': HRU.totalPotET * np.float32(0.2),
+        'totalPotET': HRU.totalPotET,
+    }
+    return HRU, inputs
+
+
+def assert_float32_close(actual, desired, name):
+    """same in float32 precision: a few units of the last place of the largest value (storages differ in the last bits)"""
+    assert actual.dtype == np.float32
+    atol = 4 * np.finfo(np.float32).eps * np.abs(desired).max()
+    np.testing.assert_allclose(actual, desired, rtol=1e-6, atol=atol, err_msg=name)
+
+
+def run_soil(soilNumba, soilSubStepTolerance=0., NoSubSteps=3, saturation=None):
+    """
+    :param saturation: soil moisture of all layers between wilting point (0) and saturation (1), no infiltration
+                       and capillary rise for 0, random if None
+    """
+    HRU, inputs = soil_state()
+    if saturation is not None:
+        for layer in "123":
+            wwp = getattr(HRU, 'wwp' + layer)
+            setattr(HRU, 'w' + layer, wwp + np.float32(saturation) * (getattr(HRU, 'ws' + layer) - wwp))
+        if saturation == 0:
+            HRU.natural_available_water_infiltration[:] = 0.
+            HRU.actual_irrigation_consumption[:] = 0.
+            HRU.topwater[:] = 0.
+            inputs['capillar'][:] = 0.
+    HRU.soilNumba = soilNumba
+    HRU.soilSubStepTolerance = soilSubStepTolerance
+    HRU.soilMaxSubSteps = 30
+    module = soil(syntheticData(HRU, None))
+    module.model.NoSubSteps = NoSubSteps
+    fluxes = module.dynamic(**{name: value.copy() for name, value in inputs.items()})
+    return HRU, fluxes
+
+
+@pytest.mark.parametrize("soilSubStepTolerance", [0., 0.05, 0.1])
+def test_soil_numba(soilSubStepTolerance, monkeypatch):
+    monkeypatch.setitem(option, 'calcWaterBalance', False)
+    HRU, fluxes = run_soil(False, soilSubStepTolerance)
+    HRU_numba, fluxes_numba = run_soil(True, soilSubStepTolerance)
+
+    land_use_type = HRU.land_use_type
+    assert ((land_use_type == 2) & (HRU.cropKC > 0.75)).any() and ((land_use_type == 2) & (HRU.cropKC <= 0.75)).any()
+    assert ((land_use_type < 4) & (HRU.FrostIndex > HRU.FrostIndexThreshold)).any()
+
+    for name in ('w1', 'w2', 'w3', 'topwater', 'actTransTotal', 'actBareSoilEvap', 'actualET'):
+        assert_float32_close(getattr(HRU_numba, name), getattr(HRU, name), name)
+    names = ('interflow', 'directRunoff', 'groundwater_recharge', 'perc3toGW', 'prefFlow', 'openWaterEvap')
+    for name, flux_numba, flux in zip(names, fluxes_numba, fluxes):
+        assert_float32_close(flux_numba, flux, name)
+    # the water actually moves
+    assert fluxes[3].max() > 1e-4 and fluxes[1].max() > 1e-4 and HRU.topwater.max() > 0
+    if soilSubStepTolerance > 0:
+        np.testing.assert_array_equal(HRU_numba.soilSubSteps, HRU.soilSubSteps)
+
+
+@pytest.mark.parametrize("soilNumba", [False, True])
+def test_soil_substeps_wet(soilNumba, monkeypatch):
+    """wet soil: more substeps than NoSubSteps where the percolation is large, fluxes as with the fixed substeps"""
+    monkeypatch.setitem(option, 'calcWaterBalance', False)
+    tolerance = 0.1
+    HRU, fluxes = run_soil(soilNumba, saturation=0.9)
+    HRU_adaptive, fluxes_adaptive = run_soil(soilNumba, tolerance, saturation=0.9)
+
+    bioarea = HRU.land_use_type < 4
+    subSteps = HRU_adaptive.soilSubSteps[bioarea]
+    assert (subSteps >= 1).all() and subSteps.max() > 3 and subSteps.max() <= HRU_adaptive.soilMaxSubSteps
+    assert (HRU_adaptive.soilSubSteps[~bioarea] == 0).all()
+    # groundwater recharge and percolation to groundwater (the fluxes which depend on the substeps)
+    for i in (2, 3):
+        np.testing.assert_allclose(fluxes_adaptive[i].sum(), fluxes[i].sum(), rtol=tolerance)
+    # runoff is calculated before the percolation
+    np.testing.assert_array_equal(fluxes_adaptive[1], fluxes[1])
+
+
+@pytest.mark.parametrize("soilNumba", [False, True])
+def test_soil_substeps_dry(soilNumba, monkeypatch):
+    """dry soil: fewer substeps than NoSubSteps, same fluxes as with the fixed substeps"""
+    monkeypatch.setitem(option, 'calcWaterBalance', False)
+    tolerance = 0.1
+    HRU, fluxes = run_soil(soilNumba, saturation=0.)
+    HRU_adaptive, fluxes_adaptive = run_soil(soilNumba, tolerance, saturation=0.)
+
+    bioarea = HRU.land_use_type < 4
+    assert (HRU_adaptive.soilSubSteps[bioarea] < 3).all()
+    assert (HRU_adaptive.soilSubSteps[bioarea] == 1).mean() > 0.9
+    for i in (2, 3):
+        np.testing.assert_allclose(fluxes_adaptive[i], fluxes[i], rtol=tolerance, atol=1e-9)
+    for layer in "123":
+        np.testing.assert_allclose(getattr(HRU_adaptive, 'w' + layer), getattr(HRU, 'w' + layer), rtol=1e-6)
+
+
+@pytest.mark.parametrize("soilNumba", [False, True])
+def test_soil_validation_off(soilNumba, monkeypatch):
+    """validationLevel = off: no storage copies and no water balance check even with calcWaterBalance"""
+    monkeypatch.setitem(option, 'calcWaterBalance', True)
+    monkeypatch.setitem(validation, 'level', 'off')
+    # the synthetic model has no water balance module, a check would fail
+    HRU, fluxes = run_soil(soilNumba)
+    assert fluxes[3].max() > 0
@@ -0,0 +1,43 @@
+import numpy as np
+
+from benchmark.synthetic_basin import synthetic_basin, synthetic_meteo, LDD
+
+# ------------------------------------------------------
+# synthetic basin of the benchmarks: one outlet, no loops in the river network,
+# land cover fractions add up to 1
+
+
+def test_synthetic_basin():
+    maps = synthetic_basin(40, 50, lakes=2, seed=3)
+    basin = maps['basin']
+    ldd = maps['Ldd']
+    assert not basin[0].any() and not basin[:, 0].any()
+    assert (ldd[basin] > 0).all() and (ldd[~basin] == 0).all()
+    assert (ldd == 5).sum() == 1
+
+    # every cell drains to the outlet, elevation decreases downstream
+    rows, cols = np.nonzero(basin)
+    for r, c in zip(rows, cols):
+        for step in range(basin.sum()):
+            if ldd[r, c] == 5:
+                break
+            dr, dc = [offset for offset, code in LDD.items() if code == ldd[r, c]][0]
+            assert basin[r + dr, c + dc]
+            assert maps['elevation'][r + dr, c + dc] < maps['elevation'][r, c]
+            r, c = r + dr, c + dc
+        assert ldd[r, c] == 5
+    assert maps['upstream_cells'].max() == basin.sum()
+
+    np.testing.assert_allclose(maps['fractionLandcover'].sum(axis=0)[basin], 1., rtol=1e-6)
+    assert set(np.unique(maps['waterBodyID'])) == {0, 1, 2}
+    assert (maps['fractionLandcover'][-1][maps['waterBodyID'] > 0] == 1).all()
+    assert maps['modflow_basin'].sum() == 4 * basin.sum()
+
+
+def test_synthetic_meteo():
+    maps = synthetic_basin(20, 20)
+    meteo = synthetic_meteo(maps, 10)
+    for name, data in meteo.items():
+        assert data.shape == (10, 20, 20) and data.dtype == np.float32, name
+    assert (meteo['tasmin'] < meteo['tas']).all() and (meteo['tas'] < meteo['tasmax']).all()
+    assert (meteo['pr'] >= 0).all()
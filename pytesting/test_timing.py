@@ -0,0 +1,93 @@
+import json
+import time
+import numpy as np
+import pytest
+
+from cwatm.management_modules.data_handling import initTiming, binding, dateVar
+from cwatm.management_modules.timing import timespan, timed, timingSummary, writeTiming, addTimeSpan
+from cwatm.management_modules.globals import timing, timeSpans, timeStats
+
+# ------------------------------------------------------
+# nested time spans of the model parts and Chrome trace
+
+
+@pytest.fixture(autouse=True)
+def settings(reset_settings):
+    binding['timing'] = 'True'
+    initTiming()
+    reset_settings(('timing', 'timingTrace'), initTiming)
+
+
+class module(object):
+    @timed
+    def dynamic(self):
+        for substep in range(3):
+            with timespan("substep"):
+                pass
+
+
+def test_timing_nested():
+    for curr in range(3):
+        dateVar['curr'] = curr
+        module().dynamic()
+
+    summary = timingSummary()
+    assert set(summary) == {"module.dynamic", "module.dynamic/substep"}
+    assert summary["module.dynamic"]['calls'] == 3 and summary["module.dynamic"]['depth'] == 0
+    # initial part (step 0) is not in the time per step
+    assert summary["module.dynamic/substep"]['calls'] == 9 and summary["module.dynamic/substep"]['steps'] == 2
+    assert summary["module.dynamic/substep"]['total'] <= summary["module.dynamic"]['total']
+
+
+def test_timing_aggregates():
+    """calls, total, initial part and Welford mean and std per time step of known durations"""
+    durations = {0: [0.5], 1: [0.25, 0.125], 2: [0.5], 3: [0.125, 0.125, 0.375]}
+    for step, spans in durations.items():
+        for duration in spans:
+            addTimeSpan("span", 1, step, duration)
+    # the last time step is still running
+    assert timeStats["span"]['steps'] == 2 and timeStats["span"]['stepTime'] == 0.625
+
+    span = timingSummary()["span"]
+    perstep = np.array([sum(durations[step]) for step in (1, 2, 3)])
+    assert span['calls'] == 7 and span['steps'] == 3 and span['depth'] == 1
+    assert span['initial'] == 0.5
+    assert span['total'] == 0.5 + perstep.sum()
+    assert span['min'] == 0.375 and span['max'] == 0.625
+    assert span['mean'] == pytest.approx(perstep.mean(), rel=1e-12)
+    assert span['std'] == pytest.approx(perstep.std(), rel=1e-12)
+    # the summary does not finish the running time step
+    assert timeStats["span"]['steps'] == 2
+
+
+def test_timing_spans():
+    """aggregated while running, no single spans without timingTrace"""
+    for curr in (1, 2):
+        dateVar['curr'] = curr
+        with timespan("span"):
+            time.sleep(0.001)
+    assert not timeSpans and set(timeStats) == {"span"}
+    span = timingSummary()["span"]
+    assert span['calls'] == 2 and span['steps'] == 2
+    assert span['total'] > 0
+
+
+def test_timing_off():
+    binding['timing'] = 'False'
+    initTiming()
+    module().dynamic()
+    assert not timeSpans and not timing['stack']
+
+
+def test_timing_trace(tmp_path):
+    binding['timingTrace'] = str(tmp_path / "run.json")
+    initTiming()
+    dateVar['curr'] = 1
+    module().dynamic()
+    assert len(timeSpans) == 4
+    writeTiming(tmp_path / "trace.json")
+    with open(tmp_path / "trace.json") as f:
+        trace = json.load(f)
+    assert [event['name'] for event in trace['traceEvents']] == ["substep"] * 3 + ["module.dynamic"]
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in trace['traceEvents'])
+    assert trace['spanSummary']["module.dynamic"]['steps'] == 1
@@ -0,0 +1,44 @@
+import pytest
+
+from cwatm.management_modules.data_handling import initValidation, checkValidation, binding, dateVar, CWATMError
+
+# ------------------------------------------------------
+# level of the runtime checks in the dynamic part
+
+
+@pytest.fixture(autouse=True)
+def settings(reset_settings):
+    reset_settings(('validationLevel', 'validationInterval'), initValidation)
+
+
+def steps():
+    checked = []
+    for curr in range(1, 13):
+        dateVar['curr'] = curr
+        checked.append(checkValidation())
+    return checked
+
+
+def test_validation_default():
+    """full if not in the settings file"""
+    initValidation()
+    assert all(steps())
+
+
+def test_validation_off():
+    binding['validationLevel'] = 'off'
+    initValidation()
+    assert not any(steps())
+
+
+def test_validation_sampled():
+    binding['validationLevel'] = 'Sampled'
+    binding['validationInterval'] = '4'
+    initValidation()
+    assert [i + 1 for i, checked in enumerate(steps()) if checked] == [4, 8, 12]
+
+
+def test_validation_wrong_level():
+    binding['validationLevel'] = 'some'
+    with pytest.raises(CWATMError):
+        initValidation()
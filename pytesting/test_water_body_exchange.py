@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from cwatm.hydrological_modules.lakes_reservoirs import lake_operators
+from cwatm.hydrological_modules.landcoverType import waterbody_storage_m, waterbody_leakage_m3
+
+# ------------------------------------------------------
+# lake and reservoir storage spread over the lake area and leakage gathered at the outlet
+# with the sparse lake operators have to be the same as with the loop over all water bodies
+
+
+def loop_water_body_exchange(grid, leakage):
+    """
+    the loop over all lakes and reservoirs which was used before the sparse operators
+    """
+
+    lakeIDbyID = np.unique(grid.waterBodyID)
+    lakestor_id = np.copy(grid.lakeStorage)
+    resstor_id = np.copy(grid.resStorage)
+    for id in range(len(lakeIDbyID)):
+        if lakeIDbyID[id] != 0:
+            temp_map = np.where(grid.waterBodyID == lakeIDbyID[id], np.where(grid.lakeStorage > 0, 1, 0), 0)
+            if np.sum(temp_map) == 0:
+                temp_map = np.where(grid.waterBodyID == lakeIDbyID[id], np.where(grid.resStorage > 0, 1, 0), 0)
+            discharge_point = np.nanargmax(temp_map)
+            if grid.waterBodyTypTemp[discharge_point] != 0:
+                area_stor = np.sum(np.where(grid.waterBodyID == lakeIDbyID[id], grid.cellArea, 0))
+                if grid.waterBodyTypTemp[discharge_point] == 1:
+                    lakestor_id = np.where(grid.waterBodyID == lakeIDbyID[id], grid.lakeStorage[discharge_point] / area_stor, lakestor_id)
+                else:
+                    resstor_id = np.where(grid.waterBodyID == lakeIDbyID[id], grid.resStorage[discharge_point] / area_stor, resstor_id)
+
+    lakeResStorage = np.where(grid.waterBodyTypTemp == 0, 0., np.where(grid.waterBodyTypTemp == 1, lakestor_id, resstor_id))
+    lakebedExchangeM = np.minimum(leakage, np.maximum(0., 0.98 * lakeResStorage))
+
+    lakebedExchangeM3 = np.zeros(grid.compressed_size, dtype=np.float32)
+    for id in range(len(lakeIDbyID)):
+        if lakeIDbyID[id] != 0:
+            temp_map = np.where(grid.waterBodyID == lakeIDbyID[id], np.where(grid.lakeStorage > 0, 1, 0), 0)
+            if np.sum(temp_map) == 0:
+                temp_map = np.where(grid.waterBodyID == lakeIDbyID[id], np.where(grid.resStorage > 0, 1, 0), 0)
+            discharge_point = np.nanargmax(temp_map)
+        lakebedExchangeM3[discharge_point] = np.sum(np.where(grid.waterBodyID == lakeIDbyID[id], lakebedExchangeM * grid.cellArea, 0))
+    return lakestor_id, resstor_id, lakebedExchangeM, lakebedExchangeM3
+
+
+def test_water_body_exchange():
+    """lake 1 and reservoir 2 with storage at the outlet, lake 3 has no storage -> no discharge point"""
+
+    ncells = 12
+    waterBodyID = np.zeros(ncells, dtype=np.int64)
+    waterBodyID[[2, 3, 4]] = 1
+    waterBodyID[[6, 7]] = 2
+    waterBodyID[[9, 10]] = 3
+    waterBodyTypTemp = np.zeros(ncells, dtype=np.int64)
+    waterBodyTypTemp[[2, 3, 4, 9, 10]] = 1
+    waterBodyTypTemp[[6, 7]] = 2
+    decompress_LR = np.array([4, 7, 10])
+    lakeStorage = np.zeros(ncells)
+    lakeStorage[4] = 5.e6
+    resStorage = np.zeros(ncells)
+    resStorage[7] = 3.e6
+    pits = np.full(ncells, ncells, dtype=np.int64)
+    cell2lake, lake2cell, upstream2lake, lake2ldd, lake2lake = lake_operators(waterBodyID, decompress_LR, pits, pits)
+    rng = np.random.default_rng(11)
+    grid = SimpleNamespace(waterBodyID=waterBodyID, waterBodyTypTemp=waterBodyTypTemp, decompress_LR=decompress_LR,
+                           lakeStorage=lakeStorage, resStorage=resStorage, cellArea=rng.random(ncells) * 1e6 + 1e6,
+                           compressed_size=ncells, cell2lake_LR=cell2lake, lake2cell_LR=lake2cell)
+    leakage = rng.random(ncells)
+
+    lakestor_loop, resstor_loop, lakebedExchangeM, lakebedExchangeM3_loop = loop_water_body_exchange(grid, leakage)
+    lakestor_id, resstor_id = waterbody_storage_m(grid)
+    np.testing.assert_allclose(lakestor_id, lakestor_loop, rtol=1e-14)
+    np.testing.assert_allclose(resstor_id, resstor_loop, rtol=1e-14)
+
+    lakebedExchangeM3 = waterbody_leakage_m3(grid, lakebedExchangeM)
+    np.testing.assert_allclose(lakebedExchangeM3, lakebedExchangeM3_loop, rtol=1e-6)
+    assert lakebedExchangeM3[4] > 0 and lakebedExchangeM3[7] > 0
+    # no storage -> no leakage, at the outlet instead of cell 0
+    assert lakebedExchangeM3[10] == 0 and lakebedExchangeM3[0] == 0
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from cwatm.hydrological_modules.waterbalance import cellwise_balance, max_abs_balance, add_catchment_term
+
+# ------------------------------------------------------
+# accumulated water balance has to give the same residuals as summing up the terms with numpy
+
+
+def terms(size=10000, seed=1):
+    rng = np.random.default_rng(seed)
+    influx = rng.uniform(0., 0.1, size).astype(np.float32)
+    outflux = rng.uniform(0., 0.1, size)
+    prestorage = rng.uniform(0., 1., size)
+    poststorage = prestorage + influx - outflux
+    return influx, outflux, prestorage, poststorage
+
+
+def test_cellwise_balance():
+    influx, outflux, prestorage, poststorage = terms()
+    poststorage[123] += 0.5
+    balance = cellwise_balance([(influx, 1.), (prestorage, 1.), (outflux, -1.), (poststorage, -1.), (0.1, 1.)])
+    np.testing.assert_allclose(balance, influx + prestorage - outflux - poststorage + 0.1, atol=1e-12)
+
+    max_abs, value = max_abs_balance(balance)
+    assert max_abs == np.abs(balance).max()
+    assert value == balance[np.abs(balance).argmax()] and value < 0
+
+
+def test_cellwise_balance_size():
+    """terms of different size are not read past the end of the shorter one"""
+    with pytest.raises(ValueError):
+        cellwise_balance([(np.ones(1000), 1.), (np.ones(10), -1.)])
+    with pytest.raises(ValueError):
+        cellwise_balance([(0.5, 1.), (np.ones(10), 1.), (np.ones(1000), -1.)])
+    assert cellwise_balance([(0.5, 1.), (0.25, -1.)]) == 0.25
+
+
+def test_cellwise_balance_float64():
+    """float32 terms are summed in double precision"""
+    influx, outflux, prestorage, poststorage = terms()
+    poststorage = poststorage.astype(np.float32)
+    balance = cellwise_balance([(influx, 1.), (prestorage, 1.), (outflux, -1.), (poststorage, -1.)])
+    assert balance.dtype == np.float64
+    expected = influx.astype(np.float64) + prestorage - outflux - poststorage.astype(np.float64)
+    np.testing.assert_allclose(balance, expected, rtol=0, atol=1e-15)
+
+
+def test_catchment_balance():
+    influx, outflux, prestorage, poststorage = terms()
+    catchments = np.random.default_rng(2).integers(0, 5, influx.size)
+    balance = np.zeros(5)
+    for term, sign in ((influx, 1.), (prestorage, 1.), (outflux, -1.), (poststorage, -1.)):
+        add_catchment_term(balance, catchments, term, sign)
+    expected = np.bincount(catchments, weights=influx) + np.bincount(catchments, weights=prestorage) \
+        - np.bincount(catchments, weights=outflux) - np.bincount(catchments, weights=poststorage)
+    np.testing.assert_allclose(balance, expected, atol=1e-10)
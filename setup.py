@@ -1,7 +1,49 @@
-from setuptools import setup
+import os
+from setuptools import setup, Extension
+from setuptools.command.build_ext import build_ext
 from pathlib import Path
 from cwatm import __version__, __author__, __email__
 
+
+class build_routing(build_ext):
+    """
+    Compiles the routing kernels (t5.cpp) for the host as shared library loaded by ctypes in globals.py
+
+    * optimized and vectorized without fast-math, so results are bit-for-bit equal to the precompiled library
+    * CWATM_OPENMP=0 switches off OpenMP, if OpenMP is not available it is compiled without
+    * CWATM_NATIVE=1 compiles for the instruction set of the host cpu (-march=native)
+    * if the compilation fails the precompiled library is used (optional extension)
+    """
+
+    def get_export_symbols(self, ext):
+        # plain C library, no Python module
+        return []
+
+    def build_extension(self, ext):
+        if self.compiler.compiler_type == 'msvc':
+            flags = ['/O2', '/fp:precise']
+            openmp = ['/openmp']
+            link_openmp = []
+        else:
+            # pow is called as in the precompiled library, not replaced by the compiler
+            flags = ['-O3', '-ffp-contract=off', '-fno-builtin-pow']
+            if os.environ.get('CWATM_NATIVE', '0') == '1':
+                flags.append('-march=native')
+            openmp = ['-fopenmp']
+            link_openmp = ['-fopenmp']
+
+        if os.environ.get('CWATM_OPENMP', '1') == '1':
+            ext.extra_compile_args = flags + openmp
+            ext.extra_link_args = link_openmp
+            try:
+                return build_ext.build_extension(self, ext)
+            except Exception:
+                print("Compiling the routing kernels with OpenMP failed, compiling without OpenMP")
+        ext.extra_compile_args = flags
+        ext.extra_link_args = []
+        build_ext.build_extension(self, ext)
+
+
 setup(
       name='CWatM',
       version=__version__,
@@ -39,7 +81,16 @@ setup(
                   'groundwater_modflow/mf6.exe',
             ],
       },
-      zip_safe=True,
+      ext_modules=[
+            Extension(
+                  'cwatm.hydrological_modules.routing_reservoirs.t5_build',
+                  sources=['cwatm/hydrological_modules/routing_reservoirs/t5.cpp'],
+                  language='c++',
+                  optional=True
+            )
+      ],
+      cmdclass={'build_ext': build_routing},
+      zip_safe=False,
       install_requires=[
             'numpy',
             'scipy',